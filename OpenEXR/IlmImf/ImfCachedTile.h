@@ -0,0 +1,92 @@
+//
+// SPDX-License-Identifier: BSD-3-Clause
+// Copyright Contributors to the OpenEXR Project.
+//
+
+#ifndef INCLUDED_IMF_CACHED_TILE_H
+#define INCLUDED_IMF_CACHED_TILE_H
+
+//-----------------------------------------------------------------------------
+//
+//	The tiles held by the process-wide tile cache (see ImfTileCache.h),
+//	and the lookups TiledInputFile makes in the cache.
+//
+//-----------------------------------------------------------------------------
+
+#include "ImfCompressor.h"
+#include "ImfNamespace.h"
+#include "ImfExport.h"
+
+#include <memory>
+#include <string>
+#include <vector>
+
+
+OPENEXR_IMF_INTERNAL_NAMESPACE_HEADER_ENTER
+
+//
+// The decompressed pixel data of a tile, in the format the
+// compressor produced it in.  A tile is not modified once it
+// is in the cache; a tile that is discarded from the cache
+// lives on until the readers still copying from it are done.
+//
+
+struct CachedTile
+{
+    std::vector<char>	data;
+    Compressor::Format	format;
+};
+
+
+//
+// Return a string that identifies the contents of the file with the
+// given name: its device, inode, size and modification time, so that
+// a file that is rewritten, or another file with the same name, does
+// not find the tiles of the old one.  Returns an empty string if the
+// file cannot be queried; such files are not cached.
+//
+
+IMF_EXPORT
+std::string
+tileCacheFileIdentity (const char fileName[]);
+
+
+//
+// Return the tile with the given file name and identity, part number,
+// level and tile coordinates, or a null pointer if the cache does not
+// hold it.  A cached tile that does not hold size bytes in a valid
+// format does not belong to the file; it is discarded and counted as
+// a miss.  Counts a hit or a miss.
+//
+
+IMF_EXPORT
+std::shared_ptr<const CachedTile>
+findCachedTile (const std::string &fileName,
+                const std::string &fileIdentity,
+                int partNumber,
+                int dx, int dy,
+                int lx, int ly,
+                size_t size);
+
+
+//
+// Add a copy of the size bytes of a tile at data to the cache,
+// discarding the least recently used tiles to make room for it.
+// Tiles larger than the cache are not added.
+//
+
+IMF_EXPORT
+void
+cacheTile (const std::string &fileName,
+           const std::string &fileIdentity,
+           int partNumber,
+           int dx, int dy,
+           int lx, int ly,
+           const char *data,
+           size_t size,
+           Compressor::Format format);
+
+
+OPENEXR_IMF_INTERNAL_NAMESPACE_HEADER_EXIT
+
+#endif
@@ -40,9 +40,12 @@
 #include "ImfDeepFrameBuffer.h"
 #include "ImfDeepCompositing.h"
 #include "ImfPixelType.h"
+#include "ImfDeepOver.h"
+#include "ImfThreading.h"
 #include "IlmThreadPool.h"
 
 #include <Iex.h>
+#include <algorithm>
 #include <vector>
 #include <stddef.h>
 OPENEXR_IMF_INTERNAL_NAMESPACE_SOURCE_ENTER
@@ -287,119 +290,176 @@ CompositeDeepScanLine::setFrameBuffer(const FrameBuffer& fr)
 
 namespace 
 {
-    
+
+//
+// Where to write the composited values of a channel of the frame buffer
+//
+
+struct OutputSlice
+{
+    char *              base;
+    PixelType           type;
+    size_t              xStride;
+    size_t              yStride;
+    int                 channel;        // in the composited pixel
+};
+
+
+//
+// The buffers a task uses for all the pixels it composites; they
+// grow to the largest number of samples of a pixel, and are not
+// allocated again for each pixel.
+//
+
+struct CompositeScratch
+{
+    vector<float>               outputs;
+    vector<const float *>       inputs;
+    vector<int>                 order;
+    vector<double>              weights;
+    vector<float>               gathered;
+};
+
+
+struct CompositeLines
+{
+    CompositeDeepScanLine::Data *        _Data;
+    int                                  start;
+    vector<const char *>                 names;
+    vector<OutputSlice>                  slices;
+    const vector<vector< vector<float *> > > * pointers;
+    const vector<unsigned int> *         total_sizes;
+    const vector<unsigned int> *         num_sources;
+};
+
+
 class LineCompositeTask : public Task
 {
   public:
 
-    LineCompositeTask ( TaskGroup* group ,
-                        CompositeDeepScanLine::Data * data,
-                    int y,
-                    int start,
-                    vector<const char*>* names,
-                    vector<vector< vector<float *> > >* pointers,
-                    vector<unsigned int>* total_sizes,
-                    vector<unsigned int>* num_sources
-                  ) : Task(group) ,
-                     _Data(data),
-                     _y(y),
-                     _start(start),
-                     _names(names),
-                     _pointers(pointers),
-                     _total_sizes(total_sizes),
-                     _num_sources(num_sources)
-                     {}
+    LineCompositeTask (TaskGroup* group,
+                       CompositeLines * lines,
+                       int y0,
+                       int y1)
+    :
+        Task(group),
+        _lines(lines),
+        _y0(y0),
+        _y1(y1)
+    {}
 
     virtual ~LineCompositeTask () {}
 
     virtual void                execute ();
-    CompositeDeepScanLine::Data*         _Data;
-    int                                  _y;
-    int                                  _start;
-    vector<const char *>*                _names;
-    vector<vector< vector<float *> > >*  _pointers;
-    vector<unsigned int>*                _total_sizes;
-    vector<unsigned int>*                _num_sources;
 
+  private:
+
+    void                        composite_line (int y);
+
+    CompositeLines *            _lines;
+    int                         _y0;
+    int                         _y1;
+    CompositeScratch            _scratch;
 };
 
 
 void
-composite_line(int y,
-               int start,
-               CompositeDeepScanLine::Data * _Data,
-               vector<const char *> & names,
-               const vector<vector< vector<float *> > >  & pointers,
-               const vector<unsigned int> & total_sizes,
-               const vector<unsigned int> & num_sources
-              )
+LineCompositeTask::composite_line (int y)
 {
-    vector<float> output_pixel(names.size());    //the pixel we'll output to
-    vector<const float *> inputs(names.size());
-    DeepCompositing d; // fallback compositing engine
-    DeepCompositing * comp= _Data->_comp ? _Data->_comp : &d;
+    CompositeLines & l = *_lines;
+    CompositeDeepScanLine::Data * _Data = l._Data;
+    size_t num_channels = l.names.size();
+
+    _scratch.outputs.resize(num_channels);
+    _scratch.inputs.resize(num_channels);
+
+    float * output_pixel = &_scratch.outputs[0];  //the pixel we'll output to
+    const float ** inputs = &_scratch.inputs[0];
 
-    int pixel = (y-start)*(_Data->_dataWindow.max.x+1-_Data->_dataWindow.min.x);
+    int pixel = (y-l.start)*(_Data->_dataWindow.max.x+1-_Data->_dataWindow.min.x);
     
      for(int x=_Data->_dataWindow.min.x;x<=_Data->_dataWindow.max.x;x++)
      {
-           // set inputs[] to point to the first sample of the first part of each channel
-           // if there's a zback, set all channel independently...
+          // set inputs[] to point to the first sample of the first part of each channel
+          // if there's no zback, set 0 and 1 to point to Z
 
-          if(_Data->_zback)
-          {
+          const vector< vector<float *> > & pointers = (*l.pointers)[0];
 
-              for(size_t channel=0;channel<names.size();channel++)
+          for(size_t channel=0;channel<num_channels;channel++)
+          {
+              if(channel==1 && !_Data->_zback)
               {
-                 inputs[channel]=pointers[0][channel][pixel];
+                  inputs[1]=inputs[0];
               }
+              else
+              {
+                  inputs[channel]=pointers[channel][pixel];
+              }
+          }
 
-          }else{
-
-              // otherwise, set 0 and 1 to point to Z
+          int num_samples = (*l.total_sizes)[pixel];
+          int sources = (*l.num_sources)[pixel];
 
+          if(_Data->_comp)
+          {
+              _Data->_comp->composite_pixel(output_pixel,
+                                            inputs,
+                                            &l.names[0],
+                                            num_channels,
+                                            num_samples,
+                                            sources);
+          }
+          else
+          {
+              //
+              // the default compositing, as in DeepCompositing,
+              // with the buffers of this task
+              //
 
-              inputs[0]=pointers[0][0][pixel];
-              inputs[1]=pointers[0][0][pixel];
-              for(size_t channel=2;channel<names.size();channel++)
+              if(_scratch.weights.size() < size_t(num_samples))
               {
-                  inputs[channel]=pointers[0][channel][pixel];
+                  _scratch.order.resize(num_samples);
+                  _scratch.weights.resize(num_samples);
+                  _scratch.gathered.resize(num_samples);
               }
 
-          }
-          comp->composite_pixel(&output_pixel[0],
-                                &inputs[0],
-                                &names[0],
-                                names.size(),
-                                total_sizes[pixel],
-                                num_sources[pixel]
-                               );
+              int * order = 0;
 
+              if(sources>1)
+              {
+                  order = &_scratch.order[0];
+                  for(int i=0;i<num_samples;i++) order[i]=i;
+                  sortDeepSamples(order,inputs,num_samples);
+              }
 
-           size_t channel_number=0;
+              compositeDeepSamplesOver(output_pixel,
+                                       inputs,
+                                       num_channels,
+                                       num_samples,
+                                       order,
+                                       num_samples ? &_scratch.weights[0] : 0,
+                                       num_samples ? &_scratch.gathered[0] : 0);
+          }
 
 
            //
            // write out composited value into internal frame buffer
            //
-           for(FrameBuffer::Iterator it = _Data->_outputFrameBuffer.begin();it !=_Data->_outputFrameBuffer.end();it++)
+           for(size_t i=0;i<l.slices.size();i++)
            {
-
-               float value = output_pixel[ _Data->_bufferMap[channel_number] ]; // value to write
-
+               const OutputSlice & slice = l.slices[i];
+               float value = output_pixel[slice.channel]; // value to write
+               char * base = slice.base + y*slice.yStride + x*slice.xStride;
 
                 // cast to half float if necessary
-               if(it.slice().type==OPENEXR_IMF_INTERNAL_NAMESPACE::FLOAT)
+               if(slice.type==OPENEXR_IMF_INTERNAL_NAMESPACE::FLOAT)
                {
-                   * (float *)(it.slice().base + y*it.slice().yStride + x*it.slice().xStride) = value;
+                   * (float *) base = value;
                }
-               else if(it.slice().type==HALF)
+               else if(slice.type==HALF)
                {
-                   * (half *)(it.slice().base + y*it.slice().yStride + x*it.slice().xStride) = half(value);
+                   * (half *) base = half(value);
                }
-
-               channel_number++;
-
            }
 
            pixel++;
@@ -409,7 +469,10 @@ composite_line(int y,
 
 void LineCompositeTask::execute()
 {
-  composite_line(_y,_start,_Data,*_names,*_pointers,*_total_sizes,*_num_sources);
+    for(int y=_y0;y<=_y1;y++)
+    {
+        composite_line(y);
+    }
 }
 
 
@@ -566,21 +629,50 @@ CompositeDeepScanLine::readPixels(int start, int end)
    
    // turn vector of strings into array of char *
    // and make sure 'ZBack' channel is correct
-   vector<const char *> names(_Data->_channels.size());
-   for(size_t i=0;i<names.size();i++)
+   CompositeLines lines;
+   lines._Data = _Data;
+   lines.start = start;
+   lines.pointers = &pointers;
+   lines.total_sizes = &total_sizes;
+   lines.num_sources = &num_sources;
+
+   lines.names.resize(_Data->_channels.size());
+   for(size_t i=0;i<lines.names.size();i++)
    {
-       names[i]=_Data->_channels[i].c_str();
+       lines.names[i]=_Data->_channels[i].c_str();
    }
    
-   if(!_Data->_zback) names[1]=names[0]; // no zback channel, so make it point to z
+   if(!_Data->_zback) lines.names[1]=lines.names[0]; // no zback channel, so make it point to z
+
+   size_t channel_number=0;
+   for(FrameBuffer::ConstIterator it = _Data->_outputFrameBuffer.begin();it !=_Data->_outputFrameBuffer.end();it++)
+   {
+       OutputSlice slice;
+       slice.base = it.slice().base;
+       slice.type = it.slice().type;
+       slice.xStride = it.slice().xStride;
+       slice.yStride = it.slice().yStride;
+       slice.channel = _Data->_bufferMap[channel_number];
+       lines.slices.push_back(slice);
+       channel_number++;
+   }
+
+   //
+   // split the lines into ranges, each composited by a task
+   // with its own buffers
+   //
+
+   int num_lines = end-start+1;
+   int num_tasks = std::max(1, std::min(num_lines, 4*globalThreadCount()));
 
-   
-   
    TaskGroup g;
-   for(int y=start;y<=end;y++)
+   for(int i=0;i<num_tasks;i++)
    {
-       ThreadPool::addGlobalTask(new LineCompositeTask(&g,_Data,y,start,&names,&pointers,&total_sizes,&num_sources));
-   }//next row
+       ThreadPool::addGlobalTask(new LineCompositeTask(&g,
+                                                       &lines,
+                                                       start+num_lines*i/num_tasks,
+                                                       start+num_lines*(i+1)/num_tasks-1));
+   }
 }  
 
 const FrameBuffer& 
@@ -32,6 +32,8 @@
 ///////////////////////////////////////////////////////////////////////////
 
 #include "ImfDeepCompositing.h"
+#include "ImfDeepOver.h"
+#include "ImfSimd.h"
 
 #include "ImfNamespace.h"
 #include <algorithm>
@@ -72,18 +74,16 @@ DeepCompositing::composite_pixel (float outputs[],
        sort(&sort_order[0],inputs,channel_names,num_channels,num_samples,sources);
    }
    
-   
-   for(int i=0;i<num_samples;i++)
-   {
-       int s=(sources>1) ? sort_order[i] : i;
-       float alpha=outputs[2]; 
-       if(alpha>=1.0) return;
-       
-       for(int c=0;c<num_channels;c++)
-       {
-           outputs[c]+=(1.0-alpha)*inputs[c][s];
-       }
-   }   
+   vector<double> weights(num_samples);
+   vector<float> gathered(sources>1 ? num_samples : 0);
+
+   compositeDeepSamplesOver(outputs,
+                            inputs,
+                            num_channels,
+                            num_samples,
+                            sources>1 ? &sort_order[0] : 0,
+                            &weights[0],
+                            sources>1 ? &gathered[0] : 0);
 }
 
 struct sort_helper
@@ -103,7 +103,109 @@ struct sort_helper
 void
 DeepCompositing::sort(int order[], const float* inputs[], const char* channel_names[], int num_channels, int num_samples, int sources)
 {
-  std::sort(order+0,order+num_samples,sort_helper(inputs));
+  sortDeepSamples(order,inputs,num_samples);
+}
+
+
+void
+sortDeepSamples (int order[], const float *inputs[], int num_samples)
+{
+    std::sort (order, order + num_samples, sort_helper (inputs));
+}
+
+
+namespace {
+
+double
+weightedSum (const double weights[], const float values[], int n)
+{
+    //
+    // The sum of weights[i] * values[i], accumulated in double
+    //
+
+    int i = 0;
+    double sum = 0;
+
+#ifdef IMF_HAVE_SSE2
+
+    __m128d sum0 = _mm_setzero_pd();
+    __m128d sum1 = _mm_setzero_pd();
+
+    for (; i + 4 <= n; i += 4)
+    {
+        __m128 v = _mm_loadu_ps (values + i);
+
+        sum0 = _mm_add_pd (sum0, _mm_mul_pd (_mm_loadu_pd (weights + i),
+                                             _mm_cvtps_pd (v)));
+
+        sum1 = _mm_add_pd (sum1, _mm_mul_pd (_mm_loadu_pd (weights + i + 2),
+                                             _mm_cvtps_pd (_mm_movehl_ps (v, v))));
+    }
+
+    double sums[2];
+    _mm_storeu_pd (sums, _mm_add_pd (sum0, sum1));
+    sum = sums[0] + sums[1];
+
+#endif
+
+    for (; i < n; ++i)
+        sum += weights[i] * values[i];
+
+    return sum;
+}
+
+} // namespace
+
+
+void
+compositeDeepSamplesOver (float outputs[],
+                          const float *inputs[],
+                          int num_channels,
+                          int num_samples,
+                          const int order[],
+                          double weights[],
+                          float gathered[])
+{
+    //
+    // Each sample contributes to the result with the weight 1 - alpha,
+    // where alpha is the composited alpha of the samples in front of
+    // it.  The weights depend only on the alpha channel; compute them
+    // first, then sum up each channel, weighted, in one pass.
+    //
+
+    const float *a = inputs[2];
+    float alpha = 0;
+    int n = 0;
+
+    for (; n < num_samples && alpha < 1.0; ++n)
+    {
+        double w = 1.0 - alpha;
+        weights[n] = w;
+        alpha += w * a[order ? order[n] : n];
+    }
+
+    for (int c = 0; c < num_channels; ++c)
+    {
+        if (c == 2)
+        {
+            outputs[c] = alpha;
+        }
+        else if (c == 1 && inputs[1] == inputs[0])
+        {
+            outputs[c] = outputs[0];
+        }
+        else if (order)
+        {
+            for (int i = 0; i < n; ++i)
+                gathered[i] = inputs[c][order[i]];
+
+            outputs[c] = weightedSum (weights, gathered, n);
+        }
+        else
+        {
+            outputs[c] = weightedSum (weights, inputs[c], n);
+        }
+    }
 }
 
 
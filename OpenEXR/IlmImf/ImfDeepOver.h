@@ -0,0 +1,56 @@
+//
+// SPDX-License-Identifier: BSD-3-Clause
+// Copyright Contributors to the OpenEXR Project.
+//
+
+#ifndef INCLUDED_IMF_DEEP_OVER_H
+#define INCLUDED_IMF_DEEP_OVER_H
+
+//-----------------------------------------------------------------------------
+//
+//	The default sorting and compositing of deep samples, shared by
+//	DeepCompositing and by the compositing engine of
+//	CompositeDeepScanLine, which calls them with buffers it reuses
+//	for all the pixels instead of allocating them for each pixel.
+//
+//	The channels of the samples are laid out as for
+//	DeepCompositing::composite_pixel(): Z, ZBack (or Z again), A,
+//	then the other channels.
+//
+//-----------------------------------------------------------------------------
+
+#include "ImfNamespace.h"
+
+
+OPENEXR_IMF_INTERNAL_NAMESPACE_HEADER_ENTER
+
+//
+// Sort order[0] ... order[num_samples-1], the indices of the
+// samples, from front to back by Z, then ZBack, then index.
+//
+
+void	sortDeepSamples (int order[],
+			 const float *inputs[],
+			 int num_samples);
+
+
+//
+// Composite the samples front to back with the over operator,
+// stopping at the first sample that the samples in front of it
+// make fully opaque.  The samples are taken in the given order,
+// or in storage order if order is null.  weights and gathered
+// are buffers of num_samples elements.
+//
+
+void	compositeDeepSamplesOver (float outputs[],
+				  const float *inputs[],
+				  int num_channels,
+				  int num_samples,
+				  const int order[],
+				  double weights[],
+				  float gathered[]);
+
+
+OPENEXR_IMF_INTERNAL_NAMESPACE_HEADER_EXIT
+
+#endif
@@ -42,7 +42,7 @@
 #include <ImfDeepScanLineInputFile.h>
 #include <ImfChannelList.h>
 #include <ImfMisc.h>
-#include <ImfStdIO.h>
+#include <ImfMMapIO.h>
 #include <ImfCompressor.h>
 #include <ImfXdr.h>
 #include <ImfConvert.h>
@@ -961,7 +961,7 @@ DeepScanLineInputFile::DeepScanLineInputFile
 
     try
     {
-        is = new StdIFStream (fileName);
+        is = openInputStream (fileName);
         readMagicNumberAndVersionField(*is, _data->version);
         //
         // Backward compatibility to read multpart file.
@@ -43,7 +43,7 @@
 #include <ImfChannelList.h>
 #include <ImfMisc.h>
 #include <ImfTiledMisc.h>
-#include <ImfStdIO.h>
+#include <ImfMMapIO.h>
 #include <ImfCompressor.h>
 #include "ImathBox.h"
 #include <ImfXdr.h>
@@ -772,7 +772,7 @@ DeepTiledInputFile::DeepTiledInputFile (const char fileName[], int numThreads):
     IStream* is = 0;
     try
     {
-        is = new StdIFStream (fileName);
+        is = openInputStream (fileName);
         readMagicNumberAndVersionField(*is, _data->version);
 
         //
@@ -786,6 +786,7 @@ DeepTiledInputFile::DeepTiledInputFile (const char fileName[], int numThreads):
         {
             _data->_streamData = new InputStreamMutex();
             _data->_streamData->is = is;
+            _data->memoryMapped = is->isMemoryMapped();
             _data->header.readFrom (*_data->_streamData->is, _data->version);
             initialize();
             _data->tileOffsets.readFrom (*(_data->_streamData->is), _data->fileIsComplete,false,true);
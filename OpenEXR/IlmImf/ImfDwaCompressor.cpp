@@ -124,6 +124,11 @@
 // When dealing with FLOAT source buffers, we first quantize the source
 // to HALF and continue down as we would for HALF source.
 //
+// The 8x8 blocks are encoded independently, so a chunk's rows of
+// blocks are shared among any idle threads of the global thread pool.
+// The AC components of each row are gathered in order afterwards, and
+// the output does not depend on the number of threads.
+//
 //---------------------------------------------------
 
 
@@ -144,6 +149,9 @@
 #include "ImfSystemSpecific.h"
 #include "ImfXdr.h"
 #include "ImfZip.h"
+#include "ImfThreading.h"
+#include "IlmThreadPool.h"
+#include "IlmThreadSemaphore.h"
 
 #include "ImathFun.h"
 #include "ImathBox.h"
@@ -157,6 +165,9 @@
 #include <cassert>
 #include <algorithm>
 #include <limits>
+#include <atomic>
+#include <memory>
+#include <exception>
 
 #include <cstddef>
 
@@ -175,6 +186,11 @@ OPENEXR_IMF_INTERNAL_NAMESPACE_SOURCE_ENTER
 
 #include "dwaLookups.h"
 
+using ILMTHREAD_NAMESPACE::Semaphore;
+using ILMTHREAD_NAMESPACE::Task;
+using ILMTHREAD_NAMESPACE::TaskGroup;
+using ILMTHREAD_NAMESPACE::ThreadPool;
+
 namespace {
 
     //
@@ -205,6 +221,129 @@ namespace {
     void (*dctInverse8x8_5)(float*) = dctInverse8x8_scalar<5>;
     void (*dctInverse8x8_6)(float*) = dctInverse8x8_scalar<6>;
     void (*dctInverse8x8_7)(float*) = dctInverse8x8_scalar<7>;
+
+    //
+    // Function pointer for dispatching the forward DCT
+    //
+
+    void (*dctForward)(float*) = dctForward8x8;
+
+
+    //
+    // A set of independent jobs, numbered from 0, run by run() on the
+    // calling thread and on the idle threads of the global thread pool.
+    // The calling thread takes jobs like the others and, once none are
+    // left, waits only for the jobs other threads have started. Tasks
+    // that start late find nothing to do, so a chunk compressed by a
+    // thread of the pool never waits for tasks queued behind it.
+    //
+
+    class ParallelJobs
+    {
+      public:
+
+        virtual ~ParallelJobs () {}
+
+        virtual void runJob (int job) = 0;
+
+        void run (int numJobs);
+    };
+
+
+    struct JobQueue
+    {
+        std::atomic<int>    nextJob;
+        int                 numJobs;
+        ParallelJobs       *jobs;       // valid while jobs are left
+        Semaphore           jobDone;
+        std::atomic<bool>   failed;
+        std::exception_ptr  error;
+
+        JobQueue (ParallelJobs *jobs, int numJobs):
+            nextJob (0), numJobs (numJobs), jobs (jobs),
+            jobDone (0), failed (false) {}
+
+        //
+        // Run jobs until none are left, returning how many were run.
+        // Errors are saved for run() to rethrow, after the jobs
+        // started by other threads are done.
+        //
+
+        int
+        runJobs (bool postDone)
+        {
+            int n = 0;
+
+            for (int job = nextJob++; job < numJobs; job = nextJob++, ++n)
+            {
+                if (!failed)
+                {
+                    try
+                    {
+                        jobs->runJob (job);
+                    }
+                    catch (...)
+                    {
+                        if (!failed.exchange (true))
+                            error = std::current_exception();
+                    }
+                }
+
+                if (postDone)
+                    jobDone.post();
+            }
+
+            return n;
+        }
+    };
+
+
+    class JobTask: public Task
+    {
+      public:
+
+        JobTask (TaskGroup *group, const std::shared_ptr<JobQueue> &queue):
+            Task (group), _queue (queue) {}
+
+        virtual void execute () {_queue->runJobs (true);}
+
+      private:
+
+        std::shared_ptr<JobQueue> _queue;
+    };
+
+
+    //
+    // The job tasks are never waited for as a group, but they need one
+    // that outlives them. The global thread pool is created first, so
+    // that it is destroyed after the group.
+    //
+
+    TaskGroup &
+    jobTaskGroup ()
+    {
+        ThreadPool::globalThreadPool();
+        static TaskGroup group;
+        return group;
+    }
+
+
+    void
+    ParallelJobs::run (int numJobs)
+    {
+        std::shared_ptr<JobQueue> queue (new JobQueue (this, numJobs));
+
+        int numTasks = std::min (globalThreadCount(), numJobs - 1);
+
+        for (int i = 0; i < numTasks; ++i)
+            ThreadPool::addGlobalTask (new JobTask (&jobTaskGroup(), queue));
+
+        for (int n = queue->runJobs (false); n < numJobs; ++n)
+            queue->jobDone.wait();
+
+        if (queue->failed)
+            std::rethrow_exception (queue->error);
+    }
     
 } // namespace
 
@@ -560,6 +699,10 @@ class DwaCompressor::LossyDctEncoderBase
 
   protected:
 
+    struct BlockRowJobs;
+
+    void    encodeBlockRow (int blocky, std::vector<unsigned short> &acComp);
+
     void    toZigZag (half *dst, half *src);
     int     countSetBits (unsigned short src);
     half    quantize (half src, float errorTolerance);
@@ -576,7 +719,6 @@ class DwaCompressor::LossyDctEncoderBase
 
     std::vector< std::vector<const char *> > _rowPtrs;
     std::vector<PixelType>                   _type;
-    std::vector<SimdAlignedBuffer64f>        _dctData;
 
 
     //
@@ -598,6 +740,14 @@ class DwaCompressor::LossyDctEncoderBase
 
     float                      _quantTableY[64];
     float                      _quantTableCbCr[64];
+
+    //
+    // The quantization tables scaled by _quantBaseError, giving
+    // the acceptable error for each component
+    //
+
+    float                      _quantErrorY[64];
+    float                      _quantErrorCbCr[64];
 };
 
 
@@ -1334,6 +1484,9 @@ DwaCompressor::LossyDctEncoderBase::LossyDctEncoderBase
 
         _quantTableCbCr[idx] = static_cast<float> (jpegQuantTableCbCr[idx]) /
                                static_cast<float> (jpegQuantTableCbCrMin);
+
+        _quantErrorY[idx]    = _quantBaseError * _quantTableY[idx];
+        _quantErrorCbCr[idx] = _quantBaseError * _quantTableCbCr[idx];
     }
     
     if (_quantBaseError < 0)
@@ -1346,6 +1499,26 @@ DwaCompressor::LossyDctEncoderBase::~LossyDctEncoderBase ()
 }
 
 
+//
+// The rows of blocks of a chunk, as jobs for ParallelJobs
+//
+
+struct DwaCompressor::LossyDctEncoderBase::BlockRowJobs: public ParallelJobs
+{
+    LossyDctEncoderBase                        *encoder;
+    std::vector< std::vector<unsigned short> >  acComp;
+
+    BlockRowJobs (LossyDctEncoderBase *encoder, int numBlocksY):
+        encoder (encoder), acComp (numBlocksY) {}
+
+    virtual void
+    runJob (int blocky)
+    {
+        encoder->encodeBlockRow (blocky, acComp[blocky]);
+    }
+};
+
+
 //
 // Given three channels of source data, encoding by first applying
 // a color space conversion to a YCbCr space.  Otherwise, if we only
@@ -1361,13 +1534,6 @@ DwaCompressor::LossyDctEncoderBase::execute ()
     int  numBlocksX   = (int)ceil ((float)_width / 8.0f);
     int  numBlocksY   = (int)ceil ((float)_height/ 8.0f);
 
-    half halfZigCoef[64]; 
-    half halfCoef[64];
-
-    std::vector<unsigned short *> currDcComp (_rowPtrs.size());
-    unsigned short               *currAcComp = (unsigned short *)_packedAc;
-
-    _dctData.resize (_rowPtrs.size());
     _numAcComp = 0;
     _numDcComp = 0;
  
@@ -1435,151 +1601,203 @@ DwaCompressor::LossyDctEncoderBase::execute ()
     }
 
     //
-    // Pack DC components together by common plane, so we can get 
-    // a little more out of differencing them. We'll always have 
-    // one component per block, so we can computed offsets.
+    // Encode the rows of blocks, in parallel if there are idle
+    // threads. Each row packs its AC components on its own, and
+    // they are gathered in order, so the output does not depend
+    // on how the rows were shared among the threads.
     //
 
-    currDcComp[0] = (unsigned short *)_packedDc;
+    BlockRowJobs rows (this, numBlocksY);
+    rows.run (numBlocksY);
 
-    for (unsigned int chan = 1; chan < _rowPtrs.size(); ++chan)
-        currDcComp[chan] = currDcComp[chan-1] + numBlocksX * numBlocksY;
+    unsigned short *currAcComp = (unsigned short *)_packedAc;
 
     for (int blocky = 0; blocky < numBlocksY; ++blocky)
     {
-        for (int blockx = 0; blockx < numBlocksX; ++blockx)
-        {
-            half           h;
-            unsigned short tmpShortXdr, tmpShortNative;
-            char          *tmpCharPtr;
+        const std::vector<unsigned short> &acComp = rows.acComp[blocky];
 
-            for (unsigned int chan = 0; chan < _rowPtrs.size(); ++chan)
-            {
-                //
-                // Break the source into 8x8 blocks. If we don't
-                // fit at the edges, mirror.
-                //
-                // Also, convert from linear to nonlinear representation.
-                // Our source is assumed to be XDR, and we need to convert
-                // to NATIVE prior to converting to float.
-                //
-                // If we're converting linear -> nonlinear, assume that the
-                // XDR -> NATIVE conversion is built into the lookup. Otherwise,
-                // we'll need to explicitly do it.
-                //
+        if (acComp.empty())
+            continue;
 
-                for (int y = 0; y < 8; ++y)
-                {
-                    for (int x = 0; x < 8; ++x)
-                    {
-                        int vx = 8 * blockx + x;
-                        int vy = 8 * blocky + y;
+        memcpy (currAcComp, &acComp[0],
+                acComp.size() * sizeof (unsigned short));
+
+        currAcComp += acComp.size();
+        _numAcComp += (int)acComp.size();
+    }
 
-                        if (vx >= _width)
-                            vx = _width - (vx - (_width - 1));
-                        
-                        if (vx < 0) vx = _width-1;
+    _numDcComp = numBlocksX * numBlocksY * (int)_rowPtrs.size();
+}
 
-                        if (vy >=_height)
-                            vy = _height - (vy - (_height - 1));
 
-                        if (vy < 0) vy = _height-1;
-                    
-                        tmpShortXdr =
-                            ((const unsigned short *)(_rowPtrs[chan])[vy])[vx];
+//
+// Encode one row of 8x8 blocks. The DC components go straight to
+// their place in _packedDc, one per block and channel, and the RLE'd
+// AC components to acComp. This only reads the encoder's state, so
+// several rows can be encoded at the same time.
+//
 
-                        if (_toNonlinear)
-                        {
-                            h.setBits (_toNonlinear[tmpShortXdr]);
-                        }
-                        else
-                        {
-                            const char *tmpConstCharPtr =
-                                (const char *)(&tmpShortXdr);
+void
+DwaCompressor::LossyDctEncoderBase::encodeBlockRow
+    (int blocky,
+     std::vector<unsigned short> &acComp)
+{
+    int  numBlocksX   = (int)ceil ((float)_width / 8.0f);
+    int  numBlocksY   = (int)ceil ((float)_height/ 8.0f);
 
-                            Xdr::read<CharPtrIO>
-                                (tmpConstCharPtr, tmpShortNative);
+    half halfZigCoef[64];
+    half halfCoef[64];
 
-                            h.setBits(tmpShortNative);
-                        }
+    std::vector<SimdAlignedBuffer64f> dctData (_rowPtrs.size());
+    SimdAlignedBuffer64us             halfBits;
+
+    //
+    // Pack DC components together by common plane, so we can get
+    // a little more out of differencing them. We'll always have
+    // one component per block, so we can computed offsets.
+    //
+
+    std::vector<unsigned short *> currDcComp (_rowPtrs.size());
+
+    for (unsigned int chan = 0; chan < _rowPtrs.size(); ++chan)
+    {
+        currDcComp[chan] = (unsigned short *)_packedDc +
+                           (chan * numBlocksY + blocky) * numBlocksX;
+    }
+
+    //
+    // There are at most 63 AC components per block
+    //
+
+    acComp.resize (numBlocksX * _rowPtrs.size() * 63);
 
-                        _dctData[chan]._buffer[y * 8 + x] = (float)h;
-                    } // x
-                } // y
-            } // chan
+    unsigned short *currAcComp = &acComp[0];
+
+    for (int blockx = 0; blockx < numBlocksX; ++blockx)
+    {
+        half           h;
+        unsigned short tmpShortXdr, tmpShortNative;
+        char          *tmpCharPtr;
 
+        for (unsigned int chan = 0; chan < _rowPtrs.size(); ++chan)
+        {
+            //
+            // Break the source into 8x8 blocks. If we don't
+            // fit at the edges, mirror.
+            //
+            // Also, convert from linear to nonlinear representation.
+            // Our source is assumed to be XDR, and we need to convert
+            // to NATIVE prior to converting to float.
             //
-            // Color space conversion
+            // If we're converting linear -> nonlinear, assume that the
+            // XDR -> NATIVE conversion is built into the lookup. Otherwise,
+            // we'll need to explicitly do it.
             //
 
-            if (_rowPtrs.size() == 3)
+            for (int y = 0; y < 8; ++y)
             {
-                csc709Forward64 (_dctData[0]._buffer, 
-                                 _dctData[1]._buffer, 
-                                 _dctData[2]._buffer);
-            }
+                for (int x = 0; x < 8; ++x)
+                {
+                    int vx = 8 * blockx + x;
+                    int vy = 8 * blocky + y;
 
-            for (unsigned int chan = 0; chan < _rowPtrs.size(); ++chan)
-            {
-                //
-                // Forward DCT
-                //
+                    if (vx >= _width)
+                        vx = _width - (vx - (_width - 1));
 
-                dctForward8x8(_dctData[chan]._buffer);
+                    if (vx < 0) vx = _width-1;
 
-                //
-                // Quantize to half, and zigzag
-                //
+                    if (vy >=_height)
+                        vy = _height - (vy - (_height - 1));
 
-                if (chan == 0)
-                {
-                    for (int i = 0; i < 64; ++i)
+                    if (vy < 0) vy = _height-1;
+
+                    tmpShortXdr =
+                        ((const unsigned short *)(_rowPtrs[chan])[vy])[vx];
+
+                    if (_toNonlinear)
                     {
-                        halfCoef[i] =
-                            quantize ((half)_dctData[chan]._buffer[i],
-                                      _quantBaseError*_quantTableY[i]);
+                        h.setBits (_toNonlinear[tmpShortXdr]);
                     }
-                }
-                else
-                {
-                    for (int i = 0; i < 64; ++i)
+                    else
                     {
-                        halfCoef[i] =
-                            quantize ((half)_dctData[chan]._buffer[i],
-                                      _quantBaseError*_quantTableCbCr[i]);
+                        const char *tmpConstCharPtr =
+                            (const char *)(&tmpShortXdr);
+
+                        Xdr::read<CharPtrIO>
+                            (tmpConstCharPtr, tmpShortNative);
+
+                        h.setBits(tmpShortNative);
                     }
-                }
 
-                toZigZag (halfZigCoef, halfCoef);
-                
-                //
-                // Convert from NATIVE back to XDR, before we write out
-                //
+                    dctData[chan]._buffer[y * 8 + x] = (float)h;
+                } // x
+            } // y
+        } // chan
 
-                for (int i = 0; i < 64; ++i)
-                {
-                    tmpCharPtr = (char *)&tmpShortXdr;
-                    Xdr::write<CharPtrIO>(tmpCharPtr, halfZigCoef[i].bits());
-                    halfZigCoef[i].setBits(tmpShortXdr);
-                }
+        //
+        // Color space conversion
+        //
 
-                //
-                // Save the DC component separately, to be compressed on
-                // its own.
-                //
+        if (_rowPtrs.size() == 3)
+        {
+            csc709Forward64 (dctData[0]._buffer,
+                             dctData[1]._buffer,
+                             dctData[2]._buffer);
+        }
 
-                *currDcComp[chan]++ = halfZigCoef[0].bits();
-                _numDcComp++;
-                
-                //
-                // Then RLE the AC components (which will record the count
-                // of the resulting number of items)
-                //
+        for (unsigned int chan = 0; chan < _rowPtrs.size(); ++chan)
+        {
+            //
+            // Forward DCT
+            //
 
-                rleAc (halfZigCoef, currAcComp);
-            } // chan
-        } // blockx
-    } // blocky              
+            dctForward (dctData[chan]._buffer);
+
+            //
+            // Drop the whole block to half at once, then quantize,
+            // and zigzag
+            //
+
+            convertFloatToHalf64 (halfBits._buffer, dctData[chan]._buffer);
+
+            const float *quantError =
+                (chan == 0)? _quantErrorY: _quantErrorCbCr;
+
+            for (int i = 0; i < 64; ++i)
+            {
+                halfCoef[i].setBits (halfBits._buffer[i]);
+                halfCoef[i] = quantize (halfCoef[i], quantError[i]);
+            }
+
+            toZigZag (halfZigCoef, halfCoef);
+
+            //
+            // Convert from NATIVE back to XDR, before we write out
+            //
+
+            for (int i = 0; i < 64; ++i)
+            {
+                tmpCharPtr = (char *)&tmpShortXdr;
+                Xdr::write<CharPtrIO>(tmpCharPtr, halfZigCoef[i].bits());
+                halfZigCoef[i].setBits(tmpShortXdr);
+            }
+
+            //
+            // Save the DC component separately, to be compressed on
+            // its own.
+            //
+
+            *currDcComp[chan]++ = halfZigCoef[0].bits();
+
+            //
+            // Then RLE the AC components
+            //
+
+            rleAc (halfZigCoef, currAcComp);
+        } // chan
+    } // blockx
+
+    acComp.resize (currAcComp - &acComp[0]);
 }
 
 
@@ -1699,9 +1917,8 @@ DwaCompressor::LossyDctEncoderBase::quantize (half src, float errorTolerance)
 // of 3 0's, starting at the current location.
 //
 // block is our block of 64 coefficients
-// acPtr a pointer to back the RLE'd values into.
-//
-// This will advance the counter, _numAcComp.
+// acPtr a pointer to back the RLE'd values into, which is advanced
+// past them.
 //
 
 void
@@ -1723,7 +1940,6 @@ DwaCompressor::LossyDctEncoderBase::rleAc
         if (block[dctComp].bits() != rleSymbol)
         {
             *acPtr++ =  block[dctComp].bits();
-            _numAcComp++;
 
             dctComp += runLen;
             continue;
@@ -1753,7 +1969,6 @@ DwaCompressor::LossyDctEncoderBase::rleAc
         {
             runLen           = 1;
             *acPtr++ = block[dctComp].bits();
-            _numAcComp++;
 
             //
             // Using 0xff00 for "end of block"
@@ -1766,7 +1981,6 @@ DwaCompressor::LossyDctEncoderBase::rleAc
             //
 
             *acPtr++ = 0xff00;
-            _numAcComp++;
         }
         else
         {
@@ -1775,7 +1989,6 @@ DwaCompressor::LossyDctEncoderBase::rleAc
             //
 
             *acPtr++   = 0xff00 | runLen;
-            _numAcComp++;
         }
 
         //
@@ -2886,6 +3099,15 @@ DwaCompressor::initializeFuncs()
         fromHalfZigZag       = fromHalfZigZag_f16c;
     } 
 
+    //
+    // Setup the forward DCT implementation
+    //
+
+    dctForward = dctForward8x8;
+
+    if (cpuId.avx)
+        dctForward = dctForward8x8_avx;
+
     //
     // Setup inverse DCT implementations
     //
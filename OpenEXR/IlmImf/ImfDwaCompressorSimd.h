@@ -2152,6 +2152,190 @@ dctForward8x8 (float *data)
 
 #endif /* IMF_HAVE_SSE2 */
 
+
+//
+// AVX implementation of the forward DCT
+//
+// This does the same arithmetic as the SSE2 version, in the same
+// order, but on all 8 columns at once, so the results are bit-exact
+// with it. Each pass runs the 1D DCT down the columns, writing the
+// results back in place, and then transposes the block with an
+// 8x8 shuffle. Two passes gives us the rows and the columns.
+//
+
+#define FDCT_AVX_PASS                                                         \
+    /* Load the rows of the block                                  */        \
+    "vmovaps      (%0), %%ymm0                                  \n"          \
+    "vmovaps    32(%0), %%ymm1                                  \n"          \
+    "vmovaps    64(%0), %%ymm2                                  \n"          \
+    "vmovaps    96(%0), %%ymm3                                  \n"          \
+    "vmovaps   128(%0), %%ymm4                                  \n"          \
+    "vmovaps   160(%0), %%ymm5                                  \n"          \
+    "vmovaps   192(%0), %%ymm6                                  \n"          \
+    "vmovaps   224(%0), %%ymm7                                  \n"          \
+                                                                              \
+    /* a0 = y8,  a1 = y9,  a2 = y1,  a3 = y10                      */        \
+    /* a4 = y3,  a5 = y11, a6 = y5,  a7 = y0                       */        \
+    "vaddps    %%ymm7, %%ymm0, %%ymm8                           \n"          \
+    "vsubps    %%ymm7, %%ymm0, %%ymm0                           \n"          \
+    "vaddps    %%ymm2, %%ymm1, %%ymm9                           \n"          \
+    "vsubps    %%ymm2, %%ymm1, %%ymm1                           \n"          \
+    "vaddps    %%ymm4, %%ymm3, %%ymm10                          \n"          \
+    "vsubps    %%ymm4, %%ymm3, %%ymm3                           \n"          \
+    "vaddps    %%ymm6, %%ymm5, %%ymm11                          \n"          \
+    "vsubps    %%ymm6, %%ymm5, %%ymm5                           \n"          \
+                                                                              \
+    /* First stage; compute out_0 and out_4                        */        \
+    "vaddps   %%ymm10, %%ymm8, %%ymm12                          \n"          \
+    "vaddps   %%ymm11, %%ymm9, %%ymm13                          \n"          \
+    "vmulps       (%1), %%ymm12, %%ymm12                        \n"          \
+    "vmulps       (%1), %%ymm13, %%ymm13                        \n"          \
+    "vaddps   %%ymm13, %%ymm12, %%ymm14                         \n"          \
+    "vmulps    256(%1), %%ymm14, %%ymm14                        \n"          \
+    "vmovaps  %%ymm14,    (%0)                                  \n"          \
+    "vsubps   %%ymm13, %%ymm12, %%ymm14                         \n"          \
+    "vmulps    256(%1), %%ymm14, %%ymm14                        \n"          \
+    "vmovaps  %%ymm14, 128(%0)                                  \n"          \
+                                                                              \
+    /* Second stage; compute out_2 and out_6                       */        \
+    "vsubps    %%ymm5, %%ymm1, %%ymm12                          \n"          \
+    "vsubps   %%ymm10, %%ymm8, %%ymm13                          \n"          \
+    "vmulps    192(%1), %%ymm12, %%ymm14                        \n"          \
+    "vmulps     96(%1), %%ymm13, %%ymm15                        \n"          \
+    "vaddps   %%ymm15, %%ymm14, %%ymm14                         \n"          \
+    "vmovaps  %%ymm14,  64(%0)                                  \n"          \
+    "vmulps    192(%1), %%ymm13, %%ymm14                        \n"          \
+    "vmulps     96(%1), %%ymm12, %%ymm15                        \n"          \
+    "vsubps   %%ymm15, %%ymm14, %%ymm14                         \n"          \
+    "vmovaps  %%ymm14, 192(%0)                                  \n"          \
+                                                                              \
+    /* K0 = y12 and K1 = y13, for the remaining stages             */        \
+    "vsubps   %%ymm11, %%ymm9, %%ymm12                          \n"          \
+    "vmulps       (%1), %%ymm12, %%ymm12                        \n"          \
+    "vaddps    %%ymm5, %%ymm1, %%ymm13                          \n"          \
+    "vmulps     32(%1), %%ymm13, %%ymm13                        \n"          \
+                                                                              \
+    /* Third stage; compute out_3 and out_5                        */        \
+    "vsubps   %%ymm12, %%ymm0, %%ymm14                          \n"          \
+    "vaddps   %%ymm13, %%ymm3, %%ymm15                          \n"          \
+    "vmulps    128(%1), %%ymm14, %%ymm2                         \n"          \
+    "vmulps    160(%1), %%ymm15, %%ymm4                         \n"          \
+    "vsubps    %%ymm4, %%ymm2, %%ymm2                           \n"          \
+    "vmovaps   %%ymm2,  96(%0)                                  \n"          \
+    "vmulps    160(%1), %%ymm14, %%ymm2                         \n"          \
+    "vmulps    128(%1), %%ymm15, %%ymm4                         \n"          \
+    "vaddps    %%ymm4, %%ymm2, %%ymm2                           \n"          \
+    "vmovaps   %%ymm2, 160(%0)                                  \n"          \
+                                                                              \
+    /* Fourth stage; compute out_1 and out_7                       */        \
+    "vaddps   %%ymm12, %%ymm0, %%ymm14                          \n"          \
+    "vsubps    %%ymm3, %%ymm13, %%ymm15                         \n"          \
+    "vmulps     64(%1), %%ymm14, %%ymm2                         \n"          \
+    "vmulps    224(%1), %%ymm15, %%ymm4                         \n"          \
+    "vsubps    %%ymm4, %%ymm2, %%ymm2                           \n"          \
+    "vmovaps   %%ymm2,  32(%0)                                  \n"          \
+    "vmulps    224(%1), %%ymm14, %%ymm2                         \n"          \
+    "vmulps     64(%1), %%ymm15, %%ymm4                         \n"          \
+    "vaddps    %%ymm4, %%ymm2, %%ymm2                           \n"          \
+    "vmovaps   %%ymm2, 224(%0)                                  \n"          \
+                                                                              \
+    /* Transpose; first interleave pairs of rows                   */        \
+    "vmovaps      (%0), %%ymm0                                  \n"          \
+    "vmovaps    32(%0), %%ymm1                                  \n"          \
+    "vmovaps    64(%0), %%ymm2                                  \n"          \
+    "vmovaps    96(%0), %%ymm3                                  \n"          \
+    "vmovaps   128(%0), %%ymm4                                  \n"          \
+    "vmovaps   160(%0), %%ymm5                                  \n"          \
+    "vmovaps   192(%0), %%ymm6                                  \n"          \
+    "vmovaps   224(%0), %%ymm7                                  \n"          \
+    "vunpcklps %%ymm1, %%ymm0, %%ymm8                           \n"          \
+    "vunpckhps %%ymm1, %%ymm0, %%ymm9                           \n"          \
+    "vunpcklps %%ymm3, %%ymm2, %%ymm10                          \n"          \
+    "vunpckhps %%ymm3, %%ymm2, %%ymm11                          \n"          \
+    "vunpcklps %%ymm5, %%ymm4, %%ymm12                          \n"          \
+    "vunpckhps %%ymm5, %%ymm4, %%ymm13                          \n"          \
+    "vunpcklps %%ymm7, %%ymm6, %%ymm14                          \n"          \
+    "vunpckhps %%ymm7, %%ymm6, %%ymm15                          \n"          \
+                                                                              \
+    /* Then gather the columns, 4 rows at a time...                */        \
+    "vshufps $0x44, %%ymm10, %%ymm8,  %%ymm0                    \n"          \
+    "vshufps $0xee, %%ymm10, %%ymm8,  %%ymm1                    \n"          \
+    "vshufps $0x44, %%ymm11, %%ymm9,  %%ymm2                    \n"          \
+    "vshufps $0xee, %%ymm11, %%ymm9,  %%ymm3                    \n"          \
+    "vshufps $0x44, %%ymm14, %%ymm12, %%ymm4                    \n"          \
+    "vshufps $0xee, %%ymm14, %%ymm12, %%ymm5                    \n"          \
+    "vshufps $0x44, %%ymm15, %%ymm13, %%ymm6                    \n"          \
+    "vshufps $0xee, %%ymm15, %%ymm13, %%ymm7                    \n"          \
+                                                                              \
+    /* ...and swap the 128-bit halves into place                   */        \
+    "vperm2f128 $0x20, %%ymm4, %%ymm0, %%ymm8                   \n"          \
+    "vperm2f128 $0x20, %%ymm5, %%ymm1, %%ymm9                   \n"          \
+    "vperm2f128 $0x20, %%ymm6, %%ymm2, %%ymm10                  \n"          \
+    "vperm2f128 $0x20, %%ymm7, %%ymm3, %%ymm11                  \n"          \
+    "vperm2f128 $0x31, %%ymm4, %%ymm0, %%ymm12                  \n"          \
+    "vperm2f128 $0x31, %%ymm5, %%ymm1, %%ymm13                  \n"          \
+    "vperm2f128 $0x31, %%ymm6, %%ymm2, %%ymm14                  \n"          \
+    "vperm2f128 $0x31, %%ymm7, %%ymm3, %%ymm15                  \n"          \
+    "vmovaps  %%ymm8,     (%0)                                  \n"          \
+    "vmovaps  %%ymm9,   32(%0)                                  \n"          \
+    "vmovaps  %%ymm10,  64(%0)                                  \n"          \
+    "vmovaps  %%ymm11,  96(%0)                                  \n"          \
+    "vmovaps  %%ymm12, 128(%0)                                  \n"          \
+    "vmovaps  %%ymm13, 160(%0)                                  \n"          \
+    "vmovaps  %%ymm14, 192(%0)                                  \n"          \
+    "vmovaps  %%ymm15, 224(%0)                                  \n"
+
+void
+dctForward8x8_avx (float *data)
+{
+    #if defined IMF_HAVE_GCC_INLINEASM_X86_64
+
+    //
+    // Each constant is repeated across a full register:
+    //
+    //     0: c4        1: -c4       2: c1 / 2    3: c2 / 2
+    //     4: c3 / 2    5: c5 / 2    6: c6 / 2    7: c7 / 2
+    //     8: 1 / 2
+    //
+
+    #define FDCT_AVX_COEF(_X) _X, _X, _X, _X, _X, _X, _X, _X
+
+    static const float sAvxCoef[72]  __attribute__((aligned(32))) = {
+        FDCT_AVX_COEF ( .70710678f),
+        FDCT_AVX_COEF (-.70710678f),
+        FDCT_AVX_COEF ( .490392640f),
+        FDCT_AVX_COEF ( .461939770f),
+        FDCT_AVX_COEF ( .415734810f),
+        FDCT_AVX_COEF ( .277785120f),
+        FDCT_AVX_COEF ( .191341720f),
+        FDCT_AVX_COEF ( .097545161f),
+        FDCT_AVX_COEF ( .5f)
+    };
+
+    #undef FDCT_AVX_COEF
+
+    __asm__(
+        FDCT_AVX_PASS
+        FDCT_AVX_PASS
+        #ifndef __AVX__
+            "vzeroupper                   \n"
+        #endif /* __AVX__ */
+        : /* Output  */
+        : /* Input   */ "r"(data), "r"(sAvxCoef)
+        : /* Clobber */ "memory",
+                        "%xmm0",  "%xmm1",  "%xmm2",  "%xmm3",
+                        "%xmm4",  "%xmm5",  "%xmm6",  "%xmm7",
+                        "%xmm8",  "%xmm9",  "%xmm10", "%xmm11",
+                        "%xmm12", "%xmm13", "%xmm14", "%xmm15"
+    );
+
+    #else  /* IMF_HAVE_GCC_INLINEASM_X86_64 */
+
+        dctForward8x8 (data);
+
+    #endif /* IMF_HAVE_GCC_INLINEASM_X86_64 */
+}
+
 } // namespace
 
 OPENEXR_IMF_INTERNAL_NAMESPACE_HEADER_EXIT
@@ -0,0 +1,1110 @@
+//
+// SPDX-License-Identifier: BSD-3-Clause
+// Copyright Contributors to the OpenEXR Project.
+//
+
+//-----------------------------------------------------------------------------
+//
+//	Resampling and blurring of environment maps
+//
+//-----------------------------------------------------------------------------
+
+#include "ImfEnvmapFilter.h"
+#include "ImfThreading.h"
+#include "IlmThreadPool.h"
+#include "ImathFun.h"
+#include "ImathPlatform.h"
+#include "ImathVec.h"
+#include "Iex.h"
+
+#include <algorithm>
+#include <cmath>
+#include <memory>
+#include <string.h>
+#include <vector>
+
+#include "ImfNamespace.h"
+
+OPENEXR_IMF_INTERNAL_NAMESPACE_SOURCE_ENTER
+
+using IMATH_NAMESPACE::Box2i;
+using IMATH_NAMESPACE::V2i;
+using IMATH_NAMESPACE::V2f;
+using IMATH_NAMESPACE::V3f;
+using IMATH_NAMESPACE::V3d;
+using IMATH_NAMESPACE::C4f;
+using ILMTHREAD_NAMESPACE::Task;
+using ILMTHREAD_NAMESPACE::TaskGroup;
+using ILMTHREAD_NAMESPACE::ThreadPool;
+using std::vector;
+
+namespace {
+
+int
+widthOf (const Box2i &dataWindow)
+{
+    return dataWindow.max.x - dataWindow.min.x + 1;
+}
+
+
+int
+heightOf (const Box2i &dataWindow)
+{
+    return dataWindow.max.y - dataWindow.min.y + 1;
+}
+
+
+void
+checkCube (const Box2i &dataWindow)
+{
+    if (CubeMap::sizeOfFace (dataWindow) < 1 ||
+        heightOf (dataWindow) != 6 * widthOf (dataWindow))
+    {
+        THROW (IEX_NAMESPACE::ArgExc, "The data window of a cube-face "
+               "environment map must be N by 6*N pixels, with N > 0.");
+    }
+}
+
+
+template <class P>
+struct Envmap2D
+{
+    //
+    // An environment map, or the pixels of one
+    //
+
+    Envmap	type;
+    Box2i	dataWindow;
+    int		width;
+    P *		pixels;
+
+    Envmap2D (Envmap type, const Box2i &dataWindow, P *pixels):
+        type (type),
+        dataWindow (dataWindow),
+        width (widthOf (dataWindow)),
+        pixels (pixels)
+    {}
+
+    P &
+    at (const V2f &pos) const
+    {
+        //
+        // The pixel nearest to pixel space position pos
+        //
+
+        int x = int (pos.x + 0.5f) - dataWindow.min.x;
+        int y = int (pos.y + 0.5f) - dataWindow.min.y;
+        return pixels[size_t (y) * width + x];
+    }
+};
+
+
+V2f
+dirToPosLatLong (const Box2i &dataWindow, const V3f &dir)
+{
+    return LatLongMap::pixelPosition (dataWindow, dir);
+}
+
+
+V2f
+dirToPosCube (const Box2i &dataWindow, const V3f &dir)
+{
+    CubeMapFace face;
+    V2f posInFace;
+    CubeMap::faceAndPixelPosition (dir, dataWindow, face, posInFace);
+    return CubeMap::pixelPosition (face, dataWindow, posInFace);
+}
+
+
+template <class P>
+P
+sample (const Envmap2D<const P> &map, const V2f &pos)
+{
+    //
+    // Point-sample the environment map image at 2D position pos.
+    // Interpolate bilinearly between the four nearest pixels.
+    //
+
+    const Box2i &dw = map.dataWindow;
+
+    int x1 = IMATH_NAMESPACE::floor (pos.x);
+    int x2 = x1 + 1;
+    float sx = x2 - pos.x;
+    float tx = 1 - sx;
+
+    x1 = IMATH_NAMESPACE::clamp (x1, dw.min.x, dw.max.x) - dw.min.x;
+    x2 = IMATH_NAMESPACE::clamp (x2, dw.min.x, dw.max.x) - dw.min.x;
+
+    int y1 = IMATH_NAMESPACE::floor (pos.y);
+    int y2 = y1 + 1;
+    float sy = y2 - pos.y;
+    float ty = 1 - sy;
+
+    y1 = IMATH_NAMESPACE::clamp (y1, dw.min.y, dw.max.y) - dw.min.y;
+    y2 = IMATH_NAMESPACE::clamp (y2, dw.min.y, dw.max.y) - dw.min.y;
+
+    const P &p11 = map.pixels[size_t (y1) * map.width + x1];
+    const P &p12 = map.pixels[size_t (y1) * map.width + x2];
+    const P &p21 = map.pixels[size_t (y2) * map.width + x1];
+    const P &p22 = map.pixels[size_t (y2) * map.width + x2];
+
+    P p;
+    p.r = (p11.r * sx + p12.r * tx) * sy + (p21.r * sx + p22.r * tx) * ty;
+    p.g = (p11.g * sx + p12.g * tx) * sy + (p21.g * sx + p22.g * tx) * ty;
+    p.b = (p11.b * sx + p12.b * tx) * sy + (p21.b * sx + p22.b * tx) * ty;
+    p.a = (p11.a * sx + p12.a * tx) * sy + (p21.a * sx + p22.a * tx) * ty;
+
+    return p;
+}
+
+
+template <class P>
+class FilteredLookup
+{
+  public:
+
+    //
+    // Filtered environment map lookup: Take n by n point samples
+    // from the environment map, clustered around a direction, and
+    // combine the samples with a tent filter.  The positions and
+    // weights of the samples are the same for every lookup, and
+    // are computed up front.
+    //
+
+    FilteredLookup (const Envmap2D<const P> &map, float radius, int n);
+
+    P		operator () (V3f d) const;
+
+  private:
+
+    Envmap2D<const P>	_map;
+    V2f			(* _dirToPos) (const Box2i &, const V3f &);
+    float		_radius;
+    int			_n;
+    vector<float>	_offsets;	// of the samples, in units of radius
+    vector<float>	_weights;	// of the samples in x or in y
+    float		_weightScale;	// 1 over the sum of the weights
+};
+
+
+template <class P>
+FilteredLookup<P>::FilteredLookup (const Envmap2D<const P> &map,
+                                   float radius,
+                                   int n)
+:
+    _map (map),
+    _dirToPos (map.type == ENVMAP_LATLONG? dirToPosLatLong: dirToPosCube),
+    _radius (radius),
+    _n (n),
+    _offsets (n),
+    _weights (n)
+{
+    for (int i = 0; i < n; ++i)
+    {
+        _offsets[i] = float (2 * i + 2) / float (n + 1) - 1;
+        _weights[i] = 1 - std::abs (_offsets[i]);
+    }
+
+    float wt = 0;
+
+    for (int y = 0; y < n; ++y)
+        for (int x = 0; x < n; ++x)
+            wt += _weights[x] * _weights[y];
+
+    _weightScale = 1 / wt;
+}
+
+
+template <class P>
+P
+FilteredLookup<P>::operator () (V3f d) const
+{
+    //
+    // Pick two vectors, dx and dy, of length r, that are orthogonal
+    // to the lookup direction, d, and to each other.
+    //
+
+    d.normalize();
+    V3f dx, dy;
+
+    if (std::abs (d.x) > 0.707f)
+        dx = (d % V3f (0, 1, 0)).normalized() * _radius;
+    else
+        dx = (d % V3f (1, 0, 0)).normalized() * _radius;
+
+    dy = (d % dx).normalized() * _radius;
+
+    //
+    // Take n by n point samples from the map, and add them up.
+    // The directions for the point samples are all within the pyramid
+    // defined by the vectors d-dy-dx, d-dy+dx, d+dy-dx, d+dy+dx.
+    //
+
+    float cr = 0;
+    float cg = 0;
+    float cb = 0;
+    float ca = 0;
+
+    for (int y = 0; y < _n; ++y)
+    {
+        V3f ddy (_offsets[y] * dy);
+
+        for (int x = 0; x < _n; ++x)
+        {
+            V3f ddx (_offsets[x] * dx);
+
+            P s = sample (_map, _dirToPos (_map.dataWindow, d + ddx + ddy));
+
+            float w = _weights[x] * _weights[y];
+
+            cr += s.r * w;
+            cg += s.g * w;
+            cb += s.b * w;
+            ca += s.a * w;
+        }
+    }
+
+    P c;
+
+    c.r = cr * _weightScale;
+    c.g = cg * _weightScale;
+    c.b = cb * _weightScale;
+    c.a = ca * _weightScale;
+
+    return c;
+}
+
+
+int
+numRowRanges (int numRows)
+{
+    //
+    // The number of ranges of output rows that are computed
+    // by separate tasks
+    //
+
+    return std::max (1, std::min (numRows, 4 * globalThreadCount()));
+}
+
+
+template <class P>
+class ResampleTask: public Task
+{
+  public:
+
+    ResampleTask (TaskGroup *group,
+                  const FilteredLookup<P> &lookup,
+                  const Envmap2D<P> &map,
+                  int row0,
+                  int row1)
+    :
+        Task (group),
+        _lookup (lookup),
+        _map (map),
+        _row0 (row0),
+        _row1 (row1)
+    {}
+
+    virtual void	execute ();
+
+  private:
+
+    const FilteredLookup<P> &	_lookup;
+    Envmap2D<P>			_map;
+    int				_row0;
+    int				_row1;
+};
+
+
+template <class P>
+void
+ResampleTask<P>::execute ()
+{
+    const Box2i &dw = _map.dataWindow;
+
+    if (_map.type == ENVMAP_LATLONG)
+    {
+        for (int y = _row0; y < _row1; ++y)
+        {
+            for (int x = 0; x < _map.width; ++x)
+            {
+                V2f pos (x + dw.min.x, y + dw.min.y);
+                V3f dir = LatLongMap::direction (dw, pos);
+                _map.at (pos) = _lookup (dir);
+            }
+        }
+    }
+    else
+    {
+        int sof = CubeMap::sizeOfFace (dw);
+
+        for (int row = _row0; row < _row1; ++row)
+        {
+            CubeMapFace face = CubeMapFace (row / sof);
+            int y = row % sof;
+
+            for (int x = 0; x < sof; ++x)
+            {
+                V2f posInFace (x, y);
+                V3f dir = CubeMap::direction (face, dw, posInFace);
+                _map.at (CubeMap::pixelPosition (face, dw, posInFace)) =
+                    _lookup (dir);
+            }
+        }
+    }
+}
+
+
+template <class P>
+void
+resample (Envmap type1,
+          const Box2i &dataWindow1,
+          const P pixels1[],
+          Envmap type2,
+          const Box2i &dataWindow2,
+          P pixels2[],
+          float filterRadius,
+          int numSamples)
+{
+    if (numSamples < 1)
+        THROW (IEX_NAMESPACE::ArgExc, "The number of samples must be positive.");
+
+    if (type1 == ENVMAP_CUBE)
+        checkCube (dataWindow1);
+
+    if (type2 == ENVMAP_CUBE)
+        checkCube (dataWindow2);
+
+    int w = widthOf (dataWindow2);
+    int h = heightOf (dataWindow2);
+
+    if (type1 == ENVMAP_CUBE && type2 == ENVMAP_CUBE &&
+        dataWindow1 == dataWindow2)
+    {
+        //
+        // Special case - the input image is a cube-face environment
+        // map with the same size as the output image.  We can copy
+        // the input image without resampling.
+        //
+
+        memcpy (pixels2, pixels1, sizeof (P) * w * h);
+        return;
+    }
+
+    float radius;
+    int rows;
+
+    if (type2 == ENVMAP_LATLONG)
+    {
+        radius = 0.5f * 2 * M_PI * filterRadius / w;
+        rows = h;
+    }
+    else
+    {
+        int sof = CubeMap::sizeOfFace (dataWindow2);
+        radius = 1.5f * filterRadius / sof;
+        rows = 6 * sof;
+    }
+
+    Envmap2D<const P> map1 (type1, dataWindow1, pixels1);
+    Envmap2D<P> map2 (type2, dataWindow2, pixels2);
+    FilteredLookup<P> lookup (map1, radius, numSamples);
+
+    TaskGroup group;
+    int n = numRowRanges (rows);
+
+    for (int i = 0; i < n; ++i)
+    {
+        ThreadPool::addGlobalTask (new ResampleTask<P> (&group,
+                                                        lookup,
+                                                        map2,
+                                                        rows * i / n,
+                                                        rows * (i + 1) / n));
+    }
+}
+
+
+inline double
+sqr (double x)
+{
+    return x * x;
+}
+
+
+template <class P>
+void
+weightPixels (const Envmap2D<P> &map)
+{
+    //
+    // Multiply each pixel of a cube-face map by a weight that
+    // is proportional to the solid angle subtended by the pixel
+    // as seen from the center of the environment cube.
+    //
+
+    const Box2i &dw = map.dataWindow;
+    int sof = CubeMap::sizeOfFace (dw);
+
+    double weightTotal = 0;
+
+    for (int f = CUBEFACE_POS_X; f <= CUBEFACE_NEG_Z; ++f)
+    {
+        CubeMapFace face = CubeMapFace (f);
+        V3f faceDir (0, 0, 0);
+        int ix = 0, iy = 0, iz = 0;
+
+        switch (face)
+        {
+          case CUBEFACE_POS_X:
+            faceDir = V3f (1, 0, 0);
+            ix = 0;
+            iy = 1;
+            iz = 2;
+            break;
+
+          case CUBEFACE_NEG_X:
+            faceDir = V3f (-1, 0, 0);
+            ix = 0;
+            iy = 1;
+            iz = 2;
+            break;
+
+          case CUBEFACE_POS_Y:
+            faceDir = V3f (0, 1, 0);
+            ix = 1;
+            iy = 0;
+            iz = 2;
+            break;
+
+          case CUBEFACE_NEG_Y:
+            faceDir = V3f (0, -1, 0);
+            ix = 1;
+            iy = 0;
+            iz = 2;
+            break;
+
+          case CUBEFACE_POS_Z:
+            faceDir = V3f (0, 0, 1);
+            ix = 2;
+            iy = 0;
+            iz = 1;
+            break;
+
+          case CUBEFACE_NEG_Z:
+            faceDir = V3f (0, 0, -1);
+            ix = 2;
+            iy = 0;
+            iz = 1;
+            break;
+        }
+
+        for (int y = 0; y < sof; ++y)
+        {
+            bool yEdge = (y == 0 || y == sof - 1);
+
+            for (int x = 0; x < sof; ++x)
+            {
+                bool xEdge = (x == 0 || x == sof - 1);
+
+                V2f posInFace (x, y);
+
+                V3f dir = CubeMap::direction (face, dw, posInFace).normalized();
+
+                //
+                // The solid angle subtended by pixel (x,y), as seen
+                // from the center of the cube, is proportional to the
+                // square of the distance of the pixel from the center
+                // of the cube and proportional to the dot product of
+                // the viewing direction and the normal of the cube
+                // face that contains the pixel.
+                //
+
+                double weight =
+                    (dir ^ faceDir) *
+                    (sqr (dir[iy] / dir[ix]) + sqr (dir[iz] / dir[ix]) + 1);
+
+                //
+                // Pixels at the edges and corners of the
+                // cube are duplicated; we must adjust the
+                // pixel weights accordingly.
+                //
+
+                if (xEdge && yEdge)
+                    weight /= 3;
+                else if (xEdge || yEdge)
+                    weight /= 2;
+
+                P &pixel = map.at (CubeMap::pixelPosition (face, dw, posInFace));
+
+                pixel.r *= weight;
+                pixel.g *= weight;
+                pixel.b *= weight;
+                pixel.a *= weight;
+
+                weightTotal += weight;
+            }
+        }
+    }
+
+    //
+    // The weighting operation above has made the overall image darker.
+    // Apply a correction to recover the image's original brightness.
+    //
+
+    size_t numPixels = size_t (map.width) * heightOf (dw);
+    double weight = numPixels / weightTotal;
+
+    for (size_t i = 0; i < numPixels; ++i)
+    {
+        P &p = map.pixels[i];
+
+        p.r *= weight;
+        p.g *= weight;
+        p.b *= weight;
+        p.a *= weight;
+    }
+}
+
+
+struct BlurSource
+{
+    //
+    // The pixels of the blur proxy, face by face, with the
+    // direction from the center of the cube to each pixel.
+    //
+
+    vector<V3f>		dirs;
+    vector<float>	r;
+    vector<float>	g;
+    vector<float>	b;
+    vector<float>	a;
+
+    template <class P>
+    BlurSource (const Envmap2D<P> &map);
+};
+
+
+template <class P>
+BlurSource::BlurSource (const Envmap2D<P> &map)
+{
+    const Box2i &dw = map.dataWindow;
+    int sof = CubeMap::sizeOfFace (dw);
+
+    for (int f = CUBEFACE_POS_X; f <= CUBEFACE_NEG_Z; ++f)
+    {
+        CubeMapFace face = CubeMapFace (f);
+
+        for (int y = 0; y < sof; ++y)
+        {
+            for (int x = 0; x < sof; ++x)
+            {
+                V2f posInFace (x, y);
+                const P &pixel = map.at (CubeMap::pixelPosition (face, dw, posInFace));
+
+                dirs.push_back (CubeMap::direction (face, dw, posInFace));
+                r.push_back (pixel.r);
+                g.push_back (pixel.g);
+                b.push_back (pixel.b);
+                a.push_back (pixel.a);
+            }
+        }
+    }
+}
+
+
+//
+// The polynomial approximation of the blur kernel, max (0, c), where c
+// is the cosine of the angle between the directions n1 and n2 (both
+// unit vectors), is the Legendre series of the kernel, truncated to
+// degree KERNEL_DEGREE:
+//
+//	k(c) = sum over d of a[d] * c^d
+//
+// Expanding the powers of c = dot (n1, n2) into products of the
+// components of n1 and n2 gives
+//
+//	k(c) = sum over monomials m of coefficient(m) * m(n1) * m(n2)
+//
+// so that the sum of k(c) over the pixels of the proxy, weighted
+// by their values, is the sum of the monomials of n2 weighted by
+// the moments of the proxy pixels.  The series converges slowly
+// because of the kink of max (0, c) at c = 0: the error of the
+// kernel is about 0.059 at degree 4, 0.034 at degree 8 and 0.024
+// at degree 12.
+//
+
+const int KERNEL_DEGREE = 8;
+
+
+struct Monomial
+{
+    int		ex;	// exponents of the components
+    int		ey;
+    int		ez;
+    double	c;	// coefficient
+};
+
+
+double
+factorial (int n)
+{
+    return n <= 1? 1: n * factorial (n - 1);
+}
+
+
+vector<double>
+kernelPolynomial ()
+{
+    //
+    // The coefficients of the powers of c in the Legendre series of
+    // max (0, c).  The Legendre polynomials, P[l], are generated with
+    // Bonnet's recursion; the coefficient of P[l] in the series is
+    // (2l+1)/2 times the integral of c * P[l](c) from 0 to 1.
+    //
+
+    const int n = KERNEL_DEGREE + 1;
+    vector<vector<double> > P (n, vector<double> (n, 0.0));
+    vector<double> a (n, 0.0);
+
+    P[0][0] = 1;
+
+    if (n > 1)
+        P[1][1] = 1;
+
+    for (int l = 1; l + 1 < n; ++l)
+    {
+        for (int d = 0; d < n; ++d)
+        {
+            P[l + 1][d] = -double (l) / (l + 1) * P[l - 1][d];
+
+            if (d > 0)
+                P[l + 1][d] += double (2 * l + 1) / (l + 1) * P[l][d - 1];
+        }
+    }
+
+    for (int l = 0; l < n; ++l)
+    {
+        double integral = 0;
+
+        for (int d = 0; d < n; ++d)
+            integral += P[l][d] / (d + 2);
+
+        for (int d = 0; d < n; ++d)
+            a[d] += (2 * l + 1) * 0.5 * integral * P[l][d];
+    }
+
+    return a;
+}
+
+
+vector<Monomial>
+kernelMonomials ()
+{
+    vector<double> a = kernelPolynomial();
+    vector<Monomial> monomials;
+
+    for (int d = 0; d <= KERNEL_DEGREE; ++d)
+    {
+        //
+        // The odd powers above 1 cancel out.
+        //
+
+        if (d > 1 && d % 2)
+            continue;
+
+        for (int ex = d; ex >= 0; --ex)
+        {
+            for (int ey = d - ex; ey >= 0; --ey)
+            {
+                Monomial m;
+                m.ex = ex;
+                m.ey = ey;
+                m.ez = d - ex - ey;
+                m.c = a[d] * factorial (d) /
+                      (factorial (m.ex) * factorial (m.ey) * factorial (m.ez));
+
+                monomials.push_back (m);
+            }
+        }
+    }
+
+    return monomials;
+}
+
+
+inline double
+monomial (const Monomial &m, const double px[], const double py[], const double pz[])
+{
+    return px[m.ex] * py[m.ey] * pz[m.ez];
+}
+
+
+void
+powers (const V3d &n, double px[], double py[], double pz[])
+{
+    px[0] = py[0] = pz[0] = 1;
+
+    for (int i = 1; i <= KERNEL_DEGREE; ++i)
+    {
+        px[i] = px[i - 1] * n.x;
+        py[i] = py[i - 1] * n.y;
+        pz[i] = pz[i - 1] * n.z;
+    }
+}
+
+
+struct BlurMoments
+{
+    //
+    // For each monomial, the sums over the proxy pixels of the
+    // monomial of the pixel's direction times the pixel's r, g,
+    // b, a, and 1, weighted by the length of the direction (the
+    // exact blur uses the dot products of unnormalized directions).
+    //
+
+    vector<Monomial>	monomials;
+    vector<double>	sums;		// 5 per monomial
+
+    BlurMoments (const BlurSource &source);
+};
+
+
+BlurMoments::BlurMoments (const BlurSource &source):
+    monomials (kernelMonomials()),
+    sums (5 * monomials.size(), 0.0)
+{
+    for (size_t i = 0; i < source.dirs.size(); ++i)
+    {
+        V3d dir (source.dirs[i]);
+        double length = dir.length();
+
+        double px[KERNEL_DEGREE + 1];
+        double py[KERNEL_DEGREE + 1];
+        double pz[KERNEL_DEGREE + 1];
+        powers (dir / length, px, py, pz);
+
+        double v[5] = {source.r[i] * length,
+                       source.g[i] * length,
+                       source.b[i] * length,
+                       source.a[i] * length,
+                       length};
+
+        for (size_t j = 0; j < monomials.size(); ++j)
+        {
+            double m = monomials[j].c * monomial (monomials[j], px, py, pz);
+
+            for (int k = 0; k < 5; ++k)
+                sums[5 * j + k] += v[k] * m;
+        }
+    }
+}
+
+
+template <class P>
+class BlurTask: public Task
+{
+  public:
+
+    BlurTask (TaskGroup *group,
+              const BlurSource &source,
+              const BlurMoments *moments,
+              const Envmap2D<P> &map,
+              int row0,
+              int row1)
+    :
+        Task (group),
+        _source (source),
+        _moments (moments),
+        _map (map),
+        _row0 (row0),
+        _row1 (row1)
+    {}
+
+    virtual void	execute ();
+
+  private:
+
+    void		blurExact (const V3f &dir2, P &pixel2) const;
+    void		blurApproximate (const V3f &dir2, P &pixel2) const;
+
+    const BlurSource &	_source;
+    const BlurMoments *	_moments;
+    Envmap2D<P>		_map;
+    int			_row0;
+    int			_row1;
+};
+
+
+template <class P>
+void
+BlurTask<P>::execute ()
+{
+    const Box2i &dw = _map.dataWindow;
+    int sof = CubeMap::sizeOfFace (dw);
+
+    for (int row = _row0; row < _row1; ++row)
+    {
+        CubeMapFace face = CubeMapFace (row / sof);
+        int y = row % sof;
+
+        for (int x = 0; x < sof; ++x)
+        {
+            V2f posInFace (x, y);
+            V3f dir = CubeMap::direction (face, dw, posInFace);
+            P &pixel = _map.at (CubeMap::pixelPosition (face, dw, posInFace));
+
+            if (_moments)
+                blurApproximate (dir, pixel);
+            else
+                blurExact (dir, pixel);
+        }
+    }
+}
+
+
+template <class P>
+void
+BlurTask<P>::blurExact (const V3f &dir2, P &pixel2) const
+{
+    //
+    // Multiply each proxy pixel's color by max (0, dot (dir1, dir2)),
+    // where dir1 is the direction to the proxy pixel, and add up
+    // the results.
+    //
+
+    const V3f *dirs = &_source.dirs[0];
+    const float *r = &_source.r[0];
+    const float *g = &_source.g[0];
+    const float *b = &_source.b[0];
+    const float *a = &_source.a[0];
+    size_t n = _source.dirs.size();
+
+    double weightTotal = 0;
+    double rTotal = 0;
+    double gTotal = 0;
+    double bTotal = 0;
+    double aTotal = 0;
+
+    for (size_t i = 0; i < n; ++i)
+    {
+        double weight = dirs[i] ^ dir2;
+
+        if (weight <= 0)
+            continue;
+
+        weightTotal += weight;
+        rTotal += r[i] * weight;
+        gTotal += g[i] * weight;
+        bTotal += b[i] * weight;
+        aTotal += a[i] * weight;
+    }
+
+    pixel2.r = rTotal / weightTotal;
+    pixel2.g = gTotal / weightTotal;
+    pixel2.b = bTotal / weightTotal;
+    pixel2.a = aTotal / weightTotal;
+}
+
+
+template <class P>
+void
+BlurTask<P>::blurApproximate (const V3f &dir2, P &pixel2) const
+{
+    const vector<Monomial> &monomials = _moments->monomials;
+    const double *sums = &_moments->sums[0];
+
+    double px[KERNEL_DEGREE + 1];
+    double py[KERNEL_DEGREE + 1];
+    double pz[KERNEL_DEGREE + 1];
+    powers (V3d (dir2).normalized(), px, py, pz);
+
+    double total[5] = {0, 0, 0, 0, 0};
+
+    for (size_t j = 0; j < monomials.size(); ++j)
+    {
+        double m = monomial (monomials[j], px, py, pz);
+
+        for (int k = 0; k < 5; ++k)
+            total[k] += sums[5 * j + k] * m;
+    }
+
+    pixel2.r = total[0] / total[4];
+    pixel2.g = total[1] / total[4];
+    pixel2.b = total[2] / total[4];
+    pixel2.a = total[3] / total[4];
+}
+
+
+template <class P>
+void
+blur (Envmap type1,
+      const Box2i &dataWindow1,
+      const P pixels1[],
+      const Box2i &dataWindow2,
+      P pixels2[],
+      bool approximate)
+{
+    //
+    // Ideally we would blur the input image directly by convolving
+    // it with a 180-degree wide blur kernel.  Unfortunately this
+    // is prohibitively expensive when the input image is large.
+    // In order to keep running times reasonable, we perform the
+    // blur on a small proxy image:
+    //
+    // * If the input image is in latitude-longitude format,
+    //   convert it into a cube-face environment map.
+    //
+    // * Repeatedly resample the image, each time shrinking
+    //   it to no less than half its current size, until the
+    //   width of each cube face is MAX_IN_WIDTH pixels.
+    //
+    // * Multiply each pixel by a weight that is proportinal
+    //   to the solid angle subtended by the pixel as seen
+    //   from the center of the environment cube.
+    //
+    // * For each pixel of the output image, add up the colors of
+    //   the proxy pixels, weighted by max (0, d1.dot(d2)), where
+    //   d1 and d2 are the directions from the center of the cube
+    //   to the proxy pixel and to the output pixel.
+    //
+
+    const int MAX_IN_WIDTH = 40;
+
+    if (type1 == ENVMAP_CUBE)
+        checkCube (dataWindow1);
+
+    checkCube (dataWindow2);
+
+    int w = widthOf (dataWindow1);
+    vector<P> proxy;
+    vector<P> buffer;
+    Box2i dw = dataWindow1;
+
+    if (type1 == ENVMAP_LATLONG)
+    {
+        //
+        // Convert the input image from latitude-longitude
+        // to cube-face format.
+        //
+
+        w /= 4;
+
+        if (w < 1)
+        {
+            THROW (IEX_NAMESPACE::ArgExc, "The latitude-longitude map "
+                   "to be blurred is too small.");
+        }
+
+        dw = Box2i (V2i (0, 0), V2i (w - 1, w * 6 - 1));
+        proxy.resize (size_t (w) * w * 6);
+        resample (type1, dataWindow1, pixels1, ENVMAP_CUBE, dw, &proxy[0], 1, 7);
+    }
+    else
+    {
+        proxy.assign (pixels1, pixels1 + size_t (w) * heightOf (dw));
+    }
+
+    while (w > MAX_IN_WIDTH)
+    {
+        //
+        // Shrink the image.
+        //
+
+        if (w >= MAX_IN_WIDTH * 2)
+            w /= 2;
+        else
+            w = MAX_IN_WIDTH;
+
+        Box2i dw2 (V2i (0, 0), V2i (w - 1, w * 6 - 1));
+        buffer.resize (size_t (w) * w * 6);
+        resample (ENVMAP_CUBE, dw, &proxy[0], ENVMAP_CUBE, dw2, &buffer[0], 1, 7);
+
+        proxy.swap (buffer);
+        dw = dw2;
+    }
+
+    Envmap2D<P> map1 (ENVMAP_CUBE, dw, &proxy[0]);
+    weightPixels (map1);
+
+    BlurSource source (map1);
+    std::unique_ptr<BlurMoments> moments;
+
+    if (approximate)
+        moments.reset (new BlurMoments (source));
+
+    Envmap2D<P> map2 (ENVMAP_CUBE, dataWindow2, pixels2);
+    int rows = 6 * CubeMap::sizeOfFace (dataWindow2);
+
+    TaskGroup group;
+    int n = numRowRanges (rows);
+
+    for (int i = 0; i < n; ++i)
+    {
+        ThreadPool::addGlobalTask (new BlurTask<P> (&group,
+                                                    source,
+                                                    moments.get(),
+                                                    map2,
+                                                    rows * i / n,
+                                                    rows * (i + 1) / n));
+    }
+}
+
+} // namespace
+
+
+void
+resampleEnvmap (Envmap type1,
+                const Box2i &dataWindow1,
+                const Rgba pixels1[],
+                Envmap type2,
+                const Box2i &dataWindow2,
+                Rgba pixels2[],
+                float filterRadius,
+                int numSamples)
+{
+    resample (type1, dataWindow1, pixels1,
+              type2, dataWindow2, pixels2,
+              filterRadius, numSamples);
+}
+
+
+void
+resampleEnvmap (Envmap type1,
+                const Box2i &dataWindow1,
+                const C4f pixels1[],
+                Envmap type2,
+                const Box2i &dataWindow2,
+                C4f pixels2[],
+                float filterRadius,
+                int numSamples)
+{
+    resample (type1, dataWindow1, pixels1,
+              type2, dataWindow2, pixels2,
+              filterRadius, numSamples);
+}
+
+
+void
+blurEnvmap (Envmap type1,
+            const Box2i &dataWindow1,
+            const Rgba pixels1[],
+            const Box2i &dataWindow2,
+            Rgba pixels2[],
+            bool approximate)
+{
+    blur (type1, dataWindow1, pixels1, dataWindow2, pixels2, approximate);
+}
+
+
+void
+blurEnvmap (Envmap type1,
+            const Box2i &dataWindow1,
+            const C4f pixels1[],
+            const Box2i &dataWindow2,
+            C4f pixels2[],
+            bool approximate)
+{
+    blur (type1, dataWindow1, pixels1, dataWindow2, pixels2, approximate);
+}
+
+
+OPENEXR_IMF_INTERNAL_NAMESPACE_SOURCE_EXIT
@@ -0,0 +1,105 @@
+//
+// SPDX-License-Identifier: BSD-3-Clause
+// Copyright Contributors to the OpenEXR Project.
+//
+
+#ifndef INCLUDED_IMF_ENVMAP_FILTER_H
+#define INCLUDED_IMF_ENVMAP_FILTER_H
+
+//-----------------------------------------------------------------------------
+//
+//	Resampling and blurring of environment maps
+//
+//	resampleEnvmap() converts an environment map to another size
+//	and/or type (see ImfEnvmap.h).  Each output pixel is a filtered
+//	lookup in the input map: numSamples by numSamples bilinearly
+//	interpolated samples, clustered around the direction of the
+//	pixel, combined with a tent filter.  A filterRadius of 1 makes
+//	the filter about as wide as an output pixel.
+//
+//	blurEnvmap() applies a 180-degree-wide filter kernel to an
+//	environment map, and stores the result in a cube-face map:
+//	point-sampling the blurred map at direction N returns the
+//	color that a white diffuse reflector with surface normal N
+//	would have if it was lit by the original map.  In order to
+//	keep running times reasonable, the blur is computed from a
+//	proxy of the input map, with cube faces at most 40 pixels
+//	wide.
+//
+//	By default, blurEnvmap() sums the contributions of all the
+//	pixels of the proxy to each output pixel.  With approximate set,
+//	the kernel is replaced by a polynomial of degree 8 in the
+//	cosine of the angle between the directions.  The polynomial,
+//	unlike the kernel itself, expands into a sum of products of
+//	functions of each direction; the blur then costs a pass over
+//	the proxy and a pass over the output, whatever their sizes.
+//	The approximate blur differs from the exact one by about one
+//	percent of the brightness of the map on average, and by more,
+//	up to about 15 percent, on the side facing away from small,
+//	bright light sources.
+//
+//	The pixels of both maps are stored row by row, without gaps,
+//	starting with the pixel at dataWindow.min.  The output pixels
+//	are computed in parallel by the global thread pool (see
+//	ImfThreading.h); the results do not depend on the number of
+//	threads.
+//
+//-----------------------------------------------------------------------------
+
+#include "ImfEnvmap.h"
+#include "ImfRgba.h"
+#include "ImfNamespace.h"
+#include "ImfExport.h"
+
+#include "ImathBox.h"
+#include "ImathColor.h"
+
+
+OPENEXR_IMF_INTERNAL_NAMESPACE_HEADER_ENTER
+
+IMF_EXPORT
+void	resampleEnvmap (Envmap type1,
+			const IMATH_NAMESPACE::Box2i &dataWindow1,
+			const Rgba pixels1[],
+			Envmap type2,
+			const IMATH_NAMESPACE::Box2i &dataWindow2,
+			Rgba pixels2[],
+			float filterRadius = 1,
+			int numSamples = 5);
+
+IMF_EXPORT
+void	resampleEnvmap (Envmap type1,
+			const IMATH_NAMESPACE::Box2i &dataWindow1,
+			const IMATH_NAMESPACE::C4f pixels1[],
+			Envmap type2,
+			const IMATH_NAMESPACE::Box2i &dataWindow2,
+			IMATH_NAMESPACE::C4f pixels2[],
+			float filterRadius = 1,
+			int numSamples = 5);
+
+
+//
+// The output map of blurEnvmap() is a cube-face map with
+// data window dataWindow2.
+//
+
+IMF_EXPORT
+void	blurEnvmap (Envmap type1,
+		    const IMATH_NAMESPACE::Box2i &dataWindow1,
+		    const Rgba pixels1[],
+		    const IMATH_NAMESPACE::Box2i &dataWindow2,
+		    Rgba pixels2[],
+		    bool approximate = false);
+
+IMF_EXPORT
+void	blurEnvmap (Envmap type1,
+		    const IMATH_NAMESPACE::Box2i &dataWindow1,
+		    const IMATH_NAMESPACE::C4f pixels1[],
+		    const IMATH_NAMESPACE::Box2i &dataWindow2,
+		    IMATH_NAMESPACE::C4f pixels2[],
+		    bool approximate = false);
+
+
+OPENEXR_IMF_INTERNAL_NAMESPACE_HEADER_EXIT
+
+#endif
@@ -0,0 +1,229 @@
+//
+// SPDX-License-Identifier: BSD-3-Clause
+// Copyright Contributors to the OpenEXR Project.
+//
+
+//-----------------------------------------------------------------------------
+//
+//	class FramePrefetcher
+//
+//-----------------------------------------------------------------------------
+
+#include "ImfFramePrefetcher.h"
+#include "ImfInputFile.h"
+#include "IlmThreadPool.h"
+#include "IlmThreadSemaphore.h"
+#include "Iex.h"
+
+#include <deque>
+
+#include "ImfNamespace.h"
+
+OPENEXR_IMF_INTERNAL_NAMESPACE_SOURCE_ENTER
+
+using IMATH_NAMESPACE::Box2i;
+using ILMTHREAD_NAMESPACE::Semaphore;
+using ILMTHREAD_NAMESPACE::Task;
+using ILMTHREAD_NAMESPACE::TaskGroup;
+using ILMTHREAD_NAMESPACE::ThreadPool;
+
+namespace {
+
+//
+// A frame in flight.  The task reading it posts done when it
+// finishes, after which only the prefetcher's thread touches it.
+//
+
+struct Frame
+{
+    std::string		fileName;
+    FrameBuffer		frameBuffer;
+    Box2i		dataWindow;
+    int			number;
+    int			numThreads;
+
+    Header		header;
+    bool		failed;
+    std::string		error;
+    Semaphore		done;
+
+    Frame (): number (0), numThreads (0), failed (false), done (0) {}
+};
+
+
+class FrameTask: public Task
+{
+  public:
+
+    FrameTask (TaskGroup *group, Frame *frame): Task (group), _frame (frame) {}
+
+    virtual void execute ();
+
+  private:
+
+    Frame *		_frame;
+};
+
+
+void
+FrameTask::execute ()
+{
+    try
+    {
+        InputFile in (_frame->fileName.c_str(), _frame->numThreads);
+        _frame->header = in.header();
+
+        if (in.header().dataWindow() != _frame->dataWindow)
+        {
+            THROW (IEX_NAMESPACE::ArgExc, "The data window of file \"" <<
+                   _frame->fileName << "\" differs from the data window "
+                   "of its frame buffer.");
+        }
+
+        in.setFrameBuffer (_frame->frameBuffer);
+        in.readPixels (_frame->dataWindow.min.y, _frame->dataWindow.max.y);
+    }
+    catch (std::exception &e)
+    {
+        _frame->failed = true;
+        _frame->error = e.what();
+    }
+    catch (...)
+    {
+        _frame->failed = true;
+        _frame->error = "Cannot read image file \"" + _frame->fileName + "\".";
+    }
+
+    _frame->done.post();
+}
+
+} // namespace
+
+
+struct FramePrefetcher::Data
+{
+    ThreadPool		pool;
+    TaskGroup		group;
+    int			maxFramesInFlight;
+    int			numThreads;
+    std::deque<Frame *>	frames;
+
+    Data (int maxFramesInFlight, int numThreads);
+    ~Data ();
+};
+
+
+FramePrefetcher::Data::Data (int maxFramesInFlight, int numThreads):
+    pool (maxFramesInFlight),
+    maxFramesInFlight (maxFramesInFlight),
+    numThreads (numThreads)
+{
+    // empty
+}
+
+
+FramePrefetcher::Data::~Data ()
+{
+    //
+    // The frames' tasks hold pointers to them; wait for the tasks
+    // to finish before deleting the frames.  The task group, which
+    // goes away before the pool, then waits for the tasks to be
+    // deleted.
+    //
+
+    for (size_t i = 0; i < frames.size(); ++i)
+    {
+        frames[i]->done.wait();
+        delete frames[i];
+    }
+}
+
+
+FramePrefetcher::FramePrefetcher (int maxFramesInFlight, int numThreads)
+{
+    if (maxFramesInFlight < 1)
+        throw IEX_NAMESPACE::ArgExc ("The number of frames in flight must be positive.");
+
+    _data = new Data (maxFramesInFlight, numThreads);
+}
+
+
+FramePrefetcher::~FramePrefetcher ()
+{
+    delete _data;
+}
+
+
+int
+FramePrefetcher::maxFramesInFlight () const
+{
+    return _data->maxFramesInFlight;
+}
+
+
+int
+FramePrefetcher::framesInFlight () const
+{
+    return int (_data->frames.size());
+}
+
+
+void
+FramePrefetcher::prefetch (const char fileName[],
+                           const FrameBuffer &frameBuffer,
+                           const Box2i &dataWindow,
+                           int frame)
+{
+    if (framesInFlight() >= _data->maxFramesInFlight)
+    {
+        THROW (IEX_NAMESPACE::LogicExc, "Cannot prefetch file \"" << fileName <<
+               "\": " << _data->maxFramesInFlight << " frames are already "
+               "in flight.");
+    }
+
+    Frame *f = new Frame;
+    f->fileName = fileName;
+    f->frameBuffer = frameBuffer;
+    f->dataWindow = dataWindow;
+    f->number = frame;
+    f->numThreads = _data->numThreads;
+
+    _data->frames.push_back (f);
+    _data->pool.addTask (new FrameTask (&_data->group, f));
+}
+
+
+int
+FramePrefetcher::nextFrame (Header *header)
+{
+    if (_data->frames.empty())
+        throw IEX_NAMESPACE::LogicExc ("There are no frames in flight.");
+
+    Frame *f = _data->frames.front();
+    f->done.wait();
+    _data->frames.pop_front();
+
+    int number = f->number;
+    bool failed = f->failed;
+    std::string error = f->error;
+
+    if (header && !failed)
+        *header = f->header;
+
+    delete f;
+
+    if (failed)
+        throw IEX_NAMESPACE::InputExc (error);
+
+    return number;
+}
+
+
+bool
+FramePrefetcher::nextFrameReady () const
+{
+    return !_data->frames.empty() && _data->frames.front()->done.value() > 0;
+}
+
+
+OPENEXR_IMF_INTERNAL_NAMESPACE_SOURCE_EXIT
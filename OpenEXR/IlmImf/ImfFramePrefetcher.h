@@ -0,0 +1,145 @@
+//
+// SPDX-License-Identifier: BSD-3-Clause
+// Copyright Contributors to the OpenEXR Project.
+//
+
+#ifndef INCLUDED_IMF_FRAME_PREFETCHER_H
+#define INCLUDED_IMF_FRAME_PREFETCHER_H
+
+//-----------------------------------------------------------------------------
+//
+//	class FramePrefetcher
+//
+//	Reads the frames of an image sequence ahead of their use, for
+//	playback and other sequential processing.
+//
+//	The frames are read into frame buffers supplied by the caller.
+//	Each frame is read by a thread of the prefetcher's own pool, which
+//	does the file IO, while the chunks of pixels are decompressed by
+//	the threads of the global thread pool.  With several frames in
+//	flight, reading the next frames from disk overlaps decompressing
+//	the previous ones.  The frames are delivered in the order they
+//	were requested, through a queue holding at most maxFramesInFlight()
+//	frames:
+//
+//	    FramePrefetcher prefetcher (3);
+//
+//	    for (int i = 0; i < 3; ++i)
+//	        prefetcher.prefetch (fileName (i), frameBuffer (i % 3),
+//	                             dataWindow, i);
+//
+//	    for (int i = 3; ; ++i)
+//	    {
+//	        int frame = prefetcher.nextFrame ();
+//	        display (frame);
+//	        prefetcher.prefetch (fileName (i), frameBuffer (frame % 3),
+//	                             dataWindow, i);
+//	    }
+//
+//	prefetch() and nextFrame() should be called from a single thread.
+//
+//-----------------------------------------------------------------------------
+
+#include "ImfFrameBuffer.h"
+#include "ImfHeader.h"
+#include "ImfThreading.h"
+#include "ImfNamespace.h"
+#include "ImfExport.h"
+#include "ImathBox.h"
+
+#include <string>
+
+
+OPENEXR_IMF_INTERNAL_NAMESPACE_HEADER_ENTER
+
+class FramePrefetcher
+{
+  public:
+
+    //------------------------------------------------------------------
+    // Constructor -- maxFramesInFlight is the number of frames that can
+    // be requested and not yet delivered, and the number of frames read
+    // at the same time.  numThreads is the number of threads of the
+    // global thread pool each frame keeps busy decompressing pixels,
+    // as for InputFile.
+    //------------------------------------------------------------------
+
+    IMF_EXPORT
+    FramePrefetcher (int maxFramesInFlight = 2,
+                     int numThreads = globalThreadCount());
+
+
+    //-----------------------------------------------------------------
+    // Destructor -- waits for the frames in flight to be read, and
+    // drops them.
+    //-----------------------------------------------------------------
+
+    IMF_EXPORT
+    virtual ~FramePrefetcher ();
+
+
+    IMF_EXPORT
+    int			maxFramesInFlight () const;
+
+
+    //--------------------------------------------------
+    // The number of frames requested and not delivered
+    //--------------------------------------------------
+
+    IMF_EXPORT
+    int			framesInFlight () const;
+
+
+    //-----------------------------------------------------------------
+    // Start reading the file with the given name into a frame buffer
+    // whose slices hold the pixels of dataWindow, which must be the
+    // data window of the file.  The frame buffer, and the memory its
+    // slices point to, must stay valid until the frame is delivered,
+    // or the prefetcher goes away.  frame is a number passed back by
+    // nextFrame() to identify the frame.
+    //
+    // prefetch() returns right away.  It throws an exception if
+    // maxFramesInFlight() frames are already in flight.
+    //-----------------------------------------------------------------
+
+    IMF_EXPORT
+    void		prefetch (const char fileName[],
+                                  const FrameBuffer &frameBuffer,
+                                  const IMATH_NAMESPACE::Box2i &dataWindow,
+                                  int frame = 0);
+
+
+    //-----------------------------------------------------------------
+    // Wait for the oldest frame in flight to be read, and deliver it:
+    // return its number and, if header is not null, store the header
+    // of its file in *header.  If the frame could not be read, an
+    // exception describing why is thrown instead; the frame is
+    // delivered either way.
+    //
+    // nextFrame() throws an exception if there are no frames in
+    // flight.  nextFrameReady() returns whether nextFrame() would
+    // return right away.
+    //-----------------------------------------------------------------
+
+    IMF_EXPORT
+    int			nextFrame (Header *header = 0);
+
+    IMF_EXPORT
+    bool		nextFrameReady () const;
+
+    struct Data;
+
+  private:
+
+    FramePrefetcher (const FramePrefetcher &) = delete;
+    FramePrefetcher & operator = (const FramePrefetcher &) = delete;
+    FramePrefetcher (FramePrefetcher &&) = delete;
+    FramePrefetcher & operator = (FramePrefetcher &&) = delete;
+
+    Data *		_data;
+};
+
+
+OPENEXR_IMF_INTERNAL_NAMESPACE_HEADER_EXIT
+
+#endif
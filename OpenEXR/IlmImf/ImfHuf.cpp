@@ -53,6 +53,7 @@
 #include <cstring>
 #include <cassert>
 #include <algorithm>
+#include <functional>
 
 
 using namespace std;
@@ -268,20 +269,37 @@ hufCanonicalCodeTable (Int64 hcode[HUF_ENCSIZE])
 //	- original frequencies are destroyed;
 //	- encoding tables are used by hufEncode() and hufBuildDecTable();
 //
-// NB: The following code "(*a == *b) && (a > b))" was added to ensure
-//     elements in the heap with the same value are sorted by index.
-//     This is to ensure, the STL make_heap()/pop_heap()/push_heap() methods
-//     produced a resultant sorted heap that is identical across OSes.
+// NB: Elements in the heap with the same frequency are sorted by index.
+//     This ensures that the resulting code table is identical across
+//     OSes and heap implementations.  To keep the heap compact, each
+//     element is a single key holding its frequency in the high bits
+//     and its index in the low HUF_KEYBITS bits, so comparing keys
+//     compares frequencies first and indices second.
 //
 
+const int HUF_KEYBITS = 17;			// bits of an index in a key
+const Int64 HUF_KEYMASK = (Int64 (1) << HUF_KEYBITS) - 1;
 
-struct FHeapCompare
+
+inline Int64
+hufKey (Int64 frq, int index)
 {
-    bool operator () (Int64 *a, Int64 *b)
-    {
-        return ((*a > *b) || ((*a == *b) && (a > b)));
-    }
-};
+    return (frq << HUF_KEYBITS) | index;
+}
+
+
+inline int
+hufKeyIndex (Int64 key)
+{
+    return int (key & HUF_KEYMASK);
+}
+
+
+inline Int64
+hufKeyFrq (Int64 key)
+{
+    return key >> HUF_KEYBITS;
+}
 
 
 void
@@ -296,7 +314,7 @@ hufBuildEncTable
     // that are to be Huffman-encoded.  (frq[i] contains the number
     // of occurrences of symbol i in the data.)
     //
-    // The loop below does three things:
+    // The loop below does two things:
     //
     // 1) Finds the minimum and maximum indices that point
     //    to non-zero entries in frq:
@@ -304,15 +322,11 @@ hufBuildEncTable
     //     frq[im] != 0, and frq[i] == 0 for all i < im
     //     frq[iM] != 0, and frq[i] == 0 for all i > iM
     //
-    // 2) Fills array fHeap with pointers to all non-zero
+    // 2) Fills array fHeap with the keys of all non-zero
     //    entries in frq.
     //
-    // 3) Initializes array hlink such that hlink[i] == i
-    //    for all array entries.
-    //
 
-    AutoArray <int, HUF_ENCSIZE> hlink;
-    AutoArray <Int64 *, HUF_ENCSIZE> fHeap;
+    AutoArray <Int64, HUF_ENCSIZE> fHeap;
 
     *im = 0;
 
@@ -323,11 +337,9 @@ hufBuildEncTable
 
     for (int i = *im; i < HUF_ENCSIZE; i++)
     {
-	hlink[i] = i;
-
 	if (frq[i])
 	{
-	    fHeap[nf] = &frq[i];
+	    fHeap[nf] = hufKey (frq[i], i);
 	    nf++;
 	    *iM = i;
 	}
@@ -335,20 +347,19 @@ hufBuildEncTable
 
     //
     // Add a pseudo-symbol, with a frequency count of 1, to frq;
-    // adjust the fHeap and hlink array accordingly.  Function
-    // hufEncode() uses the pseudo-symbol for run-length encoding.
+    // adjust the fHeap array accordingly.  Function hufEncode()
+    // uses the pseudo-symbol for run-length encoding.
     //
 
     (*iM)++;
     frq[*iM] = 1;
-    fHeap[nf] = &frq[*iM];
+    fHeap[nf] = hufKey (1, *iM);
     nf++;
 
     //
     // Build an array, scode, such that scode[i] contains the number
-    // of bits assigned to symbol i.  Conceptually this is done by
-    // constructing a tree whose leaves are the symbols with non-zero
-    // frequency:
+    // of bits assigned to symbol i.  This is done by constructing a
+    // tree whose leaves are the symbols with non-zero frequency:
     //
     //     Make a heap that contains all symbols with a non-zero frequency,
     //     with the least frequent symbol on top.
@@ -364,85 +375,71 @@ hufBuildEncTable
     // leaf node, the distance between the root and the leaf is the length
     // of the code for the corresponding symbol.
     //
-    // The loop below doesn't actually build the tree; instead we compute
-    // the distances of the leaves from the root on the fly.  When a new
-    // node is added to the heap, then that node's descendants are linked
-    // into a single linear list that starts at the new node, and the code
-    // lengths of the descendants (that is, their distance from the root
-    // of the tree) are incremented by one.
+    // The new node takes the place, and the index, of the second node
+    // in the heap.  The tree is recorded as the parent of each node:
+    // leaves are numbered by symbol, and the n-th new node is numbered
+    // HUF_ENCSIZE + n.  Since a parent is always created after its
+    // children, the distances from the root can then be computed in
+    // a single pass over the new nodes, from the last to the first.
     //
 
-    make_heap (&fHeap[0], &fHeap[nf], FHeapCompare());
+    make_heap (&fHeap[0], &fHeap[nf], greater<Int64>());
 
-    AutoArray <Int64, HUF_ENCSIZE> scode;
-    memset (scode, 0, sizeof (Int64) * HUF_ENCSIZE);
+    AutoArray <int, HUF_ENCSIZE> hnode;	// tree node of each heap index
+    AutoArray <int, 2 * HUF_ENCSIZE> parent;
+
+    for (int i = *im; i <= *iM; i++)
+	hnode[i] = i;
+
+    int nn = 0;		// number of new nodes
 
     while (nf > 1)
     {
 	//
-	// Find the indices, mm and m, of the two smallest non-zero frq
-	// values in fHeap, add the smallest frq to the second-smallest
-	// frq, and remove the smallest frq value from fHeap.
+	// Find the indices, mm and m, of the two smallest frq values
+	// in fHeap, and replace them with their sum, under index m.
 	//
 
-	int mm = fHeap[0] - frq;
-	pop_heap (&fHeap[0], &fHeap[nf], FHeapCompare());
+	Int64 kmm = fHeap[0];
+	pop_heap (&fHeap[0], &fHeap[nf], greater<Int64>());
 	--nf;
 
-	int m = fHeap[0] - frq;
-	pop_heap (&fHeap[0], &fHeap[nf], FHeapCompare());
+	Int64 km = fHeap[0];
+	pop_heap (&fHeap[0], &fHeap[nf], greater<Int64>());
 
-	frq[m ] += frq[mm];
-	push_heap (&fHeap[0], &fHeap[nf], FHeapCompare());
-
-	//
-	// The entries in scode are linked into lists with the
-	// entries in hlink serving as "next" pointers and with
-	// the end of a list marked by hlink[j] == j.
-	//
-	// Traverse the lists that start at scode[m] and scode[mm].
-	// For each element visited, increment the length of the
-	// corresponding code by one bit. (If we visit scode[j]
-	// during the traversal, then the code for symbol j becomes
-	// one bit longer.)
-	//
-	// Merge the lists that start at scode[m] and scode[mm]
-	// into a single list that starts at scode[m].
-	//
-	
-	//
-	// Add a bit to all codes in the first list.
-	//
+	int mm = hufKeyIndex (kmm);
+	int m = hufKeyIndex (km);
 
-	for (int j = m; true; j = hlink[j])
-	{
-	    scode[j]++;
+	fHeap[nf - 1] = hufKey (hufKeyFrq (km) + hufKeyFrq (kmm), m);
+	push_heap (&fHeap[0], &fHeap[nf], greater<Int64>());
 
-	    assert (scode[j] <= 58);
+	int n = HUF_ENCSIZE + nn++;
+	parent[hnode[m]] = n;
+	parent[hnode[mm]] = n;
+	hnode[m] = n;
+    }
 
-	    if (hlink[j] == j)
-	    {
-		//
-		// Merge the two lists.
-		//
+    //
+    // depth[n] is the distance of new node HUF_ENCSIZE + n from
+    // the root, which is the last new node.
+    //
 
-		hlink[j] = mm;
-		break;
-	    }
-	}
+    AutoArray <int, HUF_ENCSIZE> depth;
 
-	//
-	// Add a bit to all codes in the second list
-	//
+    depth[nn - 1] = 0;
 
-	for (int j = mm; true; j = hlink[j])
-	{
-	    scode[j]++;
+    for (int n = nn - 2; n >= 0; --n)
+	depth[n] = depth[parent[HUF_ENCSIZE + n] - HUF_ENCSIZE] + 1;
 
-	    assert (scode[j] <= 58);
+    AutoArray <Int64, HUF_ENCSIZE> scode;
+    memset (scode, 0, sizeof (Int64) * HUF_ENCSIZE);
 
-	    if (hlink[j] == j)
-		break;
+    for (int i = *im; i <= *iM; i++)
+    {
+	if (frq[i])
+	{
+	    scode[i] = depth[parent[i] - HUF_ENCSIZE] + 1;
+	    assert (scode[i] <= 58);
 	}
     }
 
@@ -731,10 +728,48 @@ hufFreeDecTable (HufDec *hdecod)	// io: Decoding table
 // ENCODING
 //
 
+//
+// The encoder writes its output 32 bits at a time, rather than one
+// byte at a time as outputBits() does: bits accumulate in c until
+// there are at least 32 of them, which then go out as four bytes,
+// most significant first.  Between calls, lc is less than 32, so
+// up to 32 bits can be added at once without overflowing c.
+//
+
+inline void
+outputWordBits (int nBits, Int64 bits, Int64 &c, int &lc, char *&out)
+{
+    c = (c << nBits) | bits;
+    lc += nBits;
+
+    if (lc >= 32)
+    {
+	lc -= 32;
+	unsigned int w = (unsigned int) (c >> lc);
+
+	out[0] = (char) (w >> 24);
+	out[1] = (char) (w >> 16);
+	out[2] = (char) (w >> 8);
+	out[3] = (char) w;
+	out += 4;
+    }
+}
+
+
 inline void
 outputCode (Int64 code, Int64 &c, int &lc, char *&out)
 {
-    outputBits (hufLength (code), hufCode (code), c, lc, out);
+    int l = hufLength (code);
+
+    if (l > 32)
+    {
+	outputWordBits (l - 32, hufCode (code) >> 32, c, lc, out);
+	outputWordBits (32, hufCode (code) & 0xffffffff, c, lc, out);
+    }
+    else
+    {
+	outputWordBits (l, hufCode (code), c, lc, out);
+    }
 }
 
 
@@ -754,7 +789,7 @@ sendCode (Int64 sCode, int runCount, Int64 runCode,
     {
 	outputCode (sCode, c, lc, out);
 	outputCode (runCode, c, lc, out);
-	outputBits (8, runCount, c, lc, out);
+	outputWordBits (8, runCount, c, lc, out);
     }
     else
     {
@@ -811,6 +846,9 @@ hufEncode				// return: output size (in bits)
 
     sendCode (hcode[s], cs, hcode[rlc], c, lc, out);
 
+    while (lc >= 8)
+	*out++ = (c >> (lc -= 8));
+
     if (lc)
 	*out = (c << (8 - lc)) & 0xff;
 
@@ -44,7 +44,8 @@
 #include "ImfTiledInputFile.h"
 #include "ImfChannelList.h"
 #include "ImfMisc.h"
-#include "ImfStdIO.h"
+#include "ImfMMapIO.h"
+#include "ImfCachedTile.h"
 #include "ImfVersion.h"
 #include "ImfPartType.h"
 #include "ImfInputPartData.h"
@@ -440,7 +441,7 @@ InputFile::InputFile (const char fileName[], int numThreads):
     OPENEXR_IMF_INTERNAL_NAMESPACE::IStream* is = 0;
     try
     {
-        is = new StdIFStream (fileName);
+        is = openInputStream (fileName);
         readMagicNumberAndVersionField(*is, _data->version);
 
         //
@@ -478,6 +479,9 @@ InputFile::InputFile (const char fileName[], int numThreads):
 
             initialize();
         }
+
+        if (_data->tFile)
+            _data->tFile->setFileIdentity (tileCacheFileIdentity (fileName));
     }
     catch (IEX_NAMESPACE::BaseExc &e)
     {
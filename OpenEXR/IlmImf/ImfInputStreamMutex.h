@@ -39,6 +39,8 @@
 #include "IlmThreadMutex.h"
 #include "ImfNamespace.h"
 
+#include <string>
+
 OPENEXR_IMF_INTERNAL_NAMESPACE_HEADER_ENTER
 
 using ILMTHREAD_NAMESPACE::Mutex;
@@ -51,6 +53,13 @@ struct InputStreamMutex : public Mutex
     OPENEXR_IMF_INTERNAL_NAMESPACE::IStream* is;
     Int64 currentPosition;
 
+    //
+    // Identifies the file in the tile cache when the stream was
+    // opened from a file name (see ImfCachedTile.h); empty for
+    // streams given by the caller, whose tiles are not cached.
+    //
+    std::string fileIdentity;
+
     InputStreamMutex()
     {
         is = 0;
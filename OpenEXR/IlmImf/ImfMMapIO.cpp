@@ -0,0 +1,302 @@
+//
+// SPDX-License-Identifier: BSD-3-Clause
+// Copyright Contributors to the OpenEXR Project.
+//
+
+//-----------------------------------------------------------------------------
+//
+//	Low-level file input for OpenEXR based on memory-mapped files.
+//
+//-----------------------------------------------------------------------------
+
+#include <ImfMMapIO.h>
+#include <ImfStdIO.h>
+#include "Iex.h"
+
+#include <atomic>
+#include <limits>
+#include <string.h>
+#include <errno.h>
+
+#ifdef _WIN32
+# define VC_EXTRALEAN
+# include <windows.h>
+# include <string>
+#else
+# include <sys/types.h>
+# include <sys/stat.h>
+# include <sys/mman.h>
+# include <fcntl.h>
+# include <unistd.h>
+#endif
+
+#include "ImfNamespace.h"
+
+OPENEXR_IMF_INTERNAL_NAMESPACE_SOURCE_ENTER
+
+namespace {
+
+std::atomic<bool> mapInputFiles (false);
+
+
+#ifdef _WIN32
+
+std::wstring
+WidenFilename (const char *filename)
+{
+    std::wstring ret;
+    int fnlen = static_cast<int> (strlen (filename));
+    int len = MultiByteToWideChar (CP_UTF8, 0, filename, fnlen, NULL, 0);
+    if (len > 0)
+    {
+        ret.resize (len);
+        MultiByteToWideChar (CP_UTF8, 0, filename, fnlen, &ret[0], len);
+    }
+    return ret;
+}
+
+
+void
+throwLastError (const char fileName[], const char what[])
+{
+    THROW (IEX_NAMESPACE::InputExc, "Cannot " << what << " file \"" <<
+           fileName << "\" (Windows error " << GetLastError() << ").");
+}
+
+
+char *
+mapFile (const char fileName[], Int64 &size)
+{
+    HANDLE file = CreateFileW (WidenFilename (fileName).c_str(),
+                               GENERIC_READ,
+                               FILE_SHARE_READ | FILE_SHARE_WRITE | FILE_SHARE_DELETE,
+                               NULL,
+                               OPEN_EXISTING,
+                               FILE_ATTRIBUTE_NORMAL,
+                               NULL);
+
+    if (file == INVALID_HANDLE_VALUE)
+        throwLastError (fileName, "open");
+
+    LARGE_INTEGER fileSize;
+    if (!GetFileSizeEx (file, &fileSize))
+    {
+        CloseHandle (file);
+        throwLastError (fileName, "get the size of");
+    }
+
+    size = fileSize.QuadPart;
+
+    if (size == 0)
+    {
+        CloseHandle (file);
+        return 0;
+    }
+
+    if (size > Int64 (std::numeric_limits<SIZE_T>::max()))
+    {
+        CloseHandle (file);
+        THROW (IEX_NAMESPACE::InputExc, "File \"" << fileName << "\" is "
+               "too large to be memory mapped.");
+    }
+
+    HANDLE mapping = CreateFileMappingW (file, NULL, PAGE_READONLY, 0, 0, NULL);
+    CloseHandle (file);
+
+    if (mapping == NULL)
+        throwLastError (fileName, "map");
+
+    void *data = MapViewOfFile (mapping, FILE_MAP_READ, 0, 0, SIZE_T (size));
+    CloseHandle (mapping);
+
+    if (data == NULL)
+        throwLastError (fileName, "map");
+
+    return static_cast<char *> (data);
+}
+
+
+void
+unmapFile (char *data, Int64)
+{
+    UnmapViewOfFile (data);
+}
+
+#else
+
+char *
+mapFile (const char fileName[], Int64 &size)
+{
+    int fd = ::open (fileName, O_RDONLY);
+
+    if (fd < 0)
+        IEX_NAMESPACE::throwErrnoExc();
+
+    struct stat st;
+    if (fstat (fd, &st) != 0)
+    {
+        int err = errno;
+        ::close (fd);
+        IEX_NAMESPACE::throwErrnoExc ("%T.", err);
+    }
+
+    if (!S_ISREG (st.st_mode))
+    {
+        ::close (fd);
+        THROW (IEX_NAMESPACE::InputExc, "File \"" << fileName << "\" is "
+               "not a regular file, and cannot be memory mapped.");
+    }
+
+    size = st.st_size;
+
+    if (size == 0)
+    {
+        ::close (fd);
+        return 0;
+    }
+
+    if (size > Int64 (std::numeric_limits<size_t>::max()))
+    {
+        ::close (fd);
+        THROW (IEX_NAMESPACE::InputExc, "File \"" << fileName << "\" is "
+               "too large to be memory mapped.");
+    }
+
+    //
+    // The mapping holds its own reference to the file,
+    // which can be closed right away.
+    //
+
+    void *data = mmap (0, size_t (size), PROT_READ, MAP_SHARED, fd, 0);
+    int err = errno;
+    ::close (fd);
+
+    if (data == MAP_FAILED)
+        IEX_NAMESPACE::throwErrnoExc ("%T.", err);
+
+    return static_cast<char *> (data);
+}
+
+
+void
+unmapFile (char *data, Int64 size)
+{
+    munmap (data, size_t (size));
+}
+
+#endif
+
+} // namespace
+
+
+MMapIFStream::MMapIFStream (const char fileName[]):
+    OPENEXR_IMF_INTERNAL_NAMESPACE::IStream (fileName),
+    _data (0),
+    _size (0),
+    _pos (0)
+{
+    _data = mapFile (fileName, _size);
+}
+
+
+MMapIFStream::~MMapIFStream ()
+{
+    if (_data)
+        unmapFile (_data, _size);
+}
+
+
+bool
+MMapIFStream::isMemoryMapped () const
+{
+    return true;
+}
+
+
+bool
+MMapIFStream::read (char c[/*n*/], int n)
+{
+    if (n < 0 || _pos > _size || Int64 (n) > _size - _pos)
+    {
+        THROW (IEX_NAMESPACE::InputExc, "Early end of file: read " <<
+               (_pos > _size ? 0 : _size - _pos) <<
+               " out of " << n << " requested bytes.");
+    }
+
+    memcpy (c, _data + _pos, n);
+    _pos += n;
+    return _pos < _size;
+}
+
+
+char *
+MMapIFStream::readMemoryMapped (int n)
+{
+    if (n < 0 || _pos > _size || Int64 (n) > _size - _pos)
+        throw IEX_NAMESPACE::InputExc ("Reading past end of file.");
+
+    char *data = _data + _pos;
+    _pos += n;
+    return data;
+}
+
+
+Int64
+MMapIFStream::tellg ()
+{
+    return _pos;
+}
+
+
+void
+MMapIFStream::seekg (Int64 pos)
+{
+    _pos = pos;
+}
+
+
+Int64
+MMapIFStream::size () const
+{
+    return _size;
+}
+
+
+bool
+memoryMappedInput ()
+{
+    return mapInputFiles;
+}
+
+
+void
+setMemoryMappedInput (bool enabled)
+{
+    mapInputFiles = enabled;
+}
+
+
+IStream *
+openInputStream (const char fileName[])
+{
+    if (mapInputFiles)
+    {
+        //
+        // Fall back to reading files that cannot be mapped; if the
+        // file cannot be opened at all, StdIFStream reports why.
+        //
+
+        try
+        {
+            return new MMapIFStream (fileName);
+        }
+        catch (IEX_NAMESPACE::BaseExc &)
+        {
+        }
+    }
+
+    return new StdIFStream (fileName);
+}
+
+
+OPENEXR_IMF_INTERNAL_NAMESPACE_SOURCE_EXIT
@@ -0,0 +1,109 @@
+//
+// SPDX-License-Identifier: BSD-3-Clause
+// Copyright Contributors to the OpenEXR Project.
+//
+
+#ifndef INCLUDED_IMF_MMAP_IO_H
+#define INCLUDED_IMF_MMAP_IO_H
+
+//-----------------------------------------------------------------------------
+//
+//	Low-level file input for OpenEXR based on memory-mapped files.
+//
+//	The readers detect memory-mapped streams with isMemoryMapped(),
+//	and decode the pixels of uncompressed chunks, and the compressed
+//	data of the others, straight from the mapping instead of copying
+//	them into buffers of their own.  The pages of the file live in
+//	the operating system's page cache, and are shared by all the
+//	processes reading the file.
+//
+//	The files opened by name by InputFile, TiledInputFile,
+//	MultiPartInputFile, DeepScanLineInputFile and DeepTiledInputFile
+//	(and the classes built on them) are memory-mapped once
+//	setMemoryMappedInput(true) is called.  A single file can also be
+//	memory-mapped by passing an MMapIFStream to the constructors of
+//	these classes that take an IStream.
+//
+//-----------------------------------------------------------------------------
+
+#include "ImfIO.h"
+#include "ImfNamespace.h"
+#include "ImfExport.h"
+
+
+OPENEXR_IMF_INTERNAL_NAMESPACE_HEADER_ENTER
+
+//-------------------------------------------
+// class MMapIFStream -- an implementation of
+// class OPENEXR_IMF_INTERNAL_NAMESPACE::IStream
+// that maps a whole file into memory
+//-------------------------------------------
+
+class MMapIFStream: public OPENEXR_IMF_INTERNAL_NAMESPACE::IStream
+{
+  public:
+
+    //----------------------------------------------------------
+    // A constructor that opens and maps the file with the given
+    // name.  The destructor will unmap the file.  Mapping fails
+    // for files that are not regular files, and for files larger
+    // than the address space of the process.
+    //
+    // The file must not be truncated while it is mapped: reading
+    // pages that are no longer in the file crashes the process.
+    //----------------------------------------------------------
+
+    IMF_EXPORT
+    MMapIFStream (const char fileName[]);
+
+    IMF_EXPORT
+    virtual ~MMapIFStream ();
+
+    IMF_EXPORT
+    virtual bool	isMemoryMapped () const;
+    IMF_EXPORT
+    virtual bool	read (char c[/*n*/], int n);
+    IMF_EXPORT
+    virtual char *	readMemoryMapped (int n);
+    IMF_EXPORT
+    virtual Int64	tellg ();
+    IMF_EXPORT
+    virtual void	seekg (Int64 pos);
+
+
+    //---------------------------------
+    // The size of the file, in bytes.
+    //---------------------------------
+
+    IMF_EXPORT
+    Int64		size () const;
+
+  private:
+
+    char *		_data;
+    Int64		_size;
+    Int64		_pos;
+};
+
+
+//-----------------------------------------------------------------------------
+// Query and control whether the input files opened by name are memory-
+// mapped.  The default is to read them through a StdIFStream.
+//-----------------------------------------------------------------------------
+
+IMF_EXPORT bool		memoryMappedInput ();
+IMF_EXPORT void		setMemoryMappedInput (bool enabled);
+
+
+//-----------------------------------------------------------------------------
+// Open the file with the given name for reading, as an MMapIFStream
+// if memoryMappedInput() is set and the file can be mapped, or as a
+// StdIFStream otherwise.  The caller owns the returned stream.
+//-----------------------------------------------------------------------------
+
+IMF_EXPORT IStream *	openInputStream (const char fileName[]);
+
+
+OPENEXR_IMF_INTERNAL_NAMESPACE_HEADER_EXIT
+
+#endif
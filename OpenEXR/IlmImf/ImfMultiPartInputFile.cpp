@@ -38,7 +38,8 @@
 #include "ImfChromaticitiesAttribute.h"
 #include "ImfBoxAttribute.h"
 #include "ImfFloatAttribute.h"
-#include "ImfStdIO.h"
+#include "ImfMMapIO.h"
+#include "ImfCachedTile.h"
 #include "ImfTileOffsets.h"
 #include "ImfMisc.h"
 #include "ImfTiledMisc.h"
@@ -137,7 +138,8 @@ MultiPartInputFile::MultiPartInputFile(const char fileName[],
 {
     try
     {
-        _data->is = new StdIFStream (fileName);
+        _data->is = openInputStream (fileName);
+        _data->fileIdentity = tileCacheFileIdentity (fileName);
         initialize();
     }
     catch (IEX_NAMESPACE::BaseExc &e)
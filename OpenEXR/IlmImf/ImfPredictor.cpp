@@ -0,0 +1,198 @@
+//
+// SPDX-License-Identifier: BSD-3-Clause
+// Copyright Contributors to the OpenEXR Project.
+//
+
+//-----------------------------------------------------------------------------
+//
+//	Byte reordering and predictor stages of the ZIP and RLE compressors
+//
+//-----------------------------------------------------------------------------
+
+#include "ImfPredictor.h"
+#include "ImfSimd.h"
+#include "ImfNamespace.h"
+
+OPENEXR_IMF_INTERNAL_NAMESPACE_SOURCE_ENTER
+
+
+void
+splitBytes (const char *in, size_t size, char *out)
+{
+    char *t1 = out;
+    char *t2 = out + (size + 1) / 2;
+    const char *stop = in + size;
+
+#ifdef IMF_HAVE_SSE2
+    //
+    // Split 32 bytes at a time: the even bytes are the low halves
+    // of 16-bit lanes, the odd bytes the high halves.
+    //
+
+    const __m128i lowMask = _mm_set1_epi16 (0x00ff);
+
+    for (; in + 32 <= stop; in += 32, t1 += 16, t2 += 16)
+    {
+        __m128i a = _mm_loadu_si128 ((const __m128i *) in);
+        __m128i b = _mm_loadu_si128 ((const __m128i *) (in + 16));
+
+        __m128i even = _mm_packus_epi16 (_mm_and_si128 (a, lowMask),
+                                         _mm_and_si128 (b, lowMask));
+
+        __m128i odd = _mm_packus_epi16 (_mm_srli_epi16 (a, 8),
+                                        _mm_srli_epi16 (b, 8));
+
+        _mm_storeu_si128 ((__m128i *) t1, even);
+        _mm_storeu_si128 ((__m128i *) t2, odd);
+    }
+#endif
+
+    while (true)
+    {
+        if (in < stop)
+            *(t1++) = *(in++);
+        else
+            break;
+
+        if (in < stop)
+            *(t2++) = *(in++);
+        else
+            break;
+    }
+}
+
+
+void
+interleaveBytes (const char *in, size_t size, char *out)
+{
+    const char *t1 = in;
+    const char *t2 = in + (size + 1) / 2;
+    char *s = out;
+    char *const stop = s + size;
+
+#ifdef IMF_HAVE_SSE2
+    for (; s + 32 <= stop; t1 += 16, t2 += 16, s += 32)
+    {
+        __m128i a = _mm_loadu_si128 ((const __m128i *) t1);
+        __m128i b = _mm_loadu_si128 ((const __m128i *) t2);
+
+        _mm_storeu_si128 ((__m128i *) s, _mm_unpacklo_epi8 (a, b));
+        _mm_storeu_si128 ((__m128i *) (s + 16), _mm_unpackhi_epi8 (a, b));
+    }
+#endif
+
+    while (true)
+    {
+        if (s < stop)
+            *(s++) = *(t1++);
+        else
+            break;
+
+        if (s < stop)
+            *(s++) = *(t2++);
+        else
+            break;
+    }
+}
+
+
+void
+predictBytes (char *buf, size_t size)
+{
+    //
+    // Work from the end of the buffer towards its start, so that
+    // the previous byte of each byte is still the original one.
+    //
+
+    unsigned char *start = (unsigned char *) buf + 1;
+    unsigned char *t = (unsigned char *) buf + size;
+
+#ifdef IMF_HAVE_SSE2
+    const __m128i offset = _mm_set1_epi8 (-128);
+
+    while (t - start >= 16)
+    {
+        t -= 16;
+
+        __m128i v = _mm_loadu_si128 ((const __m128i *) t);
+        __m128i p = _mm_loadu_si128 ((const __m128i *) (t - 1));
+
+        _mm_storeu_si128 ((__m128i *) t,
+                          _mm_add_epi8 (_mm_sub_epi8 (v, p), offset));
+    }
+#endif
+
+    while (t > start)
+    {
+        --t;
+        t[0] = int (t[0]) - int (t[-1]) + (128 + 256);
+    }
+}
+
+
+void
+reconstructBytes (char *buf, size_t size)
+{
+    unsigned char *t = (unsigned char *) buf + 1;
+    unsigned char *stop = (unsigned char *) buf + size;
+
+#ifdef IMF_HAVE_SSE2
+    const size_t vSize = size / sizeof (__m128i);
+
+    if (vSize > 0)
+    {
+        const __m128i c = _mm_set1_epi8 (-128);
+
+        //
+        // The first byte doesn't have 128 added to it by predictBytes(),
+        // so it must not be subtracted here.  To make the loop uniform,
+        // add 128 to the first byte; the loop subtracts it again.
+        //
+
+        buf[0] += -128;
+
+        __m128i *vBuf = reinterpret_cast<__m128i *> (buf);
+        __m128i vPrev = _mm_setzero_si128();
+
+        for (size_t i = 0; i < vSize; ++i)
+        {
+            __m128i d = _mm_add_epi8 (_mm_loadu_si128 (vBuf), c);
+
+            //
+            // Compute the prefix sum of the bytes, and add
+            // the last byte of the previous chunk.
+            //
+
+            d = _mm_add_epi8 (d, _mm_slli_si128 (d, 1));
+            d = _mm_add_epi8 (d, _mm_slli_si128 (d, 2));
+            d = _mm_add_epi8 (d, _mm_slli_si128 (d, 4));
+            d = _mm_add_epi8 (d, _mm_slli_si128 (d, 8));
+            d = _mm_add_epi8 (d, vPrev);
+
+            _mm_storeu_si128 (vBuf++, d);
+
+            //
+            // Broadcast the last byte of the result to all bytes
+            // of vPrev for the next chunk.
+            //
+
+            vPrev = _mm_srli_si128 (d, 15);
+            vPrev = _mm_unpacklo_epi8 (vPrev, vPrev);
+            vPrev = _mm_unpacklo_epi16 (vPrev, vPrev);
+            vPrev = _mm_shuffle_epi32 (vPrev, 0);
+        }
+
+        t = (unsigned char *) vBuf;
+    }
+#endif
+
+    while (t < stop)
+    {
+        int d = int (t[-1]) + int (t[0]) - 128;
+        t[0] = d;
+        ++t;
+    }
+}
+
+
+OPENEXR_IMF_INTERNAL_NAMESPACE_SOURCE_EXIT
@@ -0,0 +1,50 @@
+//
+// SPDX-License-Identifier: BSD-3-Clause
+// Copyright Contributors to the OpenEXR Project.
+//
+
+#ifndef INCLUDED_IMF_PREDICTOR_H
+#define INCLUDED_IMF_PREDICTOR_H
+
+//-----------------------------------------------------------------------------
+//
+//	The byte reordering and predictor stages that the ZIP and RLE
+//	compressors apply to pixel data before encoding it:
+//
+//	splitBytes() copies the bytes at even offsets to the first half
+//	of the output, and those at odd offsets to the second half, so
+//	that the high and low bytes of most pixel values are separated.
+//
+//	predictBytes() replaces each byte except the first with its
+//	difference to the previous byte, plus 128.
+//
+//	reconstructBytes() and interleaveBytes() undo predictBytes()
+//	and splitBytes().
+//
+//	The functions use SSE2 when it is available; their results are
+//	the same either way.
+//
+//-----------------------------------------------------------------------------
+
+#include "ImfNamespace.h"
+#include "ImfExport.h"
+
+#include <cstddef>
+
+OPENEXR_IMF_INTERNAL_NAMESPACE_HEADER_ENTER
+
+IMF_EXPORT
+void splitBytes (const char *in, size_t size, char *out);
+
+IMF_EXPORT
+void interleaveBytes (const char *in, size_t size, char *out);
+
+IMF_EXPORT
+void predictBytes (char *buf, size_t size);
+
+IMF_EXPORT
+void reconstructBytes (char *buf, size_t size);
+
+OPENEXR_IMF_INTERNAL_NAMESPACE_HEADER_EXIT
+
+#endif
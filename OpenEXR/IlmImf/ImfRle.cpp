@@ -34,8 +34,13 @@
 
 #include <string.h>
 #include "ImfRle.h"
+#include "ImfSimd.h"
 #include "ImfNamespace.h"
 
+#if defined IMF_HAVE_SSE2 && defined _MSC_VER
+#include <intrin.h>
+#endif
+
 OPENEXR_IMF_INTERNAL_NAMESPACE_SOURCE_ENTER
 
 namespace {
@@ -43,8 +48,92 @@ namespace {
 const int MIN_RUN_LENGTH = 3;
 const int MAX_RUN_LENGTH = 127;
 
+
+#ifdef IMF_HAVE_SSE2
+
+//
+// Index of the lowest set bit in a non-zero mask
+//
+
+inline int
+firstBit (int mask)
+{
+#ifdef _MSC_VER
+    unsigned long i;
+    _BitScanForward (&i, mask);
+    return int (i);
+#else
+    return __builtin_ctz (mask);
+#endif
+}
+
+#endif
+
+
+//
+// Return the first position, starting at p and before end, where
+// the byte differs from value, or end if there is no such position.
+//
+
+inline const char *
+findMismatch (const char *p, const char *end, char value)
+{
+#ifdef IMF_HAVE_SSE2
+    const __m128i v = _mm_set1_epi8 (value);
+
+    for (; p + 16 <= end; p += 16)
+    {
+	__m128i eq = _mm_cmpeq_epi8 (_mm_loadu_si128 ((const __m128i *) p), v);
+	int mask = ~_mm_movemask_epi8 (eq) & 0xffff;
+
+	if (mask)
+	    return p + firstBit (mask);
+    }
+#endif
+
+    while (p < end && *p == value)
+	++p;
+
+    return p;
+}
+
+
+//
+// Return the first position, starting at p and before end, where
+// a run of three equal bytes starts, within the buffer that ends at
+// inEnd, or end if there is no such position.
+//
+
+inline const char *
+findRun (const char *p, const char *end, const char *inEnd)
+{
+#ifdef IMF_HAVE_SSE2
+    for (; p + 16 <= end && p + 18 <= inEnd; p += 16)
+    {
+	__m128i a = _mm_loadu_si128 ((const __m128i *) p);
+	__m128i b = _mm_loadu_si128 ((const __m128i *) (p + 1));
+	__m128i c = _mm_loadu_si128 ((const __m128i *) (p + 2));
+
+	int mask = _mm_movemask_epi8 (_mm_and_si128 (_mm_cmpeq_epi8 (a, b),
+						     _mm_cmpeq_epi8 (b, c)));
+
+	if (mask)
+	    return p + firstBit (mask);
+    }
+#endif
+
+    while (p < end &&
+	   ((p + 1 >= inEnd || *p != *(p + 1)) ||
+	    (p + 2 >= inEnd || *(p + 1) != *(p + 2))))
+    {
+	++p;
+    }
+
+    return p;
 }
 
+} // namespace
+
 //
 // Compress an array of bytes, using run-length encoding,
 // and return the length of the compressed data.
@@ -60,12 +149,10 @@ rleCompress (int inLength, const char in[], signed char out[])
 
     while (runStart < inEnd)
     {
-	while (runEnd < inEnd &&
-	       *runStart == *runEnd &&
-	       runEnd - runStart - 1 < MAX_RUN_LENGTH)
-	{
-	    ++runEnd;
-	}
+	runEnd = findMismatch (runEnd,
+			       inEnd - runStart > MAX_RUN_LENGTH?
+				   runStart + MAX_RUN_LENGTH + 1: inEnd,
+			       *runStart);
 
 	if (runEnd - runStart >= MIN_RUN_LENGTH)
 	{
@@ -83,22 +170,16 @@ rleCompress (int inLength, const char in[], signed char out[])
 	    // Uncompressable run
 	    //
 
-	    while (runEnd < inEnd &&
-		   ((runEnd + 1 >= inEnd ||
-		     *runEnd != *(runEnd + 1)) ||
-		    (runEnd + 2 >= inEnd ||
-		     *(runEnd + 1) != *(runEnd + 2))) &&
-		   runEnd - runStart < MAX_RUN_LENGTH)
-	    {
-		++runEnd;
-	    }
+	    runEnd = findRun (runEnd,
+			      inEnd - runStart > MAX_RUN_LENGTH?
+				  runStart + MAX_RUN_LENGTH: inEnd,
+			      inEnd);
 
 	    *outWrite++ = runStart - runEnd;
 
-	    while (runStart < runEnd)
-	    {
-		*outWrite++ = *(signed char *) (runStart++);
-	    }
+	    memcpy (outWrite, runStart, runEnd - runStart);
+	    outWrite += runEnd - runStart;
+	    runStart = runEnd;
 	}
 
 	++runEnd;
@@ -43,6 +43,7 @@
 #include "ImfRleCompressor.h"
 #include "ImfCheckedArithmetic.h"
 #include "ImfRle.h"
+#include "ImfPredictor.h"
 #include "Iex.h"
 #include "ImfNamespace.h"
 
@@ -94,45 +95,11 @@ RleCompressor::compress (const char *inPtr,
     }
 
     //
-    // Reorder the pixel data.
+    // Reorder the pixel data, and apply the predictor.
     //
 
-    {
-	char *t1 = _tmpBuffer;
-	char *t2 = _tmpBuffer + (inSize + 1) / 2;
-	const char *stop = inPtr + inSize;
-
-	while (true)
-	{
-	    if (inPtr < stop)
-		*(t1++) = *(inPtr++);
-	    else
-		break;
-
-	    if (inPtr < stop)
-		*(t2++) = *(inPtr++);
-	    else
-		break;
-	}
-    }
-
-    //
-    // Predictor.
-    //
-
-    {
-	unsigned char *t = (unsigned char *) _tmpBuffer + 1;
-	unsigned char *stop = (unsigned char *) _tmpBuffer + inSize;
-	int p = t[-1];
-
-	while (t < stop)
-	{
-	    int d = int (t[0]) - p + (128 + 256);
-	    p = t[0];
-	    t[0] = d;
-	    ++t;
-	}
-    }
+    splitBytes (inPtr, inSize, _tmpBuffer);
+    predictBytes (_tmpBuffer, inSize);
 
     //
     // Run-length encode the data.
@@ -173,44 +140,11 @@ RleCompressor::uncompress (const char *inPtr,
     }
 
     //
-    // Predictor.
+    // Undo the predictor, and reorder the pixel data.
     //
 
-    {
-	unsigned char *t = (unsigned char *) _tmpBuffer + 1;
-	unsigned char *stop = (unsigned char *) _tmpBuffer + outSize;
-
-	while (t < stop)
-	{
-	    int d = int (t[-1]) + int (t[0]) - 128;
-	    t[0] = d;
-	    ++t;
-	}
-    }
-
-    //
-    // Reorder the pixel data.
-    //
-
-    {
-	const char *t1 = _tmpBuffer;
-	const char *t2 = _tmpBuffer + (outSize + 1) / 2;
-	char *s = _outBuffer;
-	char *stop = s + outSize;
-
-	while (true)
-	{
-	    if (s < stop)
-		*(s++) = *(t1++);
-	    else
-		break;
-
-	    if (s < stop)
-		*(s++) = *(t2++);
-	    else
-		break;
-	}
-    }
+    reconstructBytes (_tmpBuffer, outSize);
+    interleaveBytes (_tmpBuffer, outSize, _outBuffer);
 
     outPtr = _outBuffer;
     return outSize;
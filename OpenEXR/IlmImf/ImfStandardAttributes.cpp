@@ -121,5 +121,6 @@ IMF_STD_ATTRIBUTE_IMP (worldToNDC, WorldToNDC, M44f)
 IMF_STD_ATTRIBUTE_IMP (deepImageState, DeepImageState, DeepImageState)
 IMF_STD_ATTRIBUTE_IMP (originalDataWindow, OriginalDataWindow, Box2i)
 IMF_STD_ATTRIBUTE_IMP (dwaCompressionLevel, DwaCompressionLevel, float)
+IMF_STD_ATTRIBUTE_IMP (zipCompressionLevel, ZipCompressionLevel, int)
 
 OPENEXR_IMF_INTERNAL_NAMESPACE_SOURCE_EXIT
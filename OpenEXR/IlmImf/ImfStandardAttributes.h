@@ -60,6 +60,7 @@
 #include "ImfEnvmapAttribute.h"
 #include "ImfDeepImageStateAttribute.h"
 #include "ImfFloatAttribute.h"
+#include "ImfIntAttribute.h"
 #include "ImfKeyCodeAttribute.h"
 #include "ImfMatrixAttribute.h"
 #include "ImfRationalAttribute.h"
@@ -383,4 +384,14 @@ IMF_STD_ATTRIBUTE_DEF
 IMF_STD_ATTRIBUTE_DEF (dwaCompressionLevel, DwaCompressionLevel, float)
 
 
+//
+// zipCompressionLevel -- sets the deflate level, from 0 (fastest) to
+// 9 (smallest files), for images compressed with the ZIP or ZIPS method.
+// If the attribute is not present, or out of range, zlib's default
+// level is used.
+//
+
+IMF_STD_ATTRIBUTE_DEF (zipCompressionLevel, ZipCompressionLevel, int)
+
+
 #endif
@@ -0,0 +1,314 @@
+//
+// SPDX-License-Identifier: BSD-3-Clause
+// Copyright Contributors to the OpenEXR Project.
+//
+
+//-----------------------------------------------------------------------------
+//
+//	A process-wide cache of decompressed tiles.
+//
+//-----------------------------------------------------------------------------
+
+#include <ImfTileCache.h>
+#include "ImfCachedTile.h"
+#include "IlmThreadMutex.h"
+
+#include <atomic>
+#include <list>
+#include <map>
+#include <sstream>
+
+#include <sys/types.h>
+#include <sys/stat.h>
+
+#include "ImfNamespace.h"
+
+OPENEXR_IMF_INTERNAL_NAMESPACE_SOURCE_ENTER
+
+using ILMTHREAD_NAMESPACE::Mutex;
+using ILMTHREAD_NAMESPACE::Lock;
+using std::string;
+using std::shared_ptr;
+
+namespace {
+
+struct TileKey
+{
+    string	fileName;
+    string	fileIdentity;
+    int		partNumber;
+    int		dx;
+    int		dy;
+    int		lx;
+    int		ly;
+
+    bool
+    operator < (const TileKey &other) const
+    {
+        if (dx != other.dx)
+            return dx < other.dx;
+
+        if (dy != other.dy)
+            return dy < other.dy;
+
+        if (lx != other.lx)
+            return lx < other.lx;
+
+        if (ly != other.ly)
+            return ly < other.ly;
+
+        if (partNumber != other.partNumber)
+            return partNumber < other.partNumber;
+
+        if (fileName != other.fileName)
+            return fileName < other.fileName;
+
+        return fileIdentity < other.fileIdentity;
+    }
+};
+
+
+//
+// The tiles are kept in a list, from the most recently used to the
+// least recently used, and indexed by a map from their keys to
+// their positions in the list.
+//
+
+struct TileCache: public Mutex
+{
+    typedef std::pair<TileKey, shared_ptr<const CachedTile> > Entry;
+    typedef std::list<Entry> EntryList;
+    typedef std::map<TileKey, EntryList::iterator> EntryMap;
+
+    std::atomic<size_t>	maxBytes;
+    size_t		bytes;
+    Int64		hits;
+    Int64		misses;
+    EntryList		entries;
+    EntryMap		index;
+
+    TileCache (): maxBytes (0), bytes (0), hits (0), misses (0) {}
+
+    void	erase (EntryList::iterator i);
+    void	shrink (size_t maxBytes);
+};
+
+
+void
+TileCache::erase (EntryList::iterator i)
+{
+    bytes -= i->second->data.size();
+    index.erase (i->first);
+    entries.erase (i);
+}
+
+
+void
+TileCache::shrink (size_t maxBytes)
+{
+    while (bytes > maxBytes)
+        erase (--entries.end());
+}
+
+
+TileCache &
+tileCache ()
+{
+    static TileCache cache;
+    return cache;
+}
+
+} // namespace
+
+
+size_t
+tileCacheSize ()
+{
+    return tileCache().maxBytes;
+}
+
+
+void
+setTileCacheSize (size_t maxBytes)
+{
+    TileCache &cache = tileCache();
+    Lock lock (cache);
+
+    cache.maxBytes = maxBytes;
+    cache.shrink (maxBytes);
+}
+
+
+void
+clearTileCache ()
+{
+    TileCache &cache = tileCache();
+    Lock lock (cache);
+
+    cache.shrink (0);
+}
+
+
+void
+clearTileCache (const char fileName[])
+{
+    TileCache &cache = tileCache();
+    Lock lock (cache);
+
+    for (TileCache::EntryList::iterator i = cache.entries.begin();
+         i != cache.entries.end();)
+    {
+        TileCache::EntryList::iterator next = i;
+        ++next;
+
+        if (i->first.fileName == fileName)
+            cache.erase (i);
+
+        i = next;
+    }
+}
+
+
+TileCacheStats
+tileCacheStats ()
+{
+    TileCache &cache = tileCache();
+    Lock lock (cache);
+
+    TileCacheStats stats;
+    stats.hits = cache.hits;
+    stats.misses = cache.misses;
+    stats.numTiles = cache.index.size();
+    stats.bytes = cache.bytes;
+    return stats;
+}
+
+
+void
+resetTileCacheStats ()
+{
+    TileCache &cache = tileCache();
+    Lock lock (cache);
+
+    cache.hits = 0;
+    cache.misses = 0;
+}
+
+
+string
+tileCacheFileIdentity (const char fileName[])
+{
+    std::ostringstream identity;
+
+#ifdef _WIN32
+    struct _stat64 st;
+
+    if (_stat64 (fileName, &st) != 0)
+        return string();
+
+    identity << st.st_dev << ':' << st.st_size << ':' << st.st_mtime;
+#else
+    struct stat st;
+
+    if (stat (fileName, &st) != 0)
+        return string();
+
+    identity << st.st_dev << ':' << st.st_ino << ':' << st.st_size << ':';
+
+  #if defined (__APPLE__)
+    identity << st.st_mtimespec.tv_sec << '.' << st.st_mtimespec.tv_nsec;
+  #elif defined (__linux__)
+    identity << st.st_mtim.tv_sec << '.' << st.st_mtim.tv_nsec;
+  #else
+    identity << st.st_mtime;
+  #endif
+#endif
+
+    return identity.str();
+}
+
+
+shared_ptr<const CachedTile>
+findCachedTile (const string &fileName,
+                const string &fileIdentity,
+                int partNumber,
+                int dx, int dy,
+                int lx, int ly,
+                size_t size)
+{
+    TileKey key = {fileName, fileIdentity, partNumber, dx, dy, lx, ly};
+
+    TileCache &cache = tileCache();
+    Lock lock (cache);
+
+    TileCache::EntryMap::iterator i = cache.index.find (key);
+
+    if (i == cache.index.end())
+    {
+        ++cache.misses;
+        return shared_ptr<const CachedTile>();
+    }
+
+    const CachedTile &tile = *i->second->second;
+
+    if (tile.data.size() != size ||
+        (tile.format != Compressor::NATIVE && tile.format != Compressor::XDR))
+    {
+        ++cache.misses;
+        cache.erase (i->second);
+        return shared_ptr<const CachedTile>();
+    }
+
+    ++cache.hits;
+
+    //
+    // Move the tile to the front of the list
+    //
+
+    cache.entries.splice (cache.entries.begin(), cache.entries, i->second);
+    return i->second->second;
+}
+
+
+void
+cacheTile (const string &fileName,
+           const string &fileIdentity,
+           int partNumber,
+           int dx, int dy,
+           int lx, int ly,
+           const char *data,
+           size_t size,
+           Compressor::Format format)
+{
+    if (size > tileCache().maxBytes)
+        return;
+
+    //
+    // Copy the tile before taking the lock
+    //
+
+    shared_ptr<CachedTile> tile (new CachedTile);
+    tile->data.assign (data, data + size);
+    tile->format = format;
+
+    TileKey key = {fileName, fileIdentity, partNumber, dx, dy, lx, ly};
+
+    TileCache &cache = tileCache();
+    Lock lock (cache);
+
+    //
+    // Another thread may have added the same tile in the meantime,
+    // or the cache may have been made smaller.
+    //
+
+    if (size > cache.maxBytes || cache.index.find (key) != cache.index.end())
+        return;
+
+    cache.shrink (cache.maxBytes - size);
+    cache.entries.push_front (TileCache::Entry (key, tile));
+    cache.index[key] = cache.entries.begin();
+    cache.bytes += size;
+}
+
+
+OPENEXR_IMF_INTERNAL_NAMESPACE_SOURCE_EXIT
@@ -0,0 +1,85 @@
+//
+// SPDX-License-Identifier: BSD-3-Clause
+// Copyright Contributors to the OpenEXR Project.
+//
+
+#ifndef INCLUDED_IMF_TILE_CACHE_H
+#define INCLUDED_IMF_TILE_CACHE_H
+
+//-----------------------------------------------------------------------------
+//
+//	A process-wide cache of decompressed tiles.
+//
+//	TiledInputFile (and the classes built on it, TiledInputPart and
+//	TiledRgbaInputFile) look up the tiles they read in the cache,
+//	and add the tiles they decompress to it.  A tile found in the
+//	cache is neither read from the file nor decompressed again, so
+//	reading the same tiles repeatedly, as a renderer or an image
+//	viewer does, costs only the conversion of the pixels into the
+//	frame buffer.
+//
+//	The cached tiles hold all the channels of the file, so they can
+//	be read into any frame buffer.  They are keyed by file name,
+//	part number, level and tile coordinates, and by the device,
+//	inode, size and modification time of the file, so that a file
+//	that is rewritten does not find the tiles of the old one.  Only
+//	the files opened by name are cached; the tiles read through an
+//	IStream given by the caller are not.  clearTileCache(fileName)
+//	frees the tiles of a file that is no longer read.
+//
+//	The cache holds up to tileCacheSize() bytes of pixel data,
+//	discarding the least recently used tiles when it is full.  The
+//	size is zero, and the cache disabled, until setTileCacheSize()
+//	is called.  All the functions may be called from any thread.
+//
+//-----------------------------------------------------------------------------
+
+#include "ImfInt64.h"
+#include "ImfNamespace.h"
+#include "ImfExport.h"
+
+#include <cstddef>
+
+
+OPENEXR_IMF_INTERNAL_NAMESPACE_HEADER_ENTER
+
+//-----------------------------------------------------------------------------
+// Query and set the maximum number of bytes of pixel data that the
+// cache holds.  Reducing the size discards tiles right away; zero
+// disables the cache and empties it.
+//-----------------------------------------------------------------------------
+
+IMF_EXPORT size_t	tileCacheSize ();
+IMF_EXPORT void		setTileCacheSize (size_t maxBytes);
+
+
+//-----------------------------------------------------------------------------
+// Discard the cached tiles of all files, or of the file with the
+// given name.
+//-----------------------------------------------------------------------------
+
+IMF_EXPORT void		clearTileCache ();
+IMF_EXPORT void		clearTileCache (const char fileName[]);
+
+
+//-----------------------------------------------------------------------------
+// The number of tiles found in the cache (hits) and not found in it
+// (misses) since the counters were last reset, and the number and
+// total size of the tiles the cache holds.
+//-----------------------------------------------------------------------------
+
+struct TileCacheStats
+{
+    Int64	hits;
+    Int64	misses;
+    size_t	numTiles;
+    size_t	bytes;
+};
+
+IMF_EXPORT TileCacheStats	tileCacheStats ();
+IMF_EXPORT void			resetTileCacheStats ();
+
+
+OPENEXR_IMF_INTERNAL_NAMESPACE_HEADER_EXIT
+
+#endif
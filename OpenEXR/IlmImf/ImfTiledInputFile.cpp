@@ -43,7 +43,9 @@
 #include "ImfChannelList.h"
 #include "ImfMisc.h"
 #include "ImfTiledMisc.h"
-#include "ImfStdIO.h"
+#include "ImfMMapIO.h"
+#include "ImfTileCache.h"
+#include "ImfCachedTile.h"
 #include "ImfCompressor.h"
 #include "ImfXdr.h"
 #include "ImfConvert.h"
@@ -145,6 +147,9 @@ struct TileBuffer
     int			ly;
     bool		hasException;
     string		exception;
+    std::shared_ptr<const CachedTile> cachedTile; // tile found in the cache
+    bool		addToCache;	// add the tile to the cache once
+					// it has been decompressed
 
      TileBuffer (Compressor * const comp);
     ~TileBuffer ();
@@ -175,6 +180,7 @@ TileBuffer::TileBuffer (Compressor *comp):
     ly (-1),
     hasException (false),
     exception (),
+    addToCache (false),
     _sem (1)
 {
     // empty
@@ -558,9 +564,11 @@ TileBufferTask::TileBufferTask
 TileBufferTask::~TileBufferTask ()
 {
     //
-    // Signal that the tile buffer is now free
+    // Let go of the cached tile, and signal
+    // that the tile buffer is now free
     //
 
+    _tileBuffer->cachedTile.reset();
     _tileBuffer->post ();
 }
 
@@ -595,7 +603,17 @@ TileBufferTask::execute ()
         // Uncompress the data, if necessary
         //
     
-        if (_tileBuffer->compressor && _tileBuffer->dataSize < sizeOfTile)
+        if (_tileBuffer->cachedTile)
+        {
+            //
+            // The tile was found in the tile cache
+            //
+
+            _tileBuffer->format = _tileBuffer->cachedTile->format;
+            _tileBuffer->dataSize = _tileBuffer->cachedTile->data.size();
+            _tileBuffer->uncompressedData = _tileBuffer->cachedTile->data.data();
+        }
+        else if (_tileBuffer->compressor && _tileBuffer->dataSize < sizeOfTile)
         {
             _tileBuffer->format = _tileBuffer->compressor->format();
 
@@ -613,6 +631,18 @@ TileBufferTask::execute ()
             _tileBuffer->format = Compressor::XDR;
             _tileBuffer->uncompressedData = _tileBuffer->buffer;
         }
+
+        if (_tileBuffer->addToCache && _tileBuffer->dataSize == sizeOfTile)
+        {
+            cacheTile (_ifd->_streamData->is->fileName(),
+                       _ifd->_streamData->fileIdentity,
+                       _ifd->partNumber,
+                       _tileBuffer->dx, _tileBuffer->dy,
+                       _tileBuffer->lx, _tileBuffer->ly,
+                       _tileBuffer->uncompressedData,
+                       sizeOfTile,
+                       _tileBuffer->format);
+        }
     
         //
         // Convert the tile of pixel data back from the machine-independent
@@ -711,12 +741,14 @@ newTileBufferTask
      TiledInputFile::Data *ifd,
      int number,
      int dx, int dy,
-     int lx, int ly)
+     int lx, int ly,
+     bool useCache)
 {
     //
     // Wait for a tile buffer to become available,
     // fill the buffer with raw data from the file,
-    // and create a new TileBufferTask whose execute()
+    // or with the tile from the tile cache, and
+    // create a new TileBufferTask whose execute()
     // method will uncompress the tile and copy the
     // tile's pixels into the frame buffer.
     //
@@ -734,9 +766,33 @@ newTileBufferTask
 
 	tileBuffer->uncompressedData = 0;
 
-	readTileData (streamData, ifd, dx, dy, lx, ly,
-		      tileBuffer->buffer,
-		      tileBuffer->dataSize);
+	if (useCache)
+	{
+	    Box2i tileRange = OPENEXR_IMF_INTERNAL_NAMESPACE::dataWindowForTile (
+		    ifd->tileDesc,
+		    ifd->minX, ifd->maxX,
+		    ifd->minY, ifd->maxY,
+		    dx, dy, lx, ly);
+
+	    size_t sizeOfTile = ifd->bytesPerPixel *
+				(tileRange.max.x - tileRange.min.x + 1) *
+				(tileRange.max.y - tileRange.min.y + 1);
+
+	    tileBuffer->cachedTile = findCachedTile (streamData->is->fileName(),
+						     streamData->fileIdentity,
+						     ifd->partNumber,
+						     dx, dy, lx, ly,
+						     sizeOfTile);
+	}
+
+	tileBuffer->addToCache = useCache && !tileBuffer->cachedTile;
+
+	if (!tileBuffer->cachedTile)
+	{
+	    readTileData (streamData, ifd, dx, dy, lx, ly,
+			  tileBuffer->buffer,
+			  tileBuffer->dataSize);
+	}
     }
     catch (...)
     {
@@ -746,6 +802,7 @@ newTileBufferTask
 	// re-throw the exception.
 	//
 
+	tileBuffer->cachedTile.reset();
 	tileBuffer->post();
 	throw;
     }
@@ -774,7 +831,7 @@ TiledInputFile::TiledInputFile (const char fileName[], int numThreads):
     {
         try
         {
-            is = new StdIFStream (fileName);
+            is = openInputStream (fileName);
             readMagicNumberAndVersionField(*is, _data->version);
 
             //
@@ -783,11 +840,14 @@ TiledInputFile::TiledInputFile (const char fileName[], int numThreads):
             if (isMultiPart(_data->version))
             {
                 compatibilityInitialize(*is);
+                _data->_streamData->fileIdentity = tileCacheFileIdentity (fileName);
                 return;
             }
 
             _data->_streamData = new InputStreamMutex();
             _data->_streamData->is = is;
+            _data->_streamData->fileIdentity = tileCacheFileIdentity (fileName);
+            _data->memoryMapped = is->isMemoryMapped();
             _data->header.readFrom (*_data->_streamData->is, _data->version);
 
             initialize();
@@ -1328,6 +1388,8 @@ TiledInputFile::readTiles (int dx1, int dx2, int dy1, int dy2, int lx, int ly)
         {
             TaskGroup taskGroup;
             int tileNumber = 0;
+            bool useCache = tileCacheSize() > 0 &&
+                            !_data->_streamData->fileIdentity.empty();
     
             for (int dy = dyStart; dy != dyStop; dy += dY)
             {
@@ -1343,7 +1405,8 @@ TiledInputFile::readTiles (int dx1, int dx2, int dy1, int dy2, int lx, int ly)
                                                                   _data,
                                                                   tileNumber++,
                                                                   dx, dy,
-                                                                  lx, ly));
+                                                                  lx, ly,
+                                                                  useCache));
                 }
             }
 
@@ -1664,6 +1727,17 @@ TiledInputFile::dataWindowForTile (int dx, int dy, int lx, int ly) const
 }
 
 
+void
+TiledInputFile::setFileIdentity (const std::string &identity)
+{
+    //
+    // Called by InputFile, which opened the file by name
+    //
+
+    _data->_streamData->fileIdentity = identity;
+}
+
+
 bool
 TiledInputFile::isValidTile (int dx, int dy, int lx, int ly) const
 {
@@ -411,6 +411,8 @@ class TiledInputFile : public GenericInputFile
     void                multiPartInitialize(InputPartData* part);
     void                compatibilityInitialize(OPENEXR_IMF_INTERNAL_NAMESPACE::IStream& is);
 
+    void		setFileIdentity (const std::string &identity);
+
     bool		isValidTile (int dx, int dy,
 				     int lx, int ly) const;
 
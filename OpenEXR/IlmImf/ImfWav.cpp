@@ -46,6 +46,7 @@
 
 
 #include <ImfWav.h>
+#include "ImfSimd.h"
 #include "ImfNamespace.h"
 
 OPENEXR_IMF_INTERNAL_NAMESPACE_SOURCE_ENTER
@@ -134,6 +135,155 @@ wdec16 (unsigned short  l, unsigned short  h,
     a = aa;
 }
 
+
+#ifdef IMF_HAVE_SSE2
+
+//
+// The first level of the wavelet transform, for four 2x2 squares
+// at once.  px points to the first row of the squares and p10 to
+// the second; the values of each row are adjacent in memory.
+//
+// Each 32-bit lane holds a pair of adjacent values, the left one in
+// its low half.  The basis functions above are computed on 32-bit
+// integers, truncating their results to 16 bits in the same places,
+// so the results are identical.
+//
+
+inline __m128i
+lo14 (__m128i v)
+{
+    return _mm_srai_epi32 (_mm_slli_epi32 (v, 16), 16);
+}
+
+
+inline __m128i
+hi14 (__m128i v)
+{
+    return _mm_srai_epi32 (v, 16);
+}
+
+
+inline __m128i
+lo16 (__m128i v)
+{
+    return _mm_and_si128 (v, _mm_set1_epi32 (MOD_MASK));
+}
+
+
+inline __m128i
+hi16 (__m128i v)
+{
+    return _mm_srli_epi32 (v, 16);
+}
+
+
+inline __m128i
+pack (__m128i l, __m128i h)
+{
+    return _mm_or_si128 (_mm_and_si128 (l, _mm_set1_epi32 (MOD_MASK)),
+                         _mm_slli_epi32 (h, 16));
+}
+
+
+inline void
+wenc14x4 (__m128i a, __m128i b, __m128i &l, __m128i &h)
+{
+    l = lo14 (_mm_srai_epi32 (_mm_add_epi32 (a, b), 1));
+    h = lo14 (_mm_sub_epi32 (a, b));
+}
+
+
+inline void
+wdec14x4 (__m128i l, __m128i h, __m128i &a, __m128i &b)
+{
+    __m128i ai = _mm_add_epi32 (_mm_add_epi32 (l, _mm_srai_epi32 (h, 1)),
+                                _mm_and_si128 (h, _mm_set1_epi32 (1)));
+    a = lo14 (ai);
+    b = lo14 (_mm_sub_epi32 (ai, h));
+}
+
+
+inline void
+wenc16x4 (__m128i a, __m128i b, __m128i &l, __m128i &h)
+{
+    //
+    // (m + M_OFFSET) & MOD_MASK flips the top bit of m
+    //
+
+    __m128i ao = lo16 (_mm_add_epi32 (a, _mm_set1_epi32 (A_OFFSET)));
+    __m128i m  = _mm_srli_epi32 (_mm_add_epi32 (ao, b), 1);
+    __m128i d  = _mm_sub_epi32 (ao, b);
+
+    m = _mm_xor_si128 (m, _mm_and_si128 (_mm_srai_epi32 (d, 31),
+                                         _mm_set1_epi32 (M_OFFSET)));
+    l = m;
+    h = lo16 (d);
+}
+
+
+inline void
+wdec16x4 (__m128i l, __m128i h, __m128i &a, __m128i &b)
+{
+    b = lo16 (_mm_sub_epi32 (l, _mm_srli_epi32 (h, 1)));
+    a = lo16 (_mm_sub_epi32 (_mm_add_epi32 (h, b), _mm_set1_epi32 (A_OFFSET)));
+}
+
+
+inline void
+wav2Encode4 (unsigned short *px, unsigned short *p10, bool w14)
+{
+    __m128i r0 = _mm_loadu_si128 ((const __m128i *) px);
+    __m128i r1 = _mm_loadu_si128 ((const __m128i *) p10);
+    __m128i i00, i01, i10, i11, o00, o01, o10, o11;
+
+    if (w14)
+    {
+	wenc14x4 (lo14 (r0), hi14 (r0), i00, i01);
+	wenc14x4 (lo14 (r1), hi14 (r1), i10, i11);
+	wenc14x4 (i00, i10, o00, o10);
+	wenc14x4 (i01, i11, o01, o11);
+    }
+    else
+    {
+	wenc16x4 (lo16 (r0), hi16 (r0), i00, i01);
+	wenc16x4 (lo16 (r1), hi16 (r1), i10, i11);
+	wenc16x4 (i00, i10, o00, o10);
+	wenc16x4 (i01, i11, o01, o11);
+    }
+
+    _mm_storeu_si128 ((__m128i *) px,  pack (o00, o01));
+    _mm_storeu_si128 ((__m128i *) p10, pack (o10, o11));
+}
+
+
+inline void
+wav2Decode4 (unsigned short *px, unsigned short *p10, bool w14)
+{
+    __m128i r0 = _mm_loadu_si128 ((const __m128i *) px);
+    __m128i r1 = _mm_loadu_si128 ((const __m128i *) p10);
+    __m128i i00, i01, i10, i11, o00, o01, o10, o11;
+
+    if (w14)
+    {
+	wdec14x4 (lo14 (r0), lo14 (r1), i00, i10);
+	wdec14x4 (hi14 (r0), hi14 (r1), i01, i11);
+	wdec14x4 (i00, i01, o00, o01);
+	wdec14x4 (i10, i11, o10, o11);
+    }
+    else
+    {
+	wdec16x4 (lo16 (r0), lo16 (r1), i00, i10);
+	wdec16x4 (hi16 (r0), hi16 (r1), i01, i11);
+	wdec16x4 (i00, i01, o00, o01);
+	wdec16x4 (i10, i11, o10, o11);
+    }
+
+    _mm_storeu_si128 ((__m128i *) px,  pack (o00, o01));
+    _mm_storeu_si128 ((__m128i *) p10, pack (o10, o11));
+}
+
+#endif
+
 } // namespace
 
 
@@ -178,6 +328,19 @@ wav2Encode
 	    unsigned short *px = py;
 	    unsigned short *ex = py + ox * (nx - p2);
 
+#ifdef IMF_HAVE_SSE2
+	    //
+	    // At the first level, with adjacent values, transform
+	    // four squares at a time
+	    //
+
+	    if (p == 1 && ox == 1)
+	    {
+		for (; px + 6 <= ex; px += 8)
+		    wav2Encode4 (px, px + oy, w14);
+	    }
+#endif
+
 	    //
 	    // X loop
 	    //
@@ -309,6 +472,19 @@ wav2Decode
 	    unsigned short *px = py;
 	    unsigned short *ex = py + ox * (nx - p2);
 
+#ifdef IMF_HAVE_SSE2
+	    //
+	    // At the first level, with adjacent values, transform
+	    // four squares at a time
+	    //
+
+	    if (p == 1 && ox == 1)
+	    {
+		for (; px + 6 <= ex; px += 8)
+		    wav2Decode4 (px, px + oy, w14);
+	    }
+#endif
+
 	    //
 	    // X loop
 	    //
@@ -35,243 +35,239 @@
 #include "ImfZip.h"
 #include "ImfCheckedArithmetic.h"
 #include "ImfNamespace.h"
-#include "ImfSimd.h"
+#include "ImfPredictor.h"
 #include "Iex.h"
+#include "OpenEXRConfigInternal.h"
 
 #include <math.h>
 #include <zlib.h>
 
-OPENEXR_IMF_INTERNAL_NAMESPACE_SOURCE_ENTER
-
-Zip::Zip(size_t maxRawSize):
-    _maxRawSize(maxRawSize),
-    _tmpBuffer(0)
-{
-    _tmpBuffer = new char[_maxRawSize];
-}
-
-Zip::Zip(size_t maxScanLineSize, size_t numScanLines):
-    _maxRawSize(0),
-    _tmpBuffer(0)
-{
-    _maxRawSize = uiMult (maxScanLineSize, numScanLines);
-    _tmpBuffer  = new char[_maxRawSize];
-}
+#ifdef OPENEXR_IMF_HAVE_LIBDEFLATE
+#include <libdeflate.h>
+#endif
 
-Zip::~Zip()
-{
-    if (_tmpBuffer) delete[] _tmpBuffer;
-}
+OPENEXR_IMF_INTERNAL_NAMESPACE_SOURCE_ENTER
 
-size_t
-Zip::maxRawSize()
-{
-    return _maxRawSize;
-}
+//
+// A zlib deflate stream, reset for each block.  Allocating the
+// stream's state once, rather than in each call to compress2(),
+// saves several hundred kilobytes of allocation and initialization
+// per block; the compressed data is the same.
+//
 
-size_t
-Zip::maxCompressedSize()
+struct Zip::Deflater
 {
-    return uiAdd (uiAdd (_maxRawSize,
-               size_t (ceil (_maxRawSize * 0.01))),
-                  size_t (100));
-}
-
-int
-Zip::compress(const char *raw, int rawSize, char *compressed)
-{
-    //
-    // Reorder the pixel data.
-    //
+    z_stream stream;
 
+    explicit Deflater (int level)
     {
-        char *t1 = _tmpBuffer;
-        char *t2 = _tmpBuffer + (rawSize + 1) / 2;
-        const char *stop = raw + rawSize;
+        stream.zalloc = Z_NULL;
+        stream.zfree = Z_NULL;
+        stream.opaque = Z_NULL;
 
-        while (true)
-        {
-            if (raw < stop)
-            *(t1++) = *(raw++);
-            else
-            break;
-
-            if (raw < stop)
-            *(t2++) = *(raw++);
-            else
-            break;
-        }
+        if (Z_OK != deflateInit (&stream, level))
+            throw IEX_NAMESPACE::BaseExc ("Data compression (zlib) failed.");
     }
 
-    //
-    // Predictor.
-    //
-
+    ~Deflater ()
     {
-        unsigned char *t    = (unsigned char *) _tmpBuffer + 1;
-        unsigned char *stop = (unsigned char *) _tmpBuffer + rawSize;
-        int p = t[-1];
-
-        while (t < stop)
-        {
-            int d = int (t[0]) - p + (128 + 256);
-            p = t[0];
-            t[0] = d;
-            ++t;
-        }
+        deflateEnd (&stream);
     }
 
-    //
-    // Compress the data using zlib
-    //
-
-    uLongf outSize = int(ceil(rawSize * 1.01)) + 100;
-
-    if (Z_OK != ::compress ((Bytef *)compressed, &outSize,
-                (const Bytef *) _tmpBuffer, rawSize))
+    bool
+    deflate (const char *in, size_t inSize, char *out, size_t &outSize)
     {
-        throw IEX_NAMESPACE::BaseExc ("Data compression (zlib) failed.");
-    }
+        if (Z_OK != deflateReset (&stream))
+            return false;
 
-    return outSize;
-}
+        stream.next_in = (Bytef *) in;
+        stream.avail_in = (uInt) inSize;
+        stream.next_out = (Bytef *) out;
+        stream.avail_out = (uInt) outSize;
 
-#ifdef IMF_HAVE_SSE4_1
+        if (Z_STREAM_END != ::deflate (&stream, Z_FINISH))
+            return false;
 
-static void
-reconstruct_sse41(char *buf, size_t outSize)
-{
-    static const size_t bytesPerChunk = sizeof(__m128i);
-    const size_t vOutSize = outSize / bytesPerChunk;
+        outSize = stream.total_out;
+        return true;
+    }
+};
 
-    const __m128i c = _mm_set1_epi8(-128);
-    const __m128i shuffleMask = _mm_set1_epi8(15);
 
-    // The first element doesn't have its high bit flipped during compression,
-    // so it must not be flipped here.  To make the SIMD loop nice and
-    // uniform, we pre-flip the bit so that the loop will unflip it again.
-    buf[0] += -128;
+#ifdef OPENEXR_IMF_HAVE_LIBDEFLATE
 
-    __m128i *vBuf = reinterpret_cast<__m128i *>(buf);
-    __m128i vPrev = _mm_setzero_si128();
-    for (size_t i=0; i<vOutSize; ++i)
-    {
-        __m128i d = _mm_add_epi8(_mm_loadu_si128(vBuf), c);
+//
+// A libdeflate decompressor, which decodes a whole zlib stream
+// in a single call.
+//
 
-        // Compute the prefix sum of elements.
-        d = _mm_add_epi8(d, _mm_slli_si128(d, 1));
-        d = _mm_add_epi8(d, _mm_slli_si128(d, 2));
-        d = _mm_add_epi8(d, _mm_slli_si128(d, 4));
-        d = _mm_add_epi8(d, _mm_slli_si128(d, 8));
-        d = _mm_add_epi8(d, vPrev);
+struct Zip::Inflater
+{
+    libdeflate_decompressor *decompressor;
 
-        _mm_storeu_si128(vBuf++, d);
+    Inflater ():
+        decompressor (libdeflate_alloc_decompressor())
+    {
+        if (decompressor == 0)
+            throw IEX_NAMESPACE::BaseExc ("Data decompression (libdeflate) "
+                                          "failed.");
+    }
 
-        // Broadcast the high byte in our result to all lanes of the prev
-        // value for the next iteration.
-        vPrev = _mm_shuffle_epi8(d, shuffleMask);
+    ~Inflater ()
+    {
+        libdeflate_free_decompressor (decompressor);
     }
 
-    unsigned char prev = _mm_extract_epi8(vPrev, 15);
-    for (size_t i=vOutSize*bytesPerChunk; i<outSize; ++i)
+    bool
+    inflate (const char *in, size_t inSize, char *out, size_t &outSize)
     {
-        unsigned char d = prev + buf[i] - 128;
-        buf[i] = d;
-        prev = d;
+        size_t actualOutSize = 0;
+
+        if (LIBDEFLATE_SUCCESS !=
+            libdeflate_zlib_decompress (decompressor, in, inSize,
+                                        out, outSize, &actualOutSize))
+        {
+            return false;
+        }
+
+        outSize = actualOutSize;
+        return true;
     }
-}
+};
 
 #else
 
-static void
-reconstruct_scalar(char *buf, size_t outSize)
+//
+// A zlib inflate stream, reset for each block.
+//
+
+struct Zip::Inflater
 {
-    unsigned char *t    = (unsigned char *) buf + 1;
-    unsigned char *stop = (unsigned char *) buf + outSize;
+    z_stream stream;
 
-    while (t < stop)
+    Inflater ()
     {
-        int d = int (t[-1]) + int (t[0]) - 128;
-        t[0] = d;
-        ++t;
+        stream.zalloc = Z_NULL;
+        stream.zfree = Z_NULL;
+        stream.opaque = Z_NULL;
+        stream.next_in = Z_NULL;
+        stream.avail_in = 0;
+
+        if (Z_OK != inflateInit (&stream))
+            throw IEX_NAMESPACE::BaseExc ("Data decompression (zlib) "
+                                          "failed.");
     }
-}
 
-#endif
+    ~Inflater ()
+    {
+        inflateEnd (&stream);
+    }
 
+    bool
+    inflate (const char *in, size_t inSize, char *out, size_t &outSize)
+    {
+        if (Z_OK != inflateReset (&stream))
+            return false;
 
-#ifdef IMF_HAVE_SSE2
+        stream.next_in = (Bytef *) in;
+        stream.avail_in = (uInt) inSize;
+        stream.next_out = (Bytef *) out;
+        stream.avail_out = (uInt) outSize;
 
-static void
-interleave_sse2(const char *source, size_t outSize, char *out)
-{
-    static const size_t bytesPerChunk = 2*sizeof(__m128i);
+        if (Z_STREAM_END != ::inflate (&stream, Z_FINISH))
+            return false;
 
-    const size_t vOutSize = outSize / bytesPerChunk;
+        outSize = stream.total_out;
+        return true;
+    }
+};
 
-    const __m128i *v1 = reinterpret_cast<const __m128i *>(source);
-    const __m128i *v2 = reinterpret_cast<const __m128i *>(source + (outSize + 1) / 2);
-    __m128i *vOut = reinterpret_cast<__m128i *>(out);
+#endif
 
-    for (size_t i=0; i<vOutSize; ++i) {
-        __m128i a = _mm_loadu_si128(v1++);
-        __m128i b = _mm_loadu_si128(v2++);
 
-        __m128i lo = _mm_unpacklo_epi8(a, b);
-        __m128i hi = _mm_unpackhi_epi8(a, b);
+Zip::Zip(size_t maxRawSize, int level):
+    _maxRawSize(maxRawSize),
+    _tmpBuffer(0),
+    _level(level),
+    _deflater(0),
+    _inflater(0)
+{
+    _tmpBuffer = new char[_maxRawSize];
+}
 
-        _mm_storeu_si128(vOut++, lo);
-        _mm_storeu_si128(vOut++, hi);
-    }
+Zip::Zip(size_t maxScanLineSize, size_t numScanLines, int level):
+    _maxRawSize(0),
+    _tmpBuffer(0),
+    _level(level),
+    _deflater(0),
+    _inflater(0)
+{
+    _maxRawSize = uiMult (maxScanLineSize, numScanLines);
+    _tmpBuffer  = new char[_maxRawSize];
+}
 
-    const char *t1 = reinterpret_cast<const char *>(v1);
-    const char *t2 = reinterpret_cast<const char *>(v2);
-    char *sOut = reinterpret_cast<char *>(vOut);
+Zip::~Zip()
+{
+    if (_tmpBuffer) delete[] _tmpBuffer;
+    delete _deflater;
+    delete _inflater;
+}
 
-    for (size_t i=vOutSize*bytesPerChunk; i<outSize; ++i)
-    {
-        *(sOut++) = (i%2==0) ? *(t1++) : *(t2++);
-    }
+size_t
+Zip::maxRawSize()
+{
+    return _maxRawSize;
 }
 
-#else
+size_t
+Zip::maxCompressedSize()
+{
+    return uiAdd (uiAdd (_maxRawSize,
+               size_t (ceil (_maxRawSize * 0.01))),
+                  size_t (100));
+}
 
-static void
-interleave_scalar(const char *source, size_t outSize, char *out)
+int
+Zip::compress(const char *raw, int rawSize, char *compressed)
 {
-    const char *t1 = source;
-    const char *t2 = source + (outSize + 1) / 2;
-    char *s = out;
-    char *const stop = s + outSize;
+    //
+    // Reorder the pixel data, and apply the predictor.
+    //
+
+    splitBytes (raw, rawSize, _tmpBuffer);
+    predictBytes (_tmpBuffer, rawSize);
+
+    //
+    // Compress the data using zlib
+    //
+
+    size_t outSize = int(ceil(rawSize * 1.01)) + 100;
+
+    if (_deflater == 0)
+        _deflater = new Deflater (_level);
 
-    while (true)
+    if (!_deflater->deflate (_tmpBuffer, rawSize, compressed, outSize))
     {
-        if (s < stop)
-            *(s++) = *(t1++);
-        else
-            break;
-
-        if (s < stop)
-            *(s++) = *(t2++);
-        else
-            break;
+        throw IEX_NAMESPACE::BaseExc ("Data compression (zlib) failed.");
     }
-}
 
-#endif
+    return outSize;
+}
 
 int
 Zip::uncompress(const char *compressed, int compressedSize,
                 char *raw)
 {
     //
-    // Decompress the data using zlib
+    // Decompress the data using zlib, or libdeflate
     //
 
-    uLongf outSize = _maxRawSize;
+    size_t outSize = _maxRawSize;
+
+    if (_inflater == 0)
+        _inflater = new Inflater;
 
-    if (Z_OK != ::uncompress ((Bytef *)_tmpBuffer, &outSize,
-                     (const Bytef *) compressed, compressedSize))
+    if (!_inflater->inflate (compressed, compressedSize, _tmpBuffer, outSize))
     {
         throw IEX_NAMESPACE::InputExc ("Data decompression (zlib) failed.");
     }
@@ -282,22 +278,11 @@ Zip::uncompress(const char *compressed, int compressedSize,
     }
 
     //
-    // Predictor.
+    // Undo the predictor, and reorder the pixel data.
     //
-#ifdef IMF_HAVE_SSE4_1
-    reconstruct_sse41(_tmpBuffer, outSize);
-#else
-    reconstruct_scalar(_tmpBuffer, outSize);
-#endif
 
-    //
-    // Reorder the pixel data.
-    //
-#ifdef IMF_HAVE_SSE2
-    interleave_sse2(_tmpBuffer, outSize, raw);
-#else
-    interleave_scalar(_tmpBuffer, outSize, raw);
-#endif
+    reconstructBytes (_tmpBuffer, outSize);
+    interleaveBytes (_tmpBuffer, outSize, raw);
 
     return outSize;
 }
@@ -43,13 +43,27 @@
 
 OPENEXR_IMF_INTERNAL_NAMESPACE_HEADER_ENTER
 
+//
+// Zip compresses blocks of pixel data with the deflate method, after
+// reordering the bytes and applying a predictor.
+//
+// The deflate level is one of zlib's, from 0 (store only) through 9
+// (best compression); -1 selects zlib's default, level 6.  The output
+// for a given level is the same as zlib's compress2().
+//
+// Compression always uses zlib.  Decompression uses libdeflate instead
+// if OpenEXR was built with it (OPENEXR_IMF_HAVE_LIBDEFLATE).  Either
+// way, the state of the deflate and inflate streams is allocated on
+// first use and kept for the following blocks.
+//
+
 class Zip
 {
     public:
         IMF_EXPORT
-        explicit Zip(size_t rawMaxSize);
+        explicit Zip(size_t rawMaxSize, int level = -1);
         IMF_EXPORT
-        Zip(size_t maxScanlineSize, size_t numScanLines);
+        Zip(size_t maxScanlineSize, size_t numScanLines, int level = -1);
         IMF_EXPORT
         ~Zip();
 
@@ -79,8 +93,14 @@ class Zip
                                                  char *raw);
 
     private:
-        size_t _maxRawSize;
-        char  *_tmpBuffer;
+        struct Deflater;
+        struct Inflater;
+
+        size_t    _maxRawSize;
+        char     *_tmpBuffer;
+        int       _level;
+        Deflater *_deflater;
+        Inflater *_inflater;
 };
 
 OPENEXR_IMF_INTERNAL_NAMESPACE_HEADER_EXIT
@@ -42,12 +42,36 @@
 
 #include "ImfZipCompressor.h"
 #include "ImfCheckedArithmetic.h"
+#include "ImfStandardAttributes.h"
 #include "Iex.h"
 #include <zlib.h>
 #include "ImfNamespace.h"
 
 OPENEXR_IMF_INTERNAL_NAMESPACE_SOURCE_ENTER
 
+namespace {
+
+int
+zipLevel (const Header &hdr)
+{
+    //
+    // The level only matters when writing, so rather than reject
+    // an invalid zipCompressionLevel attribute, use the default.
+    //
+
+    if (hasZipCompressionLevel (hdr))
+    {
+        int level = zipCompressionLevel (hdr);
+
+        if (level >= Z_NO_COMPRESSION && level <= Z_BEST_COMPRESSION)
+            return level;
+    }
+
+    return Z_DEFAULT_COMPRESSION;
+}
+
+} // namespace
+
 
 ZipCompressor::ZipCompressor
     (const Header &hdr,
@@ -58,7 +82,7 @@ ZipCompressor::ZipCompressor
     _maxScanLineSize (maxScanLineSize),
     _numScanLines (numScanLines),
     _outBuffer (0),
-    _zip(maxScanLineSize, numScanLines)
+    _zip(maxScanLineSize, numScanLines, zipLevel (hdr))
 {
     // TODO: Remove this when we can change the ABI
     (void) _maxScanLineSize;
@@ -92,9 +92,17 @@
 #include "testFutureProofing.h"
 #include "testPartHelper.h"
 #include "testDwaCompressorSimd.h"
+#include "testDwaEncoder.h"
 #include "testRle.h"
 #include "testB44ExpLogTable.h"
 #include "testDwaLookups.h"
+#include "testMMapIO.h"
+#include "testFramePrefetcher.h"
+#include "testZip.h"
+#include "testPredictor.h"
+#include "testTileCache.h"
+#include "testEnvmapFilter.h"
+#include "testDeepCompositing.h"
 
 #include "tmpDir.h"
 #include "ImathRandom.h"
@@ -253,9 +261,17 @@ main (int argc, char *argv[])
     TEST (testBackwardCompatibility, "core");
     TEST (testFutureProofing, "core");
     TEST (testDwaCompressorSimd, "basic");
+    TEST (testDwaEncoder, "basic");
     TEST (testRle, "core");
+    TEST (testPredictor, "core");
     TEST (testB44ExpLogTable, "core");
     TEST (testDwaLookups, "core");
+    TEST (testMMapIO, "basic");
+    TEST (testFramePrefetcher, "basic");
+    TEST (testZip, "basic");
+    TEST (testTileCache, "basic");
+    TEST (testEnvmapFilter, "basic");
+    TEST (testDeepCompositing, "basic");
     
 
     //#ifdef ENABLE_IMFHUGETEST
@@ -0,0 +1,313 @@
+//
+// SPDX-License-Identifier: BSD-3-Clause
+// Copyright Contributors to the OpenEXR Project.
+//
+
+#ifdef NDEBUG
+#    undef NDEBUG
+#endif
+
+#include "testDeepCompositing.h"
+
+#include <ImfCompositeDeepScanLine.h>
+#include <ImfDeepCompositing.h>
+#include <ImfDeepScanLineOutputFile.h>
+#include <ImfDeepScanLineInputFile.h>
+#include <ImfDeepFrameBuffer.h>
+#include <ImfFrameBuffer.h>
+#include <ImfChannelList.h>
+#include <ImfHeader.h>
+#include <ImfThreading.h>
+#include <ImfArray.h>
+#include "ImathRandom.h"
+#include "Iex.h"
+
+#include <algorithm>
+#include <iostream>
+#include <sstream>
+#include <vector>
+#include <math.h>
+#include <stdio.h>
+#include <assert.h>
+
+using namespace OPENEXR_IMF_NAMESPACE;
+using namespace std;
+using namespace IMATH_NAMESPACE;
+
+
+namespace {
+
+const int width = 97;
+const int height = 61;
+const char *channels[] = {"Z", "A", "R", "G", "B"};
+const int numChannels = 5;
+
+
+void
+writeFile (const string &fileName, int seed, int maxSamples)
+{
+    //
+    // A deep file with random samples: some pixels have none, some
+    // have opaque samples, and the depths of the samples overlap
+    // those of the other files.
+    //
+
+    Header header (width, height);
+    header.compression() = ZIPS_COMPRESSION;
+
+    for (int c = 0; c < numChannels; ++c)
+        header.channels().insert (channels[c], Channel (FLOAT));
+
+    Rand48 rand (seed);
+
+    Array2D<unsigned int> counts (height, width);
+    vector<float> pool;
+
+    for (int y = 0; y < height; ++y)
+    {
+        for (int x = 0; x < width; ++x)
+        {
+            counts[y][x] = rand.nexti() % (maxSamples + 1);
+
+            for (unsigned int s = 0; s < counts[y][x]; ++s)
+            {
+                pool.push_back (float (rand.nextf (0, 100)));       // Z
+
+                float a = rand.nextf() < 0.05? 1: float (rand.nextf (0, 0.3));
+                pool.push_back (a);                                 // A
+                pool.push_back (a * float (rand.nextf()));          // R
+                pool.push_back (a * float (rand.nextf()));          // G
+                pool.push_back (a * float (rand.nextf()));          // B
+            }
+        }
+    }
+
+    Array2D<float *> pointers[numChannels];
+    size_t offset = 0;
+
+    for (int c = 0; c < numChannels; ++c)
+        pointers[c].resizeErase (height, width);
+
+    for (int y = 0; y < height; ++y)
+    {
+        for (int x = 0; x < width; ++x)
+        {
+            for (int c = 0; c < numChannels; ++c)
+                pointers[c][y][x] = pool.data() + offset + c;
+
+            offset += numChannels * counts[y][x];
+        }
+    }
+
+    DeepFrameBuffer frameBuffer;
+
+    frameBuffer.insertSampleCountSlice (Slice (UINT,
+                                               (char *) &counts[0][0],
+                                               sizeof (unsigned int),
+                                               sizeof (unsigned int) * width));
+
+    for (int c = 0; c < numChannels; ++c)
+    {
+        frameBuffer.insert (channels[c],
+                            DeepSlice (FLOAT,
+                                       (char *) &pointers[c][0][0],
+                                       sizeof (float *),
+                                       sizeof (float *) * width,
+                                       sizeof (float) * numChannels));
+    }
+
+    DeepScanLineOutputFile file (fileName.c_str(), header);
+    file.setFrameBuffer (frameBuffer);
+    file.writePixels (height);
+}
+
+
+//
+// The compositing of DeepCompositing before it shared the buffers
+// of CompositeDeepScanLine: sorted with the default sort(), then
+// composited one sample at a time, rounding to float each time.
+//
+
+class ReferenceCompositing: public DeepCompositing
+{
+  public:
+
+    virtual void
+    composite_pixel (float outputs[],
+                     const float *inputs[],
+                     const char *channel_names[],
+                     int num_channels,
+                     int num_samples,
+                     int sources)
+    {
+        for (int i = 0; i < num_channels; i++)
+            outputs[i] = 0.0;
+
+        vector<int> sort_order (num_samples);
+
+        for (int i = 0; i < num_samples; i++)
+            sort_order[i] = i;
+
+        if (sources > 1)
+        {
+            sort (&sort_order[0], inputs, channel_names,
+                  num_channels, num_samples, sources);
+        }
+
+        for (int i = 0; i < num_samples; i++)
+        {
+            int s = sort_order[i];
+            float alpha = outputs[2];
+
+            if (alpha >= 1.0)
+                return;
+
+            for (int c = 0; c < num_channels; c++)
+                outputs[c] += (1.0 - alpha) * inputs[c][s];
+        }
+    }
+};
+
+
+void
+composite (const vector<string> &fileNames,
+           DeepCompositing *compositing,
+           int lines,
+           Array2D<float> *pixels)
+{
+    vector<DeepScanLineInputFile *> files;
+    CompositeDeepScanLine comp;
+
+    for (size_t i = 0; i < fileNames.size(); ++i)
+    {
+        files.push_back (new DeepScanLineInputFile (fileNames[i].c_str()));
+        comp.addSource (files.back());
+    }
+
+    if (compositing)
+        comp.setCompositing (compositing);
+
+    FrameBuffer frameBuffer;
+
+    for (int c = 0; c < numChannels; ++c)
+    {
+        pixels[c].resizeErase (height, width);
+
+        frameBuffer.insert (channels[c],
+                            Slice (FLOAT,
+                                   (char *) &pixels[c][0][0],
+                                   sizeof (float),
+                                   sizeof (float) * width));
+    }
+
+    comp.setFrameBuffer (frameBuffer);
+
+    for (int y = 0; y < height; y += lines)
+        comp.readPixels (y, min (y + lines, height) - 1);
+
+    for (size_t i = 0; i < files.size(); ++i)
+        delete files[i];
+}
+
+
+void
+compare (const Array2D<float> *pixels1,
+         const Array2D<float> *pixels2,
+         float tolerance)
+{
+    for (int c = 0; c < numChannels; ++c)
+    {
+        for (int y = 0; y < height; ++y)
+        {
+            for (int x = 0; x < width; ++x)
+            {
+                float p1 = pixels1[c][y][x];
+                float p2 = pixels2[c][y][x];
+
+                assert (fabs (p1 - p2) <= tolerance * max (1.0f, fabs (p1)));
+            }
+        }
+    }
+}
+
+
+void
+testSources (const string &tempDir, int numSources, int maxSamples)
+{
+    cout << numSources << " source(s), up to " << maxSamples <<
+            " samples per pixel" << endl;
+
+    vector<string> fileNames;
+
+    for (int i = 0; i < numSources; ++i)
+    {
+        stringstream s;
+        s << tempDir << "imf_test_deep_compositing_" << i << ".exr";
+        fileNames.push_back (s.str());
+        writeFile (fileNames.back(), i + 17 * maxSamples, maxSamples);
+    }
+
+    int threads = globalThreadCount();
+
+    //
+    // The default compositing must give the same result
+    // whatever the number of threads and of lines read at a time,
+    // and close to the result of the reference compositing.
+    //
+
+    Array2D<float> reference[numChannels];
+    ReferenceCompositing referenceCompositing;
+    composite (fileNames, &referenceCompositing, height, reference);
+
+    Array2D<float> pixels1[numChannels];
+    setGlobalThreadCount (0);
+    composite (fileNames, 0, height, pixels1);
+
+    compare (reference, pixels1, 1e-5f);
+
+    Array2D<float> pixels2[numChannels];
+    setGlobalThreadCount (3);
+    composite (fileNames, 0, 7, pixels2);
+
+    compare (pixels1, pixels2, 0);
+
+    //
+    // A DeepCompositing object given to CompositeDeepScanLine
+    // gives the same result as the default compositing.
+    //
+
+    Array2D<float> pixels3[numChannels];
+    DeepCompositing defaultCompositing;
+    composite (fileNames, &defaultCompositing, height, pixels3);
+
+    compare (pixels1, pixels3, 0);
+
+    setGlobalThreadCount (threads);
+
+    for (int i = 0; i < numSources; ++i)
+        remove (fileNames[i].c_str());
+}
+
+} // namespace
+
+
+void
+testDeepCompositing (const string &tempDir)
+{
+    try
+    {
+        cout << "Testing deep compositing" << endl;
+
+        testSources (tempDir, 1, 4);
+        testSources (tempDir, 1, 40);
+        testSources (tempDir, 3, 3);
+        testSources (tempDir, 3, 50);
+
+        cout << "ok\n" << endl;
+    }
+    catch (const std::exception &e)
+    {
+        cerr << "ERROR -- caught exception: " << e.what() << endl;
+        assert (false);
+    }
+}
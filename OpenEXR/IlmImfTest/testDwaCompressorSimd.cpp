@@ -348,6 +348,35 @@ testDct()
         INVERSE_DCT_SCALAR_TEST_N(dctInverse8x8_avx, 5, "3x8")
         INVERSE_DCT_SCALAR_TEST_N(dctInverse8x8_avx, 6, "2x8")
         INVERSE_DCT_SCALAR_TEST_N(dctInverse8x8_avx, 7, "1x8")
+
+        //
+        // The AVX forward DCT should match the default one exactly,
+        // so files don't depend on the processor they're written on
+        //
+
+        cout << "      Forward, AVX" << endl;
+        for (int iter=0; iter<numIter; ++iter)
+        {
+            for (int i=0; i<64; ++i)
+            {
+                orig._buffer[i] = test._buffer[i] =
+                                     (float)140000*(rand48.nextf()-.5);
+            }
+
+            dctForward8x8(orig._buffer);
+            dctForward8x8_avx(test._buffer);
+
+            for (int i=0; i<64; ++i)
+            {
+                if (memcmp (&orig._buffer[i], &test._buffer[i], sizeof (float)))
+                {
+                    cout << "At index " << i << ": ";
+                    cout << "expecting " << orig._buffer[i] << "; got "
+                         << test._buffer[i] << endl;
+                    assert(false);
+                }
+            }
+        }
     }
 }
 
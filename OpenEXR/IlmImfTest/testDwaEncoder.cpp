@@ -0,0 +1,349 @@
+//
+// SPDX-License-Identifier: BSD-3-Clause
+// Copyright Contributors to the OpenEXR Project.
+//
+
+#ifdef NDEBUG
+#    undef NDEBUG
+#endif
+
+#include "testDwaEncoder.h"
+
+#include <ImfOutputFile.h>
+#include <ImfInputFile.h>
+#include <ImfRgbaFile.h>
+#include <ImfChannelList.h>
+#include <ImfFrameBuffer.h>
+#include <ImfStandardAttributes.h>
+#include <ImfThreading.h>
+#include <ImfArray.h>
+#include <ImathRandom.h>
+#include <half.h>
+#include "Iex.h"
+
+#include <chrono>
+#include <fstream>
+#include <iostream>
+#include <algorithm>
+#include <stdio.h>
+#include <string.h>
+#include <math.h>
+#include <assert.h>
+
+#ifndef ILM_IMF_TEST_IMAGEDIR
+    #define ILM_IMF_TEST_IMAGEDIR
+#endif
+
+using namespace OPENEXR_IMF_NAMESPACE;
+using namespace std;
+using namespace IMATH_NAMESPACE;
+
+
+namespace {
+
+//
+// Not a multiple of 8 in either direction, so the encoder mirrors
+// partial blocks, and tall enough for several DWAB chunks
+//
+
+const int width = 1021;
+const int height = 611;
+
+
+//
+// A synthetic frame: smooth gradients with some noise in R, G and B,
+// hard edges in A, and a FLOAT depth channel
+//
+
+struct Frame
+{
+    Array2D<half>	r, g, b, a;
+    Array2D<float>	z;
+
+    Frame ():
+        r (height, width), g (height, width), b (height, width),
+        a (height, width), z (height, width)
+    {
+	Rand48 rand48 (0);
+
+	for (int y = 0; y < height; ++y)
+	{
+	    for (int x = 0; x < width; ++x)
+	    {
+		float n = rand48.nextf (-.02, .02);
+
+		r[y][x] = .5f + .5f * sinf (x * .013f) * cosf (y * .021f) + n;
+		g[y][x] = float (x) / width + n;
+		b[y][x] = 4.f * float (y) / height * rand48.nextf (.9, 1.1);
+		a[y][x] = ((x / 37 + y / 23) % 2)? 1: 0;
+		z[y][x] = 1000.f + 100.f * sinf (x * .001f + y * .002f) + n;
+	    }
+	}
+    }
+
+    FrameBuffer
+    frameBuffer ()
+    {
+	FrameBuffer fb;
+	fb.insert ("R", Slice (HALF, (char *) &r[0][0], sizeof (half), sizeof (half) * width));
+	fb.insert ("G", Slice (HALF, (char *) &g[0][0], sizeof (half), sizeof (half) * width));
+	fb.insert ("B", Slice (HALF, (char *) &b[0][0], sizeof (half), sizeof (half) * width));
+	fb.insert ("A", Slice (HALF, (char *) &a[0][0], sizeof (half), sizeof (half) * width));
+	fb.insert ("Z", Slice (FLOAT, (char *) &z[0][0], sizeof (float), sizeof (float) * width));
+	return fb;
+    }
+};
+
+
+Header
+frameHeader (Compression compression)
+{
+    Header header (width, height);
+    header.compression() = compression;
+    header.channels().insert ("R", Channel (HALF));
+    header.channels().insert ("G", Channel (HALF));
+    header.channels().insert ("B", Channel (HALF));
+    header.channels().insert ("A", Channel (HALF));
+    header.channels().insert ("Z", Channel (FLOAT));
+    return header;
+}
+
+
+//
+// Write the frame with the given number of threads in the global
+// thread pool.  The file itself is written with no threads, so its
+// chunks are compressed one at a time; only the encoder's own rows
+// of blocks run in parallel.  Returns the best time of a few runs,
+// in seconds.
+//
+
+double
+writeFrame (const string &fileName,
+	    Frame &frame,
+	    Compression compression,
+	    int numThreads)
+{
+    setGlobalThreadCount (numThreads);
+
+    double best = 0;
+
+    for (int run = 0; run < 3; ++run)
+    {
+	chrono::steady_clock::time_point start = chrono::steady_clock::now();
+
+	OutputFile out (fileName.c_str(), frameHeader (compression), 0);
+	out.setFrameBuffer (frame.frameBuffer());
+	out.writePixels (height);
+
+	double seconds = chrono::duration<double>
+			     (chrono::steady_clock::now() - start).count();
+
+	if (run == 0 || seconds < best)
+	    best = seconds;
+    }
+
+    return best;
+}
+
+
+Int64
+fileSize (const string &fileName)
+{
+    ifstream file (fileName.c_str(), ios_base::binary);
+    file.seekg (0, ios_base::end);
+    return Int64 (file.tellg());
+}
+
+
+//
+// Files written with and without threads must hold the same pixels
+//
+
+void
+comparePixels (const string &fileName1, const string &fileName2)
+{
+    Frame frame1, frame2;
+
+    {
+	InputFile in (fileName1.c_str(), 0);
+	in.setFrameBuffer (frame1.frameBuffer());
+	in.readPixels (0, height - 1);
+    }
+
+    {
+	InputFile in (fileName2.c_str(), 0);
+	in.setFrameBuffer (frame2.frameBuffer());
+	in.readPixels (0, height - 1);
+    }
+
+    size_t n = size_t (width) * height;
+
+    assert (!memcmp (&frame1.r[0][0], &frame2.r[0][0], n * sizeof (half)));
+    assert (!memcmp (&frame1.g[0][0], &frame2.g[0][0], n * sizeof (half)));
+    assert (!memcmp (&frame1.b[0][0], &frame2.b[0][0], n * sizeof (half)));
+    assert (!memcmp (&frame1.a[0][0], &frame2.a[0][0], n * sizeof (half)));
+    assert (!memcmp (&frame1.z[0][0], &frame2.z[0][0], n * sizeof (float)));
+}
+
+
+void
+testEncoder (const string &tempDir, Frame &frame, Compression compression)
+{
+    cout << (compression == DWAA_COMPRESSION? "DWAA": "DWAB") << endl;
+
+    string serialName = tempDir + "imf_test_dwa_encoder_serial.exr";
+    string parallelName = tempDir + "imf_test_dwa_encoder_parallel.exr";
+
+    //
+    // Report the throughput in megabytes of uncompressed pixels
+    // per second, with one thread (the encoder as it used to be),
+    // and with the rows of blocks shared among several threads
+    //
+
+    double megabytes = double (width) * height * (4 * sizeof (half) +
+						  sizeof (float)) / (1 << 20);
+
+    double serial = writeFrame (serialName, frame, compression, 0);
+
+    cout << "   1 thread:  " << megabytes / serial << " MB/s" << endl;
+
+    const int threads[] = {2, 4, 8};
+
+    for (size_t i = 0; i < sizeof (threads) / sizeof (threads[0]); ++i)
+    {
+	double parallel = writeFrame (parallelName, frame, compression, threads[i]);
+
+	cout << "   " << threads[i] << " threads: " <<
+		megabytes / parallel << " MB/s (" <<
+		serial / parallel << "x)" << endl;
+
+	assert (fileSize (serialName) == fileSize (parallelName));
+	comparePixels (serialName, parallelName);
+    }
+
+    remove (serialName.c_str());
+    remove (parallelName.c_str());
+}
+
+
+//
+// A 64-bit FNV-1a hash of the pixels of an RGBA image
+//
+
+Int64
+checksum (const Array2D<Rgba> &pixels, int w, int h)
+{
+    Int64 hash = 14695981039346656037ULL;
+
+    for (int y = 0; y < h; ++y)
+    {
+	for (int x = 0; x < w; ++x)
+	{
+	    const Rgba &p = pixels[y][x];
+	    unsigned short bits[] = {p.r.bits(), p.g.bits(), p.b.bits(), p.a.bits()};
+
+	    for (int i = 0; i < 4; ++i)
+	    {
+		hash = (hash ^ (bits[i] & 0xff)) * 1099511628211ULL;
+		hash = (hash ^ (bits[i] >> 8)) * 1099511628211ULL;
+	    }
+	}
+    }
+
+    return hash;
+}
+
+
+//
+// Compress a stored image with the serial encoder, read it back, and
+// compare a checksum of the decoded pixels with the one recorded when
+// the test was written, with the encoder as it was before it learned
+// to use threads.  Any change to the quantization or the forward DCT
+// that alters the output shows up here, even if it stays within the
+// error bounds the other tests allow.  The compressed bytes are not
+// compared directly because they also depend on the zlib version.
+//
+
+void
+testChecksum (const string &tempDir,
+	      Compression compression,
+	      Int64 expected)
+{
+    cout << (compression == DWAA_COMPRESSION? "DWAA": "DWAB") <<
+	    " checksum" << endl;
+
+    string fileName = tempDir + "imf_test_dwa_encoder_checksum.exr";
+
+    setGlobalThreadCount (0);
+
+    Header header;
+    Array2D<Rgba> pixels;
+    int w, h;
+
+    {
+	RgbaInputFile in (ILM_IMF_TEST_IMAGEDIR "comp_none.exr", 0);
+	const Box2i &dw = in.dataWindow();
+	w = dw.max.x - dw.min.x + 1;
+	h = dw.max.y - dw.min.y + 1;
+
+	header = in.header();
+	pixels.resizeErase (h, w);
+	in.setFrameBuffer (&pixels[-dw.min.y][-dw.min.x], 1, w);
+	in.readPixels (dw.min.y, dw.max.y);
+    }
+
+    header.compression() = compression;
+    addDwaCompressionLevel (header, 45);
+
+    {
+	RgbaOutputFile out (fileName.c_str(), header, WRITE_RGBA, 0);
+	const Box2i &dw = out.dataWindow();
+	out.setFrameBuffer (&pixels[-dw.min.y][-dw.min.x], 1, w);
+	out.writePixels (h);
+    }
+
+    {
+	RgbaInputFile in (fileName.c_str(), 0);
+	const Box2i &dw = in.dataWindow();
+	in.setFrameBuffer (&pixels[-dw.min.y][-dw.min.x], 1, w);
+	in.readPixels (dw.min.y, dw.max.y);
+    }
+
+    Int64 hash = checksum (pixels, w, h);
+
+    cout << "   " << hex << hash << dec << endl;
+
+    assert (hash == expected);
+
+    remove (fileName.c_str());
+}
+
+} // namespace
+
+
+void
+testDwaEncoder (const string &tempDir)
+{
+    try
+    {
+	cout << "Testing the DWA encoder with threads" << endl;
+
+	int threads = globalThreadCount();
+
+	Frame frame;
+	testEncoder (tempDir, frame, DWAA_COMPRESSION);
+	testEncoder (tempDir, frame, DWAB_COMPRESSION);
+
+	testChecksum (tempDir, DWAA_COMPRESSION, 0x69bd5df37646202aULL);
+	testChecksum (tempDir, DWAB_COMPRESSION, 0x599e7e01ddafeea2ULL);
+
+	setGlobalThreadCount (threads);
+
+	cout << "ok\n" << endl;
+    }
+    catch (const std::exception &e)
+    {
+	cerr << "ERROR -- caught exception: " << e.what() << endl;
+	assert (false);
+    }
+}
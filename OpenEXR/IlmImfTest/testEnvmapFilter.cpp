@@ -0,0 +1,356 @@
+//
+// SPDX-License-Identifier: BSD-3-Clause
+// Copyright Contributors to the OpenEXR Project.
+//
+
+#ifdef NDEBUG
+#    undef NDEBUG
+#endif
+
+#include "testEnvmapFilter.h"
+
+#include <ImfEnvmapFilter.h>
+#include <ImfThreading.h>
+#include "ImathRandom.h"
+#include "Iex.h"
+
+#include <algorithm>
+#include <iostream>
+#include <vector>
+#include <assert.h>
+
+using namespace OPENEXR_IMF_NAMESPACE;
+using namespace std;
+using namespace IMATH_NAMESPACE;
+
+
+namespace {
+
+Box2i
+cubeWindow (int w)
+{
+    return Box2i (V2i (0, 0), V2i (w - 1, 6 * w - 1));
+}
+
+
+Box2i
+latLongWindow (int w)
+{
+    return Box2i (V2i (0, 0), V2i (w - 1, w / 2 - 1));
+}
+
+
+size_t
+numPixels (const Box2i &dw)
+{
+    return size_t (dw.max.x - dw.min.x + 1) * (dw.max.y - dw.min.y + 1);
+}
+
+
+void
+fillPixels (vector<C4f> &pixels, const Box2i &dw, int seed)
+{
+    //
+    // Smoothly varying, positive colors, with some noise
+    //
+
+    Rand48 rand (seed);
+    pixels.resize (numPixels (dw));
+
+    for (size_t i = 0; i < pixels.size(); ++i)
+    {
+        float x = float (i % (dw.max.x - dw.min.x + 1)) / (dw.max.x - dw.min.x);
+        float y = float (i / (dw.max.x - dw.min.x + 1)) / (dw.max.y - dw.min.y);
+
+        pixels[i] = C4f (1 + x + 0.2f * rand.nextf(),
+                         2 - y + 0.2f * rand.nextf(),
+                         0.5f + x * y,
+                         1);
+    }
+}
+
+
+float
+maxDifference (const vector<C4f> &p1, const vector<C4f> &p2)
+{
+    assert (p1.size() == p2.size());
+
+    float d = 0;
+
+    for (size_t i = 0; i < p1.size(); ++i)
+    {
+        d = max (d, abs (p1[i].r - p2[i].r));
+        d = max (d, abs (p1[i].g - p2[i].g));
+        d = max (d, abs (p1[i].b - p2[i].b));
+        d = max (d, abs (p1[i].a - p2[i].a));
+    }
+
+    return d;
+}
+
+
+void
+testConstant ()
+{
+    cout << "constant maps" << endl;
+
+    const C4f c (0.25f, 0.5f, 2, 1);
+
+    Box2i ll = latLongWindow (64);
+    Box2i cube = cubeWindow (24);
+
+    vector<C4f> pixels1 (numPixels (ll), c);
+    vector<C4f> pixels2 (numPixels (cube));
+    vector<C4f> pixels3 (numPixels (ll));
+    vector<C4f> constant2 (numPixels (cube), c);
+    vector<C4f> constant3 (numPixels (ll), c);
+
+    resampleEnvmap (ENVMAP_LATLONG, ll, &pixels1[0],
+                    ENVMAP_CUBE, cube, &pixels2[0]);
+
+    assert (maxDifference (pixels2, constant2) < 1e-5);
+
+    resampleEnvmap (ENVMAP_CUBE, cube, &pixels2[0],
+                    ENVMAP_LATLONG, ll, &pixels3[0], 2, 3);
+
+    assert (maxDifference (pixels3, constant3) < 1e-5);
+
+    //
+    // The pixel weights of the blur are normalized over the whole
+    // map, not for each output pixel; a constant map comes out
+    // within about one percent of the original.
+    //
+
+    blurEnvmap (ENVMAP_LATLONG, ll, &pixels1[0], cube, &pixels2[0]);
+    assert (maxDifference (pixels2, constant2) < 0.01f * c.b);
+
+    blurEnvmap (ENVMAP_LATLONG, ll, &pixels1[0], cube, &pixels2[0], true);
+    assert (maxDifference (pixels2, constant2) < 0.01f * c.b);
+}
+
+
+void
+testExactBlur ()
+{
+    cout << "exact blur" << endl;
+
+    //
+    // A cube-face map narrower than the blur proxy is blurred
+    // directly; compare with a straightforward computation.
+    //
+
+    Box2i dw1 = cubeWindow (12);
+    Box2i dw2 = cubeWindow (5);
+
+    vector<C4f> pixels1;
+    fillPixels (pixels1, dw1, 1);
+
+    vector<C4f> pixels2 (numPixels (dw2));
+    blurEnvmap (ENVMAP_CUBE, dw1, &pixels1[0], dw2, &pixels2[0]);
+
+    vector<C4f> weighted (pixels1);
+    double weightTotal = 0;
+
+    for (int f1 = CUBEFACE_POS_X; f1 <= CUBEFACE_NEG_Z; ++f1)
+    {
+        for (int y1 = 0; y1 < 12; ++y1)
+        {
+            for (int x1 = 0; x1 < 12; ++x1)
+            {
+                V2f posInFace (x1, y1);
+                V3f dir = CubeMap::direction (CubeMapFace (f1), dw1, posInFace);
+                V2f pos = CubeMap::pixelPosition (CubeMapFace (f1), dw1, posInFace);
+
+                //
+                // Pixel weight, halved at the edges of the
+                // cube faces, divided by 3 at the corners
+                //
+
+                double weight = dir.length() / abs (dir[f1 / 2]);
+
+                bool xEdge = (x1 == 0 || x1 == 11);
+                bool yEdge = (y1 == 0 || y1 == 11);
+
+                if (xEdge && yEdge)
+                    weight /= 3;
+                else if (xEdge || yEdge)
+                    weight /= 2;
+
+                weighted[int (pos.y + 0.5f) * 12 + int (pos.x + 0.5f)] *= weight;
+                weightTotal += weight;
+            }
+        }
+    }
+
+    for (int f2 = CUBEFACE_POS_X; f2 <= CUBEFACE_NEG_Z; ++f2)
+    {
+        for (int y2 = 0; y2 < 5; ++y2)
+        {
+            for (int x2 = 0; x2 < 5; ++x2)
+            {
+                V2f posInFace2 (x2, y2);
+                V3f dir2 = CubeMap::direction (CubeMapFace (f2), dw2, posInFace2);
+                V2f pos2 = CubeMap::pixelPosition (CubeMapFace (f2), dw2, posInFace2);
+
+                double total[4] = {0, 0, 0, 0};
+                double wt = 0;
+
+                for (int f1 = CUBEFACE_POS_X; f1 <= CUBEFACE_NEG_Z; ++f1)
+                {
+                    for (int y1 = 0; y1 < 12; ++y1)
+                    {
+                        for (int x1 = 0; x1 < 12; ++x1)
+                        {
+                            V2f posInFace1 (x1, y1);
+                            V3f dir1 = CubeMap::direction (CubeMapFace (f1), dw1, posInFace1);
+                            V2f pos1 = CubeMap::pixelPosition (CubeMapFace (f1), dw1, posInFace1);
+
+                            double w = dir1 ^ dir2;
+
+                            if (w <= 0)
+                                continue;
+
+                            const C4f &p = weighted[int (pos1.y + 0.5f) * 12 +
+                                                    int (pos1.x + 0.5f)];
+
+                            total[0] += p.r * w;
+                            total[1] += p.g * w;
+                            total[2] += p.b * w;
+                            total[3] += p.a * w;
+                            wt += w;
+                        }
+                    }
+                }
+
+                const C4f &p2 = pixels2[int (pos2.y + 0.5f) * 5 +
+                                        int (pos2.x + 0.5f)];
+
+                double scale = 12 * 12 * 6 / weightTotal / wt;
+
+                assert (abs (p2.r - total[0] * scale) < 1e-4 * p2.r);
+                assert (abs (p2.g - total[1] * scale) < 1e-4 * p2.g);
+                assert (abs (p2.b - total[2] * scale) < 1e-4 * p2.b);
+                assert (abs (p2.a - total[3] * scale) < 1e-4 * p2.a);
+            }
+        }
+    }
+}
+
+
+void
+testApproximateBlur ()
+{
+    cout << "approximate blur" << endl;
+
+    Box2i dw1 = latLongWindow (256);
+    Box2i dw2 = cubeWindow (16);
+
+    vector<C4f> pixels1;
+    fillPixels (pixels1, dw1, 2);
+
+    vector<C4f> exact (numPixels (dw2));
+    vector<C4f> approx (numPixels (dw2));
+
+    blurEnvmap (ENVMAP_LATLONG, dw1, &pixels1[0], dw2, &exact[0]);
+    blurEnvmap (ENVMAP_LATLONG, dw1, &pixels1[0], dw2, &approx[0], true);
+
+    for (size_t i = 0; i < exact.size(); ++i)
+    {
+        assert (abs (exact[i].r - approx[i].r) < 0.02f * exact[i].r);
+        assert (abs (exact[i].g - approx[i].g) < 0.02f * exact[i].g);
+        assert (abs (exact[i].b - approx[i].b) < 0.02f * exact[i].b);
+        assert (abs (exact[i].a - approx[i].a) < 0.02f * exact[i].a);
+    }
+}
+
+
+void
+testThreads ()
+{
+    cout << "threads" << endl;
+
+    Box2i ll = latLongWindow (128);
+    Box2i cube = cubeWindow (20);
+
+    vector<C4f> pixels1;
+    fillPixels (pixels1, ll, 3);
+
+    vector<C4f> resampled[2];
+    vector<C4f> blurred[2];
+
+    int threads = globalThreadCount();
+
+    for (int i = 0; i < 2; ++i)
+    {
+        setGlobalThreadCount (i == 0? 0: 4);
+
+        resampled[i].resize (numPixels (cube));
+        resampleEnvmap (ENVMAP_LATLONG, ll, &pixels1[0],
+                        ENVMAP_CUBE, cube, &resampled[i][0]);
+
+        blurred[i].resize (numPixels (cube));
+        blurEnvmap (ENVMAP_LATLONG, ll, &pixels1[0], cube, &blurred[i][0]);
+    }
+
+    setGlobalThreadCount (threads);
+
+    assert (maxDifference (resampled[0], resampled[1]) == 0);
+    assert (maxDifference (blurred[0], blurred[1]) == 0);
+}
+
+
+void
+testErrors ()
+{
+    cout << "invalid data windows" << endl;
+
+    vector<C4f> pixels1 (16 * 16);
+    vector<C4f> pixels2 (16 * 16);
+    Box2i square (V2i (0, 0), V2i (15, 15));
+
+    try
+    {
+        resampleEnvmap (ENVMAP_CUBE, square, &pixels1[0],
+                        ENVMAP_LATLONG, square, &pixels2[0]);
+        assert (false);
+    }
+    catch (const IEX_NAMESPACE::ArgExc &)
+    {
+        // expected
+    }
+
+    try
+    {
+        blurEnvmap (ENVMAP_LATLONG, square, &pixels1[0], square, &pixels2[0]);
+        assert (false);
+    }
+    catch (const IEX_NAMESPACE::ArgExc &)
+    {
+        // expected
+    }
+}
+
+} // namespace
+
+
+void
+testEnvmapFilter (const string &)
+{
+    try
+    {
+        cout << "Testing environment map resampling and blurring" << endl;
+
+        testConstant();
+        testExactBlur();
+        testApproximateBlur();
+        testThreads();
+        testErrors();
+
+        cout << "ok\n" << endl;
+    }
+    catch (const std::exception &e)
+    {
+        cerr << "ERROR -- caught exception: " << e.what() << endl;
+        assert (false);
+    }
+}
@@ -0,0 +1,279 @@
+//
+// SPDX-License-Identifier: BSD-3-Clause
+// Copyright Contributors to the OpenEXR Project.
+//
+
+#ifdef NDEBUG
+#    undef NDEBUG
+#endif
+
+#include "testFramePrefetcher.h"
+
+#include <ImfFramePrefetcher.h>
+#include <ImfRgbaFile.h>
+#include <ImfTiledRgbaFile.h>
+#include <ImfArray.h>
+#include <ImfThreading.h>
+#include "Iex.h"
+
+#include <iostream>
+#include <sstream>
+#include <vector>
+#include <stdio.h>
+#include <assert.h>
+
+using namespace OPENEXR_IMF_NAMESPACE;
+using namespace std;
+using namespace IMATH_NAMESPACE;
+
+
+namespace {
+
+const int width = 97;
+const int height = 61;
+const int numFrames = 7;
+
+
+string
+frameName (const string &tempDir, int frame)
+{
+    stringstream s;
+    s << tempDir << "imf_test_prefetch." << frame << ".exr";
+    return s.str();
+}
+
+
+half
+pixelValue (int frame, int x, int y)
+{
+    return half (float (frame * 100 + (x * 7 + y) % 64));
+}
+
+
+//
+// Frames of increasing pixel values, alternating scan line and tiled
+// files and compression methods
+//
+
+void
+writeFrames (const string &tempDir, const Box2i &dataWindow)
+{
+    const Compression compressions[] = {ZIP_COMPRESSION, PIZ_COMPRESSION, NO_COMPRESSION};
+
+    Array2D<Rgba> pixels (height, width);
+
+    for (int frame = 0; frame < numFrames; ++frame)
+    {
+	for (int y = 0; y < height; ++y)
+	    for (int x = 0; x < width; ++x)
+		pixels[y][x] = Rgba (pixelValue (frame, x, y), frame, 0, 1);
+
+	Header header (dataWindow, dataWindow);
+	header.compression() = compressions[frame % 3];
+
+	Rgba *base = &pixels[0][0] - dataWindow.min.x - dataWindow.min.y * width;
+
+	if (frame % 2)
+	{
+	    TiledRgbaOutputFile out (frameName (tempDir, frame).c_str(), header,
+				     WRITE_RGBA, 32, 16, ONE_LEVEL);
+	    out.setFrameBuffer (base, 1, width);
+	    out.writeTiles (0, out.numXTiles() - 1, 0, out.numYTiles() - 1);
+	}
+	else
+	{
+	    RgbaOutputFile out (frameName (tempDir, frame).c_str(), header, WRITE_RGBA);
+	    out.setFrameBuffer (base, 1, width);
+	    out.writePixels (height);
+	}
+    }
+}
+
+
+//
+// A ring of frame buffers holding the R and G channels as floats
+//
+
+struct Buffers
+{
+    Buffers (int n, const Box2i &dataWindow):
+        pixels (n)
+    {
+	for (int i = 0; i < n; ++i)
+	{
+	    pixels[i].resizeErase (height, width * 2);
+	    float *base = &pixels[i][0][0] -
+			  2 * (dataWindow.min.x + dataWindow.min.y * width);
+
+	    frameBuffers.push_back (FrameBuffer());
+	    frameBuffers[i].insert ("R", Slice (FLOAT, (char *) base,
+					       sizeof (float) * 2,
+					       sizeof (float) * 2 * width));
+	    frameBuffers[i].insert ("G", Slice (FLOAT, (char *) (base + 1),
+					       sizeof (float) * 2,
+					       sizeof (float) * 2 * width));
+	}
+    }
+
+    void
+    check (int i, int frame) const
+    {
+	for (int y = 0; y < height; ++y)
+	{
+	    for (int x = 0; x < width; ++x)
+	    {
+		assert (pixels[i][y][2 * x] == pixelValue (frame, x, y));
+		assert (pixels[i][y][2 * x + 1] == frame);
+	    }
+	}
+    }
+
+    vector< Array2D<float> >	pixels;
+    vector<FrameBuffer>		frameBuffers;
+};
+
+
+void
+testPlayback (const string &tempDir, const Box2i &dataWindow, int framesInFlight)
+{
+    cout << framesInFlight << " frames in flight, " <<
+	    globalThreadCount() << " threads" << endl;
+
+    Buffers buffers (framesInFlight, dataWindow);
+    FramePrefetcher prefetcher (framesInFlight);
+    assert (prefetcher.maxFramesInFlight() == framesInFlight);
+
+    //
+    // Play the sequence twice, keeping the queue full
+    //
+
+    int requested = 0;
+
+    for (; requested < framesInFlight; ++requested)
+    {
+	prefetcher.prefetch (frameName (tempDir, requested % numFrames).c_str(),
+			     buffers.frameBuffers[requested % framesInFlight],
+			     dataWindow,
+			     requested);
+    }
+
+    for (int delivered = 0; delivered < 2 * numFrames; ++delivered)
+    {
+	assert (prefetcher.framesInFlight() == requested - delivered);
+
+	Header header;
+	int frame = prefetcher.nextFrame (&header);
+	assert (frame == delivered);
+	assert (header.dataWindow() == dataWindow);
+
+	buffers.check (frame % framesInFlight, frame % numFrames);
+
+	if (requested < 2 * numFrames)
+	{
+	    prefetcher.prefetch (frameName (tempDir, requested % numFrames).c_str(),
+				 buffers.frameBuffers[requested % framesInFlight],
+				 dataWindow,
+				 requested);
+	    ++requested;
+	}
+    }
+
+    assert (prefetcher.framesInFlight() == 0);
+    assert (!prefetcher.nextFrameReady());
+}
+
+
+void
+testErrors (const string &tempDir, const Box2i &dataWindow)
+{
+    cout << "errors" << endl;
+
+    Buffers buffers (2, dataWindow);
+
+    {
+	FramePrefetcher prefetcher (2);
+
+	bool caught = false;
+	try { prefetcher.nextFrame(); } catch (const IEX_NAMESPACE::LogicExc &) { caught = true; }
+	assert (caught);
+
+	//
+	// A missing file and a file of another data window are delivered
+	// in order, as exceptions
+	//
+
+	prefetcher.prefetch ((tempDir + "imf_test_prefetch_missing.exr").c_str(),
+			     buffers.frameBuffers[0], dataWindow, 0);
+	prefetcher.prefetch (frameName (tempDir, 1).c_str(),
+			     buffers.frameBuffers[1],
+			     Box2i (dataWindow.min, dataWindow.max - V2i (1, 1)), 1);
+
+	caught = false;
+	try { prefetcher.prefetch (frameName (tempDir, 2).c_str(), buffers.frameBuffers[0], dataWindow, 2); }
+	catch (const IEX_NAMESPACE::LogicExc &) { caught = true; }
+	assert (caught);
+
+	caught = false;
+	try { prefetcher.nextFrame(); } catch (const IEX_NAMESPACE::BaseExc &) { caught = true; }
+	assert (caught);
+
+	caught = false;
+	try { prefetcher.nextFrame(); } catch (const IEX_NAMESPACE::BaseExc &) { caught = true; }
+	assert (caught);
+
+	prefetcher.prefetch (frameName (tempDir, 2).c_str(), buffers.frameBuffers[0], dataWindow, 2);
+	assert (prefetcher.nextFrame() == 2);
+	buffers.check (0, 2);
+
+	//
+	// The prefetcher waits for the frames in flight when it goes away
+	//
+
+	prefetcher.prefetch (frameName (tempDir, 3).c_str(), buffers.frameBuffers[0], dataWindow, 3);
+	prefetcher.prefetch (frameName (tempDir, 4).c_str(), buffers.frameBuffers[1], dataWindow, 4);
+    }
+
+    buffers.check (0, 3);
+    buffers.check (1, 4);
+
+    bool caught = false;
+    try { FramePrefetcher prefetcher (0); } catch (const IEX_NAMESPACE::ArgExc &) { caught = true; }
+    assert (caught);
+}
+
+} // namespace
+
+
+void
+testFramePrefetcher (const string &tempDir)
+{
+    try
+    {
+	cout << "Testing the frame prefetcher" << endl;
+
+	Box2i dataWindow (V2i (-11, 7), V2i (width - 12, height + 6));
+	writeFrames (tempDir, dataWindow);
+
+	int threads = globalThreadCount();
+
+	for (int n = 0; n < 3; ++n)
+	{
+	    setGlobalThreadCount (n * 2);
+	    testPlayback (tempDir, dataWindow, 1);
+	    testPlayback (tempDir, dataWindow, 3);
+	}
+
+	testErrors (tempDir, dataWindow);
+	setGlobalThreadCount (threads);
+
+	for (int frame = 0; frame < numFrames; ++frame)
+	    remove (frameName (tempDir, frame).c_str());
+
+	cout << "ok\n" << endl;
+    }
+    catch (const std::exception &e)
+    {
+	cerr << "ERROR -- caught exception: " << e.what() << endl;
+	assert (false);
+    }
+}
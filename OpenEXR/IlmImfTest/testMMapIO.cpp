@@ -0,0 +1,459 @@
+//
+// SPDX-License-Identifier: BSD-3-Clause
+// Copyright Contributors to the OpenEXR Project.
+//
+
+#ifdef NDEBUG
+#    undef NDEBUG
+#endif
+
+#include "testMMapIO.h"
+
+#include <ImfMMapIO.h>
+#include <ImfRgbaFile.h>
+#include <ImfTiledRgbaFile.h>
+#include <ImfInputFile.h>
+#include <ImfMultiPartInputFile.h>
+#include <ImfMultiPartOutputFile.h>
+#include <ImfInputPart.h>
+#include <ImfOutputPart.h>
+#include <ImfDeepScanLineInputFile.h>
+#include <ImfDeepScanLineOutputFile.h>
+#include <ImfDeepTiledInputFile.h>
+#include <ImfDeepTiledOutputFile.h>
+#include <ImfDeepFrameBuffer.h>
+#include <ImfFrameBuffer.h>
+#include <ImfChannelList.h>
+#include <ImfPartType.h>
+#include <ImfArray.h>
+#include "Iex.h"
+
+#include <fstream>
+#include <iostream>
+#include <vector>
+#include <stdio.h>
+#include <string.h>
+#include <assert.h>
+
+using namespace OPENEXR_IMF_NAMESPACE;
+using namespace std;
+using namespace IMATH_NAMESPACE;
+
+
+namespace {
+
+const int width = 67;
+const int height = 41;
+
+
+void
+fillPixels (Array2D<Rgba> &pixels)
+{
+    pixels.resizeErase (height, width);
+
+    for (int y = 0; y < height; ++y)
+	for (int x = 0; x < width; ++x)
+	    pixels[y][x] = Rgba (x % 13, y % 7, x * y % 5, 1);
+}
+
+
+bool
+samePixels (const Array2D<Rgba> &a, const Array2D<Rgba> &b)
+{
+    for (int y = 0; y < height; ++y)
+    {
+	for (int x = 0; x < width; ++x)
+	{
+	    if (a[y][x].r.bits() != b[y][x].r.bits() ||
+		a[y][x].g.bits() != b[y][x].g.bits() ||
+		a[y][x].b.bits() != b[y][x].b.bits() ||
+		a[y][x].a.bits() != b[y][x].a.bits())
+	    {
+		return false;
+	    }
+	}
+    }
+
+    return true;
+}
+
+
+void
+testStream (const string &tempDir)
+{
+    cout << "stream operations" << endl;
+
+    string fileName = tempDir + "imf_test_mmap_stream.dat";
+
+    {
+	ofstream out (fileName.c_str(), ios_base::binary);
+	for (int i = 0; i < 1000; ++i)
+	    out.put (char (i % 251));
+    }
+
+    {
+	MMapIFStream is (fileName.c_str());
+	assert (is.isMemoryMapped());
+	assert (is.size() == 1000);
+	assert (!strcmp (is.fileName(), fileName.c_str()));
+
+	char c[10];
+	assert (is.read (c, 10));
+	assert (c[3] == 3 && is.tellg() == 10);
+
+	const char *p = is.readMemoryMapped (500);
+	assert (p[0] == 10 && p[499] == char (509 % 251));
+	assert (is.tellg() == 510);
+
+	is.seekg (990);
+	assert (!is.read (c, 10));
+	assert (c[9] == char (999 % 251));
+
+	//
+	// Reads past the end throw, as StdIFStream's do
+	//
+
+	is.seekg (995);
+	bool caught = false;
+	try { is.read (c, 10); } catch (const IEX_NAMESPACE::InputExc &) { caught = true; }
+	assert (caught);
+
+	caught = false;
+	try { is.readMemoryMapped (6); } catch (const IEX_NAMESPACE::InputExc &) { caught = true; }
+	assert (caught);
+
+	is.seekg (2000);
+	caught = false;
+	try { is.read (c, 1); } catch (const IEX_NAMESPACE::InputExc &) { caught = true; }
+	assert (caught);
+    }
+
+    {
+	ofstream out (fileName.c_str(), ios_base::binary | ios_base::trunc);
+    }
+
+    {
+	MMapIFStream is (fileName.c_str());
+	assert (is.size() == 0);
+
+	char c;
+	bool caught = false;
+	try { is.read (&c, 1); } catch (const IEX_NAMESPACE::InputExc &) { caught = true; }
+	assert (caught);
+    }
+
+    remove (fileName.c_str());
+
+    bool caught = false;
+    try { MMapIFStream is (fileName.c_str()); } catch (const IEX_NAMESPACE::BaseExc &) { caught = true; }
+    assert (caught);
+
+    //
+    // openInputStream() only maps files when asked to
+    //
+
+    {
+	ofstream out (fileName.c_str(), ios_base::binary);
+	out << "data";
+    }
+
+    IStream *is = openInputStream (fileName.c_str());
+    assert (!is->isMemoryMapped());
+    delete is;
+
+    setMemoryMappedInput (true);
+    assert (memoryMappedInput());
+    is = openInputStream (fileName.c_str());
+    assert (is->isMemoryMapped() && dynamic_cast <MMapIFStream *> (is));
+    delete is;
+    setMemoryMappedInput (false);
+
+    remove (fileName.c_str());
+}
+
+
+void
+testScanLinesAndTiles (const string &tempDir)
+{
+    Array2D<Rgba> pixels;
+    fillPixels (pixels);
+
+    const Compression compressions[] = {NO_COMPRESSION, ZIP_COMPRESSION, PIZ_COMPRESSION};
+
+    for (int c = 0; c < 3; ++c)
+    {
+	cout << "scan lines and tiles, compression " << compressions[c] << endl;
+
+	string scanLineName = tempDir + "imf_test_mmap_scanlines.exr";
+	string tiledName = tempDir + "imf_test_mmap_tiles.exr";
+
+	{
+	    RgbaOutputFile out (scanLineName.c_str(), width, height,
+				WRITE_RGBA, 1, V2f (0, 0), 1, INCREASING_Y,
+				compressions[c]);
+	    out.setFrameBuffer (&pixels[0][0], 1, width);
+	    out.writePixels (height);
+	}
+
+	{
+	    TiledRgbaOutputFile out (tiledName.c_str(), width, height, 16, 9,
+				     ONE_LEVEL, ROUND_DOWN, WRITE_RGBA, 1,
+				     V2f (0, 0), 1, INCREASING_Y, compressions[c]);
+	    out.setFrameBuffer (&pixels[0][0], 1, width);
+	    out.writeTiles (0, out.numXTiles() - 1, 0, out.numYTiles() - 1);
+	}
+
+	for (int mapped = 0; mapped < 2; ++mapped)
+	{
+	    setMemoryMappedInput (mapped != 0);
+
+	    Array2D<Rgba> in (height, width);
+	    {
+		RgbaInputFile file (scanLineName.c_str());
+		file.setFrameBuffer (&in[0][0], 1, width);
+		file.readPixels (0, height - 1);
+	    }
+	    assert (samePixels (pixels, in));
+
+	    Array2D<Rgba> tiles (height, width);
+	    {
+		TiledRgbaInputFile file (tiledName.c_str());
+		file.setFrameBuffer (&tiles[0][0], 1, width);
+		file.readTiles (0, file.numXTiles() - 1, 0, file.numYTiles() - 1);
+	    }
+	    assert (samePixels (pixels, tiles));
+	}
+
+	setMemoryMappedInput (false);
+
+	//
+	// A single file can be mapped by passing an MMapIFStream
+	//
+
+	{
+	    MMapIFStream is (scanLineName.c_str());
+	    RgbaInputFile file (is);
+
+	    Array2D<Rgba> in (height, width);
+	    file.setFrameBuffer (&in[0][0], 1, width);
+	    file.readPixels (0, height - 1);
+	    assert (samePixels (pixels, in));
+	}
+
+	remove (scanLineName.c_str());
+	remove (tiledName.c_str());
+    }
+}
+
+
+void
+testMultiPart (const string &tempDir)
+{
+    cout << "multi-part files" << endl;
+
+    string fileName = tempDir + "imf_test_mmap_multipart.exr";
+
+    vector<Header> headers;
+    for (int i = 0; i < 2; ++i)
+    {
+	Header header (width, height);
+	header.channels().insert ("Z", Channel (FLOAT));
+	header.setName (i ? "second" : "first");
+	header.setType (SCANLINEIMAGE);
+	header.compression() = i ? ZIPS_COMPRESSION : NO_COMPRESSION;
+	headers.push_back (header);
+    }
+
+    vector<float> z (width * height);
+    for (size_t i = 0; i < z.size(); ++i)
+	z[i] = float (i) * 0.5f;
+
+    {
+	MultiPartOutputFile out (fileName.c_str(), &headers[0], int (headers.size()));
+	for (int i = 0; i < 2; ++i)
+	{
+	    vector<float> v (z);
+	    for (size_t j = 0; j < v.size(); ++j)
+		v[j] += i;
+
+	    OutputPart part (out, i);
+	    FrameBuffer frameBuffer;
+	    frameBuffer.insert ("Z", Slice (FLOAT, (char *) &v[0],
+					    sizeof (float), sizeof (float) * width));
+	    part.setFrameBuffer (frameBuffer);
+	    part.writePixels (height);
+	}
+    }
+
+    setMemoryMappedInput (true);
+
+    {
+	MultiPartInputFile in (fileName.c_str());
+	assert (in.parts() == 2);
+
+	for (int i = 0; i < 2; ++i)
+	{
+	    vector<float> v (width * height);
+	    InputPart part (in, i);
+	    FrameBuffer frameBuffer;
+	    frameBuffer.insert ("Z", Slice (FLOAT, (char *) &v[0],
+					    sizeof (float), sizeof (float) * width));
+	    part.setFrameBuffer (frameBuffer);
+	    part.readPixels (0, height - 1);
+
+	    for (size_t j = 0; j < v.size(); ++j)
+		assert (v[j] == z[j] + i);
+	}
+    }
+
+    setMemoryMappedInput (false);
+    remove (fileName.c_str());
+}
+
+
+void
+testDeep (const string &tempDir)
+{
+    cout << "deep files" << endl;
+
+    string scanLineName = tempDir + "imf_test_mmap_deep_scanlines.exr";
+    string tiledName = tempDir + "imf_test_mmap_deep_tiles.exr";
+
+    //
+    // Pixel (x, y) has (x + y) % 4 samples, of value x + y * 1000 + s
+    //
+
+    Array2D<unsigned int> counts (height, width);
+    Array2D<float *> pointers (height, width);
+    vector<float> samples;
+
+    for (int y = 0; y < height; ++y)
+	for (int x = 0; x < width; ++x)
+	    counts[y][x] = (x + y) % 4;
+
+    for (int y = 0; y < height; ++y)
+	for (int x = 0; x < width; ++x)
+	    for (unsigned int s = 0; s < counts[y][x]; ++s)
+		samples.push_back (x + y * 1000 + s);
+
+    size_t n = 0;
+    for (int y = 0; y < height; ++y)
+	for (int x = 0; x < width; ++x)
+	{
+	    pointers[y][x] = &samples[0] + n;
+	    n += counts[y][x];
+	}
+
+    DeepFrameBuffer frameBuffer;
+    frameBuffer.insertSampleCountSlice (Slice (UINT, (char *) &counts[0][0],
+					       sizeof (unsigned int),
+					       sizeof (unsigned int) * width));
+    frameBuffer.insert ("Z", DeepSlice (FLOAT, (char *) &pointers[0][0],
+					sizeof (float *), sizeof (float *) * width,
+					sizeof (float)));
+
+    Header header (width, height);
+    header.channels().insert ("Z", Channel (FLOAT));
+    header.compression() = ZIPS_COMPRESSION;
+
+    {
+	Header h (header);
+	h.setType (DEEPSCANLINE);
+	DeepScanLineOutputFile out (scanLineName.c_str(), h);
+	out.setFrameBuffer (frameBuffer);
+	out.writePixels (height);
+    }
+
+    {
+	Header h (header);
+	h.setType (DEEPTILE);
+	h.setTileDescription (TileDescription (16, 16, ONE_LEVEL));
+	DeepTiledOutputFile out (tiledName.c_str(), h);
+	out.setFrameBuffer (frameBuffer);
+	out.writeTiles (0, out.numXTiles() - 1, 0, out.numYTiles() - 1);
+    }
+
+    setMemoryMappedInput (true);
+
+    for (int tiled = 0; tiled < 2; ++tiled)
+    {
+	Array2D<unsigned int> inCounts (height, width);
+	Array2D<float *> inPointers (height, width);
+	vector<float> inSamples (samples.size());
+
+	DeepFrameBuffer inFrameBuffer;
+	inFrameBuffer.insertSampleCountSlice (Slice (UINT, (char *) &inCounts[0][0],
+						     sizeof (unsigned int),
+						     sizeof (unsigned int) * width));
+	inFrameBuffer.insert ("Z", DeepSlice (FLOAT, (char *) &inPointers[0][0],
+					      sizeof (float *), sizeof (float *) * width,
+					      sizeof (float)));
+
+	if (tiled)
+	{
+	    DeepTiledInputFile in (tiledName.c_str());
+	    in.setFrameBuffer (inFrameBuffer);
+	    in.readPixelSampleCounts (0, in.numXTiles() - 1, 0, in.numYTiles() - 1);
+
+	    size_t k = 0;
+	    for (int y = 0; y < height; ++y)
+		for (int x = 0; x < width; ++x)
+		{
+		    inPointers[y][x] = &inSamples[0] + k;
+		    k += inCounts[y][x];
+		}
+
+	    in.readTiles (0, in.numXTiles() - 1, 0, in.numYTiles() - 1);
+	}
+	else
+	{
+	    DeepScanLineInputFile in (scanLineName.c_str());
+	    in.setFrameBuffer (inFrameBuffer);
+	    in.readPixelSampleCounts (0, height - 1);
+
+	    size_t k = 0;
+	    for (int y = 0; y < height; ++y)
+		for (int x = 0; x < width; ++x)
+		{
+		    inPointers[y][x] = &inSamples[0] + k;
+		    k += inCounts[y][x];
+		}
+
+	    in.readPixels (0, height - 1);
+	}
+
+	for (int y = 0; y < height; ++y)
+	    for (int x = 0; x < width; ++x)
+		assert (inCounts[y][x] == counts[y][x]);
+
+	assert (inSamples == samples);
+    }
+
+    setMemoryMappedInput (false);
+    remove (scanLineName.c_str());
+    remove (tiledName.c_str());
+}
+
+} // namespace
+
+
+void
+testMMapIO (const string &tempDir)
+{
+    try
+    {
+	cout << "Testing memory-mapped input files" << endl;
+
+	testStream (tempDir);
+	testScanLinesAndTiles (tempDir);
+	testMultiPart (tempDir);
+	testDeep (tempDir);
+
+	cout << "ok\n" << endl;
+    }
+    catch (const std::exception &e)
+    {
+	cerr << "ERROR -- caught exception: " << e.what() << endl;
+	assert (false);
+    }
+}
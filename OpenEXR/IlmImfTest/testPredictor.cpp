@@ -0,0 +1,292 @@
+//
+// SPDX-License-Identifier: BSD-3-Clause
+// Copyright Contributors to the OpenEXR Project.
+//
+
+#ifdef NDEBUG
+#    undef NDEBUG
+#endif
+
+#include "testPredictor.h"
+
+#include <ImfPredictor.h>
+#include <ImfRle.h>
+#include <ImathRandom.h>
+
+#include <chrono>
+#include <iostream>
+#include <vector>
+#include <string.h>
+#include <assert.h>
+
+using namespace OPENEXR_IMF_NAMESPACE;
+using namespace IMATH_NAMESPACE;
+using namespace std;
+
+namespace {
+
+//
+// The scalar loops that the ZIP and RLE compressors used before the
+// SSE2 versions; the library's functions must match them exactly.
+//
+
+void
+splitReference (const char *in, size_t size, char *out)
+{
+    char *t1 = out;
+    char *t2 = out + (size + 1) / 2;
+    const char *stop = in + size;
+
+    while (true)
+    {
+	if (in < stop)
+	    *(t1++) = *(in++);
+	else
+	    break;
+
+	if (in < stop)
+	    *(t2++) = *(in++);
+	else
+	    break;
+    }
+}
+
+
+void
+predictReference (char *buf, size_t size)
+{
+    unsigned char *t = (unsigned char *) buf + 1;
+    unsigned char *stop = (unsigned char *) buf + size;
+    int p = t[-1];
+
+    while (t < stop)
+    {
+	int d = int (t[0]) - p + (128 + 256);
+	p = t[0];
+	t[0] = d;
+	++t;
+    }
+}
+
+
+const int MIN_RUN_LENGTH = 3;
+const int MAX_RUN_LENGTH = 127;
+
+int
+rleCompressReference (int inLength, const char in[], signed char out[])
+{
+    const char *inEnd = in + inLength;
+    const char *runStart = in;
+    const char *runEnd = in + 1;
+    signed char *outWrite = out;
+
+    while (runStart < inEnd)
+    {
+	while (runEnd < inEnd &&
+	       *runStart == *runEnd &&
+	       runEnd - runStart - 1 < MAX_RUN_LENGTH)
+	{
+	    ++runEnd;
+	}
+
+	if (runEnd - runStart >= MIN_RUN_LENGTH)
+	{
+	    *outWrite++ = (runEnd - runStart) - 1;
+	    *outWrite++ = *(signed char *) runStart;
+	    runStart = runEnd;
+	}
+	else
+	{
+	    while (runEnd < inEnd &&
+		   ((runEnd + 1 >= inEnd ||
+		     *runEnd != *(runEnd + 1)) ||
+		    (runEnd + 2 >= inEnd ||
+		     *(runEnd + 1) != *(runEnd + 2))) &&
+		   runEnd - runStart < MAX_RUN_LENGTH)
+	    {
+		++runEnd;
+	    }
+
+	    *outWrite++ = runStart - runEnd;
+
+	    while (runStart < runEnd)
+	    {
+		*outWrite++ = *(signed char *) (runStart++);
+	    }
+	}
+
+	++runEnd;
+    }
+
+    return outWrite - out;
+}
+
+
+//
+// Pixel-like data: slowly varying 16-bit values with some noise,
+// and stretches of constant values, so that the RLE encoder
+// sees both runs of all lengths and literal data.
+//
+
+void
+fillData (vector<char> &data, Rand48 &rand48)
+{
+    size_t i = 0;
+    unsigned short v = 0;
+
+    while (i < data.size())
+    {
+	int n = rand48.nexti() % 300 + 1;
+	bool constant = rand48.nextf() < .3;
+
+	for (int j = 0; j < n && i < data.size(); ++j)
+	{
+	    if (!constant)
+		v += rand48.nexti() % 5 - 2;
+
+	    data[i++] = char (v & 0xff);
+
+	    if (i < data.size())
+		data[i++] = char (v >> 8);
+	}
+    }
+}
+
+
+void
+compareStages (size_t size, Rand48 &rand48)
+{
+    vector<char> raw (size);
+    fillData (raw, rand48);
+
+    vector<char> split (size + 1), splitRef (size + 1);
+    splitBytes (raw.data(), size, split.data());
+    splitReference (raw.data(), size, splitRef.data());
+    assert (!memcmp (split.data(), splitRef.data(), size));
+
+    vector<char> unpredicted (split);
+
+    predictBytes (split.data(), size);
+    predictReference (splitRef.data(), size);
+    assert (!memcmp (split.data(), splitRef.data(), size));
+
+    vector<signed char> rle (size * 3 / 2 + 2), rleRef (size * 3 / 2 + 2);
+    int rleSize = rleCompress (int (size), split.data(), rle.data());
+    int rleRefSize = rleCompressReference (int (size), split.data(),
+					   rleRef.data());
+    assert (rleSize == rleRefSize);
+    assert (!memcmp (rle.data(), rleRef.data(), rleSize));
+
+    vector<char> unrle (size + 1);
+
+    if (size > 0)
+    {
+	assert (rleUncompress (rleSize, int (size), rle.data(), unrle.data()) ==
+		int (size));
+	assert (!memcmp (unrle.data(), split.data(), size));
+    }
+
+    reconstructBytes (split.data(), size);
+    assert (!memcmp (split.data(), unpredicted.data(), size));
+
+    vector<char> interleaved (size + 1);
+    interleaveBytes (split.data(), size, interleaved.data());
+    assert (!memcmp (interleaved.data(), raw.data(), size));
+}
+
+
+template <class F>
+void
+reportThroughput (const char *name, size_t size, F f)
+{
+    double best = 0;
+
+    for (int run = 0; run < 5; ++run)
+    {
+	chrono::steady_clock::time_point start = chrono::steady_clock::now();
+
+	for (int i = 0; i < 10; ++i)
+	    f();
+
+	double seconds = chrono::duration<double>
+			     (chrono::steady_clock::now() - start).count();
+
+	if (run == 0 || seconds < best)
+	    best = seconds;
+    }
+
+    cout << "   " << name << ": " <<
+	    10 * double (size) / best / (1 << 30) << " GB/s" << endl;
+}
+
+
+//
+// Throughput of each stage on a buffer the size of a ZIP chunk
+// of a 2K RGBA half image, 16 lines
+//
+
+void
+benchmarkStages ()
+{
+    const size_t size = 2048 * 4 * 2 * 16;
+
+    Rand48 rand48 (0);
+    vector<char> raw (size);
+    fillData (raw, rand48);
+
+    vector<char> split (size);
+    vector<signed char> rle (size * 3 / 2 + 2);
+    vector<char> out (size);
+    int rleSize = 0;
+
+    splitBytes (raw.data(), size, split.data());
+    predictBytes (split.data(), size);
+    rleSize = rleCompress (int (size), split.data(), rle.data());
+
+    reportThroughput ("splitBytes", size, [&] ()
+	{ splitBytes (raw.data(), size, out.data()); });
+
+    reportThroughput ("interleaveBytes", size, [&] ()
+	{ interleaveBytes (raw.data(), size, out.data()); });
+
+    reportThroughput ("predictBytes", size, [&] ()
+	{ predictBytes (out.data(), size); });
+
+    reportThroughput ("reconstructBytes", size, [&] ()
+	{ reconstructBytes (out.data(), size); });
+
+    reportThroughput ("rleCompress", size, [&] ()
+	{ rleCompress (int (size), split.data(), rle.data()); });
+
+    reportThroughput ("rleUncompress", size, [&] ()
+	{ rleUncompress (rleSize, int (size), rle.data(), out.data()); });
+}
+
+} // namespace
+
+
+void
+testPredictor (const string &)
+{
+    try
+    {
+	cout << "Testing the ZIP and RLE byte stages" << endl;
+
+	Rand48 rand48 (0);
+
+	for (size_t size = 0; size < 100; ++size)
+	    compareStages (size, rand48);
+
+	for (int i = 0; i < 200; ++i)
+	    compareStages (rand48.nexti() % 200000, rand48);
+
+	benchmarkStages();
+
+	cout << "ok\n" << endl;
+    }
+    catch (const std::exception &e)
+    {
+	cerr << "ERROR -- caught exception: " << e.what() << endl;
+	assert (false);
+    }
+}
@@ -0,0 +1,445 @@
+//
+// SPDX-License-Identifier: BSD-3-Clause
+// Copyright Contributors to the OpenEXR Project.
+//
+
+#ifdef NDEBUG
+#    undef NDEBUG
+#endif
+
+#include "testTileCache.h"
+
+#include <ImfTileCache.h>
+#include <ImfCachedTile.h>
+#include <ImfTiledRgbaFile.h>
+#include <ImfTiledInputFile.h>
+#include <ImfTiledOutputFile.h>
+#include <ImfChannelList.h>
+#include <ImfFrameBuffer.h>
+#include <ImfStdIO.h>
+#include <ImfThreading.h>
+#include <ImfArray.h>
+#include "Iex.h"
+
+#include <fstream>
+#include <iostream>
+#include <sstream>
+#include <stdio.h>
+#include <assert.h>
+
+using namespace OPENEXR_IMF_NAMESPACE;
+using namespace std;
+using namespace IMATH_NAMESPACE;
+
+
+namespace {
+
+const int width = 131;
+const int height = 97;
+const int tileSize = 16;
+const size_t bytesPerTile = tileSize * tileSize * 4 * sizeof (half);
+
+
+void
+fillPixels (Array2D<Rgba> &pixels, int seed)
+{
+    pixels.resizeErase (height, width);
+
+    for (int y = 0; y < height; ++y)
+	for (int x = 0; x < width; ++x)
+	    pixels[y][x] = Rgba (x % 13 + seed, y % 7, x * y % 5, 1);
+}
+
+
+void
+writeFile (const string &fileName, Array2D<Rgba> &pixels)
+{
+    TiledRgbaOutputFile out (fileName.c_str(), width, height,
+			     tileSize, tileSize, MIPMAP_LEVELS, ROUND_DOWN,
+			     WRITE_RGBA, 1, V2f (0, 0), 1, INCREASING_Y,
+			     PIZ_COMPRESSION);
+
+    out.setFrameBuffer (&pixels[0][0], 1, width);
+
+    for (int l = 0; l < out.numLevels(); ++l)
+	out.writeTiles (0, out.numXTiles (l) - 1, 0, out.numYTiles (l) - 1, l);
+}
+
+
+//
+// Read level 0 of the file, and compare it with pixels
+//
+
+void
+readAndCompare (const string &fileName, Array2D<Rgba> &pixels)
+{
+    TiledRgbaInputFile in (fileName.c_str());
+
+    Array2D<Rgba> pixels2 (height, width);
+    in.setFrameBuffer (&pixels2[0][0], 1, width);
+    in.readTiles (0, in.numXTiles (0) - 1, 0, in.numYTiles (0) - 1, 0);
+
+    for (int y = 0; y < height; ++y)
+    {
+	for (int x = 0; x < width; ++x)
+	{
+	    assert (pixels2[y][x].r == pixels[y][x].r);
+	    assert (pixels2[y][x].g == pixels[y][x].g);
+	    assert (pixels2[y][x].b == pixels[y][x].b);
+	    assert (pixels2[y][x].a == pixels[y][x].a);
+	}
+    }
+}
+
+
+void
+readTile (const string &fileName, int dx, int dy)
+{
+    TiledRgbaInputFile in (fileName.c_str());
+
+    Array2D<Rgba> pixels (height, width);
+    in.setFrameBuffer (&pixels[0][0], 1, width);
+    in.readTile (dx, dy, 0);
+}
+
+
+void
+testHitsAndMisses (const string &fileName, Array2D<Rgba> &pixels)
+{
+    cout << "hits and misses" << endl;
+
+    const int numTiles = ((width + tileSize - 1) / tileSize) *
+			 ((height + tileSize - 1) / tileSize);
+
+    //
+    // With the cache disabled, nothing is looked up or cached
+    //
+
+    setTileCacheSize (0);
+    resetTileCacheStats();
+    readAndCompare (fileName, pixels);
+
+    TileCacheStats stats = tileCacheStats();
+    assert (stats.hits == 0 && stats.misses == 0 && stats.numTiles == 0);
+
+    //
+    // The first read misses every tile, the second one hits them
+    //
+
+    setTileCacheSize (1 << 20);
+    readAndCompare (fileName, pixels);
+
+    stats = tileCacheStats();
+    assert (stats.hits == 0 && stats.misses == numTiles);
+    assert (stats.numTiles == size_t (numTiles));
+    assert (stats.bytes <= numTiles * bytesPerTile);
+
+    readAndCompare (fileName, pixels);
+
+    stats = tileCacheStats();
+    assert (stats.hits == numTiles && stats.misses == numTiles);
+
+    //
+    // The cached tiles hold all the channels, so reading them
+    // into a frame buffer with a single channel hits too
+    //
+
+    {
+	TiledInputFile in (fileName.c_str());
+
+	Array2D<float> g (height, width);
+	FrameBuffer fb;
+	fb.insert ("G", Slice (FLOAT, (char *) &g[0][0],
+			       sizeof (float), sizeof (float) * width));
+
+	in.setFrameBuffer (fb);
+	in.readTiles (0, in.numXTiles (0) - 1, 0, in.numYTiles (0) - 1, 0);
+
+	for (int y = 0; y < height; ++y)
+	    for (int x = 0; x < width; ++x)
+		assert (g[y][x] == float (pixels[y][x].g));
+    }
+
+    stats = tileCacheStats();
+    assert (stats.hits == 2 * numTiles && stats.misses == numTiles);
+
+    //
+    // Clearing the tiles of another file changes nothing,
+    // clearing those of the file empties the cache
+    //
+
+    clearTileCache ("no such file");
+    assert (tileCacheStats().numTiles == size_t (numTiles));
+
+    clearTileCache (fileName.c_str());
+    stats = tileCacheStats();
+    assert (stats.numTiles == 0 && stats.bytes == 0);
+
+    resetTileCacheStats();
+    stats = tileCacheStats();
+    assert (stats.hits == 0 && stats.misses == 0);
+}
+
+
+void
+testLeastRecentlyUsed (const string &fileName)
+{
+    cout << "least recently used tiles" << endl;
+
+    //
+    // With room for three full tiles, reading tiles A, B, C, A and D
+    // discards B, the least recently used one
+    //
+
+    setTileCacheSize (3 * bytesPerTile);
+    clearTileCache();
+    resetTileCacheStats();
+
+    readTile (fileName, 0, 0);
+    readTile (fileName, 1, 0);
+    readTile (fileName, 2, 0);
+    readTile (fileName, 0, 0);
+    readTile (fileName, 3, 0);
+
+    TileCacheStats stats = tileCacheStats();
+    assert (stats.hits == 1 && stats.misses == 4);
+    assert (stats.numTiles == 3 && stats.bytes == 3 * bytesPerTile);
+
+    readTile (fileName, 2, 0);
+    readTile (fileName, 0, 0);
+    readTile (fileName, 3, 0);
+    assert (tileCacheStats().hits == 4);
+
+    readTile (fileName, 1, 0);
+    assert (tileCacheStats().misses == 5);
+
+    //
+    // Shrinking the cache discards tiles right away
+    //
+
+    setTileCacheSize (bytesPerTile);
+    stats = tileCacheStats();
+    assert (stats.numTiles == 1 && stats.bytes == bytesPerTile);
+
+    setTileCacheSize (0);
+    assert (tileCacheStats().numTiles == 0);
+}
+
+
+void
+testThreads (const string &fileName, Array2D<Rgba> &pixels)
+{
+    cout << "reading with threads" << endl;
+
+    int threads = globalThreadCount();
+    setGlobalThreadCount (4);
+
+    setTileCacheSize (1 << 20);
+    clearTileCache();
+
+    for (int i = 0; i < 3; ++i)
+	readAndCompare (fileName, pixels);
+
+    //
+    // A rewritten file must be cleared from the cache
+    //
+
+    Array2D<Rgba> pixels2;
+    fillPixels (pixels2, 1);
+    writeFile (fileName, pixels2);
+
+    clearTileCache (fileName.c_str());
+    readAndCompare (fileName, pixels2);
+    readAndCompare (fileName, pixels2);
+
+    setTileCacheSize (0);
+    setGlobalThreadCount (threads);
+}
+
+//
+// A single level file with half channels of the given names,
+// the value of channel c being the one of fillValue()
+//
+
+half
+fillValue (int x, int y, int c, int seed)
+{
+    return half (float ((x + 3 * c + seed) % 17 + y % 5));
+}
+
+
+void
+writeChannels (const string &fileName, const char *names[], int n, int seed)
+{
+    Header header (width, height);
+    header.setTileDescription (TileDescription (tileSize, tileSize, ONE_LEVEL));
+
+    for (int c = 0; c < n; ++c)
+	header.channels().insert (names[c], Channel (HALF));
+
+    Array2D<half> pixels[3];
+    FrameBuffer fb;
+
+    for (int c = 0; c < n; ++c)
+    {
+	pixels[c].resizeErase (height, width);
+
+	for (int y = 0; y < height; ++y)
+	    for (int x = 0; x < width; ++x)
+		pixels[c][y][x] = fillValue (x, y, c, seed);
+
+	fb.insert (names[c], Slice (HALF, (char *) &pixels[c][0][0],
+				    sizeof (half), sizeof (half) * width));
+    }
+
+    TiledOutputFile out (fileName.c_str(), header);
+    out.setFrameBuffer (fb);
+    out.writeTiles (0, out.numXTiles() - 1, 0, out.numYTiles() - 1);
+}
+
+
+void
+readAndCompareChannel (TiledInputFile &in, const char name[], int c, int seed)
+{
+    Array2D<half> pixels (height, width);
+    FrameBuffer fb;
+    fb.insert (name, Slice (HALF, (char *) &pixels[0][0],
+			    sizeof (half), sizeof (half) * width));
+
+    in.setFrameBuffer (fb);
+    in.readTiles (0, in.numXTiles() - 1, 0, in.numYTiles() - 1);
+
+    for (int y = 0; y < height; ++y)
+	for (int x = 0; x < width; ++x)
+	    assert (pixels[y][x] == fillValue (x, y, c, seed));
+}
+
+
+string
+fileContents (const string &fileName)
+{
+    ifstream file (fileName.c_str(), ios_base::binary);
+    stringstream contents;
+    contents << file.rdbuf();
+    return contents.str();
+}
+
+
+void
+testFileIdentity (const string &tempDir)
+{
+    cout << "files with the same name" << endl;
+
+    string fileName1 = tempDir + "imf_test_tile_cache_1.exr";
+    string fileName2 = tempDir + "imf_test_tile_cache_2.exr";
+    const char *y[] = {"Y"};
+    const char *rgb[] = {"R", "G", "B"};
+
+    setTileCacheSize (1 << 20);
+    clearTileCache();
+    resetTileCacheStats();
+
+    //
+    // Streams given by the caller are not cached: two in-memory
+    // streams with the same name each read their own pixels
+    //
+
+    writeChannels (fileName1, y, 1, 1);
+    writeChannels (fileName2, y, 1, 2);
+
+    {
+	StdISStream is1;
+	is1.str (fileContents (fileName1));
+	TiledInputFile in1 (is1);
+	readAndCompareChannel (in1, "Y", 0, 1);
+
+	StdISStream is2;
+	is2.str (fileContents (fileName2));
+	TiledInputFile in2 (is2);
+	assert (string (is1.fileName()) == is2.fileName());
+	readAndCompareChannel (in2, "Y", 0, 2);
+    }
+
+    TileCacheStats stats = tileCacheStats();
+    assert (stats.hits == 0 && stats.misses == 0 && stats.numTiles == 0);
+
+    //
+    // A file rewritten with more channels does not find the tiles
+    // of the old file, even when they are not cleared from the cache
+    //
+
+    {
+	TiledInputFile in (fileName1.c_str());
+	readAndCompareChannel (in, "Y", 0, 1);
+	readAndCompareChannel (in, "Y", 0, 1);
+    }
+
+    stats = tileCacheStats();
+    assert (stats.numTiles > 0 && stats.hits == stats.misses);
+
+    writeChannels (fileName1, rgb, 3, 3);
+
+    {
+	TiledInputFile in (fileName1.c_str());
+	readAndCompareChannel (in, "R", 0, 3);
+	readAndCompareChannel (in, "G", 1, 3);
+	readAndCompareChannel (in, "B", 2, 3);
+    }
+
+    //
+    // A cached tile that does not have the size of the tile
+    // looked up is discarded, and counted as a miss
+    //
+
+    char data[8] = {0};
+    string identity = tileCacheFileIdentity (fileName2.c_str());
+    assert (!identity.empty());
+    assert (tileCacheFileIdentity ("no such file").empty());
+
+    clearTileCache();
+    resetTileCacheStats();
+
+    cacheTile (fileName2, identity, 0, 0, 0, 0, 0, data, 8, Compressor::XDR);
+    assert (findCachedTile (fileName2, identity, 0, 0, 0, 0, 0, 8));
+    assert (!findCachedTile (fileName2, identity, 0, 0, 0, 0, 0, 24));
+    assert (!findCachedTile (fileName2, "", 0, 0, 0, 0, 0, 8));
+
+    stats = tileCacheStats();
+    assert (stats.hits == 1 && stats.misses == 2 && stats.numTiles == 0);
+
+    setTileCacheSize (0);
+    remove (fileName1.c_str());
+    remove (fileName2.c_str());
+}
+
+} // namespace
+
+
+void
+testTileCache (const string &tempDir)
+{
+    try
+    {
+	cout << "Testing the tile cache" << endl;
+
+	string fileName = tempDir + "imf_test_tile_cache.exr";
+
+	Array2D<Rgba> pixels;
+	fillPixels (pixels, 0);
+	writeFile (fileName, pixels);
+
+	testHitsAndMisses (fileName, pixels);
+	testLeastRecentlyUsed (fileName);
+	testThreads (fileName, pixels);
+	testFileIdentity (tempDir);
+
+	remove (fileName.c_str());
+
+	cout << "ok\n" << endl;
+    }
+    catch (const std::exception &e)
+    {
+	cerr << "ERROR -- caught exception: " << e.what() << endl;
+	assert (false);
+    }
+}
@@ -0,0 +1,215 @@
+//
+// SPDX-License-Identifier: BSD-3-Clause
+// Copyright Contributors to the OpenEXR Project.
+//
+
+#ifdef NDEBUG
+#    undef NDEBUG
+#endif
+
+#include "testZip.h"
+
+#include <ImfZip.h>
+#include <ImfOutputFile.h>
+#include <ImfInputFile.h>
+#include <ImfChannelList.h>
+#include <ImfFrameBuffer.h>
+#include <ImfStandardAttributes.h>
+#include <ImfArray.h>
+#include <ImathRandom.h>
+#include <half.h>
+#include "Iex.h"
+
+#include <zlib.h>
+#include <fstream>
+#include <iostream>
+#include <vector>
+#include <stdio.h>
+#include <string.h>
+#include <math.h>
+#include <assert.h>
+
+using namespace OPENEXR_IMF_NAMESPACE;
+using namespace std;
+using namespace IMATH_NAMESPACE;
+
+
+namespace {
+
+const int width = 347;
+const int height = 211;
+
+
+void
+fillPixels (Array2D<half> &pixels)
+{
+    Rand48 rand48 (0);
+
+    for (int y = 0; y < height; ++y)
+	for (int x = 0; x < width; ++x)
+	    pixels[y][x] = sinf (x * .05f) * cosf (y * .03f) +
+			   rand48.nextf (-.01, .01);
+}
+
+
+//
+// Zip must produce exactly what zlib's compress2() produces for the
+// same level, block after block.  Decompressing Zip's output with
+// zlib recovers the predicted data that was deflated.
+//
+
+void
+compareWithZlib (int level)
+{
+    Rand48 rand48 (level + 1);
+    Zip zip (65536, level);
+    vector<char> compressed (zip.maxCompressedSize());
+    vector<char> uncompressed (65536);
+    vector<char> predicted (65536);
+    vector<char> reference (compressBound (65536));
+
+    for (int i = 0; i < 20; ++i)
+    {
+	int rawSize = rand48.nexti() % 65536 + 1;
+	vector<char> raw (rawSize);
+
+	for (int j = 0; j < rawSize; ++j)
+	    raw[j] = char (j / 7 + (rand48.nexti() & 3));
+
+	int outSize = zip.compress (&raw[0], rawSize, &compressed[0]);
+
+	uLongf predictedSize = predicted.size();
+
+	assert (Z_OK == ::uncompress ((Bytef *) &predicted[0], &predictedSize,
+				      (const Bytef *) &compressed[0], outSize));
+
+	assert (predictedSize == uLongf (rawSize));
+
+	uLongf referenceSize = reference.size();
+
+	assert (Z_OK == ::compress2 ((Bytef *) &reference[0], &referenceSize,
+				     (const Bytef *) &predicted[0],
+				     predictedSize, level));
+
+	assert (referenceSize == uLongf (outSize));
+	assert (!memcmp (&reference[0], &compressed[0], outSize));
+
+	assert (zip.uncompress (&compressed[0], outSize, &uncompressed[0]) ==
+		rawSize);
+
+	assert (!memcmp (&uncompressed[0], &raw[0], rawSize));
+    }
+}
+
+
+Int64
+writeRead (const string &fileName,
+	   Array2D<half> &pixels,
+	   Compression compression,
+	   int level,
+	   bool setLevel)
+{
+    Header header (width, height);
+    header.compression() = compression;
+    header.channels().insert ("Y", Channel (HALF));
+
+    if (setLevel)
+	addZipCompressionLevel (header, level);
+
+    {
+	FrameBuffer fb;
+	fb.insert ("Y", Slice (HALF, (char *) &pixels[0][0],
+			       sizeof (half), sizeof (half) * width));
+
+	OutputFile out (fileName.c_str(), header);
+	out.setFrameBuffer (fb);
+	out.writePixels (height);
+    }
+
+    Array2D<half> pixels2 (height, width);
+
+    {
+	FrameBuffer fb;
+	fb.insert ("Y", Slice (HALF, (char *) &pixels2[0][0],
+			       sizeof (half), sizeof (half) * width));
+
+	InputFile in (fileName.c_str());
+	assert (hasZipCompressionLevel (in.header()) == setLevel);
+	in.setFrameBuffer (fb);
+	in.readPixels (0, height - 1);
+    }
+
+    assert (!memcmp (&pixels[0][0], &pixels2[0][0],
+		     sizeof (half) * width * height));
+
+    ifstream file (fileName.c_str(), ios_base::binary);
+    file.seekg (0, ios_base::end);
+    return Int64 (file.tellg());
+}
+
+
+void
+testLevels (const string &tempDir, Compression compression)
+{
+    cout << (compression == ZIP_COMPRESSION? "ZIP": "ZIPS") << endl;
+
+    string fileName = tempDir + "imf_test_zip.exr";
+
+    Array2D<half> pixels (height, width);
+    fillPixels (pixels);
+
+    //
+    // Level 0 stores, so its file is the largest, and level 9
+    // compresses the most.  An out of range level is ignored.
+    //
+
+    Int64 stored = writeRead (fileName, pixels, compression, 0, true);
+    Int64 fast = writeRead (fileName, pixels, compression, 1, true);
+    Int64 best = writeRead (fileName, pixels, compression, 9, true);
+    Int64 invalid = writeRead (fileName, pixels, compression, 42, true);
+    Int64 dflt = writeRead (fileName, pixels, compression, 0, false);
+
+    cout << "   level 0: " << stored << " bytes, level 1: " << fast <<
+	    " bytes, level 9: " << best << " bytes, default: " << dflt <<
+	    " bytes" << endl;
+
+    assert (stored > fast);
+    assert (fast >= best);
+
+    //
+    // The files with the invalid level have one attribute more than
+    // those without it, an int named "zipCompressionLevel"
+    //
+
+    assert (invalid - dflt == Int64 (strlen ("zipCompressionLevel") + 1 +
+				     strlen ("int") + 1 + 4 + sizeof (int)));
+
+    remove (fileName.c_str());
+}
+
+} // namespace
+
+
+void
+testZip (const string &tempDir)
+{
+    try
+    {
+	cout << "Testing zip compression levels" << endl;
+
+	for (int level = 0; level <= 9; ++level)
+	    compareWithZlib (level);
+
+	compareWithZlib (Z_DEFAULT_COMPRESSION);
+
+	testLevels (tempDir, ZIP_COMPRESSION);
+	testLevels (tempDir, ZIPS_COMPRESSION);
+
+	cout << "ok\n" << endl;
+    }
+    catch (const std::exception &e)
+    {
+	cerr << "ERROR -- caught exception: " << e.what() << endl;
+	assert (false);
+    }
+}
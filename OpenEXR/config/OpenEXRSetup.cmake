@@ -137,3 +137,15 @@ find_package(ZLIB REQUIRED)
 if(NOT TARGET ZLIB::ZLIB)
   message(FATAL_ERROR "Unable to find zlib library target which is required for OpenEXR")
 endif()
+
+# libdeflate is optional: when enabled, ZIP data is decompressed with it
+# instead of zlib.  Compression always uses zlib, so files are unchanged.
+option(OPENEXR_USE_LIBDEFLATE "Decompress ZIP data with libdeflate" OFF)
+if(OPENEXR_USE_LIBDEFLATE)
+  find_path(LIBDEFLATE_INCLUDE_DIR libdeflate.h)
+  find_library(LIBDEFLATE_LIBRARY NAMES deflate libdeflate)
+  if(NOT LIBDEFLATE_INCLUDE_DIR OR NOT LIBDEFLATE_LIBRARY)
+    message(FATAL_ERROR "Unable to find libdeflate, which was requested with OPENEXR_USE_LIBDEFLATE")
+  endif()
+  set(OPENEXR_IMF_HAVE_LIBDEFLATE TRUE)
+endif()
@@ -69,13 +69,7 @@ class EnvmapImage
       const IMF::Array2D<IMF::Rgba> &
                                 pixels () const;
       
-      IMF::Rgba                 filteredLookup (IMATH::V3f direction,
-                                                float radius,
-                                                int numSamples) const;
-
   private:
-      
-      IMF::Rgba                 sample (const IMATH::V2f &pos) const;
 
       IMF::Envmap               _type;
       IMATH::Box2i              _dataWindow;
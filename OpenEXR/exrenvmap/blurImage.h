@@ -51,7 +51,7 @@
 
 
 void
-blurImage (EnvmapImage &image, bool verbose);
+blurImage (EnvmapImage &image, bool approximate, bool verbose);
 
 
 #endif
@@ -42,6 +42,9 @@
 
 #include "makeTiled.h"
 
+#include <ImfThreading.h>
+#include <IlmThreadPool.h>
+
 #include <iostream>
 #include <exception>
 #include <string>
@@ -100,6 +103,17 @@ usageMessage (const char argv0[], bool verbose = false)
         "          (none/rle/zip/piz/pxr24/b44/b44a/dwaa/dwab,\n"
         "          default is zip)\n"
         "\n"
+        "-s        streaming mode: generates the lower-resolution\n"
+        "          levels while the higher-resolution levels are\n"
+        "          read and written, keeping only a few rows of\n"
+        "          tiles of each level in memory.  The output\n"
+        "          image has the same pixels, but its tiles are\n"
+        "          stored in RANDOM_Y order.\n"
+        "\n"
+        "-n x      sets the number of threads that generate the\n"
+        "          levels and compress the tiles (default is\n"
+        "          the number of processors)\n"
+        "\n"
         "-v        verbose mode\n"
         "\n"
         "-h        prints this message\n"
@@ -226,6 +240,8 @@ main(int argc, char **argv)
     set<string> doNotFilter;
     Extrapolation extX = CLAMP;
     Extrapolation extY = CLAMP;
+    bool streaming = false;
+    int numThreads = ILMTHREAD_NAMESPACE::ThreadPool::estimateThreadCountForFileIO();
     bool verbose = false;
 
     //
@@ -342,6 +358,34 @@ main(int argc, char **argv)
             compression = getCompression (argv[i + 1]);
             i += 2;
         }
+        else if (!strcmp (argv[i], "-s"))
+        {
+            //
+            // Streaming mode
+            //
+
+            streaming = true;
+            i += 1;
+        }
+        else if (!strcmp (argv[i], "-n"))
+        {
+            //
+            // Set number of threads
+            //
+
+            if (i > argc - 2)
+                usageMessage (argv[0]);
+
+            numThreads = strtol (argv[i + 1], 0, 0);
+
+            if (numThreads < 0)
+            {
+                cerr << "Number of threads cannot be negative." << endl;
+                return 1;
+            }
+
+            i += 2;
+        }
         else if (!strcmp (argv[i], "-v"))
         {
             //
@@ -395,6 +439,8 @@ main(int argc, char **argv)
 
     try
     {
+        setGlobalThreadCount (numThreads);
+
         //
         // check input
         //
@@ -424,6 +470,7 @@ main(int argc, char **argv)
                    tileSizeX, tileSizeY,
                    doNotFilter,
                    extX, extY,
+                   streaming,
                    verbose);
     }
     catch (const exception &e)
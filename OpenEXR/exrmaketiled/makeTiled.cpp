@@ -54,6 +54,8 @@
 #include "ImfChannelList.h"
 #include "ImfFrameBuffer.h"
 #include "ImfStandardAttributes.h"
+#include "ImfThreading.h"
+#include "IlmThreadPool.h"
 #include "ImathFun.h"
 #include "Iex.h"
 #include "ImfMisc.h"
@@ -62,11 +64,15 @@
 #include <algorithm>
 #include <iostream>
 #include <vector>
+#include <string.h>
 
 #include "namespaceAlias.h"
 using namespace IMF;
 using namespace IMATH_NAMESPACE;
 using namespace std;
+using ILMTHREAD_NAMESPACE::Task;
+using ILMTHREAD_NAMESPACE::TaskGroup;
+using ILMTHREAD_NAMESPACE::ThreadPool;
 
 
 namespace {
@@ -108,316 +114,427 @@ mirror (int x, int w)
 }
 
 
-template <class T>
-double
-sampleX (const TypedImageChannel<T> &channel,
-         int w,
-         double x,
-         int y,
-         Extrapolation ext)
+int
+extrapolate (int x, int w, Extrapolation ext)
 {
     //
-    // Sample an image channel at location (x, y), where
-    // x is a floating point number, and y is an integer.
+    // Map pixel x of a row or column of w pixels into the
+    // image; returns -1 for pixels outside a black border.
     //
 
-    int xs = IMATH_NAMESPACE::floor (x);
-    int xt = xs + 1;
-    double s = xt - x;
-    double t = 1 - s;
-    double vs=0.0;
-    double vt=0.0;
-
     switch (ext)
     {
         case BLACK:
-
-            vs = (xs >= 0 && xs < w)? double (channel (xs, y)): 0.0;
-            vt = (xt >= 0 && xt < w)? double (channel (xt, y)): 0.0;
-            break;
+            return (x >= 0 && x < w)? x: -1;
 
         case CLAMP:
-
-            xs = IMATH_NAMESPACE::clamp (xs, 0, w - 1);
-            xt = IMATH_NAMESPACE::clamp (xt, 0, w - 1);
-            vs = channel (xs, y);
-            vt = channel (xt, y);
-            break;
+            return IMATH_NAMESPACE::clamp (x, 0, w - 1);
 
         case PERIODIC:
-
-            xs = modp (xs, w);
-            xt = modp (xt, w);
-            vs = channel (xs, y);
-            vt = channel (xt, y);
-            break;
+            return modp (x, w);
 
         case MIRROR:
-
-            xs = mirror (xs, w);
-            xt = mirror (xt, w);
-            vs = channel (xs, y);
-            vt = channel (xt, y);
-            break;
+        default:
+            return mirror (x, w);
     }
-
-    return s * vs + t * vt;
 }
 
 
-template <class T>
-double
-sampleY (const TypedImageChannel<T> &channel,
-         int h,
-         int x,
-         double y,
-         Extrapolation ext)
+struct Tap
 {
     //
-    // Sample an image channel at location (x, y), where
-    // x is an integer, and y is a floating point number.
+    // A sample at a floating point location, interpolated
+    // between two pixels, i0 and i1, with weights w0 and w1.
+    // The index of a pixel outside a black border is -1.
     //
 
-    int ys = IMATH_NAMESPACE::floor (y);
-    int yt = ys + 1;
-    double s = yt - y;
-    double t = 1 - s;
-    double vs=0.0;
-    double vt=0.0;
+    int		i0;
+    int		i1;
+    double	w0;
+    double	w1;
+};
 
-    switch (ext)
-    {
-        case BLACK:
 
-            vs = (ys >= 0 && ys < h)? double (channel (x, ys)): 0.0;
-            vt = (yt >= 0 && yt < h)? double (channel (x, yt)): 0.0;
-            break;
-
-        case CLAMP:
+struct Filter
+{
+    //
+    // Four-tap filter, centered on location x + 0.5, with
+    // samples at x - 1, x, x + 1 and x + 2.
+    //
 
-            ys = IMATH_NAMESPACE::clamp (ys, 0, h - 1);
-            yt = IMATH_NAMESPACE::clamp (yt, 0, h - 1);
-            vs = channel (x, ys);
-            vt = channel (x, yt);
-            break;
+    Tap		taps[4];
+};
 
-        case PERIODIC:
 
-            ys = modp (ys, h);
-            yt = modp (yt, h);
-            vs = channel (x, ys);
-            vt = channel (x, yt);
-            break;
+Tap
+makeTap (double x, int w, Extrapolation ext)
+{
+    int xs = IMATH_NAMESPACE::floor (x);
+    int xt = xs + 1;
 
-        case MIRROR:
+    Tap tap;
+    tap.w0 = xt - x;
+    tap.w1 = 1 - tap.w0;
+    tap.i0 = extrapolate (xs, w, ext);
+    tap.i1 = extrapolate (xt, w, ext);
+    return tap;
+}
 
-            ys = mirror (ys, h);
-            yt = mirror (yt, h);
-            vs = channel (x, ys);
-            vt = channel (x, yt);
-            break;
-    }
 
-    return s * vs + t * vt;
+Filter
+makeFilter (double x, int w, Extrapolation ext)
+{
+    Filter filter;
+    filter.taps[0] = makeTap (x - 1, w, ext);
+    filter.taps[1] = makeTap (x,     w, ext);
+    filter.taps[2] = makeTap (x + 1, w, ext);
+    filter.taps[3] = makeTap (x + 2, w, ext);
+    return filter;
 }
 
 
 template <class T>
-T
-filterX (const TypedImageChannel<T> &channel,
-         int w,
-         double x,
-         int y,
-         Extrapolation ext)
+inline double
+sample (const Tap &tap, const T *p0, const T *p1)
 {
     //
-    // Horizontal four-tap filter, centered on pixel (x + 0.5, y)
+    // p0 and p1 point to the pixels of the tap, or
+    // are null for pixels outside a black border.
     //
 
-    return T (0.125 * sampleX (channel, w, x - 1, y, ext) +
-              0.375 * sampleX (channel, w, x,     y, ext) +
-              0.375 * sampleX (channel, w, x + 1, y, ext) +
-              0.125 * sampleX (channel, w, x + 2, y, ext));
+    double v0 = p0? double (*p0): 0.0;
+    double v1 = p1? double (*p1): 0.0;
+    return tap.w0 * v0 + tap.w1 * v1;
 }
 
 
 template <class T>
-T
-filterY (const TypedImageChannel<T> &channel,
-         int h,
-         int x,
-         double y,
-         Extrapolation ext)
+inline T
+filterValue (double v0, double v1, double v2, double v3)
 {
+    return T (0.125 * v0 + 0.375 * v1 + 0.375 * v2 + 0.125 * v3);
+}
+
+
+struct Reduction
+{
+    //
+    // Shrinking an image by a factor of 2, horizontally (inX)
+    // or vertically, from size0 to size1 pixels.
+    //
+    // Low-pass filtered channels are resampled with one filter
+    // per output column or row.  For output pixels 0 and
+    // size1 - 1, the filters are centered on input pixels 0.5
+    // and size0 - 1.5 respectively.
     //
-    // Vertical four-tap filter, centered on pixel (x, y + 0.5)
+    // Channels that are not filtered are resampled by skipping
+    // every other pixel, starting at offset.  In order to keep
+    // the image from sliding if it is resampled repeatedly,
+    // we skip the last pixel of every row or column on even
+    // passes, and the first pixel on odd passes.
     //
 
-    return T (0.125 * sampleY (channel, h, x, y - 1, ext) +
-              0.375 * sampleY (channel, h, x, y,     ext) +
-              0.375 * sampleY (channel, h, x, y + 1, ext) +
-              0.125 * sampleY (channel, h, x, y + 2, ext));
+    bool		inX;
+    int			size0;
+    int			size1;
+    int			offset;
+    vector<Filter>	filters;
+
+    Reduction (bool inX,
+               int size0,
+               int size1,
+               Extrapolation ext,
+               bool odd);
+};
+
+
+Reduction::Reduction (bool inX,
+                      int size0,
+                      int size1,
+                      Extrapolation ext,
+                      bool odd)
+:
+    inX (inX),
+    size0 (size0),
+    size1 (size1),
+    offset (odd? ((size0 - 1) - 2 * (size1 - 1)): 0),
+    filters (size1)
+{
+    double f = (size1 > 1)? double (size0 - 2) / (size1 - 1): 1;
+
+    for (int i = 0; i < size1; ++i)
+        filters[i] = makeFilter (i * f, size0, ext);
 }
 
 
 template <class T>
 void
-reduceX (const TypedImageChannel<T> &channel0,
-         TypedImageChannel<T> &channel1,
-         bool filter,
-         Extrapolation &ext,
-         bool odd)
+reduceRowX (const Reduction &r, bool filter, const T *in, T *out)
 {
     //
-    // Shrink an image channel, channel0, horizontally
-    // by a factor of 2, and store the result in channel1.
+    // Shrink a row of pixels, in, horizontally.
     //
 
-    int w0 = channel0.image().width();
-    int w1 = channel1.image().width();
-    int h1 = channel1.image().height();
-
     if (filter)
     {
-        //
-        // Low-pass filter and resample.
-        // For pixels (0, y) and (w1 - 1, y) in channel 1,
-        // the low-pass filter in channel0 is centered on
-        // pixels (0.5, y) and (w0 - 1.5, y) respectively.
-        //
-
-        double f = (w1 > 1)? double (w0 - 2) / (w1 - 1): 1;
-
-        for (int y = 0; y < h1; ++y)
-            for (int x = 0; x < w1; ++x)
-                channel1 (x, y) = filterX (channel0, w0, x * f, y, ext);
+        for (int x = 0; x < r.size1; ++x)
+        {
+            const Tap *taps = r.filters[x].taps;
+            double v[4];
+
+            for (int k = 0; k < 4; ++k)
+            {
+                v[k] = sample (taps[k],
+                               taps[k].i0 >= 0? in + taps[k].i0: 0,
+                               taps[k].i1 >= 0? in + taps[k].i1: 0);
+            }
+
+            out[x] = filterValue<T> (v[0], v[1], v[2], v[3]);
+        }
     }
     else
     {
-        //
-        // Resample, skipping every other pixel, without
-        // low-pass filtering.  In order to keep the image
-        // from sliding to the right if the channel is
-        // resampled repeatedly, we skip the rightmost
-        // pixel of every row on even passes, and the
-        // leftmost pixel on odd passes.
-        //
-
-        int offset = odd? ((w0 - 1) - 2 * (w1 - 1)): 0;
-
-        for (int y = 0; y < h1; ++y)
-            for (int x = 0; x < w1; ++x)
-                channel1 (x, y) = channel0 (2 * x + offset, y);
+        for (int x = 0; x < r.size1; ++x)
+            out[x] = in[2 * x + r.offset];
     }
 }
 
 
 template <class T>
 void
-reduceY (const TypedImageChannel<T> &channel0,
-         TypedImageChannel<T> &channel1,
-         bool filter,
-         Extrapolation ext,
-         bool odd)
+reduceRowY (const Filter &f, const T *const rows[8], int width, T *out)
 {
     //
-    // Shrink an image channel, channel0, vertically
-    // by a factor of 2, and store the result in channel1.
+    // Compute a row of pixels, out, from the rows of the taps
+    // of vertical filter f; rows[2 * k] and rows[2 * k + 1] are
+    // the rows of the two pixels of tap k, or null.
     //
 
-    int w1 = channel1.image().width();
-    int h0 = channel0.image().height();
-    int h1 = channel1.image().height();
+    const Tap *taps = f.taps;
 
-    if (filter)
+    for (int x = 0; x < width; ++x)
     {
-        //
-        // Low-pass filter and resample.
-        // For pixels (x, 0) and (x, h1 - 1) in channel 1,
-        // the low-pass filter in channel0 is centered on
-        // pixels (x, 0.5) and (x, h0 - 1.5) respectively.
-        //
-
-        double f = (h1 > 1)? double (h0 - 2) / (h1 - 1): 1;
-
-        for (int y = 0; y < h1; ++y)
-            for (int x = 0; x < w1; ++x)
-                channel1 (x, y) = filterY (channel0, h0, x, y * f, ext);
+        double v[4];
+
+        for (int k = 0; k < 4; ++k)
+        {
+            const T *r0 = rows[2 * k];
+            const T *r1 = rows[2 * k + 1];
+            v[k] = sample (taps[k], r0? r0 + x: 0, r1? r1 + x: 0);
+        }
+
+        out[x] = filterValue<T> (v[0], v[1], v[2], v[3]);
     }
-    else
+}
+
+
+struct LevelChannel
+{
+    string	name;
+    PixelType	type;
+    bool	filter;
+};
+
+
+vector<LevelChannel>
+levelChannels (const ChannelList &channels, const set<string> &doNotFilter)
+{
+    vector<LevelChannel> levelChannels;
+
+    for (ChannelList::ConstIterator i = channels.begin();
+         i != channels.end();
+         ++i)
     {
-        //
-        // Resample, skipping every other pixel, without
-        // low-pass filtering.  In order to keep the image
-        // from sliding towards the top if the channel is
-        // resampled repeatedly, we skip the top pixel of
-        // every column on even passes, and the bottom pixel
-        // on odd passes.
-        //
-
-        int offset = odd? ((h0 - 1) - 2 * (h1 - 1)): 0;
-
-        for (int y = 0; y < h1; ++y)
-            for (int x = 0; x < w1; ++x)
-                channel1 (x, y) = channel0 (x, 2 * y + offset);
+        LevelChannel c;
+        c.name = i.name();
+        c.type = i.channel().type;
+        c.filter = (doNotFilter.find (c.name) == doNotFilter.end());
+        levelChannels.push_back (c);
     }
+
+    return levelChannels;
 }
 
 
+template <class T>
 void
-reduceX (const ChannelList &channels,
-         const set<string> &doNotFilter,
-         Extrapolation ext,
-         bool odd,
-         const Image &image0,
-         Image &image1)
+reduceImageRows (const Reduction &r,
+                 bool filter,
+                 const TypedImageChannel<T> &channel0,
+                 TypedImageChannel<T> &channel1,
+                 int y0,
+                 int y1)
 {
     //
-    // Shrink image image0 horizontally by a factor of 2,
-    // and store the result in image image1.
+    // Compute rows y0 to y1 - 1 of channel1 from channel0.
     //
 
-    for (ChannelList::ConstIterator i = channels.begin();
-         i != channels.end();
-         ++i)
+    int w1 = channel1.image().width();
+
+    for (int y = y0; y < y1; ++y)
     {
-        const char *name = i.name();
-        const Channel &channel = i.channel();
-        bool filter = (doNotFilter.find (name) == doNotFilter.end());
+        if (r.inX)
+        {
+            reduceRowX (r, filter, &channel0 (0, y), &channel1 (0, y));
+        }
+        else if (filter)
+        {
+            const Tap *taps = r.filters[y].taps;
+            const T *rows[8];
 
-        switch (channel.type)
+            for (int k = 0; k < 4; ++k)
+            {
+                rows[2 * k] = taps[k].i0 >= 0? &channel0 (0, taps[k].i0): 0;
+                rows[2 * k + 1] = taps[k].i1 >= 0? &channel0 (0, taps[k].i1): 0;
+            }
+
+            reduceRowY (r.filters[y], rows, w1, &channel1 (0, y));
+        }
+        else
         {
-            case IMF::HALF:
+            memcpy (&channel1 (0, y),
+                    &channel0 (0, 2 * y + r.offset),
+                    w1 * sizeof (T));
+        }
+    }
+}
 
-                reduceX (image0.typedChannel<half> (name),
-                         image1.typedChannel<half> (name),
-                         filter, ext, odd);
-                break;
 
-            case IMF::FLOAT:
+class ReduceImageTask: public Task
+{
+  public:
+
+    ReduceImageTask (TaskGroup *group,
+                     const Reduction &r,
+                     const LevelChannel &channel,
+                     const Image &image0,
+                     Image &image1,
+                     int y0,
+                     int y1)
+    :
+        Task (group),
+        _r (r),
+        _channel (channel),
+        _image0 (image0),
+        _image1 (image1),
+        _y0 (y0),
+        _y1 (y1)
+    {}
+
+    virtual void	execute ();
+
+  private:
+
+    const Reduction &		_r;
+    const LevelChannel &	_channel;
+    const Image &		_image0;
+    Image &			_image1;
+    int				_y0;
+    int				_y1;
+};
 
-                reduceX (image0.typedChannel<float> (name),
-                         image1.typedChannel<float> (name),
-                         filter, ext, odd);
-                break;
 
-            case IMF::UINT:
+void
+ReduceImageTask::execute ()
+{
+    const string &name = _channel.name;
 
-                reduceX (image0.typedChannel<unsigned int> (name),
-                         image1.typedChannel<unsigned int> (name),
-                         filter, ext, odd);
-                break;
-            default : 
-                break;
-           
+    switch (_channel.type)
+    {
+        case IMF::HALF:
+
+            reduceImageRows (_r, _channel.filter,
+                             _image0.typedChannel<half> (name),
+                             _image1.typedChannel<half> (name),
+                             _y0, _y1);
+            break;
+
+        case IMF::FLOAT:
+
+            reduceImageRows (_r, _channel.filter,
+                             _image0.typedChannel<float> (name),
+                             _image1.typedChannel<float> (name),
+                             _y0, _y1);
+            break;
+
+        case IMF::UINT:
+
+            reduceImageRows (_r, _channel.filter,
+                             _image0.typedChannel<unsigned int> (name),
+                             _image1.typedChannel<unsigned int> (name),
+                             _y0, _y1);
+            break;
+
+        default:
+            break;
+    }
+}
+
+
+int
+numRowRanges (int height)
+{
+    //
+    // The number of ranges of rows that the rows of each channel
+    // are split into, to share them among the worker threads.
+    //
+
+    return std::max (1, std::min (height, 4 * globalThreadCount()));
+}
+
+
+void
+reduceImage (const vector<LevelChannel> &channels,
+             const Reduction &r,
+             const Image &image0,
+             Image &image1)
+{
+    //
+    // Shrink image image0 horizontally or vertically by a factor
+    // of 2, and store the result in image image1.  The channels,
+    // and ranges of rows of each channel, are computed in parallel.
+    //
+
+    int h1 = image1.height();
+    int n = numRowRanges (h1);
+
+    TaskGroup group;
+
+    for (size_t i = 0; i < channels.size(); ++i)
+    {
+        for (int j = 0; j < n; ++j)
+        {
+            ThreadPool::addGlobalTask (new ReduceImageTask (&group,
+                                                            r,
+                                                            channels[i],
+                                                            image0,
+                                                            image1,
+                                                            h1 * j / n,
+                                                            h1 * (j + 1) / n));
         }
     }
 }
 
 
 void
-reduceY (const ChannelList &channels,
-         const set<string> &doNotFilter,
+reduceX (const vector<LevelChannel> &channels,
+         Extrapolation ext,
+         bool odd,
+         const Image &image0,
+         Image &image1)
+{
+    //
+    // Shrink image image0 horizontally by a factor of 2,
+    // and store the result in image image1.
+    //
+
+    Reduction r (true, image0.width(), image1.width(), ext, odd);
+    reduceImage (channels, r, image0, image1);
+}
+
+
+void
+reduceY (const vector<LevelChannel> &channels,
          Extrapolation ext,
          bool odd,
          const Image &image0,
@@ -428,70 +545,684 @@ reduceY (const ChannelList &channels,
     // and store the result in image image1.
     //
 
+    Reduction r (false, image0.height(), image1.height(), ext, odd);
+    reduceImage (channels, r, image0, image1);
+}
+
+
+void
+storeLevel (TiledOutputPart &out,
+            const ChannelList &channels,
+            int lx,
+            int ly,
+            const Image &image)
+{
+    //
+    // Store the pixels for level (lx, ly) in output file out.
+    //
+
+    FrameBuffer fb;
+
     for (ChannelList::ConstIterator i = channels.begin();
          i != channels.end();
          ++i)
     {
         const char *name = i.name();
-        const Channel &channel = i.channel();
-        bool filter = (doNotFilter.find (name) == doNotFilter.end());
+        fb.insert (name, image.channel(name).slice());
+    }
 
-        switch (channel.type)
+    out.setFrameBuffer (fb);
+    out.writeTiles (0, out.numXTiles (lx) - 1, 0, out.numYTiles (ly) - 1, lx, ly);
+}
+
+
+//
+// Streaming generation of the levels of an image.
+//
+// Instead of holding whole levels in memory, the levels are
+// computed row by row, from the rows of the level they are
+// reduced from, and written as soon as a row of tiles is
+// complete.  The full-resolution level is read from the input
+// file in bands of rows.  Each row is discarded once the rows
+// computed from it, and its row of tiles, are done, so only a
+// few rows of tiles of each level are in memory at any time.
+//
+// With periodic extrapolation, the first row of a level is
+// computed from the last row of the level it is reduced from;
+// it waits until that row is done, and keeps its sources and
+// its row of tiles in memory until then.
+//
+
+struct StreamLevel
+{
+    //
+    // A level of the output file, or an intermediate image
+    // (the horizontally reduced images of the mipmap levels)
+    //
+
+    bool		stored;
+    int			lx;
+    int			ly;
+    Box2i		dataWindow;
+    int			width;
+    int			height;
+    StreamLevel *	parent;
+    Reduction		reduction;		// from the parent
+    vector<size_t>	offsets;		// of the channels in a row
+    size_t		rowSize;
+
+    vector<vector<char> >	rows;		// empty if not in memory
+    vector<vector<int> >	sources;	// parent rows of each row
+    vector<int>			missing;	// sources not yet done
+    vector<vector<pair<StreamLevel *, int> > > readers;
+    vector<int>			users;		// readers and tile row
+    vector<int>			tileMissing;	// rows of each tile row
+    int				tileRowsLeft;
+    vector<int>			ready;		// rows that can be done
+    vector<int>			writable;	// tile rows that can be
+						// written
+
+    StreamLevel (const vector<LevelChannel> &channels,
+                 const Box2i &dataWindow,
+                 StreamLevel *parent,
+                 bool inX,
+                 Extrapolation ext,
+                 bool odd);
+
+    template <class T>
+    T *
+    row (int y, size_t channel)
+    {
+        return (T *) &rows[y][offsets[channel]];
+    }
+};
+
+
+StreamLevel::StreamLevel (const vector<LevelChannel> &channels,
+                          const Box2i &dataWindow,
+                          StreamLevel *parent,
+                          bool inX,
+                          Extrapolation ext,
+                          bool odd)
+:
+    stored (false),
+    lx (0),
+    ly (0),
+    dataWindow (dataWindow),
+    width (dataWindow.max.x - dataWindow.min.x + 1),
+    height (dataWindow.max.y - dataWindow.min.y + 1),
+    parent (parent),
+    reduction (inX,
+               parent? (inX? parent->width: parent->height): 0,
+               parent? (inX? width: height): 0,
+               ext,
+               odd),
+    rowSize (0),
+    rows (height),
+    sources (height),
+    missing (height, 0),
+    readers (height),
+    users (height, 0),
+    tileRowsLeft (0)
+{
+    //
+    // Align the channels of a row to 8 bytes.
+    //
+
+    for (size_t i = 0; i < channels.size(); ++i)
+    {
+        offsets.push_back (rowSize);
+        rowSize += (width * pixelTypeSize (channels[i].type) + 7) & ~size_t (7);
+    }
+
+    if (!parent)
+        return;
+
+    bool filter = false;
+    bool skip = false;
+
+    for (size_t i = 0; i < channels.size(); ++i)
+    {
+        if (channels[i].filter)
+            filter = true;
+        else
+            skip = true;
+    }
+
+    for (int y = 0; y < height; ++y)
+    {
+        vector<int> &s = sources[y];
+
+        if (reduction.inX)
         {
-            case IMF::HALF:
+            s.push_back (y);
+        }
+        else
+        {
+            if (filter)
+            {
+                const Tap *taps = reduction.filters[y].taps;
 
-                reduceY (image0.typedChannel<half> (name),
-                         image1.typedChannel<half> (name),
-                         filter, ext, odd);
+                for (int k = 0; k < 4; ++k)
+                {
+                    if (taps[k].i0 >= 0)
+                        s.push_back (taps[k].i0);
+
+                    if (taps[k].i1 >= 0)
+                        s.push_back (taps[k].i1);
+                }
+            }
+
+            if (skip)
+                s.push_back (2 * y + reduction.offset);
+
+            sort (s.begin(), s.end());
+            s.erase (unique (s.begin(), s.end()), s.end());
+        }
+
+        for (size_t i = 0; i < s.size(); ++i)
+        {
+            parent->readers[s[i]].push_back (make_pair (this, y));
+            parent->users[s[i]] += 1;
+        }
+
+        missing[y] = s.size();
+
+        if (missing[y] == 0)
+            ready.push_back (y);
+    }
+}
+
+
+template <class T>
+void
+computeRow (StreamLevel &level,
+            const LevelChannel &channel,
+            size_t c,
+            int y)
+{
+    StreamLevel &parent = *level.parent;
+    const Reduction &r = level.reduction;
+    T *out = level.row<T> (y, c);
+
+    if (r.inX)
+    {
+        reduceRowX (r, channel.filter, parent.row<T> (y, c), out);
+    }
+    else if (channel.filter)
+    {
+        const Tap *taps = r.filters[y].taps;
+        const T *rows[8];
+
+        for (int k = 0; k < 4; ++k)
+        {
+            rows[2 * k] = taps[k].i0 >= 0? parent.row<T> (taps[k].i0, c): 0;
+            rows[2 * k + 1] = taps[k].i1 >= 0? parent.row<T> (taps[k].i1, c): 0;
+        }
+
+        reduceRowY (r.filters[y], rows, level.width, out);
+    }
+    else
+    {
+        memcpy (out,
+                parent.row<T> (2 * y + r.offset, c),
+                level.width * sizeof (T));
+    }
+}
+
+
+class ComputeRowsTask: public Task
+{
+  public:
+
+    ComputeRowsTask (TaskGroup *group,
+                     StreamLevel &level,
+                     const LevelChannel &channel,
+                     size_t c,
+                     const int *ys,
+                     int numRows)
+    :
+        Task (group),
+        _level (level),
+        _channel (channel),
+        _c (c),
+        _ys (ys),
+        _numRows (numRows)
+    {}
+
+    virtual void	execute ();
+
+  private:
+
+    StreamLevel &		_level;
+    const LevelChannel &	_channel;
+    size_t			_c;
+    const int *			_ys;
+    int				_numRows;
+};
+
+
+void
+ComputeRowsTask::execute ()
+{
+    for (int i = 0; i < _numRows; ++i)
+    {
+        switch (_channel.type)
+        {
+            case IMF::HALF:
+                computeRow<half> (_level, _channel, _c, _ys[i]);
                 break;
 
             case IMF::FLOAT:
-
-                reduceY (image0.typedChannel<float> (name),
-                         image1.typedChannel<float> (name),
-                         filter, ext, odd);
+                computeRow<float> (_level, _channel, _c, _ys[i]);
                 break;
 
             case IMF::UINT:
-
-                reduceY (image0.typedChannel<unsigned int> (name),
-                         image1.typedChannel<unsigned int> (name),
-                         filter, ext, odd);
+                computeRow<unsigned int> (_level, _channel, _c, _ys[i]);
                 break;
-            default : 
+
+            default:
                 break;
-                
         }
     }
 }
 
 
+class LevelStream
+{
+  public:
+
+    LevelStream (const vector<LevelChannel> &channels,
+                 TiledOutputPart &out,
+                 bool verbose);
+
+    ~LevelStream ();
+
+    //------------------------------------------------------------
+    // Add the full-resolution level, or a level reduced from
+    // another level.  Levels must be added after their parents.
+    //------------------------------------------------------------
+
+    StreamLevel *	addLevel (const Box2i &dataWindow,
+                	          StreamLevel *parent = 0,
+                	          bool inX = true,
+                	          Extrapolation ext = CLAMP,
+                	          bool odd = false);
+
+    //------------------------------------------------------------
+    // Store a level in level (lx, ly) of the output file.
+    //------------------------------------------------------------
+
+    void		store (StreamLevel *level, int lx, int ly);
+
+    //------------------------------------------------------------
+    // Read the full-resolution level from the input file, and
+    // compute and write all levels.
+    //------------------------------------------------------------
+
+    void		run (InputPart &in);
+
+  private:
+
+    void		rowDone (StreamLevel &level, int y);
+    void		release (StreamLevel &level, int y);
+    void		computeRows (StreamLevel &level);
+    void		writeTileRows (StreamLevel &level);
+    void		flush ();
+
+    FrameBuffer		bandFrameBuffer (const Box2i &dataWindow,
+                                         int y0,
+                                         int y1);
+
+    const vector<LevelChannel> &	_channels;
+    TiledOutputPart &			_out;
+    bool				_verbose;
+    int					_tileYSize;
+    vector<StreamLevel *>		_levels;
+    vector<char>			_band;
+    vector<size_t>			_bandOffsets;
+};
+
+
+LevelStream::LevelStream (const vector<LevelChannel> &channels,
+                          TiledOutputPart &out,
+                          bool verbose)
+:
+    _channels (channels),
+    _out (out),
+    _verbose (verbose),
+    _tileYSize (out.tileYSize())
+{
+    // empty
+}
+
+
+LevelStream::~LevelStream ()
+{
+    for (size_t i = 0; i < _levels.size(); ++i)
+        delete _levels[i];
+}
+
+
+StreamLevel *
+LevelStream::addLevel (const Box2i &dataWindow,
+                       StreamLevel *parent,
+                       bool inX,
+                       Extrapolation ext,
+                       bool odd)
+{
+    _levels.push_back (new StreamLevel (_channels,
+                                        dataWindow,
+                                        parent,
+                                        inX,
+                                        ext,
+                                        odd));
+    return _levels.back();
+}
+
+
 void
-storeLevel (TiledOutputPart &out,
-            const ChannelList &channels,
-            int lx,
-            int ly,
-            const Image &image)
+LevelStream::store (StreamLevel *level, int lx, int ly)
+{
+    level->stored = true;
+    level->lx = lx;
+    level->ly = ly;
+    level->tileRowsLeft = _out.numYTiles (ly);
+    level->tileMissing.resize (level->tileRowsLeft, _tileYSize);
+    level->tileMissing.back() = level->height - _tileYSize * (level->tileRowsLeft - 1);
+
+    for (int y = 0; y < level->height; ++y)
+        level->users[y] += 1;
+}
+
+
+FrameBuffer
+LevelStream::bandFrameBuffer (const Box2i &dataWindow, int y0, int y1)
 {
     //
-    // Store the pixels for level (lx, ly) in output file out.
+    // Make a frame buffer for rows y0 to y1 - 1 of a level
+    // with the given data window, in the band buffer.
     //
 
+    int width = dataWindow.max.x - dataWindow.min.x + 1;
+
+    Box2i box (V2i (dataWindow.min.x, dataWindow.min.y + y0),
+               V2i (dataWindow.max.x, dataWindow.min.y + y1 - 1));
+
+    size_t size = 0;
+    _bandOffsets.clear();
+
+    for (size_t i = 0; i < _channels.size(); ++i)
+    {
+        _bandOffsets.push_back (size);
+        size += (size_t (width) * (y1 - y0) *
+                 pixelTypeSize (_channels[i].type) + 7) & ~size_t (7);
+    }
+
+    if (_band.size() < size)
+        _band.resize (size);
+
     FrameBuffer fb;
 
-    for (ChannelList::ConstIterator i = channels.begin();
-         i != channels.end();
-         ++i)
+    for (size_t i = 0; i < _channels.size(); ++i)
     {
-        const char *name = i.name();
-        fb.insert (name, image.channel(name).slice());
+        fb.insert (_channels[i].name,
+                   Slice::Make (_channels[i].type,
+                                &_band[_bandOffsets[i]],
+                                box,
+                                pixelTypeSize (_channels[i].type)));
     }
 
-    out.setFrameBuffer (fb);
+    return fb;
+}
+
+
+void
+LevelStream::rowDone (StreamLevel &level, int y)
+{
+    vector<pair<StreamLevel *, int> > &readers = level.readers[y];
+
+    for (size_t i = 0; i < readers.size(); ++i)
+    {
+        StreamLevel &reader = *readers[i].first;
+        int ry = readers[i].second;
+
+        if (--reader.missing[ry] == 0)
+            reader.ready.push_back (ry);
+    }
+
+    vector<pair<StreamLevel *, int> >().swap (readers);
+
+    if (level.stored && --level.tileMissing[y / _tileYSize] == 0)
+        level.writable.push_back (y / _tileYSize);
+
+    if (level.users[y] == 0)
+        vector<char>().swap (level.rows[y]);
+}
+
+
+void
+LevelStream::release (StreamLevel &level, int y)
+{
+    if (--level.users[y] == 0)
+        vector<char>().swap (level.rows[y]);
+}
+
+
+void
+LevelStream::computeRows (StreamLevel &level)
+{
+    //
+    // Compute the rows of a level whose sources are done,
+    // in parallel, for ranges of rows of each channel.
+    //
+
+    vector<int> ys;
+    ys.swap (level.ready);
+
+    for (size_t i = 0; i < ys.size(); ++i)
+        level.rows[ys[i]].resize (level.rowSize);
+
+    {
+        int numRows = ys.size();
+        int n = numRowRanges (numRows);
+
+        TaskGroup group;
+
+        for (size_t c = 0; c < _channels.size(); ++c)
+        {
+            for (int j = 0; j < n; ++j)
+            {
+                int i0 = numRows * j / n;
+                int i1 = numRows * (j + 1) / n;
+
+                ThreadPool::addGlobalTask (new ComputeRowsTask (&group,
+                                                                level,
+                                                                _channels[c],
+                                                                c,
+                                                                &ys[i0],
+                                                                i1 - i0));
+            }
+        }
+    }
+
+    for (size_t i = 0; i < ys.size(); ++i)
+    {
+        int y = ys[i];
+        const vector<int> &sources = level.sources[y];
+
+        for (size_t j = 0; j < sources.size(); ++j)
+            release (*level.parent, sources[j]);
+
+        vector<int>().swap (level.sources[y]);
+        rowDone (level, y);
+    }
+}
+
+
+void
+LevelStream::writeTileRows (StreamLevel &level)
+{
+    for (size_t i = 0; i < level.writable.size(); ++i)
+    {
+        int dy = level.writable[i];
+        int y0 = dy * _tileYSize;
+        int y1 = std::min (y0 + _tileYSize, level.height);
+
+        FrameBuffer fb = bandFrameBuffer (level.dataWindow, y0, y1);
+
+        for (size_t c = 0; c < _channels.size(); ++c)
+        {
+            size_t size = level.width * pixelTypeSize (_channels[c].type);
+
+            for (int y = y0; y < y1; ++y)
+            {
+                memcpy (&_band[_bandOffsets[c] + (y - y0) * size],
+                        &level.rows[y][level.offsets[c]],
+                        size);
+            }
+        }
+
+        _out.setFrameBuffer (fb);
+        _out.writeTiles (0, _out.numXTiles (level.lx) - 1, dy, dy,
+                         level.lx, level.ly);
+
+        for (int y = y0; y < y1; ++y)
+            release (level, y);
+
+        if (--level.tileRowsLeft == 0 && _verbose)
+            cout << "level (" << level.lx << ", " << level.ly << ")" << endl;
+    }
+
+    level.writable.clear();
+}
+
+
+void
+LevelStream::flush ()
+{
+    //
+    // Compute the rows that can be computed, and write the
+    // rows of tiles that are complete.  The parents of a level
+    // come before it, so the rows that become ready during
+    // this pass are computed in the same pass.
+    //
+
+    for (size_t i = 0; i < _levels.size(); ++i)
+    {
+        StreamLevel &level = *_levels[i];
+
+        if (!level.ready.empty())
+            computeRows (level);
+
+        writeTileRows (level);
+    }
+}
+
+
+void
+LevelStream::run (InputPart &in)
+{
+    StreamLevel &top = *_levels[0];
+
+    for (int y0 = 0; y0 < top.height; y0 += _tileYSize)
+    {
+        int y1 = std::min (y0 + _tileYSize, top.height);
+
+        in.setFrameBuffer (bandFrameBuffer (top.dataWindow, y0, y1));
+        in.readPixels (top.dataWindow.min.y + y0, top.dataWindow.min.y + y1 - 1);
+
+        for (int y = y0; y < y1; ++y)
+        {
+            top.rows[y].resize (top.rowSize);
+
+            for (size_t c = 0; c < _channels.size(); ++c)
+            {
+                size_t size = top.width * pixelTypeSize (_channels[c].type);
+
+                memcpy (&top.rows[y][top.offsets[c]],
+                        &_band[_bandOffsets[c] + (y - y0) * size],
+                        size);
+            }
+
+            rowDone (top, y);
+        }
+
+        flush();
+    }
 
-    for (int y = 0; y < out.numYTiles (ly); ++y)
-        for (int x = 0; x < out.numXTiles (lx); ++x)
-            out.writeTile (x, y, lx, ly);
+    for (size_t i = 0; i < _levels.size(); ++i)
+    {
+        if (_levels[i]->stored && _levels[i]->tileRowsLeft != 0)
+            throw IEX_NAMESPACE::LogicExc ("Not all levels of the image "
+                                           "were generated.");
+    }
+}
+
+
+void
+makeStreamedLevels (TiledOutputPart &out,
+                    InputPart &in,
+                    const vector<LevelChannel> &channels,
+                    LevelMode mode,
+                    Extrapolation extX,
+                    Extrapolation extY,
+                    bool verbose)
+{
+    //
+    // Set up the same reductions as the in-memory levels,
+    // so that the pixels of both are identical.
+    //
+
+    LevelStream stream (channels, out, verbose);
+
+    StreamLevel *top = stream.addLevel (out.dataWindowForLevel (0, 0));
+    stream.store (top, 0, 0);
+
+    if (mode == MIPMAP_LEVELS)
+    {
+        StreamLevel *level = top;
+
+        for (int l = 1; l < out.numLevels(); ++l)
+        {
+            StreamLevel *reducedX =
+                stream.addLevel (out.dataWindowForLevel (l, l - 1),
+                                 level, true, extX, l & 1);
+
+            level = stream.addLevel (out.dataWindowForLevel (l, l),
+                                     reducedX, false, extY, l & 1);
+
+            stream.store (level, l, l);
+        }
+    }
+
+    if (mode == RIPMAP_LEVELS)
+    {
+        StreamLevel *column = top;
+
+        for (int ly = 0; ly < out.numYLevels(); ++ly)
+        {
+            if (ly > 0)
+            {
+                column = stream.addLevel (out.dataWindowForLevel (0, ly),
+                                          column, false, extY, (ly - 1) & 1);
+
+                stream.store (column, 0, ly);
+            }
+
+            StreamLevel *level = column;
+
+            for (int lx = 1; lx < out.numXLevels(); ++lx)
+            {
+                level = stream.addLevel (out.dataWindowForLevel (lx, ly),
+                                         level, true, extX, (lx - 1) & 1);
+
+                stream.store (level, lx, ly);
+            }
+        }
+    }
+
+    stream.run (in);
 }
 
 } // namespace
@@ -509,6 +1240,7 @@ makeTiled (const char inFileName[],
            const set<string> &doNotFilter,
            Extrapolation extX,
            Extrapolation extY,
+           bool streaming,
            bool verbose)
 {
     Image image0;
@@ -517,6 +1249,7 @@ makeTiled (const char inFileName[],
     Header header;
     FrameBuffer fb;
     vector<Header> headers;
+    vector<LevelChannel> channels;
 
     //
     // Load the input image
@@ -547,7 +1280,8 @@ makeTiled (const char inFileName[],
                                       "Use exrenvmap instead.");
             }
 
-            image0.resize (header.dataWindow());
+            if (!streaming)
+                image0.resize (header.dataWindow());
 
             for (ChannelList::ConstIterator i = header.channels().begin();
                             i != header.channels().end();
@@ -562,14 +1296,27 @@ makeTiled (const char inFileName[],
                                          "not supported in tiled files.");
                 }
 
-                image0.addChannel (name, channel.type);
-                image1.addChannel (name, channel.type);
-                image2.addChannel (name, channel.type);
-                fb.insert (name, image0.channel(name).slice());
+                if (!streaming)
+                {
+                    image0.addChannel (name, channel.type);
+                    image1.addChannel (name, channel.type);
+                    image2.addChannel (name, channel.type);
+                    fb.insert (name, image0.channel(name).slice());
+                }
             }
 
-            in.setFrameBuffer (fb);
-            in.readPixels (header.dataWindow().min.y, header.dataWindow().max.y);
+            channels = levelChannels (header.channels(), doNotFilter);
+
+            //
+            // In streaming mode, the pixels are read while the
+            // levels are generated.
+            //
+
+            if (!streaming)
+            {
+                in.setFrameBuffer (fb);
+                in.readPixels (header.dataWindow().min.y, header.dataWindow().max.y);
+            }
 
 
             //
@@ -581,7 +1328,14 @@ makeTiled (const char inFileName[],
                                                         mode, roundingMode));
 
             header.compression() = compression;
-            header.lineOrder() = INCREASING_Y;
+
+            //
+            // In streaming mode, the levels are written at the same
+            // time; with RANDOM_Y, their tiles go straight to the file
+            // instead of being held until the previous levels are done.
+            //
+
+            header.lineOrder() = streaming? RANDOM_Y: INCREASING_Y;
 
             if (mode != ONE_LEVEL)
                 addWrapmodes (header, extToString (extX) + "," + extToString (extY));
@@ -618,16 +1372,25 @@ makeTiled (const char inFileName[],
                 TiledOutputPart out (output, partnum);
             //    TiledOutputFile out (outFileName, header);
 
+                if (verbose)
+                    cout << "writing file " << outFileName << endl;
+
+                if (streaming)
+                {
+                    InputPart in (input, partnum);
+
+                    makeStreamedLevels (out, in, channels,
+                                        mode, extX, extY, verbose);
+                    continue;
+                }
 
                 out.setFrameBuffer (fb);
 
                 if (verbose)
-                    cout << "writing file " << outFileName << "\n"
-                            "level (0, 0)" << endl;
+                    cout << "level (0, 0)" << endl;
 
-                for (int y = 0; y < out.numYTiles (0); ++y)
-                    for (int x = 0; x < out.numXTiles (0); ++x)
-                        out.writeTile (x, y, 0);
+                out.writeTiles (0, out.numXTiles (0) - 1,
+                                0, out.numYTiles (0) - 1, 0);
 
                 //
                 // If necessary, generate the lower-resolution mipmap
@@ -640,8 +1403,7 @@ makeTiled (const char inFileName[],
                     {
                         image1.resize (out.dataWindowForLevel (l, l - 1));
 
-                        reduceX (header.channels(),
-                                 doNotFilter,
+                        reduceX (channels,
                                  extX,
                                  l & 1,
                                  image0,
@@ -649,8 +1411,7 @@ makeTiled (const char inFileName[],
 
                         image0.resize (out.dataWindowForLevel (l, l));
 
-                        reduceY (header.channels(),
-                                 doNotFilter,
+                        reduceY (channels,
                                  extY,
                                  l & 1,
                                  image1,
@@ -675,8 +1436,7 @@ makeTiled (const char inFileName[],
                         {
                             iptr2->resize (out.dataWindowForLevel (0, ly + 1));
 
-                            reduceY (header.channels(),
-                                     doNotFilter,
+                            reduceY (channels,
                                      extY,
                                      ly & 1,
                                      *iptr0,
@@ -697,8 +1457,7 @@ makeTiled (const char inFileName[],
                             {
                                 iptr1->resize (out.dataWindowForLevel (lx + 1, ly));
 
-                                reduceX (header.channels(),
-                                         doNotFilter,
+                                reduceX (channels,
                                          extX,
                                          lx & 1,
                                          *iptr0,
@@ -751,4 +1510,3 @@ makeTiled (const char inFileName[],
     if (verbose)
 	cout << "done." << endl;
 }
-
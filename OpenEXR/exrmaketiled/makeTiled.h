@@ -74,6 +74,7 @@ void    makeTiled (const char inFileName[],
                    const std::set<std::string> &doNotFilter,
                    Extrapolation extX,
                    Extrapolation extY,
+                   bool streaming,
                    bool verbose);
 
 
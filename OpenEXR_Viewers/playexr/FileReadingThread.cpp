@@ -41,7 +41,7 @@
 #include "FileReadingThread.h"
 #include "fileNameForFrame.h"
 #include "ImageBuffers.h"
-#include <ImfInputFile.h>
+#include <ImfFramePrefetcher.h>
 #include <Iex.h>
 #include <iostream>
 
@@ -73,97 +73,114 @@ FileReadingThread::run ()
 {
     try
     {
-	int i = 0;	// index of the image buffer we will fill next
-	int frame = _firstFrame;
-
-	while (true)
-	{
-	    //
-	    // Check if the display thread wants us to exit.
-	    //
+	//
+	// Read frames until the display thread wants us to exit.  When
+	// readFrames() returns, the prefetcher is done with the image
+	// buffers, and we can tell the display thread that we have
+	// exited.
+	//
 
-	    if (_imageBuffers.exitSemaphore1.tryWait())
-	    {
-		_imageBuffers.exitSemaphore2.post();
-		return;
-	    }
+	readFrames();
+	_imageBuffers.exitSemaphore2.post();
+    }
+    catch (const std::exception &exc)
+    {
+	//
+	// If anything goes wrong, print an eror message and exit.
+	//
 
-	    //
-	    // Wait for an image buffer to become available.
-	    //
+	cerr << exc.what() << endl;
 
-	    _imageBuffers.emptyBuffersSemaphore.wait();
+	_imageBuffers.exitSemaphore2.post();
+	_imageBuffers.fullBuffersSemaphore.post();
+	return;
+    }
+}
 
-	    //
-	    // Generate the file name for this frame
-	    // and open the corresponding OpenEXR file.
-	    //
 
-	    string fileName = fileNameForFrame (_fileNameTemplate, frame);
-	    InputFile in (fileName.c_str());
+void
+FileReadingThread::readFrames ()
+{
+    //
+    // Keep a frame in flight for every empty image buffer: the
+    // prefetcher reads the next frames while the display thread
+    // shows the current one, and overlaps reading each file with
+    // decompressing the previous ones.  The frames are delivered
+    // in order, into buffers j, j+1, ...
+    //
 
-	    //
-	    // Verify that this frame has the same data window
-	    // as all other frames. (We do not dynamically resize
-	    // our image buffers.)
-	    //
+    FramePrefetcher prefetcher (_imageBuffers.numBuffers());
 
-	    if (in.header().dataWindow() != _imageBuffers.dataWindow)
-		THROW (ArgExc,
-		       "Data window of frame " << frame << " "
-		       "differs from data window of "
-		       "frame " << _firstFrame << ".");
+    int i = 0;	// index of the image buffer we will fill next
+    int j = 0;	// index of the image buffer delivered next
+    int frame = _firstFrame;
 
-	    //
-	    // Read the OpenEXR file, storing the pixels in
-	    // image buffer i.
-	    //
+    while (true)
+    {
+	//
+	// Check if the display thread wants us to exit.
+	//
 
-	    in.setFrameBuffer (_imageBuffers.frameBuffer (i));
+	if (_imageBuffers.exitSemaphore1.tryWait())
+	    return;
 
-	    in.readPixels (_imageBuffers.dataWindow.min.y,
-			   _imageBuffers.dataWindow.max.y);
+	//
+	// If no image buffer is available, hand the oldest frame
+	// in flight to the display thread; if there is none, wait
+	// for an image buffer to become available.
+	//
 
+	if (prefetcher.framesInFlight() == 0)
+	{
+	    _imageBuffers.emptyBuffersSemaphore.wait();
+	}
+	else if (!_imageBuffers.emptyBuffersSemaphore.tryWait())
+	{
 	    //
 	    // Mark the image buffer as full; the display
 	    // thread can now display this frame.
 	    //
 
-	    _imageBuffers.frameNumber (i) = frame;
+	    _imageBuffers.frameNumber (j) = prefetcher.nextFrame();
 	    _imageBuffers.fullBuffersSemaphore.post();
 
-	    //
-	    // Advance to the next frame
-	    //
-
-	    if (_imageBuffers.forward)
-	    {
-		if (frame >= _lastFrame)
-		    frame = _firstFrame;
-		else
-		    frame += 1;
-	    }
-	    else
-	    {
-		if (frame <= _firstFrame)
-		    frame = _lastFrame;
-		else
-		    frame -= 1;
-	    }
-
-	    i = (i + 1) % _imageBuffers.numBuffers();
+	    j = (j + 1) % _imageBuffers.numBuffers();
+	    continue;
 	}
-    }
-    catch (const std::exception &exc)
-    {
+
 	//
-	// If anything goes wrong, print an eror message and exit.
+	// Start reading the OpenEXR file for this frame into
+	// image buffer i.  The prefetcher verifies that the
+	// frame has the same data window as all other frames.
+	// (We do not dynamically resize our image buffers.)
 	//
 
-	cerr << exc.what() << endl;
+	string fileName = fileNameForFrame (_fileNameTemplate, frame);
 
-	_imageBuffers.exitSemaphore2.post();
-	_imageBuffers.fullBuffersSemaphore.post();
-	return;
+	prefetcher.prefetch (fileName.c_str(),
+			     _imageBuffers.frameBuffer (i),
+			     _imageBuffers.dataWindow,
+			     frame);
+
+	//
+	// Advance to the next frame
+	//
+
+	if (_imageBuffers.forward)
+	{
+	    if (frame >= _lastFrame)
+		frame = _firstFrame;
+	    else
+		frame += 1;
+	}
+	else
+	{
+	    if (frame <= _firstFrame)
+		frame = _lastFrame;
+	    else
+		frame -= 1;
+	}
+
+	i = (i + 1) % _imageBuffers.numBuffers();
     }
 }
@@ -92,6 +92,8 @@ class FileReadingThread: ILMTHREAD_NAMESPACE::Thread
 
   private:
 
+    void		readFrames ();
+
     const std::string	_fileNameTemplate;
     int			_firstFrame;
     int			_lastFrame;
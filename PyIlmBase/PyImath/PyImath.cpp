@@ -51,5 +51,6 @@ template <> PYIMATH_EXPORT const char * UnsignedIntArray::name()  { return "Unsi
 template <> PYIMATH_EXPORT const char * FloatArray::name()        { return "FloatArray"; }
 template <> PYIMATH_EXPORT const char * DoubleArray::name()       { return "DoubleArray"; }
 template <> PYIMATH_EXPORT const char * VIntArray::name()         { return "VIntArray"; }
+template <> PYIMATH_EXPORT const char * VFloatArray::name()       { return "VFloatArray"; }
 
 }
@@ -67,6 +67,7 @@ typedef FixedArray2D<int> IntArray2D;
 typedef FixedArray2D<double> DoubleArray2D;
 
 typedef FixedVArray<int> VIntArray;
+typedef FixedVArray<float> VFloatArray;
 
 }
 
@@ -43,6 +43,7 @@
 #include <ImathEuler.h>
 #include <ImathFun.h>
 #include <ImathMatrixAlgo.h>
+#include <IlmThreadPool.h>
 
 #include <PyIexExport.h>
 #include "PyImathFixedArray.h"
@@ -56,14 +57,19 @@
 #include "PyImathQuat.h"
 #include "PyImathEuler.h"
 #include "PyImathColor.h"
+#include "PyImathHalf.h"
 #include "PyImathFrustum.h"
 #include "PyImathPlane.h"
 #include "PyImathLine.h"
 #include "PyImathRandom.h"
 #include "PyImathShear.h"
 #include "PyImathMathExc.h"
+#include "PyImathArrayExpr.h"
+#include "PyImathSimd.h"
 #include "PyImathAutovectorize.h"
+#include "PyImathReduce.h"
 #include "PyImathStringArrayRegister.h"
+#include "PyImathTask.h"
 #include <PyIex.h>
 
 using namespace boost::python;
@@ -74,11 +80,7 @@ template <typename T>
 IMATH_NAMESPACE::Box<IMATH_NAMESPACE::Vec3<T> >
 computeBoundingBox(const PyImath::FixedArray<IMATH_NAMESPACE::Vec3<T> >& position)
 {
-    IMATH_NAMESPACE::Box<IMATH_NAMESPACE::Vec3<T> > bounds;
-    int len = position.len();
-    for (int i = 0; i < len; ++i)
-        bounds.extendBy(position[i]);
-    return bounds;
+    return PyImath::fa_bounds_box(position);
 }
 
 IMATH_NAMESPACE::M44d
@@ -243,6 +245,7 @@ void register_all()
     add_explicit_construction_from_type<IMATH_NAMESPACE::V3d>(v3i_class);
     add_explicit_construction_from_type<IMATH_NAMESPACE::V3i>(v3f_class);
     add_explicit_construction_from_type<IMATH_NAMESPACE::V3d>(v3f_class);
+    add_half_conversions(v3f_class);
     add_explicit_construction_from_type<IMATH_NAMESPACE::V3i>(v3d_class);
     add_explicit_construction_from_type<IMATH_NAMESPACE::V3f>(v3d_class);
 
@@ -359,6 +362,12 @@ void register_all()
 
     class_<FixedArray<IMATH_NAMESPACE::Color4f> > c4f_class = register_Color4Array<float>();
     class_<FixedArray<IMATH_NAMESPACE::Color4c> > c4c_class = register_Color4Array<unsigned char>();
+    add_half_conversions(c4f_class);
+
+    //
+    // HalfArray, V3hArray, C4hArray
+    //
+    register_HalfArrays();
 
     //
     // Color4Array
@@ -412,6 +421,42 @@ void register_all()
     //
     register_Rand32();
     register_Rand48();
+
+    //
+    // Threading
+    //
+    def("setNumThreads", &setNumThreads, args("count"),
+        "setNumThreads(count) -- sets the number of threads used to evaluate "
+        "array operations.  A count of 0 or 1 evaluates them serially in the "
+        "calling thread.");
+    def("numThreads", &numThreads,
+        "numThreads() -- returns the number of threads used to evaluate array operations.");
+
+    setNumThreads(ILMTHREAD_NAMESPACE::ThreadPool::estimateThreadCountForFileIO());
+
+    //
+    // SIMD kernels
+    //
+    enum_<SimdLevel>("SimdLevel")
+        .value("SIMD_NONE", SIMD_NONE)
+        .value("SIMD_SSE2", SIMD_SSE2)
+        .value("SIMD_AVX2", SIMD_AVX2)
+        .export_values()
+        ;
+
+    def("setSimdLevel", &setSimdLevel, args("level"),
+        "setSimdLevel(level) -- selects the instruction set of the kernels used by the "
+        "float and vector array operations, limited to the ones the processor supports.  "
+        "SIMD_NONE uses portable loops.");
+    def("simdLevel", &simdLevel,
+        "simdLevel() -- returns the instruction set of the kernels used by array operations.");
+    def("maxSimdLevel", &maxSimdLevel,
+        "maxSimdLevel() -- returns the best instruction set supported by the processor.");
+
+    //
+    // Lazily evaluated array expressions
+    //
+    register_ArrayExpr();
     
     //
     // Initialize constants
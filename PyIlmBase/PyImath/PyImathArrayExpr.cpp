@@ -0,0 +1,201 @@
+///////////////////////////////////////////////////////////////////////////
+//
+// Copyright (c) 2010-2011, Industrial Light & Magic, a division of Lucas
+// Digital Ltd. LLC
+//
+// All rights reserved.
+//
+// Redistribution and use in source and binary forms, with or without
+// modification, are permitted provided that the following conditions are
+// met:
+// *       Redistributions of source code must retain the above copyright
+// notice, this list of conditions and the following disclaimer.
+// *       Redistributions in binary form must reproduce the above
+// copyright notice, this list of conditions and the following disclaimer
+// in the documentation and/or other materials provided with the
+// distribution.
+// *       Neither the name of Industrial Light & Magic nor the names of
+// its contributors may be used to endorse or promote products derived
+// from this software without specific prior written permission.
+//
+// THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+// "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+// LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+// A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+// OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+// SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+// LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+// DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+// THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+// (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+// OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+//
+///////////////////////////////////////////////////////////////////////////
+
+#include "PyIlmBaseConfigInternal.h"
+
+#include "PyImathArrayExpr.h"
+#include "PyImathOperators.h"
+#include "PyImathVecOperators.h"
+#include "PyImathVec.h"
+#include <string>
+
+namespace PyImath {
+
+using namespace boost::python;
+
+namespace {
+
+template <class Op, class R, class A>
+struct ArrayExprUnary
+{
+    static ArrayExpr<R> apply(const ArrayExpr<A> &a)
+    {
+        return ArrayExpr<R>(typename ArrayExpr<R>::Node(new UnaryArrayExprNode<Op,R,A>(a.node())));
+    }
+};
+
+//
+// The overloads of a binary operator taking an expression and another
+// expression, an array or a scalar as operands.  The reflected
+// versions are registered on the class of the right hand operand.
+//
+template <class Op, class R, class A, class B>
+struct ArrayExprBinary
+{
+    static ArrayExpr<R> apply(const ArrayExpr<A> &a, const ArrayExpr<B> &b)
+    {
+        return ArrayExpr<R>(typename ArrayExpr<R>::Node(new BinaryArrayExprNode<Op,R,A,B>(a.node(), b.node())));
+    }
+
+    static ArrayExpr<R> applyArray(const ArrayExpr<A> &a, const FixedArray<B> &b) { return apply(a, ArrayExpr<B>(b)); }
+    static ArrayExpr<R> applyScalar(const ArrayExpr<A> &a, const B &b) { return apply(a, ArrayExpr<B>::scalar(b)); }
+    static ArrayExpr<R> rapplyArray(const ArrayExpr<B> &b, const FixedArray<A> &a) { return apply(ArrayExpr<A>(a), b); }
+    static ArrayExpr<R> rapplyScalar(const ArrayExpr<B> &b, const A &a) { return apply(ArrayExpr<A>::scalar(a), b); }
+
+    static void
+    define(class_<ArrayExpr<A> > &left, class_<ArrayExpr<B> > &right,
+           const char *name, const char *rname)
+    {
+        left
+            .def(name, &applyScalar)
+            .def(name, &applyArray)
+            .def(name, &apply)
+            ;
+        right
+            .def(rname, &rapplyScalar)
+            .def(rname, &rapplyArray)
+            ;
+    }
+
+    static void
+    define(class_<ArrayExpr<A> > &left, const char *name)
+    {
+        left
+            .def(name, &applyScalar)
+            .def(name, &applyArray)
+            .def(name, &apply)
+            ;
+    }
+};
+
+template <class T>
+static ArrayExpr<T>
+makeArrayExpr(const FixedArray<T> &a)
+{
+    return ArrayExpr<T>(a);
+}
+
+template <class T>
+static class_<ArrayExpr<T> >
+register_ArrayExprClass()
+{
+    std::string name = std::string(FixedArray<T>::name()) + "Expr";
+    std::string doc = std::string("Lazily evaluated expression over ") + FixedArray<T>::name() + "s";
+
+    class_<ArrayExpr<T> > c(name.c_str(), doc.c_str(),
+                            init<const FixedArray<T> &>("construct an expression referencing the given array"));
+    c
+        .def("__len__", &ArrayExpr<T>::len)
+        .def("eval", &ArrayExpr<T>::eval,
+             "eval() - evaluate the expression into a new array in a single pass")
+        .def("evalInto", &ArrayExpr<T>::evalInto, args("dest"),
+             "evalInto(dest) - evaluate the expression into an existing array of the same length")
+        .def("__neg__", &ArrayExprUnary<op_neg<T>,T,T>::apply)
+        ;
+
+    ArrayExprBinary<op_add<T>,T,T,T>::define(c, c, "__add__", "__radd__");
+    ArrayExprBinary<op_sub<T>,T,T,T>::define(c, c, "__sub__", "__rsub__");
+    ArrayExprBinary<op_mul<T>,T,T,T>::define(c, c, "__mul__", "__rmul__");
+
+    def("expr", &makeArrayExpr<T>, args("array"),
+        "expr(array) - wrap an array in a lazily evaluated expression.  Arithmetic on\n"
+        "the expression builds an expression tree that is evaluated by eval() or\n"
+        "evalInto() in a single pass, without intermediate arrays.");
+
+    return c;
+}
+
+template <class T>
+static void
+register_ArrayExprDivision(class_<ArrayExpr<T> > &c)
+{
+    ArrayExprBinary<op_div<T>,T,T,T>::define(c, c, "__div__", "__rdiv__");
+    ArrayExprBinary<op_div<T>,T,T,T>::define(c, c, "__truediv__", "__rtruediv__");
+}
+
+template <class V>
+static void
+register_ArrayExprVec(class_<ArrayExpr<V> > &v, class_<ArrayExpr<typename V::BaseType> > &s)
+{
+    typedef typename V::BaseType T;
+
+    ArrayExprBinary<op_mul<V,T,V>,V,V,T>::define(v, s, "__mul__", "__rmul__");
+    ArrayExprBinary<op_mul<T,V,V>,V,T,V>::define(s, v, "__mul__", "__rmul__");
+    ArrayExprBinary<op_div<V,T,V>,V,V,T>::define(v, "__div__");
+    ArrayExprBinary<op_div<V,T,V>,V,V,T>::define(v, "__truediv__");
+    ArrayExprBinary<op_vecDot<V>,T,V,V>::define(v, "dot");
+
+    v
+        .def("length", &ArrayExprUnary<op_vecLength<V>,T,V>::apply)
+        .def("length2", &ArrayExprUnary<op_vecLength2<V>,T,V>::apply)
+        .def("normalized", &ArrayExprUnary<op_vecNormalized<V>,V,V>::apply)
+        ;
+}
+
+template <class T>
+static void
+register_ArrayExprVec3Cross(class_<ArrayExpr<IMATH_NAMESPACE::Vec3<T> > > &v)
+{
+    typedef IMATH_NAMESPACE::Vec3<T> V;
+    ArrayExprBinary<op_vec3Cross<T>,V,V,V>::define(v, "cross");
+}
+
+} // namespace
+
+void
+register_ArrayExpr()
+{
+    class_<ArrayExpr<int> > i = register_ArrayExprClass<int>();
+    class_<ArrayExpr<float> > f = register_ArrayExprClass<float>();
+    class_<ArrayExpr<double> > d = register_ArrayExprClass<double>();
+    class_<ArrayExpr<IMATH_NAMESPACE::V2f> > v2f = register_ArrayExprClass<IMATH_NAMESPACE::V2f>();
+    class_<ArrayExpr<IMATH_NAMESPACE::V2d> > v2d = register_ArrayExprClass<IMATH_NAMESPACE::V2d>();
+    class_<ArrayExpr<IMATH_NAMESPACE::V3f> > v3f = register_ArrayExprClass<IMATH_NAMESPACE::V3f>();
+    class_<ArrayExpr<IMATH_NAMESPACE::V3d> > v3d = register_ArrayExprClass<IMATH_NAMESPACE::V3d>();
+
+    // integer division is left out, as it would need the division by
+    // zero checks of the array operators
+    register_ArrayExprDivision(f);
+    register_ArrayExprDivision(d);
+
+    register_ArrayExprVec(v2f, f);
+    register_ArrayExprVec(v2d, d);
+    register_ArrayExprVec(v3f, f);
+    register_ArrayExprVec(v3d, d);
+
+    register_ArrayExprVec3Cross(v3f);
+    register_ArrayExprVec3Cross(v3d);
+}
+
+} // namespace PyImath
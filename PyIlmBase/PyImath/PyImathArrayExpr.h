@@ -0,0 +1,260 @@
+///////////////////////////////////////////////////////////////////////////
+//
+// Copyright (c) 2010-2011, Industrial Light & Magic, a division of Lucas
+// Digital Ltd. LLC
+//
+// All rights reserved.
+//
+// Redistribution and use in source and binary forms, with or without
+// modification, are permitted provided that the following conditions are
+// met:
+// *       Redistributions of source code must retain the above copyright
+// notice, this list of conditions and the following disclaimer.
+// *       Redistributions in binary form must reproduce the above
+// copyright notice, this list of conditions and the following disclaimer
+// in the documentation and/or other materials provided with the
+// distribution.
+// *       Neither the name of Industrial Light & Magic nor the names of
+// its contributors may be used to endorse or promote products derived
+// from this software without specific prior written permission.
+//
+// THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+// "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+// LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+// A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+// OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+// SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+// LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+// DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+// THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+// (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+// OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+//
+///////////////////////////////////////////////////////////////////////////
+
+#ifndef _PyImathArrayExpr_h_
+#define _PyImathArrayExpr_h_
+
+#include <Python.h>
+#include <boost/python.hpp>
+#include <boost/shared_ptr.hpp>
+#include <algorithm>
+#include "PyImathExport.h"
+#include "PyImathFixedArray.h"
+#include "PyImathTask.h"
+
+namespace PyImath {
+
+//
+// Lazily evaluated array expressions.
+//
+// An ArrayExpr is a tree of nodes over arrays and scalars, combined
+// with the operator functors of PyImathOperators.h and
+// PyImathVecOperators.h.  Nothing is computed until the expression is
+// evaluated, which walks the tree one block of elements at a time:
+// every node computes its block into a buffer small enough to stay in
+// cache, so no full length temporaries are allocated and each source
+// array is read once.  The blocks are spread over the worker pool.
+//
+
+static const size_t ARRAY_EXPR_BLOCK_SIZE = 256;
+
+template <class T>
+class ArrayExprNode
+{
+  public:
+    //
+    // A scalar node is broadcast to the length of the expression
+    // it is part of.
+    //
+    ArrayExprNode(size_t length, bool scalar) : _length(length), _scalar(scalar) {}
+    virtual ~ArrayExprNode() {}
+
+    size_t len() const { return _length; }
+    bool isScalar() const { return _scalar; }
+
+    //
+    // Return a pointer to the n <= ARRAY_EXPR_BLOCK_SIZE elements of the
+    // node starting at start.  The elements are computed into buffer
+    // unless the node can point into existing storage.
+    //
+    virtual const T *block(size_t start, size_t n, T *buffer) const = 0;
+
+  private:
+    size_t _length;
+    bool   _scalar;
+};
+
+template <class T>
+class ArrayLeafExprNode : public ArrayExprNode<T>
+{
+  public:
+    ArrayLeafExprNode(const FixedArray<T> &a)
+        : ArrayExprNode<T>(a.len(), false), _a(a),
+          _contiguous(!a.isMaskedReference() && a.stride() == 1) {}
+
+    const T *block(size_t start, size_t n, T *buffer) const
+    {
+        if (_contiguous)
+            return &_a.direct_index(start);
+
+        for (size_t i = 0; i < n; ++i)
+            buffer[i] = _a[start+i];
+        return buffer;
+    }
+
+  private:
+    FixedArray<T> _a;
+    bool          _contiguous;
+};
+
+template <class T>
+class ScalarExprNode : public ArrayExprNode<T>
+{
+  public:
+    ScalarExprNode(const T &value) : ArrayExprNode<T>(0, true), _value(value) {}
+
+    const T *block(size_t, size_t n, T *buffer) const
+    {
+        std::fill(buffer, buffer+n, _value);
+        return buffer;
+    }
+
+  private:
+    T _value;
+};
+
+template <class Op, class R, class A>
+class UnaryArrayExprNode : public ArrayExprNode<R>
+{
+  public:
+    UnaryArrayExprNode(const boost::shared_ptr<const ArrayExprNode<A> > &a)
+        : ArrayExprNode<R>(a->len(), a->isScalar()), _a(a) {}
+
+    const R *block(size_t start, size_t n, R *buffer) const
+    {
+        A abuf[ARRAY_EXPR_BLOCK_SIZE];
+        const A *a = _a->block(start, n, abuf);
+
+        for (size_t i = 0; i < n; ++i)
+            buffer[i] = Op::apply(a[i]);
+        return buffer;
+    }
+
+  private:
+    boost::shared_ptr<const ArrayExprNode<A> > _a;
+};
+
+template <class Op, class R, class A, class B>
+class BinaryArrayExprNode : public ArrayExprNode<R>
+{
+  public:
+    BinaryArrayExprNode(const boost::shared_ptr<const ArrayExprNode<A> > &a,
+                        const boost::shared_ptr<const ArrayExprNode<B> > &b)
+        : ArrayExprNode<R>(matchLength(*a, *b), a->isScalar() && b->isScalar()), _a(a), _b(b) {}
+
+    const R *block(size_t start, size_t n, R *buffer) const
+    {
+        A abuf[ARRAY_EXPR_BLOCK_SIZE];
+        B bbuf[ARRAY_EXPR_BLOCK_SIZE];
+        const A *a = _a->block(start, n, abuf);
+        const B *b = _b->block(start, n, bbuf);
+
+        for (size_t i = 0; i < n; ++i)
+            buffer[i] = Op::apply(a[i], b[i]);
+        return buffer;
+    }
+
+  private:
+    static size_t matchLength(const ArrayExprNode<A> &a, const ArrayExprNode<B> &b)
+    {
+        if (a.isScalar())
+            return b.len();
+        if (!b.isScalar() && a.len() != b.len())
+            throw IEX_NAMESPACE::ArgExc("Dimensions of source do not match destination");
+        return a.len();
+    }
+
+    boost::shared_ptr<const ArrayExprNode<A> > _a;
+    boost::shared_ptr<const ArrayExprNode<B> > _b;
+};
+
+template <class T>
+struct ArrayExprEvalTask : public Task
+{
+    const ArrayExprNode<T> &node;
+    FixedArray<T> &dest;
+
+    ArrayExprEvalTask(const ArrayExprNode<T> &n, FixedArray<T> &d)
+        : node(n), dest(d) {}
+
+    void execute(size_t start, size_t end)
+    {
+        T buffer[ARRAY_EXPR_BLOCK_SIZE];
+        bool contiguous = !dest.isMaskedReference() && dest.stride() == 1;
+        size_t len = dest.len();
+
+        for (size_t b = start; b < end; ++b)
+        {
+            size_t first = b * ARRAY_EXPR_BLOCK_SIZE;
+            size_t n = std::min(ARRAY_EXPR_BLOCK_SIZE, len - first);
+
+            T *out = contiguous ? &dest.direct_index(first) : buffer;
+            const T *result = node.block(first, n, out);
+
+            if (result != out || !contiguous)
+            {
+                for (size_t i = 0; i < n; ++i)
+                    dest[first+i] = result[i];
+            }
+        }
+    }
+};
+
+//
+// The python facing handle to an expression tree
+//
+template <class T>
+class ArrayExpr
+{
+  public:
+    typedef boost::shared_ptr<const ArrayExprNode<T> > Node;
+
+    explicit ArrayExpr(const Node &node) : _node(node) {}
+    explicit ArrayExpr(const FixedArray<T> &a) : _node(new ArrayLeafExprNode<T>(a)) {}
+
+    static ArrayExpr scalar(const T &value)
+    {
+        return ArrayExpr(Node(new ScalarExprNode<T>(value)));
+    }
+
+    const Node &node() const { return _node; }
+    size_t len() const { return _node->len(); }
+
+    FixedArray<T> eval() const
+    {
+        FixedArray<T> result(len(), UNINITIALIZED);
+        evalInto(result);
+        return result;
+    }
+
+    void evalInto(FixedArray<T> &dest) const
+    {
+        if (size_t(dest.len()) != len())
+            throw IEX_NAMESPACE::ArgExc("Dimensions of source do not match destination");
+
+        PY_IMATH_LEAVE_PYTHON;
+        ArrayExprEvalTask<T> task(*_node, dest);
+        dispatchTask(task, (len() + ARRAY_EXPR_BLOCK_SIZE - 1) / ARRAY_EXPR_BLOCK_SIZE);
+        PY_IMATH_RETURN_PYTHON;
+    }
+
+  private:
+    Node _node;
+};
+
+PYIMATH_EXPORT void register_ArrayExpr();
+
+} // namespace PyImath
+
+#endif // _PyImathArrayExpr_h_
@@ -57,6 +57,7 @@
 #include <boost/python/args.hpp>
 #include <iostream>
 #include "PyImathFixedArray.h"
+#include "PyImathSimd.h"
 #include "PyImathTask.h"
 #include "PyImathUtil.h"
 #include <IexMathFloatExc.h>
@@ -361,7 +362,7 @@ struct VectorizedOperation1 : public Task
             for (size_t i=start; i<end; ++i) {
                 access_value<result_type &>::apply(retval,i) = Op::apply(access_value<arg1_type>::apply(arg1,i));
             }
-        } else {
+        } else if (!simd_op<Op>::apply(retval,arg1,start,end)) {
             for (size_t i=start; i<end; ++i) {
                 direct_access_value<result_type &>::apply(retval,i) = Op::apply(direct_access_value<arg1_type>::apply(arg1,i));
             }
@@ -385,7 +386,7 @@ struct VectorizedOperation2 : public Task
                 access_value<result_type &>::apply(retval,i) = Op::apply(access_value<arg1_type>::apply(arg1,i),
                                                                          access_value<arg2_type>::apply(arg2,i));
             }
-        } else {
+        } else if (!simd_op<Op>::apply(retval,arg1,arg2,start,end)) {
             for (size_t i=start; i<end; ++i) {
                 direct_access_value<result_type &>::apply(retval,i) = Op::apply(direct_access_value<arg1_type>::apply(arg1,i),
                                                                                 direct_access_value<arg2_type>::apply(arg2,i));
@@ -412,7 +413,7 @@ struct VectorizedOperation3 : public Task
                                                                          access_value<arg2_type>::apply(arg2,i),
                                                                          access_value<arg3_type>::apply(arg3,i));
             }
-        } else {
+        } else if (!simd_op<Op>::apply(retval,arg1,arg2,arg3,start,end)) {
             for (size_t i=start; i<end; ++i) {
                 direct_access_value<result_type &>::apply(retval,i) = Op::apply(direct_access_value<arg1_type>::apply(arg1,i),
                                                                                 direct_access_value<arg2_type>::apply(arg2,i),
@@ -582,7 +583,7 @@ struct VectorizedVoidOperation0 : public Task
             for (size_t i=start; i<end; ++i) {
                 Op::apply(access_value<class_type>::apply(cls,i));
             }
-        } else {
+        } else if (!simd_op<Op>::apply_void(cls,start,end)) {
             for (size_t i=start; i<end; ++i) {
                 Op::apply(direct_access_value<class_type>::apply(cls,i));
             }
@@ -605,7 +606,7 @@ struct VectorizedVoidOperation1 : public Task
                 Op::apply(access_value<class_type>::apply(cls,i),
                           access_value<arg1_type>::apply(arg1,i));
             }
-        } else {
+        } else if (!simd_op<Op>::apply_void(cls,arg1,start,end)) {
             for (size_t i=start; i<end; ++i) {
                 Op::apply(direct_access_value<class_type>::apply(cls,i),
                           direct_access_value<arg1_type>::apply(arg1,i));
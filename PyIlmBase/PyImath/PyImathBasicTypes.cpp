@@ -41,6 +41,7 @@
 #include "PyImathExport.h"
 #include "PyImathFixedArray.h"
 #include "PyImathFixedVArray.h"
+#include "PyImathHalf.h"
 
 using namespace boost::python;
 
@@ -57,30 +58,40 @@ register_basicTypes()
     add_mod_math_functions(scclass);
     add_comparison_functions(scclass);
     add_ordered_comparison_functions(scclass);
+    add_reduction_functions(scclass);
+    add_bounds_tuple_function(scclass);
 
     class_<UnsignedCharArray> ucclass = UnsignedCharArray::register_("Fixed length array of unsigned chars");
     add_arithmetic_math_functions(ucclass);
     add_mod_math_functions(ucclass);
     add_comparison_functions(ucclass);
     add_ordered_comparison_functions(ucclass);
+    add_reduction_functions(ucclass);
+    add_bounds_tuple_function(ucclass);
 
     class_<ShortArray> sclass = ShortArray::register_("Fixed length array of shorts");
     add_arithmetic_math_functions(sclass);
     add_mod_math_functions(sclass);
     add_comparison_functions(sclass);
     add_ordered_comparison_functions(sclass);
+    add_reduction_functions(sclass);
+    add_bounds_tuple_function(sclass);
 
     class_<UnsignedShortArray> usclass = UnsignedShortArray::register_("Fixed length array of unsigned shorts");
     add_arithmetic_math_functions(usclass);
     add_mod_math_functions(usclass);
     add_comparison_functions(usclass);
     add_ordered_comparison_functions(usclass);
+    add_reduction_functions(usclass);
+    add_bounds_tuple_function(usclass);
 
     class_<IntArray> iclass = IntArray::register_("Fixed length array of ints");
     add_arithmetic_math_functions(iclass);
     add_mod_math_functions(iclass);
     add_comparison_functions(iclass);
     add_ordered_comparison_functions(iclass);
+    add_reduction_functions(iclass);
+    add_bounds_tuple_function(iclass);
     add_explicit_construction_from_type<float>(iclass);
     add_explicit_construction_from_type<double>(iclass);
 
@@ -89,6 +100,8 @@ register_basicTypes()
     add_mod_math_functions(uiclass);
     add_comparison_functions(uiclass);
     add_ordered_comparison_functions(uiclass);
+    add_reduction_functions(uiclass);
+    add_bounds_tuple_function(uiclass);
     add_explicit_construction_from_type<float>(uiclass);
     add_explicit_construction_from_type<double>(uiclass);
 
@@ -97,18 +110,24 @@ register_basicTypes()
     add_pow_math_functions(fclass);
     add_comparison_functions(fclass);
     add_ordered_comparison_functions(fclass);
+    add_reduction_functions(fclass);
+    add_bounds_tuple_function(fclass);
     add_explicit_construction_from_type<int>(fclass);
     add_explicit_construction_from_type<double>(fclass);
+    add_half_conversions(fclass);
 
     class_<DoubleArray> dclass = DoubleArray::register_("Fixed length array of doubles");
     add_arithmetic_math_functions(dclass);
     add_pow_math_functions(dclass);
     add_comparison_functions(dclass);
     add_ordered_comparison_functions(dclass);
+    add_reduction_functions(dclass);
+    add_bounds_tuple_function(dclass);
     add_explicit_construction_from_type<int>(dclass);
     add_explicit_construction_from_type<float>(dclass);
 
     class_<VIntArray> ivclass = VIntArray::register_("Variable fixed length array of ints");
+    class_<VFloatArray> fvclass = VFloatArray::register_("Variable fixed length array of floats");
     // Don't add other functionality until its defined better.
 }
 
@@ -0,0 +1,486 @@
+///////////////////////////////////////////////////////////////////////////
+//
+// Copyright (c) 2010-2011, Industrial Light & Magic, a division of Lucas
+// Digital Ltd. LLC
+//
+// All rights reserved.
+//
+// Redistribution and use in source and binary forms, with or without
+// modification, are permitted provided that the following conditions are
+// met:
+// *       Redistributions of source code must retain the above copyright
+// notice, this list of conditions and the following disclaimer.
+// *       Redistributions in binary form must reproduce the above
+// copyright notice, this list of conditions and the following disclaimer
+// in the documentation and/or other materials provided with the
+// distribution.
+// *       Neither the name of Industrial Light & Magic nor the names of
+// its contributors may be used to endorse or promote products derived
+// from this software without specific prior written permission.
+//
+// THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+// "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+// LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+// A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+// OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+// SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+// LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+// DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+// THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+// (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+// OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+//
+///////////////////////////////////////////////////////////////////////////
+
+#ifndef _PyImathBufferProtocol_h_
+#define _PyImathBufferProtocol_h_
+
+#include <Python.h>
+#include <boost/python.hpp>
+#include <boost/any.hpp>
+#include <boost/shared_ptr.hpp>
+#include <IexBaseExc.h>
+#include <half.h>
+#include <ImathVec.h>
+#include <ImathBox.h>
+#include <ImathMatrix.h>
+#include <ImathQuat.h>
+#include <ImathColor.h>
+#include <cstring>
+#include <sstream>
+
+namespace PyImath {
+
+//
+// Python buffer protocol (PEP 3118) support for the array types.
+//
+// BufferElement<T> describes an array element type as a dense block
+// of scalars: the struct-module format character of the scalar type
+// and the extents of the block (none for scalars, {3} for a V3f,
+// {4,4} for an M44f, ...).  Element types without a specialization
+// are not exported.
+//
+// BufferLayout<Container> describes where the elements of an array
+// container live: the pointer to the first element, the shape and the
+// strides in bytes.  It is specialized next to each container class.
+// Containers that can view foreign memory also provide a fromBuffer
+// function building a container over a validated layout.
+//
+
+static const int BUFFER_MAX_NDIM = 8;
+
+template <class T>
+struct BufferElement
+{
+    enum { exportable = false, ndim = 0 };
+};
+
+#define PYIMATH_BUFFER_SCALAR(T,fmt)                                \
+    template <>                                                     \
+    struct BufferElement<T>                                         \
+    {                                                               \
+        typedef T Scalar;                                           \
+        enum { exportable = true, ndim = 0 };                       \
+        static const char *format() { return fmt; }                 \
+        static void extents(Py_ssize_t *) {}                        \
+    };
+
+PYIMATH_BUFFER_SCALAR(bool,           "?")
+PYIMATH_BUFFER_SCALAR(signed char,    "b")
+PYIMATH_BUFFER_SCALAR(unsigned char,  "B")
+PYIMATH_BUFFER_SCALAR(short,          "h")
+PYIMATH_BUFFER_SCALAR(unsigned short, "H")
+PYIMATH_BUFFER_SCALAR(int,            "i")
+PYIMATH_BUFFER_SCALAR(unsigned int,   "I")
+PYIMATH_BUFFER_SCALAR(half,           "e")
+PYIMATH_BUFFER_SCALAR(float,          "f")
+PYIMATH_BUFFER_SCALAR(double,         "d")
+
+#undef PYIMATH_BUFFER_SCALAR
+
+//
+// An element made of Count consecutive Inner elements
+//
+template <class Inner, int Count>
+struct BufferBlockElement
+{
+    typedef typename BufferElement<Inner>::Scalar Scalar;
+    enum { exportable = BufferElement<Inner>::exportable,
+           ndim = BufferElement<Inner>::ndim + 1 };
+    static const char *format() { return BufferElement<Inner>::format(); }
+    static void extents(Py_ssize_t *e) { e[0] = Count; BufferElement<Inner>::extents(e+1); }
+};
+
+template <class T> struct BufferElement<IMATH_NAMESPACE::Vec2<T> >     : public BufferBlockElement<T,2> {};
+template <class T> struct BufferElement<IMATH_NAMESPACE::Vec3<T> >     : public BufferBlockElement<T,3> {};
+template <class T> struct BufferElement<IMATH_NAMESPACE::Vec4<T> >     : public BufferBlockElement<T,4> {};
+template <class T> struct BufferElement<IMATH_NAMESPACE::Color3<T> >   : public BufferBlockElement<T,3> {};
+template <class T> struct BufferElement<IMATH_NAMESPACE::Color4<T> >   : public BufferBlockElement<T,4> {};
+template <class T> struct BufferElement<IMATH_NAMESPACE::Quat<T> >     : public BufferBlockElement<T,4> {};
+template <class T> struct BufferElement<IMATH_NAMESPACE::Box<T> >      : public BufferBlockElement<T,2> {};
+template <class T> struct BufferElement<IMATH_NAMESPACE::Matrix22<T> > : public BufferBlockElement<IMATH_NAMESPACE::Vec2<T>,2> {};
+template <class T> struct BufferElement<IMATH_NAMESPACE::Matrix33<T> > : public BufferBlockElement<IMATH_NAMESPACE::Vec3<T>,3> {};
+template <class T> struct BufferElement<IMATH_NAMESPACE::Matrix44<T> > : public BufferBlockElement<IMATH_NAMESPACE::Vec4<T>,4> {};
+
+template <class Container>
+struct BufferLayout;
+
+//
+// Storage for the shape and strides handed out with a Py_buffer,
+// released again in releasebuffer.
+//
+struct BufferView
+{
+    Py_ssize_t shape[BUFFER_MAX_NDIM];
+    Py_ssize_t strides[BUFFER_MAX_NDIM];
+};
+
+template <class Container>
+struct BufferProtocol
+{
+    typedef BufferLayout<Container>                      Layout;
+    typedef BufferElement<typename Layout::Element>      Element;
+    typedef typename Element::Scalar                     Scalar;
+
+    enum { ndim = Layout::ndim + Element::ndim };
+
+    //
+    // Fill in the shape and the byte strides of the scalars of the
+    // container, the element extents being the innermost dimensions.
+    //
+    static void
+    describe(const Container &c, Py_ssize_t *shape, Py_ssize_t *strides)
+    {
+        Layout::shape(c, shape, strides);
+        Element::extents(shape + int(Layout::ndim));
+
+        Py_ssize_t stride = sizeof(Scalar);
+        for (int i = ndim-1; i >= int(Layout::ndim); --i)
+        {
+            strides[i] = stride;
+            stride *= shape[i];
+        }
+    }
+
+    static int
+    getbuffer(PyObject *self, Py_buffer *view, int flags)
+    {
+        view->obj = 0;
+
+        try
+        {
+            boost::python::extract<Container &> ex(self);
+            if (!ex.check())
+            {
+                PyErr_SetString(PyExc_BufferError, "Object does not hold an imath array");
+                return -1;
+            }
+
+            Container &c = ex();
+            if (!Layout::exportable(c))
+            {
+                PyErr_SetString(PyExc_BufferError,
+                                "Unable to export masked reference arrays through the buffer protocol");
+                return -1;
+            }
+
+            BufferView *v = new BufferView;
+            describe(c, v->shape, v->strides);
+
+            //
+            // Whether the scalars are laid out in row major (C) or
+            // column major (Fortran) order, with no gaps
+            //
+            Py_ssize_t count = 1;
+            bool cContiguous = true;
+            for (int i = ndim-1; i >= 0; --i)
+            {
+                if (v->shape[i] > 1 && v->strides[i] != count * Py_ssize_t(sizeof(Scalar)))
+                    cContiguous = false;
+                count *= v->shape[i];
+            }
+
+            Py_ssize_t fCount = 1;
+            bool fContiguous = true;
+            for (int i = 0; i < ndim; ++i)
+            {
+                if (v->shape[i] > 1 && v->strides[i] != fCount * Py_ssize_t(sizeof(Scalar)))
+                    fContiguous = false;
+                fCount *= v->shape[i];
+            }
+
+            //
+            // The contiguity requests include the strides request, so
+            // they are checked first.
+            //
+            bool refused;
+            if ((flags & PyBUF_C_CONTIGUOUS) == PyBUF_C_CONTIGUOUS)
+                refused = !cContiguous;
+            else if ((flags & PyBUF_F_CONTIGUOUS) == PyBUF_F_CONTIGUOUS)
+                refused = !fContiguous;
+            else if ((flags & PyBUF_ANY_CONTIGUOUS) == PyBUF_ANY_CONTIGUOUS)
+                refused = !cContiguous && !fContiguous;
+            else
+                refused = !cContiguous && (flags & PyBUF_STRIDES) != PyBUF_STRIDES;
+
+            if (refused)
+            {
+                delete v;
+                PyErr_SetString(PyExc_BufferError,
+                                "Strided array requested as a contiguous buffer");
+                return -1;
+            }
+
+            view->buf = Layout::data(c);
+            view->len = count * sizeof(Scalar);
+            view->readonly = 0;
+            view->itemsize = sizeof(Scalar);
+            view->format = (flags & PyBUF_FORMAT) ? const_cast<char *>(Element::format()) : 0;
+            view->ndim = ndim;
+            view->shape = (flags & PyBUF_ND) == PyBUF_ND ? v->shape : 0;
+            view->strides = (flags & PyBUF_STRIDES) == PyBUF_STRIDES ? v->strides : 0;
+            view->suboffsets = 0;
+            view->internal = v;
+
+            Py_INCREF(self);
+            view->obj = self;
+            return 0;
+        }
+        catch (...)
+        {
+            boost::python::handle_exception();
+            return -1;
+        }
+    }
+
+    static void
+    releasebuffer(PyObject *self, Py_buffer *view)
+    {
+        delete static_cast<BufferView *>(view->internal);
+        view->internal = 0;
+    }
+
+    static PyBufferProcs procs;
+};
+
+template <class Container>
+PyBufferProcs BufferProtocol<Container>::procs = {
+#if PY_MAJOR_VERSION < 3
+    0, 0, 0, 0,
+#endif
+    &BufferProtocol<Container>::getbuffer,
+    &BufferProtocol<Container>::releasebuffer
+};
+
+//
+// Holds a buffer exported by another python object for as long as an
+// array viewing its memory is alive.  It is stored in the array's
+// handle, so the last copy of the array may go away in any thread.
+//
+class BufferHandle
+{
+  public:
+    BufferHandle(PyObject *obj, int flags)
+    {
+        if (PyObject_GetBuffer(obj, &_view, flags) != 0)
+            boost::python::throw_error_already_set();
+    }
+
+    ~BufferHandle()
+    {
+        PyGILState_STATE state = PyGILState_Ensure();
+        PyBuffer_Release(&_view);
+        PyGILState_Release(state);
+    }
+
+    const Py_buffer &view() const { return _view; }
+
+  private:
+    BufferHandle(const BufferHandle &) = delete;
+    BufferHandle &operator=(const BufferHandle &) = delete;
+
+    Py_buffer _view;
+};
+
+//
+// Compare a struct-module format string against the format of a
+// scalar type.  Native byte order is required, and integer formats
+// of the same signedness are interchangeable (the item size is
+// checked separately), so 'l' matches 'i' where long is 32 bits.
+//
+inline bool
+bufferFormatMatches(const char *format, const char *expected)
+{
+    if (format == 0)
+        format = "B";
+
+    const int one = 1;
+    const bool littleEndian = *reinterpret_cast<const char *>(&one) == 1;
+
+    switch (*format)
+    {
+      case '@':
+      case '=':
+        ++format;
+        break;
+      case '<':
+        if (!littleEndian) return false;
+        ++format;
+        break;
+      case '>':
+      case '!':
+        if (littleEndian) return false;
+        ++format;
+        break;
+    }
+
+    if (std::strcmp(format, expected) == 0)
+        return true;
+
+    if (std::strlen(format) != 1 || std::strlen(expected) != 1)
+        return false;
+
+    static const char *signedInts = "bhilq";
+    static const char *unsignedInts = "BHILQ";
+    return (std::strchr(signedInts, *format) && std::strchr(signedInts, *expected)) ||
+           (std::strchr(unsignedInts, *format) && std::strchr(unsignedInts, *expected));
+}
+
+template <class Container>
+struct BufferImport
+{
+    typedef BufferLayout<Container>                      Layout;
+    typedef typename Layout::Element                     T;
+    typedef BufferElement<T>                             Element;
+    typedef typename Element::Scalar                     Scalar;
+
+    enum { ndim = Layout::ndim + Element::ndim };
+
+    static Container
+    fromBuffer(boost::python::object obj)
+    {
+        boost::shared_ptr<BufferHandle> handle(new BufferHandle(obj.ptr(), PyBUF_RECORDS));
+        const Py_buffer &view = handle->view();
+
+        if (!bufferFormatMatches(view.format, Element::format()) ||
+            view.itemsize != Py_ssize_t(sizeof(Scalar)))
+        {
+            std::stringstream err;
+            err << "Buffer format '" << (view.format ? view.format : "B")
+                << "' with item size " << view.itemsize
+                << " does not match the array scalar format '" << Element::format() << "'";
+            throw IEX_NAMESPACE::ArgExc(err.str());
+        }
+
+        Py_ssize_t extents[BUFFER_MAX_NDIM];
+        Element::extents(extents);
+
+        bool shapeMatches = view.ndim == ndim;
+        for (int i = 0; shapeMatches && i < int(Element::ndim); ++i)
+            shapeMatches = view.shape[Layout::ndim + i] == extents[i];
+
+        if (!shapeMatches)
+        {
+            std::stringstream err;
+            err << "Buffer shape (";
+            for (int i = 0; i < view.ndim; ++i)
+                err << (i ? ", " : "") << view.shape[i];
+            err << ") does not match the array shape (";
+            for (int i = 0; i < ndim; ++i)
+            {
+                err << (i ? ", " : "");
+                if (i < int(Layout::ndim)) err << "n";
+                else err << extents[i - Layout::ndim];
+            }
+            err << ")";
+            throw IEX_NAMESPACE::ArgExc(err.str());
+        }
+
+        Py_ssize_t stride = sizeof(Scalar);
+        for (int i = ndim-1; i >= int(Layout::ndim); --i)
+        {
+            if (view.strides[i] != stride)
+                throw IEX_NAMESPACE::ArgExc("Buffer array elements must be contiguous");
+            stride *= view.shape[i];
+        }
+
+        for (int i = 0; i < int(Layout::ndim); ++i)
+        {
+            if (view.strides[i] <= 0 || view.strides[i] % sizeof(T) != 0)
+                throw IEX_NAMESPACE::ArgExc("Buffer strides must be positive multiples of the array element size");
+        }
+
+        if (reinterpret_cast<size_t>(view.buf) % alignof(Scalar) != 0)
+            throw IEX_NAMESPACE::ArgExc("Buffer data is not aligned for the array scalar type");
+
+        return Layout::fromBuffer(static_cast<T *>(view.buf), view.shape, view.strides,
+                                  boost::any(handle));
+    }
+};
+
+template <class Container, bool exportable>
+struct add_buffer_protocol_impl
+{
+    template <class Class>
+    static void apply(Class &c)
+    {
+        static_assert(int(BufferProtocol<Container>::ndim) <= BUFFER_MAX_NDIM,
+                      "array element has too many dimensions for the buffer protocol");
+
+        PyTypeObject *type = reinterpret_cast<PyTypeObject *>(c.ptr());
+        type->tp_as_buffer = &BufferProtocol<Container>::procs;
+#if PY_MAJOR_VERSION < 3
+        type->tp_flags |= Py_TPFLAGS_HAVE_NEWBUFFER;
+#endif
+    }
+
+    template <class Class>
+    static void applyImport(Class &c)
+    {
+        c.def("fromBuffer", &BufferImport<Container>::fromBuffer, boost::python::args("buffer"),
+              "construct an array viewing the memory of a buffer object (a numpy array,\n"
+              "bytearray, ...) without copying.  The buffer must have the array's scalar\n"
+              "format, the element extents as its trailing dimensions and contiguous\n"
+              "elements.  The buffer object is kept alive by the new array.");
+        c.staticmethod("fromBuffer");
+    }
+};
+
+template <class Container>
+struct add_buffer_protocol_impl<Container,false>
+{
+    template <class Class>
+    static void apply(Class &) {}
+
+    template <class Class>
+    static void applyImport(Class &) {}
+};
+
+//
+// Expose the memory of the wrapped container through the buffer
+// protocol, if its element type has a BufferElement description.
+//
+template <class Container, class Class>
+void
+add_buffer_protocol(Class &c)
+{
+    add_buffer_protocol_impl<Container,
+                             BufferElement<typename BufferLayout<Container>::Element>::exportable>::apply(c);
+}
+
+//
+// Add a static fromBuffer method constructing the container over the
+// memory of another buffer object.  Requires BufferLayout<Container>
+// to provide fromBuffer.
+//
+template <class Container, class Class>
+void
+add_from_buffer(Class &c)
+{
+    add_buffer_protocol_impl<Container,
+                             BufferElement<typename BufferLayout<Container>::Element>::exportable>::applyImport(c);
+}
+
+} // namespace PyImath
+
+#endif // _PyImathBufferProtocol_h_
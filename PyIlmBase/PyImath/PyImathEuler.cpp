@@ -782,6 +782,21 @@ EulerArray_eulerConstructor7a(const FixedArray<IMATH_NAMESPACE::Quat<T> > &q)
     return result;
 }
 
+template <class T>
+struct op_eulerToQuat {
+    static inline IMATH_NAMESPACE::Quat<T> apply(const IMATH_NAMESPACE::Euler<T> &e) { return e.toQuat(); }
+};
+
+template <class T>
+struct op_eulerToMatrix33 {
+    static inline IMATH_NAMESPACE::Matrix33<T> apply(const IMATH_NAMESPACE::Euler<T> &e) { return e.toMatrix33(); }
+};
+
+template <class T>
+struct op_eulerToMatrix44 {
+    static inline IMATH_NAMESPACE::Matrix44<T> apply(const IMATH_NAMESPACE::Euler<T> &e) { return e.toMatrix44(); }
+};
+
 template <class T>
 class_<FixedArray<IMATH_NAMESPACE::Euler<T> > >
 register_EulerArray()
@@ -797,6 +812,11 @@ register_EulerArray()
     add_comparison_functions(eulerArray_class);
     PyImath::add_explicit_construction_from_type<IMATH_NAMESPACE::Matrix33<T> >(eulerArray_class);
     PyImath::add_explicit_construction_from_type<IMATH_NAMESPACE::Matrix44<T> >(eulerArray_class);
+
+    generate_member_bindings<op_eulerToQuat<T> >(eulerArray_class,"toQuat","e.toQuat() -- converts the rotations of e into quaternions");
+    generate_member_bindings<op_eulerToMatrix33<T> >(eulerArray_class,"toMatrix33","e.toMatrix33() -- converts the rotations of e into 3x3 matrices");
+    generate_member_bindings<op_eulerToMatrix44<T> >(eulerArray_class,"toMatrix44","e.toMatrix44() -- converts the rotations of e into 4x4 matrices");
+
     return eulerArray_class;
 }
 
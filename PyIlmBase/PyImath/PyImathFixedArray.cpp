@@ -36,9 +36,87 @@
 
 #include "PyImathFixedArray.h"
 #include "PyImathExport.h"
+#include <algorithm>
+#include <vector>
 
 namespace PyImath {
 
+namespace {
+
+//
+// Masks are compacted in fixed size blocks rather than in dispatch
+// chunks, so that the counting and the filling pass see the same
+// partition of the mask whatever the worker pool does.
+//
+const size_t maskBlockSize = 65536;
+
+struct MaskCountTask : public Task
+{
+    const FixedArray<int> &mask;
+    std::vector<size_t> &offsets;
+
+    MaskCountTask(const FixedArray<int> &m, std::vector<size_t> &o)
+        : mask(m), offsets(o) {}
+
+    void execute(size_t start, size_t end)
+    {
+        size_t len = mask.len();
+        for (size_t b = start; b < end; ++b)
+        {
+            size_t count = 0;
+            for (size_t i = b*maskBlockSize, e = std::min(i+maskBlockSize,len); i < e; ++i)
+                if (mask[i]) ++count;
+            offsets[b+1] = count;
+        }
+    }
+};
+
+struct MaskFillTask : public Task
+{
+    const FixedArray<int> &mask;
+    const std::vector<size_t> &offsets;
+    size_t *indices;
+
+    MaskFillTask(const FixedArray<int> &m, const std::vector<size_t> &o, size_t *ind)
+        : mask(m), offsets(o), indices(ind) {}
+
+    void execute(size_t start, size_t end)
+    {
+        size_t len = mask.len();
+        for (size_t b = start; b < end; ++b)
+        {
+            size_t j = offsets[b];
+            for (size_t i = b*maskBlockSize, e = std::min(i+maskBlockSize,len); i < e; ++i)
+                if (mask[i]) indices[j++] = i;
+        }
+    }
+};
+
+} // namespace
+
+size_t
+maskIndices(const FixedArray<int> &mask, boost::shared_array<size_t> &indices)
+{
+    size_t numBlocks = (mask.len() + maskBlockSize - 1) / maskBlockSize;
+
+    // offsets[b+1] holds the count of block b until the prefix sum
+    // turns offsets[b] into the first output position of block b.
+    std::vector<size_t> offsets(numBlocks+1, 0);
+    MaskCountTask countTask(mask,offsets);
+    dispatchTask(countTask,numBlocks);
+
+    for (size_t b = 0; b < numBlocks; ++b)
+        offsets[b+1] += offsets[b];
+
+    size_t count = offsets[numBlocks];
+    indices.reset(new size_t[count]);
+
+    MaskFillTask fillTask(mask,offsets,indices.get());
+    dispatchTask(fillTask,numBlocks);
+
+    return count;
+}
+
 template <> PYIMATH_EXPORT bool FixedArrayDefaultValue<bool>::value() { return false; }
 template <> PYIMATH_EXPORT signed char FixedArrayDefaultValue<signed char>::value() { return 0; }
 template <> PYIMATH_EXPORT unsigned char FixedArrayDefaultValue<unsigned char>::value() { return 0; }
@@ -43,6 +43,8 @@
 #include <iostream>
 #include <IexMathFloatExc.h>
 #include "PyImathUtil.h"
+#include "PyImathTask.h"
+#include "PyImathBufferProtocol.h"
 
 #ifdef PYIMATH_ENABLE_EXCEPTIONS
 # define PY_IMATH_LEAVE_PYTHON IEX_NAMESPACE::MathExcOn mathexcon (IEX_NAMESPACE::IEEE_OVERFLOW | \
@@ -68,6 +70,15 @@ struct FixedArrayDefaultValue
 
 enum Uninitialized {UNINITIALIZED};
 
+template <class T> class FixedArray;
+
+//
+// Store the positions of the nonzero entries of mask in indices, in
+// order, and return their count.  The mask is counted and compacted in
+// parallel blocks placed with a prefix sum of the block counts.
+//
+PYIMATH_EXPORT size_t maskIndices(const FixedArray<int> &mask, boost::shared_array<size_t> &indices);
+
 template <class T>
 class FixedArray
 {
@@ -160,24 +171,7 @@ class FixedArray
 
         size_t len = f.match_dimension(mask);
         _unmaskedLength = len;
-
-        size_t reduced_len = 0;
-        for (size_t i = 0; i < len; ++i)
-            if (mask[i])
-                reduced_len++;
-
-        _indices.reset(new size_t[reduced_len]);
-
-        for (size_t i = 0, j = 0; i < len; ++i)
-        {
-            if (mask[i])
-            {
-                _indices[j] = i;
-                j++;
-            }
-        }
-
-        _length = reduced_len;
+        _length = maskIndices(mask, _indices);
     }
 
     template <class S>
@@ -286,23 +280,17 @@ class FixedArray
         size_t start=0, end=0, slicelength=0;
         Py_ssize_t step;
         extract_slice_indices(index,start,end,step,slicelength);
-        FixedArray f(slicelength);
 
-        if (_indices)
-        {
-            for (size_t i=0; i<slicelength; ++i)
-                f._ptr[i] = _ptr[raw_ptr_index(start+i*step)*_stride];
-        }
-        else
-        {
-            for (size_t i=0; i<slicelength; ++i)
-                f._ptr[i] = _ptr[(start+i*step)*_stride];
-        }
+        PyReleaseLock pyunlock;
+        FixedArray f(slicelength);
+        GetSliceTask task(*this,f,start,step);
+        dispatchTask(task,slicelength);
         return f;
     }
 
     FixedArray getslice_mask(const FixedArray<int>& mask)
     {
+        PyReleaseLock pyunlock;
         FixedArray f(*this, mask);
         return f;
     }
@@ -356,16 +344,9 @@ class FixedArray
 	    boost::python::throw_error_already_set();
         }
 
-        if (_indices)
-        {
-            for (size_t i=0; i<slicelength; ++i)
-                _ptr[raw_ptr_index(start+i*step)*_stride] = data[i];
-        }
-        else
-        {
-            for (size_t i=0; i<slicelength; ++i)
-                _ptr[(start+i*step)*_stride] = data[i];
-        }
+        PyReleaseLock pyunlock;
+        SetSliceTask task(*this,data,start,step);
+        dispatchTask(task,slicelength);
     }
 
     void
@@ -380,30 +361,24 @@ class FixedArray
         }
 
         size_t len = match_dimension(mask);
+
+        PyReleaseLock pyunlock;
         if ((size_t)data.len() == len)
         {
-            for (size_t i = 0; i < len; ++i)
-                if (mask[i]) _ptr[i*_stride] = data[i];
+            SetMaskTask task(*this,mask,data);
+            dispatchTask(task,len);
         }
         else
         {
-            size_t count = 0;
-            for (size_t i = 0; i < len; ++i)
-                if (mask[i]) count++;
+            boost::shared_array<size_t> indices;
+            size_t count = maskIndices(mask, indices);
 
             if ((size_t)data.len() != count) {
                 throw IEX_NAMESPACE::ArgExc("Dimensions of source data do not match destination either masked or unmasked");
             }
 
-            Py_ssize_t dataIndex = 0;
-            for (size_t i = 0; i < len; ++i)
-            {
-                if (mask[i])
-                {
-                    _ptr[i*_stride] = data[dataIndex];
-                    dataIndex++;
-                }
-            }
+            ScatterTask task(*this,indices.get(),data);
+            dispatchTask(task,count);
         }
     }
 
@@ -485,6 +460,8 @@ class FixedArray
             .def("ifelse",&FixedArray<T>::ifelse_scalar)
             .def("ifelse",&FixedArray<T>::ifelse_vector)
             ;
+        add_buffer_protocol<FixedArray<T> >(c);
+        add_from_buffer<FixedArray<T> >(c);
         return c;
     }
 
@@ -516,20 +493,151 @@ class FixedArray
     FixedArray<T> ifelse_vector(const FixedArray<int> &choice, const FixedArray<T> &other) {
         size_t len = match_dimension(choice);
         match_dimension(other);
+        PyReleaseLock pyunlock;
         FixedArray<T> tmp(len); // should use default construction but V3f doens't initialize
-        for (size_t i=0; i < len; ++i) tmp[i] = choice[i] ? (*this)[i] : other[i];
+        IfElseVectorTask task(*this,choice,other,tmp);
+        dispatchTask(task,len);
         return tmp;
     }
 
     FixedArray<T> ifelse_scalar(const FixedArray<int> &choice, const T &other) {
         size_t len = match_dimension(choice);
+        PyReleaseLock pyunlock;
         FixedArray<T> tmp(len); // should use default construction but V3f doens't initialize
-        for (size_t i=0; i < len; ++i) tmp[i] = choice[i] ? (*this)[i] : other;
+        IfElseScalarTask task(*this,choice,other,tmp);
+        dispatchTask(task,len);
         return tmp;
     }
 
     // Instantiations of fixed ararys must implement this static member
     static const char *name();
+
+  private:
+
+    //
+    // Tasks for the bulk copies of slicing, masking and ifelse, which
+    // are dispatched with the python lock released.
+    //
+    struct GetSliceTask : public Task
+    {
+        const FixedArray &src;
+        FixedArray &dst;
+        size_t start;
+        Py_ssize_t step;
+
+        GetSliceTask(const FixedArray &s, FixedArray &d, size_t st, Py_ssize_t sp)
+            : src(s), dst(d), start(st), step(sp) {}
+
+        void execute(size_t b, size_t e)
+        {
+            for (size_t i = b; i < e; ++i)
+                dst._ptr[i] = src[start+i*step];
+        }
+    };
+
+    struct SetSliceTask : public Task
+    {
+        FixedArray &dst;
+        const FixedArray &src;
+        size_t start;
+        Py_ssize_t step;
+
+        SetSliceTask(FixedArray &d, const FixedArray &s, size_t st, Py_ssize_t sp)
+            : dst(d), src(s), start(st), step(sp) {}
+
+        void execute(size_t b, size_t e)
+        {
+            for (size_t i = b; i < e; ++i)
+                dst[start+i*step] = src[i];
+        }
+    };
+
+    struct SetMaskTask : public Task
+    {
+        FixedArray &dst;
+        const FixedArray<int> &mask;
+        const FixedArray &src;
+
+        SetMaskTask(FixedArray &d, const FixedArray<int> &m, const FixedArray &s)
+            : dst(d), mask(m), src(s) {}
+
+        void execute(size_t b, size_t e)
+        {
+            for (size_t i = b; i < e; ++i)
+                if (mask[i]) dst._ptr[i*dst._stride] = src[i];
+        }
+    };
+
+    struct ScatterTask : public Task
+    {
+        FixedArray &dst;
+        const size_t *indices;
+        const FixedArray &src;
+
+        ScatterTask(FixedArray &d, const size_t *ind, const FixedArray &s)
+            : dst(d), indices(ind), src(s) {}
+
+        void execute(size_t b, size_t e)
+        {
+            for (size_t i = b; i < e; ++i)
+                dst._ptr[indices[i]*dst._stride] = src[i];
+        }
+    };
+
+    struct IfElseVectorTask : public Task
+    {
+        const FixedArray &a;
+        const FixedArray<int> &choice;
+        const FixedArray &other;
+        FixedArray &result;
+
+        IfElseVectorTask(const FixedArray &a_, const FixedArray<int> &c, const FixedArray &o, FixedArray &r)
+            : a(a_), choice(c), other(o), result(r) {}
+
+        void execute(size_t b, size_t e)
+        {
+            for (size_t i = b; i < e; ++i)
+                result._ptr[i] = choice[i] ? a[i] : other[i];
+        }
+    };
+
+    struct IfElseScalarTask : public Task
+    {
+        const FixedArray &a;
+        const FixedArray<int> &choice;
+        const T &other;
+        FixedArray &result;
+
+        IfElseScalarTask(const FixedArray &a_, const FixedArray<int> &c, const T &o, FixedArray &r)
+            : a(a_), choice(c), other(o), result(r) {}
+
+        void execute(size_t b, size_t e)
+        {
+            for (size_t i = b; i < e; ++i)
+                result._ptr[i] = choice[i] ? a[i] : other;
+        }
+    };
+};
+
+template <class T>
+struct BufferLayout<FixedArray<T> >
+{
+    typedef T Element;
+    enum { ndim = 1 };
+
+    static bool exportable(const FixedArray<T> &a) { return !a.isMaskedReference(); }
+    static void *data(FixedArray<T> &a) { return &a.direct_index(0); }
+    static void shape(const FixedArray<T> &a, Py_ssize_t *shape, Py_ssize_t *strides)
+    {
+        shape[0] = a.len();
+        strides[0] = a.stride() * sizeof(T);
+    }
+
+    static FixedArray<T> fromBuffer(T *data, const Py_ssize_t *shape, const Py_ssize_t *strides,
+                                    const boost::any &handle)
+    {
+        return FixedArray<T>(data, shape[0], strides[0] / sizeof(T), handle);
+    }
 };
 
 //
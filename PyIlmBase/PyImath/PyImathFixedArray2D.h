@@ -439,6 +439,8 @@ class FixedArray2D
             .def("ifelse",&FixedArray2D<T>::ifelse_scalar)
             .def("ifelse",&FixedArray2D<T>::ifelse_vector)
             ;
+        add_buffer_protocol<FixedArray2D<T> >(c);
+        add_from_buffer<FixedArray2D<T> >(c);
         return c;
     }
 
@@ -482,6 +484,32 @@ class FixedArray2D
     }
 
 };
+
+template <class T>
+struct BufferLayout<FixedArray2D<T> >
+{
+    typedef T Element;
+    enum { ndim = 2 };
+
+    static bool exportable(const FixedArray2D<T> &) { return true; }
+    static void *data(FixedArray2D<T> &a) { return &a(0,0); }
+    static void shape(const FixedArray2D<T> &a, Py_ssize_t *shape, Py_ssize_t *strides)
+    {
+        shape[0] = a.len().y;
+        shape[1] = a.len().x;
+        strides[0] = a.stride().x * a.stride().y * sizeof(T);
+        strides[1] = a.stride().x * sizeof(T);
+    }
+
+    static FixedArray2D<T> fromBuffer(T *data, const Py_ssize_t *shape, const Py_ssize_t *strides,
+                                      const boost::any &handle)
+    {
+        if (strides[0] % strides[1] != 0)
+            throw IEX_NAMESPACE::ArgExc("Buffer row stride must be a multiple of its column stride");
+        return FixedArray2D<T>(data, shape[1], shape[0], strides[1] / sizeof(T),
+                               strides[0] / strides[1], handle);
+    }
+};
  
 // unary operation application
 template <template <class,class> class Op, class T1, class Ret>
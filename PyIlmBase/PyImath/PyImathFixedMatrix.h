@@ -247,6 +247,7 @@ class FixedMatrix
             .def("rows",&FixedMatrix<T>::rows)
             .def("columns",&FixedMatrix<T>::cols)
             ;
+        add_buffer_protocol<FixedMatrix<T> >(c);
         return c;
     }
 
@@ -261,6 +262,23 @@ class FixedMatrix
     }
 };
 
+template <class T>
+struct BufferLayout<FixedMatrix<T> >
+{
+    typedef T Element;
+    enum { ndim = 2 };
+
+    static bool exportable(const FixedMatrix<T> &) { return true; }
+    static void *data(FixedMatrix<T> &m) { return &m.element(0,0); }
+    static void shape(const FixedMatrix<T> &m, Py_ssize_t *shape, Py_ssize_t *strides)
+    {
+        shape[0] = m.rows();
+        shape[1] = m.cols();
+        strides[0] = m.rowStride() * m.cols() * m.colStride() * sizeof(T);
+        strides[1] = m.colStride() * sizeof(T);
+    }
+};
+
 // unary operation application
 template <template <class,class> class Op, class T1, class Ret>
 FixedMatrix<Ret> apply_matrix_unary_op(const FixedMatrix<T1> &a1)
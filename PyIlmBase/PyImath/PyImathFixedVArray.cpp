@@ -39,16 +39,19 @@
 #include <boost/python.hpp>
 #include <boost/shared_array.hpp>
 #include <boost/any.hpp>
+#include <algorithm>
+#include <climits>
+#include <half.h>
 #include <Iex.h>
 #include "PyImathExport.h"
 
 namespace PyImath {
 
 template <class T>
-FixedVArray<T>::FixedVArray (std::vector<T>* ptr, Py_ssize_t length,
-                             Py_ssize_t stride)
-    : _ptr(ptr), _length(length), _stride(stride),
-      _handle(), _unmaskedLength(0)
+FixedVArray<T>::FixedVArray (T* ptr, boost::shared_array<size_t> offsets,
+                             Py_ssize_t length, Py_ssize_t stride)
+    : _ptr(ptr), _offsets(offsets.get()), _length(length), _stride(stride),
+      _handle(), _offsetsHandle(offsets), _unmaskedLength(0)
 {
     if (length < 0)
     {
@@ -63,10 +66,11 @@ FixedVArray<T>::FixedVArray (std::vector<T>* ptr, Py_ssize_t length,
 }
 
 template <class T>
-FixedVArray<T>::FixedVArray (std::vector<T>* ptr, Py_ssize_t length,
-                             Py_ssize_t stride, boost::any handle)
-    : _ptr(ptr), _length(length), _stride(stride),
-      _handle(handle), _unmaskedLength(0)
+FixedVArray<T>::FixedVArray (T* ptr, boost::shared_array<size_t> offsets,
+                             Py_ssize_t length, Py_ssize_t stride,
+                             boost::any handle)
+    : _ptr(ptr), _offsets(offsets.get()), _length(length), _stride(stride),
+      _handle(handle), _offsetsHandle(offsets), _unmaskedLength(0)
 {
     if (length < 0)
     {
@@ -82,17 +86,16 @@ FixedVArray<T>::FixedVArray (std::vector<T>* ptr, Py_ssize_t length,
 
 template <class T>
 FixedVArray<T>::FixedVArray(Py_ssize_t length)
-    : _ptr(0), _length(length), _stride(1), _handle(), _unmaskedLength(0)
+    : _ptr(0), _offsets(0), _length(length), _stride(1), _handle(),
+      _unmaskedLength(0)
 {
     if (length < 0)
     {
         throw IEX_NAMESPACE::ArgExc("Fixed array length must be non-negative");
     }
 
-    boost::shared_array<std::vector<T> > a(new std::vector<T>[length]);
- // Initial vectors in the array will be zero-length.
-    _handle = a;
-    _ptr = a.get();
+ // Initial items in the array will be zero-length.
+    allocate (std::vector<size_t> (length, 0));
 }
 
 // template <class T>
@@ -111,25 +114,41 @@ FixedVArray<T>::FixedVArray(Py_ssize_t length)
 
 template <class T>
 FixedVArray<T>::FixedVArray(const T& initialValue, Py_ssize_t length)
-    : _ptr(0), _length(length), _stride(1), _handle(), _unmaskedLength(0)
+    : _ptr(0), _offsets(0), _length(length), _stride(1), _handle(),
+      _unmaskedLength(0)
 {
     if (length < 0)
     {
         throw IEX_NAMESPACE::ArgExc("Fixed array length must be non-negative");
     }
 
-    boost::shared_array<std::vector<T> > a(new std::vector<T>[length]);
-    for (Py_ssize_t i = 0; i < length; ++i)
+    allocate (std::vector<size_t> (length, 1));
+    std::fill (_ptr, _ptr + length, initialValue);
+}
+
+template <class T>
+FixedVArray<T>::FixedVArray(const T& initialValue, const FixedArray<int>& lengths)
+    : _ptr(0), _offsets(0), _length(lengths.len()), _stride(1), _handle(),
+      _unmaskedLength(0)
+{
+    std::vector<size_t> l (_length);
+    for (size_t i = 0; i < _length; ++i)
     {
-        a[i].push_back (initialValue);
+        if (lengths[i] < 0)
+        {
+            throw IEX_NAMESPACE::ArgExc("Variable array item lengths must be non-negative");
+        }
+        l[i] = lengths[i];
     }
-    _handle = a;
-    _ptr = a.get();
+
+    allocate (l);
+    std::fill (_ptr, _ptr + _offsets[_length], initialValue);
 }
 
 template <class T>
 FixedVArray<T>::FixedVArray(FixedVArray<T>& other, const FixedArray<int>& mask)
-    : _ptr(other._ptr), _stride(other._stride), _handle(other._handle)
+    : _ptr(other._ptr), _offsets(other._offsets), _stride(other._stride),
+      _handle(other._handle), _offsetsHandle(other._offsetsHandle)
 {
     if (other.isMaskedReference())
     {
@@ -170,8 +189,9 @@ FixedVArray<T>::FixedVArray(FixedVArray<T>& other, const FixedArray<int>& mask)
 
 template <class T>
 FixedVArray<T>::FixedVArray(const FixedVArray<T>& other)
-    : _ptr(other._ptr), _length(other._length), _stride(other._stride),
-      _handle(other._handle), _indices(other._indices),
+    : _ptr(other._ptr), _offsets(other._offsets), _length(other._length),
+      _stride(other._stride), _handle(other._handle),
+      _offsetsHandle(other._offsetsHandle), _indices(other._indices),
       _unmaskedLength(other._unmaskedLength)
 {
     // Nothing.
@@ -185,9 +205,11 @@ FixedVArray<T>::operator = (const FixedVArray<T>& other)  // AAJ (WHY SHALLOW CO
         return *this;
 
     _ptr            = other._ptr;
+    _offsets        = other._offsets;
     _length         = other._length;
     _stride         = other._stride;
     _handle         = other._handle;
+    _offsetsHandle  = other._offsetsHandle;
     _unmaskedLength = other._unmaskedLength;
     _indices        = other._indices;
 
@@ -202,17 +224,48 @@ FixedVArray<T>::~FixedVArray()  // AAJ (NOT DELETED BECAUSE SHARED ARRAY THAT HA
 
 
 template <class T>
-std::vector<T>&
+T*
 FixedVArray<T>::operator [] (size_t i)
 {
-    return _ptr[(_indices ? raw_ptr_index(i) : i) * _stride];
+    return _ptr + _offsets[raw_index(i)];
 }
 
 template <class T>
-const std::vector<T>&
+const T*
 FixedVArray<T>::operator [] (size_t i) const
 {
-    return _ptr[(_indices ? raw_ptr_index(i) : i) * _stride];
+    return _ptr + _offsets[raw_index(i)];
+}
+
+template <class T>
+size_t
+FixedVArray<T>::size (size_t i) const
+{
+    size_t r = raw_index(i);
+    return _offsets[r+1] - _offsets[r];
+}
+
+template <class T>
+void
+FixedVArray<T>::allocate (const std::vector<size_t>& lengths)
+{
+    boost::shared_array<size_t> offsets (new size_t[lengths.size() + 1]);
+    offsets[0] = 0;
+    for (size_t i = 0; i < lengths.size(); ++i)
+    {
+        offsets[i+1] = offsets[i] + lengths[i];
+    }
+
+    boost::shared_array<T> a (new T[offsets[lengths.size()]]);
+
+    _ptr = a.get();
+    _offsets = offsets.get();
+    _length = lengths.size();
+    _stride = 1;
+    _handle = a;
+    _offsetsHandle = offsets;
+    _indices.reset();
+    _unmaskedLength = 0;
 }
 
 
@@ -286,22 +339,40 @@ extract_slice_indices (PyObject* index, size_t& start, size_t& end,
     }
 }
 
+//
+// Check that the items of two arrays have the same numbers of
+// elements, the items of an array being assigned to those of another
+//
+template <class T>
+void
+check_item_size (const FixedVArray<T>& a, size_t i,
+                 const FixedVArray<T>& b, size_t j)
+{
+    if (a.size(i) != b.size(j))
+    {
+        throw IEX_NAMESPACE::ArgExc
+            ("Number of elements of source item does not match destination");
+    }
+}
+
+template <class T>
+void
+copy_item (FixedVArray<T>& to, size_t i, const FixedVArray<T>& from, size_t j)
+{
+    std::copy (from[j], from[j] + from.size(j), to[i]);
+}
+
 } // namespace
 
 
-// template <class T>
-// typename boost::mpl::if_<boost::is_class<T>,T&,T>::type
-// FixedVArray<T>::getitem (Py_ssize_t index)
-// {
-//     return (*this)[canonical_index (index, _length)];
-// }
-// 
-// template <class T>
-// typename boost::mpl::if_<boost::is_class<T>,const T&,T>::type
-// FixedVArray<T>::getitem (Py_ssize_t index) const
-// {
-//     return (*this)[canonical_index (index, _length)];
-// }
+
+template <class T>
+FixedArray<T>
+FixedVArray<T>::getitem (Py_ssize_t index)
+{
+    size_t i = canonical_index (index, _length);
+    return FixedArray<T> ((*this)[i], size(i), 1, _handle);
+}
 
 
 template <class T>
@@ -314,21 +385,18 @@ FixedVArray<T>::getslice (PyObject* index) const
     Py_ssize_t step;
     extract_slice_indices (index, start, end, step, sliceLength, _length);
 
-    FixedVArray<T> f(sliceLength);
-
-    if (_indices)
+    std::vector<size_t> lengths (sliceLength);
+    for (size_t i = 0; i < sliceLength; ++i)
     {
-        for (size_t i = 0; i < sliceLength; ++i)
-        {
-            f._ptr[i] = _ptr[raw_ptr_index(start + i*step)*_stride];
-        }
+        lengths[i] = size(start + i*step);
     }
-    else
+
+    FixedVArray<T> f(0);
+    f.allocate (lengths);
+
+    for (size_t i = 0; i < sliceLength; ++i)
     {
-        for (size_t i = 0; i < sliceLength; ++i)
-        {
-            f._ptr[i] = _ptr[(start + i*step)*_stride];
-        }
+        copy_item (f, i, *this, start + i*step);
     }
 
     return f;
@@ -394,6 +462,7 @@ FixedVArray<T>::getslice_mask (const FixedArray<int>& mask)
 //     }
 // }
 
+
 template <class T>
 void
 FixedVArray<T>::setitem_vector (PyObject* index, const FixedVArray<T>& data)
@@ -411,19 +480,14 @@ FixedVArray<T>::setitem_vector (PyObject* index, const FixedVArray<T>& data)
         boost::python::throw_error_already_set();
     }
 
-    if (_indices)
+    for (size_t i = 0; i < sliceLength; ++i)
     {
-        for (size_t i = 0; i < sliceLength; ++i)
-        {
-            _ptr[raw_ptr_index(start + i*step)*_stride] = data[i];
-        }
+        check_item_size (*this, start + i*step, data, i);
     }
-    else
+
+    for (size_t i = 0; i < sliceLength; ++i)
     {
-        for (size_t i = 0; i < sliceLength; ++i)
-        {
-            _ptr[(start + i*step)*_stride] = data[i];
-        }
+        copy_item (*this, start + i*step, data, i);
     }
 }
 
@@ -447,7 +511,15 @@ FixedVArray<T>::setitem_vector_mask (const FixedArray<int>& mask,
         {
             if (mask[i])
             {
-                _ptr[i*_stride] = data[i];
+                check_item_size (*this, i, data, i);
+            }
+        }
+
+        for (size_t i = 0; i < len; ++i)
+        {
+            if (mask[i])
+            {
+                copy_item (*this, i, data, i);
             }
         }
     }
@@ -468,18 +540,28 @@ FixedVArray<T>::setitem_vector_mask (const FixedArray<int>& mask,
                  "either masked or unmasked");
         }
 
+        for (size_t i = 0, j = 0; i < len; ++i)
+        {
+            if (mask[i])
+            {
+                check_item_size (*this, i, data, j);
+                j++;
+            }
+        }
+
         Py_ssize_t dataIndex = 0;
         for (size_t i = 0; i < len; ++i)
         {
             if (mask[i])
             {
-                _ptr[i*_stride] = data[dataIndex];
+                copy_item (*this, i, data, dataIndex);
                 dataIndex++;
             }
         }
     }
 }
 
+
 // template <class T>
 // FixedVArray<T>
 // FixedVArray<T>::ifelse_scalar(const FixedArray<int>& choice, const T& other)
@@ -495,6 +577,7 @@ FixedVArray<T>::setitem_vector_mask (const FixedArray<int>& mask,
 //     return tmp;
 // }
 
+
 template <class T>
 FixedVArray<T>
 FixedVArray<T>::ifelse_vector(const FixedArray<int>& choice,
@@ -503,15 +586,65 @@ FixedVArray<T>::ifelse_vector(const FixedArray<int>& choice,
     size_t len = match_dimension (choice);
     match_dimension (other);
 
-    FixedVArray<T> tmp(len);
+    std::vector<size_t> lengths (len);
     for (size_t i = 0; i < len; ++i)
     {
-        tmp[i] = choice[i] ? (*this)[i] : other[i];
+        lengths[i] = choice[i] ? size(i) : other.size(i);
+    }
+
+    FixedVArray<T> tmp(0);
+    tmp.allocate (lengths);
+
+    for (size_t i = 0; i < len; ++i)
+    {
+        if (choice[i])
+            copy_item (tmp, i, *this, i);
+        else
+            copy_item (tmp, i, other, i);
     }
 
     return tmp;
 }
 
+template <class T>
+FixedArray<T>
+FixedVArray<T>::elements ()
+{
+    if (_indices || _stride != 1)
+    {
+        throw IEX_NAMESPACE::ArgExc
+            ("The elements of masked or strided variable arrays are not contiguous");
+    }
+
+    return FixedArray<T> (_ptr + _offsets[0], _offsets[_length] - _offsets[0],
+                          1, _handle);
+}
+
+template <class T>
+FixedArray<int>
+FixedVArray<T>::offsets () const
+{
+    if (_indices || _stride != 1)
+    {
+        throw IEX_NAMESPACE::ArgExc
+            ("The elements of masked or strided variable arrays are not contiguous");
+    }
+
+    if (_offsets[_length] - _offsets[0] > size_t (INT_MAX))
+    {
+        throw IEX_NAMESPACE::ArgExc
+            ("Too many elements in the variable array for int offsets");
+    }
+
+    FixedArray<int> result (_length + 1);
+    for (size_t i = 0; i <= _length; ++i)
+    {
+        result[i] = int (_offsets[i] - _offsets[0]);
+    }
+
+    return result;
+}
+
 template <class T>
 size_t
 FixedVArray<T>::raw_ptr_index (size_t i) const
@@ -529,40 +662,30 @@ template <class T>
 boost::python::class_<FixedVArray<T> >
 FixedVArray<T>::register_(const char* doc)
 {
- // // See 'PyImathFixedArray.h' for some explanation.
- // typedef typename boost::mpl::if_<
- //     boost::is_class<T>,
- //     boost::python::return_internal_reference<>,
- //     boost::python::default_call_policies>::type call_policy;
- // typedef typename boost::mpl::if_<
- //     boost::is_class<T>,
- //     boost::python::return_value_policy<boost::python::copy_const_reference>,
- //     boost::python::default_call_policies>::type const_call_policy;
- // 
- // typename FixedVArray<T>::get_type (FixedVArray<T>::*nonconst_getitem)(Py_ssize_t) =
- //     &FixedVArray<T>::getitem;
- // 
- // typename FixedVArray<T>::get_type_const (FixedVArray<T>::*const_getitem)(Py_ssize_t) const =
- //     &FixedVArray<T>::getitem;
-
     boost::python::class_<FixedVArray<T> > c (name(), doc,
         boost::python::init<size_t>("Construct a variable array of the "
-        "specified length initialized to the default value for the given type"));
+        "specified length, its items having no elements"));
 
     c.def(boost::python::init<const FixedVArray<T> &>("Construct a variable array with the same values as the given array"))
-     .def(boost::python::init<const T &, size_t>("Construct a variable array of the specified length initialized to the specified default value"))
+     .def(boost::python::init<const T &, size_t>("Construct a variable array of the specified length, each item holding the specified value"))
+     .def(boost::python::init<const T &, const FixedArray<int> &>("Construct a variable array with items of the specified lengths, their elements initialized to the specified value"))
      .def("__getitem__", &FixedVArray<T>::getslice)
      .def("__getitem__", &FixedVArray<T>::getslice_mask)
+     .def("__getitem__", &FixedVArray<T>::getitem)
      .def("__setitem__", &FixedVArray<T>::setitem_vector)
      .def("__setitem__", &FixedVArray<T>::setitem_vector_mask)
      .def("__len__",     &FixedVArray<T>::len)
      .def("ifelse",      &FixedVArray<T>::ifelse_vector)
+     .def("elements",    &FixedVArray<T>::elements,
+          "elements() -- returns an array referencing the elements of all the items,\n"
+          "item after item, without copying; numpy views it through the buffer protocol")
+     .def("offsets",     &FixedVArray<T>::offsets,
+          "offsets() -- returns an IntArray of len()+1 offsets, item i holding the\n"
+          "elements offsets[i] up to offsets[i+1] of elements()")
      ;
 
   // .def("__setitem__", &FixedVArray<T>::setitem_scalar)
   // .def("__setitem__", &FixedVArray<T>::setitem_scalar_mask)
-  // .def("__getitem__",    const_getitem, const_call_policy())
-  // .def("__getitem__", nonconst_getitem,       call_policy())
   // .def("ifelse",      &FixedVArray<T>::ifelse_scalar)
 
     return c;
@@ -572,5 +695,7 @@ FixedVArray<T>::register_(const char* doc)
 // ---- Explicit Class Instantiation ---------------------------------
 
 template class PYIMATH_EXPORT FixedVArray<int>;
+template class PYIMATH_EXPORT FixedVArray<float>;
+template class PYIMATH_EXPORT FixedVArray<half>;
 
 } // namespace PyImath
@@ -37,6 +37,7 @@
 
 #include <boost/python.hpp>
 #include <boost/any.hpp>
+#include <boost/shared_array.hpp>
 #include <vector>
 #include "PyImathFixedArray.h"
 
@@ -45,13 +46,16 @@ namespace PyImath {
 template <class T>
 class FixedVArray
 {
-    // This class (at least for now) holds a std::vector of 'T' types.
-    // This will give us the 'variable' part of the array.  Generally,
-    // we will initially support only a very small subset of accessor
-    // methods before the semantics are fully defined.  Currently, the
-    // VArray semantics are defined in the 'varraySemantics.txt' file.
-
-    std::vector<T> *  _ptr;
+    // An array of items, each of which is an array of a varying number
+    // of elements.  The elements of all the items are held in one
+    // contiguous pool, item after item; a table of length+1 offsets
+    // gives where each item starts in the pool, and where the last one
+    // ends.  The number of elements of each item is fixed when the
+    // array is made.  Currently, the VArray semantics are defined in
+    // the 'varraySemantics.txt' file.
+
+    T *               _ptr;      // the pool of elements
+    const size_t *    _offsets;  // the offsets of the items in the pool
     size_t            _length;
     size_t            _stride;
 
@@ -59,17 +63,22 @@ class FixedVArray
     // so that everything is freed properly on exit.
     boost::any        _handle;
 
+    // The offsets table, shared by the arrays referencing the same pool
+    boost::shared_array<size_t>  _offsetsHandle;
+
     boost::shared_array<size_t>  _indices;  // non-NULL if we're a masked reference
     size_t                       _unmaskedLength;
 
   public:
     typedef T  BaseType;
 
-    FixedVArray (std::vector<T>* ptr, Py_ssize_t length,
-                 Py_ssize_t stride = 1);
+    // An array over an existing pool: item i has the elements
+    // ptr[offsets[i*stride]] up to ptr[offsets[i*stride+1]].
+    FixedVArray (T* ptr, boost::shared_array<size_t> offsets,
+                 Py_ssize_t length, Py_ssize_t stride = 1);
 
-    FixedVArray (std::vector<T>* ptr, Py_ssize_t length,
-                 Py_ssize_t stride, boost::any handle);
+    FixedVArray (T* ptr, boost::shared_array<size_t> offsets,
+                 Py_ssize_t length, Py_ssize_t stride, boost::any handle);
 
     explicit FixedVArray (Py_ssize_t length);
 
@@ -78,6 +87,8 @@ class FixedVArray
 
     FixedVArray (const T& initialValue, Py_ssize_t length);
 
+    FixedVArray (const T& initialValue, const FixedArray<int>& lengths);
+
     FixedVArray (FixedVArray<T>& f, const FixedArray<int>& mask);
 
  // template <class S>
@@ -99,16 +110,14 @@ class FixedVArray
     bool        isMaskedReference() const { return _indices.get() != 0; }
     size_t      unmaskedLength()    const { return _unmaskedLength; }
 
-    std::vector<T>&        operator [] (size_t i);
-    const std::vector<T>&  operator [] (size_t i) const;
+    // The elements of item i, and how many there are
+    T*          operator [] (size_t i);
+    const T*    operator [] (size_t i) const;
+    size_t      size (size_t i) const;
 
     // ----------------
 
- // typedef typename boost::mpl::if_<boost::is_class<T>,T&,T>::type get_type;
- // get_type        getitem (Py_ssize_t index);
- // 
- // typedef typename boost::mpl::if_<boost::is_class<T>,const T&,T>::type get_type_const;
- // get_type_const  getitem (Py_ssize_t index) const;
+    FixedArray<T>   getitem (Py_ssize_t index);
 
     // ----------------
 
@@ -125,6 +134,13 @@ class FixedVArray
 
     // ----------------
 
+    // The pool of elements of all the items, without copying, and the
+    // offsets of the items in it; not for masked or strided arrays.
+    FixedArray<T>   elements ();
+    FixedArray<int> offsets () const;
+
+    // ----------------
+
     static boost::python::class_<FixedVArray<T> > register_(const char* doc);
 
     // Instantiations of fixed variable arrays must implement this static member.
@@ -200,6 +216,16 @@ class FixedVArray
   protected:
     size_t  raw_ptr_index (size_t i) const;
 
+    // Make the array hold items of the given numbers of elements, in
+    // a new pool
+    void    allocate (const std::vector<size_t>& lengths);
+
+    // The index in the offsets table of item i
+    size_t  raw_index (size_t i) const
+    {
+        return (_indices ? raw_ptr_index(i) : i) * _stride;
+    }
+
 };
 
 } // namespace PyImath
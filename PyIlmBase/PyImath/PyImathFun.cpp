@@ -146,6 +146,14 @@ struct clamp_op
     }
 };
 
+} // namespace
+
+// contiguous float and double arrays use the kernels of PyImathSimd.h
+template <class T> struct simd_op<lerp_op<T> > : public simd_ternary_op<T,SIMD_LERP> {};
+template <class T> struct simd_op<clamp_op<T> > : public simd_ternary_op<T,SIMD_CLAMP> {};
+
+namespace {
+
 template <class T>
 struct cmp_op
 {
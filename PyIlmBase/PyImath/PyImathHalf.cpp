@@ -0,0 +1,283 @@
+///////////////////////////////////////////////////////////////////////////
+//
+// Copyright (c) 2010-2011, Industrial Light & Magic, a division of Lucas
+// Digital Ltd. LLC
+//
+// All rights reserved.
+//
+// Redistribution and use in source and binary forms, with or without
+// modification, are permitted provided that the following conditions are
+// met:
+// *       Redistributions of source code must retain the above copyright
+// notice, this list of conditions and the following disclaimer.
+// *       Redistributions in binary form must reproduce the above
+// copyright notice, this list of conditions and the following disclaimer
+// in the documentation and/or other materials provided with the
+// distribution.
+// *       Neither the name of Industrial Light & Magic nor the names of
+// its contributors may be used to endorse or promote products derived
+// from this software without specific prior written permission.
+//
+// THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+// "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+// LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+// A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+// OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+// SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+// LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+// DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+// THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+// (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+// OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+//
+///////////////////////////////////////////////////////////////////////////
+
+#include "PyIlmBaseConfigInternal.h"
+
+#include "PyImathHalf.h"
+#include <ImathHalfLimits.h>
+#include "PyImathDecorators.h"
+#include "PyImathOperators.h"
+#include "PyImathSimd.h"
+#include "PyImathTask.h"
+
+namespace PyImath {
+template <> PYIMATH_EXPORT const char *HalfArray::name() { return "HalfArray"; }
+template <> PYIMATH_EXPORT const char *V3hArray::name() { return "V3hArray"; }
+template <> PYIMATH_EXPORT const char *C4hArray::name() { return "C4hArray"; }
+template <> PYIMATH_EXPORT const char *VHalfArray::name() { return "VHalfArray"; }
+}
+
+namespace PyImath {
+using namespace boost::python;
+using IMATH_NAMESPACE::Vec3;
+using IMATH_NAMESPACE::C4h;
+
+//
+// The elements of the half arrays and their Python counterparts
+//
+template <class T> struct HalfElement;
+
+template <>
+struct HalfElement<half>
+{
+    typedef float Float;
+    enum { count = 1 };
+};
+
+template <>
+struct HalfElement<Vec3<half> >
+{
+    typedef IMATH_NAMESPACE::V3f Float;
+    enum { count = 3 };
+};
+
+template <>
+struct HalfElement<C4h>
+{
+    typedef IMATH_NAMESPACE::C4f Float;
+    enum { count = 4 };
+};
+
+//
+// Converts half elements to and from their Python counterparts
+//
+template <class T>
+struct HalfConverter
+{
+    typedef typename HalfElement<T>::Float Float;
+
+    static PyObject *convert(const T &v)
+    {
+        return incref(object(Float(v)).ptr());
+    }
+
+    static void *convertible(PyObject *p)
+    {
+        return extract<Float>(p).check() ? p : 0;
+    }
+
+    static void construct(PyObject *p, converter::rvalue_from_python_stage1_data *data)
+    {
+        Float v = extract<Float>(p);
+        void *storage = ((converter::rvalue_from_python_storage<T> *) data)->storage.bytes;
+        new (storage) T(v);
+        data->convertible = storage;
+    }
+
+    static void register_()
+    {
+        to_python_converter<T,HalfConverter<T> >();
+        converter::registry::push_back(&convertible, &construct, type_id<T>());
+    }
+};
+
+//
+// The arrays return elements by value rather than by internal reference,
+// their elements having no Python class
+//
+template <class T>
+static T
+HalfArray_getitem(const FixedArray<T> &a, Py_ssize_t index)
+{
+    return a[a.canonical_index(index)];
+}
+
+template <class T, int index>
+static FixedArray<half>
+HalfArray_get(FixedArray<T> &a)
+{
+    return FixedArray<half>(&a[0][index], a.len(), int(HalfElement<T>::count) * a.stride(), a.handle());
+}
+
+//
+// Conversions between float and half arrays, running the conversion
+// kernels over the contiguous arrays
+//
+static inline void
+convertRun(const float *a, half *r, size_t n)
+{
+    simdHalfKernels().toHalf(a, reinterpret_cast<unsigned short *>(r), n);
+}
+
+static inline void
+convertRun(const half *a, float *r, size_t n)
+{
+    simdHalfKernels().toFloat(reinterpret_cast<const unsigned short *>(a), r, n);
+}
+
+template <class Src, class Dst, class SrcScalar, class DstScalar, int count>
+struct HalfConversionTask : public Task
+{
+    const FixedArray<Src> &src;
+    FixedArray<Dst>       &dst;
+
+    HalfConversionTask(const FixedArray<Src> &srcIn, FixedArray<Dst> &dstIn)
+        : src(srcIn), dst(dstIn) {}
+
+    void execute(size_t start, size_t end)
+    {
+        if (!src.isMaskedReference() && src.stride() == 1)
+        {
+            convertRun(reinterpret_cast<const SrcScalar *>(&src.direct_index(start)),
+                       reinterpret_cast<DstScalar *>(&dst.direct_index(start)),
+                       (end - start) * count);
+        }
+        else
+        {
+            for (size_t i = start; i < end; ++i)
+                dst.direct_index(i) = Dst(src[i]);
+        }
+    }
+};
+
+template <class T>
+static FixedArray<T>
+toHalf(const FixedArray<typename HalfElement<T>::Float> &a)
+{
+    typedef typename HalfElement<T>::Float Float;
+
+    size_t len = a.len();
+    FixedArray<T> result(len, UNINITIALIZED);
+
+    PY_IMATH_LEAVE_PYTHON;
+    HalfConversionTask<Float,T,float,half,HalfElement<T>::count> task(a, result);
+    dispatchTask(task, len);
+    PY_IMATH_RETURN_PYTHON;
+
+    return result;
+}
+
+template <class T>
+static FixedArray<typename HalfElement<T>::Float>
+toFloat(const FixedArray<T> &a)
+{
+    typedef typename HalfElement<T>::Float Float;
+
+    size_t len = a.len();
+    FixedArray<Float> result(len, UNINITIALIZED);
+
+    PY_IMATH_LEAVE_PYTHON;
+    HalfConversionTask<T,Float,half,float,HalfElement<T>::count> task(a, result);
+    dispatchTask(task, len);
+    PY_IMATH_RETURN_PYTHON;
+
+    return result;
+}
+
+template <class T>
+static class_<FixedArray<T> >
+register_HalfArray(const char *doc)
+{
+    class_<FixedArray<T> > c = FixedArray<T>::register_(doc);
+    c
+        .def("__getitem__", &HalfArray_getitem<T>)
+        .def("toFloat", &toFloat<T>,
+             "a.toFloat() -- returns the elements of a converted to float")
+        ;
+
+    add_arithmetic_math_functions(c);
+    add_comparison_functions(c);
+    return c;
+}
+
+void
+register_HalfArrays()
+{
+    HalfConverter<half>::register_();
+    HalfConverter<Vec3<half> >::register_();
+    HalfConverter<C4h>::register_();
+
+    class_<HalfArray> halfArray_class = register_HalfArray<half>("Fixed length array of half");
+    add_ordered_comparison_functions(halfArray_class);
+    add_reduction_functions(halfArray_class);
+    add_bounds_tuple_function(halfArray_class);
+
+    class_<V3hArray> v3hArray_class = register_HalfArray<Vec3<half> >("Fixed length array of IMATH_NAMESPACE::Vec3<half>");
+    v3hArray_class
+        .add_property("x",&HalfArray_get<Vec3<half>,0>)
+        .add_property("y",&HalfArray_get<Vec3<half>,1>)
+        .add_property("z",&HalfArray_get<Vec3<half>,2>)
+        ;
+    add_reduction_functions(v3hArray_class);
+    add_bounds_tuple_function(v3hArray_class);
+    decoratecopy(v3hArray_class);
+
+    class_<C4hArray> c4hArray_class = register_HalfArray<C4h>("Fixed length array of IMATH_NAMESPACE::C4h");
+    c4hArray_class
+        .add_property("r",&HalfArray_get<C4h,0>)
+        .add_property("g",&HalfArray_get<C4h,1>)
+        .add_property("b",&HalfArray_get<C4h,2>)
+        .add_property("a",&HalfArray_get<C4h,3>)
+        ;
+    decoratecopy(c4hArray_class);
+
+    class_<VHalfArray> vhArray_class = VHalfArray::register_("Variable fixed length array of half");
+}
+
+void
+add_half_conversions(class_<FloatArray> &c)
+{
+    c.def("toHalf", &toHalf<half>,
+          "a.toHalf() -- returns the elements of a converted to half, rounded to nearest");
+}
+
+void
+add_half_conversions(class_<FixedArray<IMATH_NAMESPACE::V3f> > &c)
+{
+    c.def("toHalf", &toHalf<Vec3<half> >,
+          "a.toHalf() -- returns the vectors of a converted to half, rounded to nearest");
+}
+
+void
+add_half_conversions(class_<FixedArray<IMATH_NAMESPACE::C4f> > &c)
+{
+    c.def("toHalf", &toHalf<C4h>,
+          "a.toHalf() -- returns the colors of a converted to half, rounded to nearest");
+}
+
+template<> PYIMATH_EXPORT half FixedArrayDefaultValue<half>::value() { return half(0.0f); }
+template<> PYIMATH_EXPORT Vec3<half> FixedArrayDefaultValue<Vec3<half> >::value() { return Vec3<half>(half(0.0f)); }
+template<> PYIMATH_EXPORT C4h FixedArrayDefaultValue<C4h>::value() { return C4h(half(0.0f)); }
+
+} // namespace PyImath
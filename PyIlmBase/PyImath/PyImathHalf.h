@@ -0,0 +1,71 @@
+///////////////////////////////////////////////////////////////////////////
+//
+// Copyright (c) 2010-2011, Industrial Light & Magic, a division of Lucas
+// Digital Ltd. LLC
+//
+// All rights reserved.
+//
+// Redistribution and use in source and binary forms, with or without
+// modification, are permitted provided that the following conditions are
+// met:
+// *       Redistributions of source code must retain the above copyright
+// notice, this list of conditions and the following disclaimer.
+// *       Redistributions in binary form must reproduce the above
+// copyright notice, this list of conditions and the following disclaimer
+// in the documentation and/or other materials provided with the
+// distribution.
+// *       Neither the name of Industrial Light & Magic nor the names of
+// its contributors may be used to endorse or promote products derived
+// from this software without specific prior written permission.
+//
+// THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+// "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+// LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+// A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+// OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+// SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+// LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+// DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+// THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+// (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+// OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+//
+///////////////////////////////////////////////////////////////////////////
+
+#ifndef _PyImathHalf_h_
+#define _PyImathHalf_h_
+
+#include <Python.h>
+#include <boost/python.hpp>
+#include <half.h>
+#include <ImathVec.h>
+#include <ImathColor.h>
+#include "PyImathExport.h"
+#include "PyImath.h"
+
+namespace PyImath {
+
+//
+// Arrays of half and of vectors and colors of half.  Their elements
+// are seen from Python as floats, V3fs and C4fs, there being no Python
+// class for half.
+//
+
+typedef FixedArray<half>                            HalfArray;
+typedef FixedArray<IMATH_NAMESPACE::Vec3<half> >    V3hArray;
+typedef FixedArray<IMATH_NAMESPACE::C4h>            C4hArray;
+typedef FixedVArray<half>                           VHalfArray;
+
+PYIMATH_EXPORT void register_HalfArrays();
+
+//
+// Add toHalf(), the parallel conversion to the matching half array,
+// to the float array types
+//
+PYIMATH_EXPORT void add_half_conversions(boost::python::class_<FloatArray> &c);
+PYIMATH_EXPORT void add_half_conversions(boost::python::class_<FixedArray<IMATH_NAMESPACE::V3f> > &c);
+PYIMATH_EXPORT void add_half_conversions(boost::python::class_<FixedArray<IMATH_NAMESPACE::C4f> > &c);
+
+}
+
+#endif // _PyImathHalf_h_
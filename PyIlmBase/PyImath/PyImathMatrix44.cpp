@@ -53,6 +53,7 @@
 #include <ImathMatrixAlgo.h>
 #include <Iex.h>
 #include "PyImathTask.h"
+#include "PyImathSimd.h"
 
 namespace PyImath {
 template<> const char PYIMATH_EXPORT *PyImath::M44fArray::name() { return "M44fArray"; }
@@ -369,6 +370,25 @@ struct op_multVecMatrix {
     }
 };
 
+// float vectors and matrices use the transform kernels of PyImathSimd.h
+template <SimdVecKernels::Transform SimdVecKernels::*Kernel>
+struct simd_matrix_vec_op : public simd_op<void>
+{
+    using simd_op<void>::apply;
+
+    static bool apply(FixedArray<IMATH_NAMESPACE::V3f> &dst, const IMATH_NAMESPACE::M44f &m,
+                      const FixedArray<IMATH_NAMESPACE::V3f> &src, size_t start, size_t end)
+    {
+        if (src.isMaskedReference() || src.stride() != 1 || dst.stride() != 1)
+            return false;
+        (simdVecKernels().*Kernel)(m.getValue(), &src.direct_index(start).x, &dst.direct_index(start).x, end - start);
+        return true;
+    }
+};
+
+template <> struct simd_op<op_multVecMatrix<float,float> > : public simd_matrix_vec_op<&SimdVecKernels::multVecMatrix3> {};
+template <> struct simd_op<op_multDirMatrix<float,float> > : public simd_matrix_vec_op<&SimdVecKernels::multDirMatrix3> {};
+
 template <class T1,class T2, class Op>
 struct MatrixVecTask : public Task
 {
@@ -381,21 +401,46 @@ struct MatrixVecTask : public Task
 
     void execute(size_t start, size_t end)
     {
+        if (simd_op<Op>::apply(dst,mat,src,start,end))
+            return;
+
         for(size_t p = start; p < end; ++p) 
             Op::apply(mat,src[p],dst[p]);
     }
 };
 
+//
+// Transforms each vector by the matrix at the same index, for
+// instanced geometry
+//
+template <class T1,class T2, class Op>
+struct MatrixArrayVecTask : public Task
+{
+    const FixedArray<Matrix44<T2> > &mat;
+    const FixedArray<Vec3<T1> >& src;
+    FixedArray<Vec3<T1> >& dst;
+
+    MatrixArrayVecTask(const FixedArray<Matrix44<T2> > &m, const FixedArray<Vec3<T1> >& s, FixedArray<Vec3<T1> >& d)
+        : mat(m), src(s), dst(d) {}
+
+    void execute(size_t start, size_t end)
+    {
+        for(size_t p = start; p < end; ++p) 
+            Op::apply(mat[p],src[p],dst[p]);
+    }
+};
+
 template <class TV,class TM>
 static FixedArray<Vec3<TV> >
 multDirMatrix44_array(Matrix44<TM> &mat, const FixedArray<Vec3<TV> >&src)
 {
-    MATH_EXC_ON;
     size_t len = src.len();
-    FixedArray<Vec3<TV> > dst(len);
+    FixedArray<Vec3<TV> > dst(len, UNINITIALIZED);
 
+    PY_IMATH_LEAVE_PYTHON;
     MatrixVecTask<TV,TM,op_multDirMatrix<TV,TM> > task(mat,src,dst);
     dispatchTask(task,len);
+    PY_IMATH_RETURN_PYTHON;
 
     return dst;
 }
@@ -423,12 +468,13 @@ template <class TV,class TM>
 static FixedArray<Vec3<TV> >
 multVecMatrix44_array(Matrix44<TM> &mat, const FixedArray<Vec3<TV> >&src)
 {
-    MATH_EXC_ON;
     size_t len = src.len();
-    FixedArray<Vec3<TV> > dst(len);
+    FixedArray<Vec3<TV> > dst(len, UNINITIALIZED);
 
+    PY_IMATH_LEAVE_PYTHON;
     MatrixVecTask<TV,TM,op_multVecMatrix<TV,TM> > task(mat,src,dst);
     dispatchTask(task,len);
+    PY_IMATH_RETURN_PYTHON;
 
     return dst;
 }
@@ -1188,6 +1234,21 @@ setM44ArrayItem(FixedArray<IMATH_NAMESPACE::Matrix44<T> > &ma,
     ma[ma.canonical_index(index)] = m;
 }
 
+template <class TV,class TM,class Op>
+static FixedArray<Vec3<TV> >
+multMatrix44Array(const FixedArray<Matrix44<TM> > &mat, const FixedArray<Vec3<TV> > &src)
+{
+    size_t len = mat.match_dimension(src);
+    FixedArray<Vec3<TV> > dst(len, UNINITIALIZED);
+
+    PY_IMATH_LEAVE_PYTHON;
+    MatrixArrayVecTask<TV,TM,Op> task(mat,src,dst);
+    dispatchTask(task,len);
+    PY_IMATH_RETURN_PYTHON;
+
+    return dst;
+}
+
 template <class T>
 class_<FixedArray<IMATH_NAMESPACE::Matrix44<T> > >
 register_M44Array()
@@ -1195,6 +1256,10 @@ register_M44Array()
     class_<FixedArray<IMATH_NAMESPACE::Matrix44<T> > > matrixArray_class = FixedArray<IMATH_NAMESPACE::Matrix44<T> >::register_("Fixed length array of IMATH_NAMESPACE::Matrix44");
     matrixArray_class
          .def("__setitem__", &setM44ArrayItem<T>)
+         .def("multDirMatrix", &multMatrix44Array<T,T,op_multDirMatrix<T,T> >, args("src"),
+              "multDirMatrix(src) - transform each direction of src by the matrix at the same index")
+         .def("multVecMatrix", &multMatrix44Array<T,T,op_multVecMatrix<T,T> >, args("src"),
+              "multVecMatrix(src) - transform each point of src by the matrix at the same index")
         ;
     return matrixArray_class;
 }
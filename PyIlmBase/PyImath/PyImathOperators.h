@@ -37,6 +37,7 @@
 
 #include "PyImathFixedArray.h"
 #include "PyImathAutovectorize.h"
+#include "PyImathReduce.h"
 
 namespace PyImath {
 
@@ -140,6 +141,18 @@ struct op_idiv {
     static inline void apply(T1 &a, const T2 &b) { a /= b; }
 };
 
+// contiguous float and double arrays, and the vector arrays made of
+// them, use the kernels of PyImathSimd.h
+template <class T1, class T2, class Ret> struct simd_op<op_add<T1,T2,Ret> > : public simd_binary_op<Ret,SIMD_ADD> {};
+template <class T1, class T2, class Ret> struct simd_op<op_sub<T1,T2,Ret> > : public simd_binary_op<Ret,SIMD_SUB> {};
+template <class T1, class T2, class Ret> struct simd_op<op_rsub<T1,T2,Ret> > : public simd_binary_op<Ret,SIMD_SUB,true> {};
+template <class T1, class T2, class Ret> struct simd_op<op_mul<T1,T2,Ret> > : public simd_binary_op<Ret,SIMD_MUL> {};
+template <class T1, class T2, class Ret> struct simd_op<op_div<T1,T2,Ret> > : public simd_binary_op<Ret,SIMD_DIV> {};
+template <class T1, class T2> struct simd_op<op_iadd<T1,T2> > : public simd_binary_op<T1,SIMD_ADD> {};
+template <class T1, class T2> struct simd_op<op_isub<T1,T2> > : public simd_binary_op<T1,SIMD_SUB> {};
+template <class T1, class T2> struct simd_op<op_imul<T1,T2> > : public simd_binary_op<T1,SIMD_MUL> {};
+template <class T1, class T2> struct simd_op<op_idiv<T1,T2> > : public simd_binary_op<T1,SIMD_DIV> {};
+
 template <class T1, class T2=T1>
 struct op_imod {
     static inline void apply(T1 &a, const T2 &b) { a %= b; }
@@ -215,30 +228,6 @@ static T fa_reduce(const FixedArray<T> &a) {
     return tmp;
 }
 
-template <class T>
-static T fa_min(const FixedArray<T> &a) {
-    T tmp(T(0));
-    size_t len = a.len();
-    if (len > 0)
-        tmp = a[0];
-    for (size_t i=1; i < len; ++i)
-        if (a[i] < tmp)
-            tmp = a[i];
-    return tmp;
-}
-
-template <class T>
-static T fa_max(const FixedArray<T> &a) {
-    T tmp(T(0));
-    size_t len = a.len();
-    if (len > 0)
-        tmp = a[0];
-    for (size_t i=1; i < len; ++i)
-        if (a[i] > tmp)
-            tmp = a[i];
-    return tmp;
-}
-
 template <class T>
 static void add_arithmetic_math_functions(boost::python::class_<FixedArray<T> > &c) {
     using boost::mpl::true_;
@@ -261,12 +250,6 @@ static void add_arithmetic_math_functions(boost::python::class_<FixedArray<T> >
     c.def("reduce",&fa_reduce<T>);
 }
 
-template <class T>
-static void add_reduction_functions(boost::python::class_<FixedArray<T> > &c) {
-    c.def("min",&fa_min<T>);
-    c.def("max",&fa_max<T>);
-}
-
 template <class T>
 static void add_pow_math_functions(boost::python::class_<FixedArray<T> > &c) {
     using boost::mpl::true_;
@@ -186,6 +186,14 @@ toMatrix44 (Quat<T> &quat)
     return quat.toMatrix44();
 }
 
+template <class T>
+static Vec3<T>
+rotateVector (Quat<T> &quat, const Vec3<T> &v)
+{
+    MATH_EXC_ON;
+    return quat.rotateVector(v);
+}
+
 template <class T>
 static Quat<T> 
 log(Quat<T> &quat)
@@ -485,6 +493,10 @@ register_Quat()
         	 "q.toMatrix44() -- returns a 4x4 matrix that\n"
 			 "represents the same rotation as quaternion q")
              
+        .def("rotateVector",&rotateVector<T>,
+        	 "q.rotateVector(v) -- returns vector v rotated\n"
+			 "by quaternion q")
+             
         .def("log",&log<T>)
         .def("exp",&exp<T>)
         .def_readwrite("v",&Quat<T>::v)                       
@@ -912,6 +924,46 @@ QuatArray_quatConstructor1(const FixedArray<IMATH_NAMESPACE::Euler<T> > &e)
     return result;
 }
 
+template <class T>
+struct op_quatSlerp {
+    static inline Quat<T> apply(const Quat<T> &q, const Quat<T> &other, T t) { return IMATH_NAMESPACE::slerp(q, other, t); }
+};
+
+template <class T>
+struct op_quatNormalize {
+    static inline void apply(Quat<T> &q) { q.normalize(); }
+};
+
+template <class T>
+struct op_quatNormalized {
+    static inline Quat<T> apply(const Quat<T> &q) { return q.normalized(); }
+};
+
+template <class T>
+struct op_quatInvert {
+    static inline void apply(Quat<T> &q) { q.invert(); }
+};
+
+template <class T>
+struct op_quatInverse {
+    static inline Quat<T> apply(const Quat<T> &q) { return q.inverse(); }
+};
+
+template <class T>
+struct op_quatToMatrix33 {
+    static inline Matrix33<T> apply(const Quat<T> &q) { return q.toMatrix33(); }
+};
+
+template <class T>
+struct op_quatToMatrix44 {
+    static inline Matrix44<T> apply(const Quat<T> &q) { return q.toMatrix44(); }
+};
+
+template <class T>
+struct op_quatRotateVector {
+    static inline Vec3<T> apply(const Quat<T> &q, const Vec3<T> &v) { return q.rotateVector(v); }
+};
+
 template <class T>
 class_<FixedArray<IMATH_NAMESPACE::Quat<T> > >
 register_QuatArray()
@@ -948,6 +1000,24 @@ register_QuatArray()
         ;
 
     add_comparison_functions(quatArray_class);
+
+    using boost::mpl::true_;
+    generate_member_bindings<op_quatSlerp<T>,true_,true_>(quatArray_class,"slerp",
+        "q.slerp(p,t) -- performs spherical linear interpolation between the\n"
+        "quaternions of q and p, p and t being arrays or single values.\n"
+        "The quaternions must be normalized",
+        args("p","t"));
+    generate_member_bindings<op_quatNormalize<T> >(quatArray_class,"normalize","q.normalize() -- normalizes the quaternions of q in place");
+    generate_member_bindings<op_quatNormalized<T> >(quatArray_class,"normalized","q.normalized() -- returns the normalized quaternions of q");
+    generate_member_bindings<op_quatInvert<T> >(quatArray_class,"invert","q.invert() -- inverts the quaternions of q in place");
+    generate_member_bindings<op_quatInverse<T> >(quatArray_class,"inverse","q.inverse() -- returns the inverses of the quaternions of q");
+    generate_member_bindings<op_quatToMatrix33<T> >(quatArray_class,"toMatrix33","q.toMatrix33() -- returns the rotations of q as 3x3 matrices");
+    generate_member_bindings<op_quatToMatrix44<T> >(quatArray_class,"toMatrix44","q.toMatrix44() -- returns the rotations of q as 4x4 matrices");
+    generate_member_bindings<op_quatRotateVector<T>,true_>(quatArray_class,"rotateVector",
+        "q.rotateVector(v) -- rotates v, an array or a single vector, by the\n"
+        "quaternions of q",
+        args("v"));
+
     decoratecopy(quatArray_class);
 
     return quatArray_class;
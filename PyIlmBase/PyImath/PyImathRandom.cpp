@@ -43,6 +43,8 @@
 #include "PyImath.h"
 #include "PyImathMathExc.h"
 #include "PyImathFixedArray.h"
+#include "PyImathTask.h"
+#include <stdint.h>
 
 
 namespace PyImath{
@@ -144,6 +146,280 @@ solidSphereRand(Rand &rand, int num)
     return retval;
 }
 
+//
+// Bulk generation.  Element i of an array gets its own counter based
+// generator, seeded from a key drawn from the Rand object and from i,
+// so the elements can be generated in parallel and the arrays only
+// depend on the state of the Rand object, not on the number of threads.
+// Each array advances the Rand object by two draws.
+//
+
+template <class Rand> struct RandArrayTraits;
+
+template <>
+struct RandArrayTraits<IMATH_NAMESPACE::Rand32>
+{
+    typedef float        Float;
+    typedef unsigned int Int;
+
+    static Int toInt (uint64_t x) { return Int (x >> 32); }
+};
+
+template <>
+struct RandArrayTraits<IMATH_NAMESPACE::Rand48>
+{
+    typedef double Float;
+    typedef int    Int;
+
+    static Int toInt (uint64_t x) { return Int (x >> 33); }   // like nrand48
+};
+
+template <class Rand>
+class CounterRand
+{
+  public:
+
+    typedef typename RandArrayTraits<Rand>::Float Float;
+    typedef typename RandArrayTraits<Rand>::Int   Int;
+
+    CounterRand (uint64_t key, uint64_t counter)
+        : _state (mix (key + counter * WEYL)) {}
+
+    Int   nexti () { return RandArrayTraits<Rand>::toInt (next()); }
+    bool  nextb () { return (next() >> 63) != 0; }
+    Float nextf () { return toFloat (next(), (Float *) 0); }
+
+    Float nextf (Float rangeMin, Float rangeMax)
+    {
+        Float f = nextf();
+        return rangeMin * (1 - f) + rangeMax * f;
+    }
+
+    static uint64_t mix (uint64_t z)
+    {
+        // splitmix64 finalizer
+        z = (z ^ (z >> 30)) * 0xbf58476d1ce4e5b9ULL;
+        z = (z ^ (z >> 27)) * 0x94d049bb133111ebULL;
+        return z ^ (z >> 31);
+    }
+
+  private:
+
+    static const uint64_t WEYL = 0x9e3779b97f4a7c15ULL;
+
+    uint64_t next ()
+    {
+        _state += WEYL;
+        return mix (_state);
+    }
+
+    static float toFloat (uint64_t x, float *) { return float (x >> 40) * (1.0f / 16777216.0f); }
+    static double toFloat (uint64_t x, double *) { return double (x >> 11) * (1.0 / 9007199254740992.0); }
+
+    uint64_t _state;
+};
+
+template <class Rand>
+struct RandUniform
+{
+    typedef typename RandArrayTraits<Rand>::Float Float;
+
+    Float rangeMin, rangeMax;
+
+    RandUniform (Float min, Float max) : rangeMin (min), rangeMax (max) {}
+    Float operator () (CounterRand<Rand> &r) const { return r.nextf (rangeMin, rangeMax); }
+};
+
+template <class Rand>
+struct RandInt
+{
+    typename RandArrayTraits<Rand>::Int operator () (CounterRand<Rand> &r) const { return r.nexti(); }
+};
+
+template <class Rand>
+struct RandBool
+{
+    bool operator () (CounterRand<Rand> &r) const { return r.nextb(); }
+};
+
+template <class Rand>
+struct RandGauss
+{
+    float operator () (CounterRand<Rand> &r) const { return IMATH_NAMESPACE::gaussRand (r); }
+};
+
+template <class Vec, class Rand>
+struct RandGaussSphere
+{
+    Vec operator () (CounterRand<Rand> &r) const { return IMATH_NAMESPACE::gaussSphereRand<Vec> (r); }
+};
+
+template <class Vec, class Rand>
+struct RandHollowSphere
+{
+    Vec operator () (CounterRand<Rand> &r) const { return IMATH_NAMESPACE::hollowSphereRand<Vec> (r); }
+};
+
+template <class Vec, class Rand>
+struct RandSolidSphere
+{
+    Vec operator () (CounterRand<Rand> &r) const { return IMATH_NAMESPACE::solidSphereRand<Vec> (r); }
+};
+
+template <class Rand, class T, class Gen>
+struct RandArrayTask : public Task
+{
+    uint64_t         key;
+    const Gen &      gen;
+    FixedArray<T> &  result;
+
+    RandArrayTask (uint64_t keyIn, const Gen &genIn, FixedArray<T> &resultIn)
+        : key (keyIn), gen (genIn), result (resultIn) {}
+
+    void execute (size_t start, size_t end)
+    {
+        for (size_t i = start; i < end; ++i)
+        {
+            CounterRand<Rand> r (key, i);
+            result.direct_index (i) = gen (r);
+        }
+    }
+};
+
+template <class T, class Rand, class Gen>
+static FixedArray<T>
+randArray (Rand &rand, Py_ssize_t num, const Gen &gen)
+{
+    FixedArray<T> result (num, UNINITIALIZED);
+
+    uint64_t key = (uint64_t (rand.nexti()) << 32) ^ uint64_t (rand.nexti());
+    key = CounterRand<Rand>::mix (key);
+
+    {
+        PY_IMATH_LEAVE_PYTHON;
+        RandArrayTask<Rand,T,Gen> task (key, gen, result);
+        dispatchTask (task, num);
+        PY_IMATH_RETURN_PYTHON;
+    }
+
+    return result;
+}
+
+template <class Rand>
+static FixedArray<typename RandArrayTraits<Rand>::Float>
+nextfArray (Rand &rand, Py_ssize_t num)
+{
+    typedef typename RandArrayTraits<Rand>::Float Float;
+    return randArray<Float> (rand, num, RandUniform<Rand> (0, 1));
+}
+
+template <class Rand>
+static FixedArray<typename RandArrayTraits<Rand>::Float>
+nextfArray2 (Rand &rand, Py_ssize_t num,
+             typename RandArrayTraits<Rand>::Float min,
+             typename RandArrayTraits<Rand>::Float max)
+{
+    typedef typename RandArrayTraits<Rand>::Float Float;
+    return randArray<Float> (rand, num, RandUniform<Rand> (min, max));
+}
+
+template <class Rand>
+static FixedArray<typename RandArrayTraits<Rand>::Int>
+nextiArray (Rand &rand, Py_ssize_t num)
+{
+    return randArray<typename RandArrayTraits<Rand>::Int> (rand, num, RandInt<Rand>());
+}
+
+template <class Rand>
+static FixedArray<bool>
+nextbArray (Rand &rand, Py_ssize_t num)
+{
+    return randArray<bool> (rand, num, RandBool<Rand>());
+}
+
+template <class Rand>
+static FixedArray<float>
+nextGaussArray (Rand &rand, Py_ssize_t num)
+{
+    return randArray<float> (rand, num, RandGauss<Rand>());
+}
+
+template <class Vec, class Rand>
+static FixedArray<Vec>
+nextGaussSphereArray (Rand &rand, Py_ssize_t num, const Vec &)
+{
+    return randArray<Vec> (rand, num, RandGaussSphere<Vec,Rand>());
+}
+
+template <class Vec, class Rand>
+static FixedArray<Vec>
+nextHollowSphereArray (Rand &rand, Py_ssize_t num, const Vec &)
+{
+    return randArray<Vec> (rand, num, RandHollowSphere<Vec,Rand>());
+}
+
+template <class Vec, class Rand>
+static FixedArray<Vec>
+nextSolidSphereArray (Rand &rand, Py_ssize_t num, const Vec &)
+{
+    return randArray<Vec> (rand, num, RandSolidSphere<Vec,Rand>());
+}
+
+template <class Rand>
+static void
+add_array_generators (class_<Rand> &rand_class)
+{
+    using IMATH_NAMESPACE::V2f;
+    using IMATH_NAMESPACE::V2d;
+    using IMATH_NAMESPACE::V3f;
+    using IMATH_NAMESPACE::V3d;
+
+    rand_class
+        .def("nextfArray", &nextfArray<Rand>,
+             "r.nextfArray(n) -- return an array of n values "
+             "uniformly distributed in [0,1)\n"
+             "r.nextfArray(n, min, max) -- return an array of n values "
+             "uniformly distributed in [min,max)\n"
+             "The arrays are generated in parallel, and their values "
+             "differ from those of successive calls to nextf()",
+             args("n"))
+        .def("nextfArray", &nextfArray2<Rand>, args("n","min","max"))
+        .def("nextiArray", &nextiArray<Rand>,
+             "r.nextiArray(n) -- return an array of n uniformly "
+             "distributed integers",
+             args("n"))
+        .def("nextbArray", &nextbArray<Rand>,
+             "r.nextbArray(n) -- return an array of n uniformly "
+             "distributed booleans",
+             args("n"))
+        .def("nextGaussArray", &nextGaussArray<Rand>,
+             "r.nextGaussArray(n) -- return an array of n normally "
+             "(Gaussian) distributed values",
+             args("n"))
+        .def("nextGaussSphereArray", &nextGaussSphereArray<V3f,Rand>,
+             "r.nextGaussSphereArray(n, v) -- return an array of n "
+             "points as returned by nextGaussSphere(v)",
+             args("n","v"))
+        .def("nextGaussSphereArray", &nextGaussSphereArray<V3d,Rand>, args("n","v"))
+        .def("nextGaussSphereArray", &nextGaussSphereArray<V2f,Rand>, args("n","v"))
+        .def("nextGaussSphereArray", &nextGaussSphereArray<V2d,Rand>, args("n","v"))
+        .def("nextHollowSphereArray", &nextHollowSphereArray<V3f,Rand>,
+             "r.nextHollowSphereArray(n, v) -- return an array of n "
+             "points as returned by nextHollowSphere(v)",
+             args("n","v"))
+        .def("nextHollowSphereArray", &nextHollowSphereArray<V3d,Rand>, args("n","v"))
+        .def("nextHollowSphereArray", &nextHollowSphereArray<V2f,Rand>, args("n","v"))
+        .def("nextHollowSphereArray", &nextHollowSphereArray<V2d,Rand>, args("n","v"))
+        .def("nextSolidSphereArray", &nextSolidSphereArray<V3f,Rand>,
+             "r.nextSolidSphereArray(n, v) -- return an array of n "
+             "points as returned by nextSolidSphere(v)",
+             args("n","v"))
+        .def("nextSolidSphereArray", &nextSolidSphereArray<V3d,Rand>, args("n","v"))
+        .def("nextSolidSphereArray", &nextSolidSphereArray<V2f,Rand>, args("n","v"))
+        .def("nextSolidSphereArray", &nextSolidSphereArray<V2d,Rand>, args("n","v"))
+        ;
+}
+
 PYIMATH_EXPORT
 class_<IMATH_NAMESPACE::Rand32>
 register_Rand32()
@@ -238,6 +514,7 @@ register_Rand32()
         "distributed through the volume of a sphere generated from the given Rand32 object",
         args("randObj","num"));
 
+    add_array_generators(rand32_class);
     decoratecopy(rand32_class);
 
     return rand32_class;
@@ -330,6 +607,7 @@ register_Rand48()
         .def("nextSolidSphere", nextSolidSphere4) 
         ;
 
+    add_array_generators(rand48_class);
     decoratecopy(rand48_class);
 
     return rand48_class;
@@ -0,0 +1,502 @@
+///////////////////////////////////////////////////////////////////////////
+//
+// Copyright (c) 2010-2011, Industrial Light & Magic, a division of Lucas
+// Digital Ltd. LLC
+//
+// All rights reserved.
+//
+// Redistribution and use in source and binary forms, with or without
+// modification, are permitted provided that the following conditions are
+// met:
+// *       Redistributions of source code must retain the above copyright
+// notice, this list of conditions and the following disclaimer.
+// *       Redistributions in binary form must reproduce the above
+// copyright notice, this list of conditions and the following disclaimer
+// in the documentation and/or other materials provided with the
+// distribution.
+// *       Neither the name of Industrial Light & Magic nor the names of
+// its contributors may be used to endorse or promote products derived
+// from this software without specific prior written permission.
+//
+// THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+// "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+// LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+// A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+// OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+// SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+// LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+// DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+// THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+// (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+// OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+//
+///////////////////////////////////////////////////////////////////////////
+
+#ifndef _PyImathReduce_h_
+#define _PyImathReduce_h_
+
+#include <Python.h>
+#include <boost/python.hpp>
+#include <ImathVec.h>
+#include <ImathBox.h>
+#include <ImathLimits.h>
+#include <IexBaseExc.h>
+#include <algorithm>
+#include <vector>
+#include "PyImathFixedArray.h"
+#include "PyImathTask.h"
+
+namespace PyImath {
+
+//
+// Parallel reductions over FixedArrays.
+//
+// A reduction is described by a Reducer, which folds the elements of a
+// block of the array into a partial result and combines the partial
+// results of two consecutive blocks.  The blocks have a fixed size and
+// their partials are combined in order, so the result doesn't depend on
+// the number of threads.  Vector arrays are reduced component by
+// component.
+//
+
+static const size_t REDUCE_BLOCK_SIZE = 16384;
+
+//
+// Access to the components of scalars and vectors
+//
+template <class T>
+struct ReduceComponents
+{
+    typedef T Base;
+    enum { count = 1 };
+    static const Base &get(const T &v, int) { return v; }
+    static Base &get(T &v, int) { return v; }
+};
+
+template <class T>
+struct ReduceComponents<IMATH_NAMESPACE::Vec2<T> >
+{
+    typedef T Base;
+    enum { count = 2 };
+    static const Base &get(const IMATH_NAMESPACE::Vec2<T> &v, int i) { return v[i]; }
+    static Base &get(IMATH_NAMESPACE::Vec2<T> &v, int i) { return v[i]; }
+};
+
+template <class T>
+struct ReduceComponents<IMATH_NAMESPACE::Vec3<T> >
+{
+    typedef T Base;
+    enum { count = 3 };
+    static const Base &get(const IMATH_NAMESPACE::Vec3<T> &v, int i) { return v[i]; }
+    static Base &get(IMATH_NAMESPACE::Vec3<T> &v, int i) { return v[i]; }
+};
+
+template <class T>
+struct ReduceComponents<IMATH_NAMESPACE::Vec4<T> >
+{
+    typedef T Base;
+    enum { count = 4 };
+    static const Base &get(const IMATH_NAMESPACE::Vec4<T> &v, int i) { return v[i]; }
+    static Base &get(IMATH_NAMESPACE::Vec4<T> &v, int i) { return v[i]; }
+};
+
+//
+// The type sums are accumulated in: double for floating point
+// components, and the widest integer of the same signedness for
+// integer components
+//
+template <class T> struct ReduceAccumulator { typedef double type; };
+template <> struct ReduceAccumulator<signed char> { typedef long long type; };
+template <> struct ReduceAccumulator<short> { typedef long long type; };
+template <> struct ReduceAccumulator<int> { typedef long long type; };
+template <> struct ReduceAccumulator<unsigned char> { typedef unsigned long long type; };
+template <> struct ReduceAccumulator<unsigned short> { typedef unsigned long long type; };
+template <> struct ReduceAccumulator<unsigned int> { typedef unsigned long long type; };
+
+//
+// The result of sum() and mean(): the accumulator for scalar arrays,
+// and the element type, or its double precision version for the mean
+// of integer vectors, for vector arrays
+//
+template <class T>
+struct ReduceResult
+{
+    typedef typename ReduceAccumulator<T>::type Sum;
+    typedef double Mean;
+};
+
+template <template <class> class V, class T>
+struct ReduceVecResult
+{
+    typedef V<T> Sum;
+    typedef V<T> Mean;
+};
+
+template <template <class> class V> struct ReduceVecResult<V,signed char> { typedef V<signed char> Sum; typedef V<double> Mean; };
+template <template <class> class V> struct ReduceVecResult<V,short> { typedef V<short> Sum; typedef V<double> Mean; };
+template <template <class> class V> struct ReduceVecResult<V,int> { typedef V<int> Sum; typedef V<double> Mean; };
+template <template <class> class V> struct ReduceVecResult<V,unsigned char> { typedef V<unsigned char> Sum; typedef V<double> Mean; };
+
+template <class T> struct ReduceResult<IMATH_NAMESPACE::Vec2<T> > : public ReduceVecResult<IMATH_NAMESPACE::Vec2,T> {};
+template <class T> struct ReduceResult<IMATH_NAMESPACE::Vec3<T> > : public ReduceVecResult<IMATH_NAMESPACE::Vec3,T> {};
+template <class T> struct ReduceResult<IMATH_NAMESPACE::Vec4<T> > : public ReduceVecResult<IMATH_NAMESPACE::Vec4,T> {};
+
+template <class Reducer>
+struct ReduceTask : public Task
+{
+    typedef typename Reducer::Value   Value;
+    typedef typename Reducer::Partial Partial;
+
+    const FixedArray<Value> &array;
+    std::vector<Partial> &partials;
+
+    ReduceTask(const FixedArray<Value> &a, std::vector<Partial> &p)
+        : array(a), partials(p) {}
+
+    void execute(size_t start, size_t end)
+    {
+        size_t len = array.len();
+        bool masked = array.isMaskedReference();
+
+        for (size_t b = start; b < end; ++b)
+        {
+            size_t first = b * REDUCE_BLOCK_SIZE;
+            size_t last = std::min(len, first + REDUCE_BLOCK_SIZE);
+            Partial &p = partials[b];
+
+            if (masked)
+            {
+                for (size_t i = first; i < last; ++i)
+                    Reducer::add(p, array[i], i);
+            }
+            else
+            {
+                for (size_t i = first; i < last; ++i)
+                    Reducer::add(p, array.direct_index(i), i);
+            }
+        }
+    }
+};
+
+//
+// Reduce the array, releasing the GIL
+//
+template <class Reducer>
+typename Reducer::Partial
+reduce(const FixedArray<typename Reducer::Value> &a)
+{
+    typedef typename Reducer::Partial Partial;
+
+    size_t blocks = (a.len() + REDUCE_BLOCK_SIZE - 1) / REDUCE_BLOCK_SIZE;
+    std::vector<Partial> partials(blocks);
+
+    {
+        PY_IMATH_LEAVE_PYTHON;
+        ReduceTask<Reducer> task(a, partials);
+        dispatchTask(task, blocks);
+        PY_IMATH_RETURN_PYTHON;
+    }
+
+    Partial result;
+    for (size_t b = 0; b < blocks; ++b)
+        Reducer::combine(result, partials[b]);
+    return result;
+}
+
+template <class T>
+struct SumReducer
+{
+    typedef T Value;
+    typedef ReduceComponents<T> C;
+    typedef typename ReduceAccumulator<typename C::Base>::type Accumulator;
+
+    struct Partial
+    {
+        Partial() { std::fill(sum, sum + C::count, Accumulator(0)); }
+        Accumulator sum[C::count];
+    };
+
+    static void add(Partial &p, const T &v, size_t)
+    {
+        for (int c = 0; c < C::count; ++c)
+            p.sum[c] += C::get(v, c);
+    }
+
+    static void combine(Partial &p, const Partial &q)
+    {
+        for (int c = 0; c < C::count; ++c)
+            p.sum[c] += q.sum[c];
+    }
+};
+
+//
+// The first smallest (or largest, if Max is true) value and its index,
+// with the comparisons of the sequential loop: NaNs are skipped unless
+// they come first.  A partial keeps its first element, which is the
+// result if it is a NaN and the partial is that of the first block,
+// and otherwise the extremum of the elements that follow a NaN it was
+// seeded with, so that a NaN at the start of a later block is skipped.
+//
+template <class T, bool Max>
+struct ExtremumReducer
+{
+    typedef T Value;
+    typedef ReduceComponents<T> C;
+    typedef typename C::Base Base;
+
+    struct Partial
+    {
+        Partial() : valid(false), start(0) {}
+        bool   valid;
+        size_t start;
+        Base   first[C::count];
+        Base   value[C::count];
+        size_t index[C::count];
+    };
+
+    static bool better(const Base &a, const Base &b) { return Max ? a > b : a < b; }
+    static bool isNaN(const Base &a) { return !(a == a); }
+
+    static void add(Partial &p, const T &v, size_t i)
+    {
+        if (!p.valid)
+        {
+            for (int c = 0; c < C::count; ++c)
+            {
+                p.first[c] = C::get(v, c);
+                p.value[c] = C::get(v, c);
+                p.index[c] = i;
+            }
+            p.start = i;
+            p.valid = true;
+            return;
+        }
+
+        for (int c = 0; c < C::count; ++c)
+        {
+            if (isNaN(p.value[c]) || better(C::get(v, c), p.value[c]))
+            {
+                p.value[c] = C::get(v, c);
+                p.index[c] = i;
+            }
+        }
+    }
+
+    static void combine(Partial &p, const Partial &q)
+    {
+        if (!q.valid)
+            return;
+
+        if (!p.valid)
+        {
+            p = q;
+            return;
+        }
+
+        for (int c = 0; c < C::count; ++c)
+        {
+            if (isNaN(p.value[c]) || better(q.value[c], p.value[c]))
+            {
+                p.value[c] = q.value[c];
+                p.index[c] = q.index[c];
+            }
+        }
+    }
+
+    static const Base &result(const Partial &p, int c, size_t &index)
+    {
+        if (isNaN(p.first[c]))
+        {
+            index = p.start;
+            return p.first[c];
+        }
+
+        index = p.index[c];
+        return p.value[c];
+    }
+};
+
+//
+// The smallest and largest values, starting from an empty range like
+// Box::extendBy()
+//
+template <class T>
+struct BoundsReducer
+{
+    typedef T Value;
+    typedef ReduceComponents<T> C;
+    typedef typename C::Base Base;
+
+    struct Partial
+    {
+        Partial()
+        {
+            std::fill(lo, lo + C::count, IMATH_NAMESPACE::limits<Base>::max());
+            std::fill(hi, hi + C::count, IMATH_NAMESPACE::limits<Base>::min());
+        }
+
+        Base lo[C::count];
+        Base hi[C::count];
+    };
+
+    static void add(Partial &p, const T &v, size_t)
+    {
+        for (int c = 0; c < C::count; ++c)
+        {
+            if (C::get(v, c) < p.lo[c])
+                p.lo[c] = C::get(v, c);
+            if (C::get(v, c) > p.hi[c])
+                p.hi[c] = C::get(v, c);
+        }
+    }
+
+    static void combine(Partial &p, const Partial &q)
+    {
+        for (int c = 0; c < C::count; ++c)
+        {
+            if (q.lo[c] < p.lo[c])
+                p.lo[c] = q.lo[c];
+            if (q.hi[c] > p.hi[c])
+                p.hi[c] = q.hi[c];
+        }
+    }
+};
+
+template <class T>
+static typename ReduceResult<T>::Sum
+fa_sum(const FixedArray<T> &a)
+{
+    typedef ReduceComponents<typename ReduceResult<T>::Sum> R;
+
+    typename SumReducer<T>::Partial p = reduce<SumReducer<T> >(a);
+    typename ReduceResult<T>::Sum result;
+    for (int c = 0; c < R::count; ++c)
+        R::get(result, c) = typename R::Base(p.sum[c]);
+    return result;
+}
+
+template <class T>
+static typename ReduceResult<T>::Mean
+fa_mean(const FixedArray<T> &a)
+{
+    typedef ReduceComponents<typename ReduceResult<T>::Mean> R;
+
+    if (a.len() == 0)
+        throw IEX_NAMESPACE::ArgExc("Cannot compute the mean of an empty array");
+
+    typename SumReducer<T>::Partial p = reduce<SumReducer<T> >(a);
+    typename ReduceResult<T>::Mean result;
+    for (int c = 0; c < R::count; ++c)
+        R::get(result, c) = typename R::Base(double(p.sum[c]) / double(a.len()));
+    return result;
+}
+
+template <class T, bool Max>
+static T
+fa_extremum(const FixedArray<T> &a)
+{
+    typedef ReduceComponents<T> C;
+
+    typename ExtremumReducer<T,Max>::Partial p = reduce<ExtremumReducer<T,Max> >(a);
+    T result = T(0);
+    if (p.valid)
+    {
+        size_t index;
+        for (int c = 0; c < C::count; ++c)
+            C::get(result, c) = ExtremumReducer<T,Max>::result(p, c, index);
+    }
+    return result;
+}
+
+template <class T, bool Max>
+static boost::python::object
+fa_argextremum(const FixedArray<T> &a)
+{
+    typedef ReduceComponents<T> C;
+
+    typename ExtremumReducer<T,Max>::Partial p = reduce<ExtremumReducer<T,Max> >(a);
+    if (!p.valid)
+        throw IEX_NAMESPACE::ArgExc("Cannot find the index of an extremum of an empty array");
+
+    size_t index[C::count];
+    for (int c = 0; c < C::count; ++c)
+        ExtremumReducer<T,Max>::result(p, c, index[c]);
+
+    if (C::count == 1)
+        return boost::python::object(index[0]);
+
+    boost::python::list indices;
+    for (int c = 0; c < C::count; ++c)
+        indices.append(index[c]);
+    return boost::python::tuple(indices);
+}
+
+template <class T>
+static void
+fa_bounds(const FixedArray<T> &a, T &lo, T &hi)
+{
+    typedef ReduceComponents<T> C;
+
+    typename BoundsReducer<T>::Partial p = reduce<BoundsReducer<T> >(a);
+    for (int c = 0; c < C::count; ++c)
+    {
+        C::get(lo, c) = p.lo[c];
+        C::get(hi, c) = p.hi[c];
+    }
+}
+
+template <class T>
+static boost::python::tuple
+fa_bounds_tuple(const FixedArray<T> &a)
+{
+    T lo, hi;
+    fa_bounds(a, lo, hi);
+    return boost::python::make_tuple(lo, hi);
+}
+
+template <class V>
+static IMATH_NAMESPACE::Box<V>
+fa_bounds_box(const FixedArray<V> &a)
+{
+    IMATH_NAMESPACE::Box<V> box;
+    fa_bounds(a, box.min, box.max);
+    return box;
+}
+
+//
+// Adds sum, mean, min, max, argmin and argmax.  bounds is added
+// separately, as vector arrays return a box for it.
+//
+template <class T>
+static void add_reduction_functions(boost::python::class_<FixedArray<T> > &c) {
+    c.def("sum",&fa_sum<T>,
+          "sum() - the sum of the elements, computed in parallel");
+    c.def("mean",&fa_mean<T>,
+          "mean() - the mean of the elements, computed in parallel");
+    c.def("min",&fa_extremum<T,false>,
+          "min() - the smallest element, or the smallest of each component of vectors");
+    c.def("max",&fa_extremum<T,true>,
+          "max() - the largest element, or the largest of each component of vectors");
+    c.def("argmin",&fa_argextremum<T,false>,
+          "argmin() - the index of the first smallest element, or a tuple of the\n"
+          "indices of the smallest of each component of vectors");
+    c.def("argmax",&fa_argextremum<T,true>,
+          "argmax() - the index of the first largest element, or a tuple of the\n"
+          "indices of the largest of each component of vectors");
+}
+
+template <class T>
+static void add_bounds_tuple_function(boost::python::class_<FixedArray<T> > &c) {
+    c.def("bounds",&fa_bounds_tuple<T>,
+          "bounds() - a tuple of the smallest and largest elements (or components)");
+}
+
+template <class V>
+static void add_bounds_box_function(boost::python::class_<FixedArray<V> > &c) {
+    c.def("bounds",&fa_bounds_box<V>,
+          "bounds() - the bounding box of the vectors, computed in parallel");
+}
+
+} // namespace PyImath
+
+#endif // _PyImathReduce_h_
@@ -0,0 +1,433 @@
+///////////////////////////////////////////////////////////////////////////
+//
+// Copyright (c) 2010-2011, Industrial Light & Magic, a division of Lucas
+// Digital Ltd. LLC
+//
+// All rights reserved.
+//
+// Redistribution and use in source and binary forms, with or without
+// modification, are permitted provided that the following conditions are
+// met:
+// *       Redistributions of source code must retain the above copyright
+// notice, this list of conditions and the following disclaimer.
+// *       Redistributions in binary form must reproduce the above
+// copyright notice, this list of conditions and the following disclaimer
+// in the documentation and/or other materials provided with the
+// distribution.
+// *       Neither the name of Industrial Light & Magic nor the names of
+// its contributors may be used to endorse or promote products derived
+// from this software without specific prior written permission.
+//
+// THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+// "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+// LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+// A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+// OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+// SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+// LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+// DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+// THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+// (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+// OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+//
+///////////////////////////////////////////////////////////////////////////
+
+#include "PyIlmBaseConfigInternal.h"
+
+#include "PyImathSimd.h"
+#include "PyImathSimdKernels.h"
+#include <ImathVec.h>
+#include <half.h>
+
+#ifdef PYIMATH_HAVE_SSE2
+    #include <emmintrin.h>
+#endif
+
+#if defined(_MSC_VER) && defined(PYIMATH_HAVE_SSE2)
+    #include <intrin.h>
+#endif
+
+namespace PyImath {
+
+namespace {
+
+#if defined(__GNUC__) && (defined(__x86_64__) || defined(__i386__))
+
+    void cpuid(int n, int &eax, int &ebx, int &ecx, int &edx)
+    {
+        __asm__ __volatile__ (
+            "cpuid"
+            : /* Output  */ "=a"(eax), "=b"(ebx), "=c"(ecx), "=d"(edx)
+            : /* Input   */ "a"(n), "c"(0)
+            : /* Clobber */);
+    }
+
+    void xgetbv(int n, int &eax, int &edx)
+    {
+        __asm__ __volatile__ (
+            "xgetbv"
+            : /* Output  */ "=a"(eax), "=d"(edx)
+            : /* Input   */ "c"(n)
+            : /* Clobber */);
+    }
+
+#elif defined(_MSC_VER) && defined(PYIMATH_HAVE_SSE2)
+
+    void cpuid(int n, int &eax, int &ebx, int &ecx, int &edx)
+    {
+        int regs[4];
+        __cpuidex(regs, n, 0);
+        eax = regs[0]; ebx = regs[1]; ecx = regs[2]; edx = regs[3];
+    }
+
+    void xgetbv(int n, int &eax, int &edx)
+    {
+        unsigned __int64 v = _xgetbv(n);
+        eax = int(v);
+        edx = int(v >> 32);
+    }
+
+#else
+
+    // not an x86 processor - all disabled
+    void cpuid(int n, int &eax, int &ebx, int &ecx, int &edx)
+    {
+        eax = ebx = ecx = edx = 0;
+    }
+
+    void xgetbv(int n, int &eax, int &edx)
+    {
+        eax = edx = 0;
+    }
+
+#endif
+
+} // namespace
+
+CpuId::CpuId():
+    sse2(false),
+    avx(false),
+    avx2(false),
+    f16c(false)
+{
+    bool osxsave = false;
+    int  max     = 0;
+    int  eax, ebx, ecx, edx;
+
+    cpuid(0, max, ebx, ecx, edx);
+    if (max > 0)
+    {
+        cpuid(1, eax, ebx, ecx, edx);
+        sse2    = ( edx & (1<<26) );
+        osxsave = ( ecx & (1<<27) );
+        avx     = ( ecx & (1<<28) );
+        f16c    = ( ecx & (1<<29) );
+
+        if (max >= 7)
+        {
+            cpuid(7, eax, ebx, ecx, edx);
+            avx2 = ( ebx & (1<<5) );
+        }
+
+        if (!osxsave)
+        {
+            avx = avx2 = f16c = false;
+        }
+        else
+        {
+            xgetbv(0, eax, edx);
+            // eax bit 1 - SSE managed, bit 2 - AVX managed
+            if ((eax & 6) != 6)
+            {
+                avx = avx2 = f16c = false;
+            }
+        }
+    }
+}
+
+//
+// Element fallbacks
+//
+
+float
+simdLength3(const float *v)
+{
+    return IMATH_NAMESPACE::V3f(v[0], v[1], v[2]).length();
+}
+
+float
+simdLength4(const float *v)
+{
+    return IMATH_NAMESPACE::V4f(v[0], v[1], v[2], v[3]).length();
+}
+
+void
+simdNormalize3(const float *v, float *r, bool keepNull)
+{
+    IMATH_NAMESPACE::V3f a(v[0], v[1], v[2]);
+    if (keepNull)
+        a.normalize();
+    else
+        a = a.normalized();
+    r[0] = a.x; r[1] = a.y; r[2] = a.z;
+}
+
+void
+simdNormalize4(const float *v, float *r, bool keepNull)
+{
+    IMATH_NAMESPACE::V4f a(v[0], v[1], v[2], v[3]);
+    if (keepNull)
+        a.normalize();
+    else
+        a = a.normalized();
+    r[0] = a.x; r[1] = a.y; r[2] = a.z; r[3] = a.w;
+}
+
+void
+simdToHalf(const float *a, unsigned short *r, size_t n)
+{
+    for (size_t i = 0; i < n; ++i)
+        r[i] = half(a[i]).bits();
+}
+
+void
+simdToFloat(const unsigned short *a, float *r, size_t n)
+{
+    half h;
+    for (size_t i = 0; i < n; ++i)
+    {
+        h.setBits(a[i]);
+        r[i] = h;
+    }
+}
+
+namespace {
+
+#ifdef PYIMATH_HAVE_SSE2
+
+struct Sse2Float
+{
+    typedef float T;
+    typedef __m128 V;
+    typedef __m128 M;
+    enum { width = 4 };
+
+    static V load(const T *p) { return _mm_loadu_ps(p); }
+    static void store(T *p, V v) { _mm_storeu_ps(p, v); }
+    static V broadcast(T v) { return _mm_set1_ps(v); }
+
+    static V add(V a, V b) { return _mm_add_ps(a, b); }
+    static V sub(V a, V b) { return _mm_sub_ps(a, b); }
+    static V mul(V a, V b) { return _mm_mul_ps(a, b); }
+    static V div(V a, V b) { return _mm_div_ps(a, b); }
+    static V sqrt(V a) { return _mm_sqrt_ps(a); }
+
+    static M lt(V a, V b) { return _mm_cmplt_ps(a, b); }
+    static M gt(V a, V b) { return _mm_cmpgt_ps(a, b); }
+    static M neq(V a, V b) { return _mm_cmpneq_ps(a, b); }
+    static V select(M m, V a, V b) { return _mm_or_ps(_mm_and_ps(m, a), _mm_andnot_ps(m, b)); }
+    static bool any(M m) { return _mm_movemask_ps(m) != 0; }
+
+    //
+    // x0 y0 z0 x1 | y1 z1 x2 y2 | z2 x3 y3 z3  <->  x0..x3 | y0..y3 | z0..z3
+    //
+
+    static void load3(const T *p, V &x, V &y, V &z)
+    {
+        V m03 = _mm_loadu_ps(p);
+        V m14 = _mm_loadu_ps(p + 4);
+        V m25 = _mm_loadu_ps(p + 8);
+
+        V xy = _mm_shuffle_ps(m14, m25, _MM_SHUFFLE(2,1,3,2));
+        V yz = _mm_shuffle_ps(m03, m14, _MM_SHUFFLE(1,0,2,1));
+        x = _mm_shuffle_ps(m03, xy, _MM_SHUFFLE(2,0,3,0));
+        y = _mm_shuffle_ps(yz, xy, _MM_SHUFFLE(3,1,2,0));
+        z = _mm_shuffle_ps(yz, m25, _MM_SHUFFLE(3,0,3,1));
+    }
+
+    static void store3(T *p, V x, V y, V z)
+    {
+        V xy = _mm_shuffle_ps(x, y, _MM_SHUFFLE(2,0,2,0));
+        V yz = _mm_shuffle_ps(y, z, _MM_SHUFFLE(3,1,3,1));
+        V zx = _mm_shuffle_ps(z, x, _MM_SHUFFLE(3,1,2,0));
+
+        _mm_storeu_ps(p, _mm_shuffle_ps(xy, zx, _MM_SHUFFLE(2,0,2,0)));
+        _mm_storeu_ps(p + 4, _mm_shuffle_ps(yz, xy, _MM_SHUFFLE(3,1,2,0)));
+        _mm_storeu_ps(p + 8, _mm_shuffle_ps(zx, yz, _MM_SHUFFLE(3,1,3,1)));
+    }
+
+    static void transpose(V &a, V &b, V &c, V &d)
+    {
+        V t0 = _mm_unpacklo_ps(a, b);
+        V t1 = _mm_unpacklo_ps(c, d);
+        V t2 = _mm_unpackhi_ps(a, b);
+        V t3 = _mm_unpackhi_ps(c, d);
+        a = _mm_shuffle_ps(t0, t1, _MM_SHUFFLE(1,0,1,0));
+        b = _mm_shuffle_ps(t0, t1, _MM_SHUFFLE(3,2,3,2));
+        c = _mm_shuffle_ps(t2, t3, _MM_SHUFFLE(1,0,1,0));
+        d = _mm_shuffle_ps(t2, t3, _MM_SHUFFLE(3,2,3,2));
+    }
+
+    static void load4(const T *p, V &x, V &y, V &z, V &w)
+    {
+        x = _mm_loadu_ps(p);
+        y = _mm_loadu_ps(p + 4);
+        z = _mm_loadu_ps(p + 8);
+        w = _mm_loadu_ps(p + 12);
+        transpose(x, y, z, w);
+    }
+
+    static void store4(T *p, V x, V y, V z, V w)
+    {
+        transpose(x, y, z, w);
+        _mm_storeu_ps(p, x);
+        _mm_storeu_ps(p + 4, y);
+        _mm_storeu_ps(p + 8, z);
+        _mm_storeu_ps(p + 12, w);
+    }
+};
+
+struct Sse2Double
+{
+    typedef double T;
+    typedef __m128d V;
+    typedef __m128d M;
+    enum { width = 2 };
+
+    static V load(const T *p) { return _mm_loadu_pd(p); }
+    static void store(T *p, V v) { _mm_storeu_pd(p, v); }
+    static V broadcast(T v) { return _mm_set1_pd(v); }
+
+    static V add(V a, V b) { return _mm_add_pd(a, b); }
+    static V sub(V a, V b) { return _mm_sub_pd(a, b); }
+    static V mul(V a, V b) { return _mm_mul_pd(a, b); }
+    static V div(V a, V b) { return _mm_div_pd(a, b); }
+
+    static M lt(V a, V b) { return _mm_cmplt_pd(a, b); }
+    static M gt(V a, V b) { return _mm_cmpgt_pd(a, b); }
+    static V select(M m, V a, V b) { return _mm_or_pd(_mm_and_pd(m, a), _mm_andnot_pd(m, b)); }
+};
+
+#endif // PYIMATH_HAVE_SSE2
+
+struct SimdState
+{
+    SimdLevel                   maxLevel;
+    SimdLevel                   level;
+    const SimdKernels<float>   *floatKernels;
+    const SimdKernels<double>  *doubleKernels;
+    const SimdVecKernels       *vecKernels;
+    const SimdHalfKernels      *halfKernels;
+    bool                        f16c;
+
+    SimdState()
+    {
+        CpuId cpu;
+        f16c = cpu.f16c;
+        maxLevel = SIMD_NONE;
+#ifdef PYIMATH_HAVE_SSE2
+        if (cpu.sse2)
+            maxLevel = SIMD_SSE2;
+#endif
+#ifdef PYIMATH_HAVE_AVX2
+        if (cpu.sse2 && cpu.avx && cpu.avx2)
+            maxLevel = SIMD_AVX2;
+#endif
+        select(maxLevel);
+    }
+
+    void select(SimdLevel l)
+    {
+        static const SimdKernels<float> scalarFloat = simdKernelSet<ScalarIsa<float> >();
+        static const SimdKernels<double> scalarDouble = simdKernelSet<ScalarIsa<double> >();
+        static const SimdVecKernels scalarVec = simdVecKernelSet<ScalarIsa<float> >();
+        static const SimdHalfKernels tableHalf = { simdToHalf, simdToFloat };
+
+        level = l > maxLevel ? maxLevel : l;
+        floatKernels = &scalarFloat;
+        doubleKernels = &scalarDouble;
+        vecKernels = &scalarVec;
+        halfKernels = &tableHalf;
+
+        switch (level)
+        {
+#ifdef PYIMATH_HAVE_AVX2
+          case SIMD_AVX2:
+            floatKernels = &avx2FloatKernels();
+            doubleKernels = &avx2DoubleKernels();
+            vecKernels = &avx2VecKernels();
+            if (f16c)
+                halfKernels = &f16cHalfKernels();
+            break;
+#endif
+#ifdef PYIMATH_HAVE_SSE2
+          case SIMD_SSE2:
+            {
+                static const SimdKernels<float> sse2Float = simdKernelSet<Sse2Float>();
+                static const SimdKernels<double> sse2Double = simdKernelSet<Sse2Double>();
+                static const SimdVecKernels sse2Vec = simdVecKernelSet<Sse2Float>();
+
+                floatKernels = &sse2Float;
+                doubleKernels = &sse2Double;
+                vecKernels = &sse2Vec;
+            }
+            break;
+#endif
+          default:
+            break;
+        }
+    }
+};
+
+SimdState &
+simdState()
+{
+    static SimdState state;
+    return state;
+}
+
+} // namespace
+
+SimdLevel
+maxSimdLevel()
+{
+    return simdState().maxLevel;
+}
+
+SimdLevel
+simdLevel()
+{
+    return simdState().level;
+}
+
+void
+setSimdLevel(SimdLevel level)
+{
+    simdState().select(level);
+}
+
+const SimdKernels<float> &
+simdFloatKernels()
+{
+    return *simdState().floatKernels;
+}
+
+const SimdKernels<double> &
+simdDoubleKernels()
+{
+    return *simdState().doubleKernels;
+}
+
+const SimdVecKernels &
+simdVecKernels()
+{
+    return *simdState().vecKernels;
+}
+
+const SimdHalfKernels &
+simdHalfKernels()
+{
+    return *simdState().halfKernels;
+}
+
+} // namespace PyImath
@@ -0,0 +1,308 @@
+///////////////////////////////////////////////////////////////////////////
+//
+// Copyright (c) 2010-2011, Industrial Light & Magic, a division of Lucas
+// Digital Ltd. LLC
+//
+// All rights reserved.
+//
+// Redistribution and use in source and binary forms, with or without
+// modification, are permitted provided that the following conditions are
+// met:
+// *       Redistributions of source code must retain the above copyright
+// notice, this list of conditions and the following disclaimer.
+// *       Redistributions in binary form must reproduce the above
+// copyright notice, this list of conditions and the following disclaimer
+// in the documentation and/or other materials provided with the
+// distribution.
+// *       Neither the name of Industrial Light & Magic nor the names of
+// its contributors may be used to endorse or promote products derived
+// from this software without specific prior written permission.
+//
+// THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+// "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+// LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+// A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+// OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+// SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+// LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+// DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+// THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+// (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+// OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+//
+///////////////////////////////////////////////////////////////////////////
+
+#ifndef _PyImathSimd_h_
+#define _PyImathSimd_h_
+
+#include <ImathVec.h>
+#include <boost/type_traits/is_same.hpp>
+#include <algorithm>
+#include <cstddef>
+#include "PyImathExport.h"
+#include "PyImathFixedArray.h"
+
+//
+// Instruction sets the kernels can be compiled for
+//
+
+#if defined(__SSE2__) || defined(_M_X64) || (defined(_M_IX86_FP) && _M_IX86_FP >= 2)
+    #define PYIMATH_HAVE_SSE2
+#endif
+
+#if defined(PYIMATH_HAVE_SSE2) && (defined(__GNUC__) || defined(__clang__) || defined(_MSC_VER))
+    #define PYIMATH_HAVE_AVX2
+#endif
+
+namespace PyImath {
+
+//
+// Explicitly vectorized kernels for the hot array operations.
+//
+// The kernels work on contiguous runs of float or double scalars, an
+// array of V3f being a run of 3n floats for the component wise
+// operations.  They are compiled for SSE2 and AVX2 next to a portable
+// scalar set, which is what non-x86 targets (NEON) use, and the best
+// set the processor supports is selected at runtime.
+//
+
+enum SimdLevel
+{
+    SIMD_NONE = 0,
+    SIMD_SSE2,
+    SIMD_AVX2
+};
+
+//
+// Simple CPUID based runtime detection of the instruction sets
+// used by the kernels
+//
+class PYIMATH_EXPORT CpuId
+{
+  public:
+    CpuId();
+
+    bool sse2;
+    bool avx;
+    bool avx2;
+    bool f16c;
+};
+
+// the best kernel set supported by the processor
+PYIMATH_EXPORT SimdLevel maxSimdLevel();
+
+// the kernel set in use, the best one unless changed by setSimdLevel
+PYIMATH_EXPORT SimdLevel simdLevel();
+
+// select a kernel set, limited to the ones the processor supports
+PYIMATH_EXPORT void setSimdLevel(SimdLevel level);
+
+enum SimdBinaryOp  { SIMD_ADD, SIMD_SUB, SIMD_MUL, SIMD_DIV, SIMD_BINARY_OPS };
+enum SimdTernaryOp { SIMD_LERP, SIMD_CLAMP, SIMD_TERNARY_OPS };
+
+//
+// Kernels over runs of n scalars.  Each operand is either a run
+// (stride 1) or a single value broadcast over the run (stride 0).
+// The result may alias any operand.
+//
+template <class T>
+struct SimdKernels
+{
+    typedef void (*Binary) (const T *a, size_t aStride,
+                            const T *b, size_t bStride,
+                            T *r, size_t n);
+
+    typedef void (*Ternary) (const T *a, size_t aStride,
+                             const T *b, size_t bStride,
+                             const T *c, size_t cStride,
+                             T *r, size_t n);
+
+    Binary  binary[SIMD_BINARY_OPS];
+    Ternary ternary[SIMD_TERNARY_OPS];
+};
+
+//
+// Kernels over runs of n V3f or V4f, passed as their components.
+// normalize leaves null vectors unchanged like V3f::normalize(),
+// normalized returns zero for them like V3f::normalized().
+// The transforms take the 16 elements of an M44f and compute
+// M44f::multVecMatrix() and M44f::multDirMatrix().
+//
+struct SimdVecKernels
+{
+    typedef void (*Binary) (const float *a, const float *b, float *r, size_t n);
+    typedef void (*Unary) (const float *a, float *r, size_t n);
+    typedef void (*Transform) (const float *m, const float *a, float *r, size_t n);
+
+    Binary dot3;
+    Binary cross3;
+    Unary  length3;
+    Unary  normalize3;
+    Unary  normalized3;
+    Transform multVecMatrix3;
+    Transform multDirMatrix3;
+
+    Binary dot4;
+    Unary  length4;
+    Unary  normalize4;
+    Unary  normalized4;
+};
+
+//
+// Conversions between runs of floats and halfs, passed as their bits.
+// They use the F16C instructions when the processor has them and the
+// AVX2 set is selected, and the tables of half otherwise.  Both round
+// to nearest even like half(float) and only differ in the payloads of
+// signaling NaNs, which F16C makes quiet.
+//
+struct SimdHalfKernels
+{
+    typedef void (*ToHalf) (const float *a, unsigned short *r, size_t n);
+    typedef void (*ToFloat) (const unsigned short *a, float *r, size_t n);
+
+    ToHalf  toHalf;
+    ToFloat toFloat;
+};
+
+PYIMATH_EXPORT const SimdKernels<float> &simdFloatKernels();
+PYIMATH_EXPORT const SimdKernels<double> &simdDoubleKernels();
+PYIMATH_EXPORT const SimdVecKernels &simdVecKernels();
+PYIMATH_EXPORT const SimdHalfKernels &simdHalfKernels();
+
+template <class T> inline const SimdKernels<T> &simdKernels();
+template <> inline const SimdKernels<float> &simdKernels<float>() { return simdFloatKernels(); }
+template <> inline const SimdKernels<double> &simdKernels<double>() { return simdDoubleKernels(); }
+
+//
+// simd_op<Op> is consulted by the vectorized operations of
+// PyImathAutovectorize.h before running their element loop over
+// unmasked arguments.  Specializations evaluate the elements
+// [start,end) with a kernel and return true, or return false when
+// they can't handle the arguments (strided arrays, for instance).
+//
+template <class Op>
+struct simd_op
+{
+    template <class R, class A1>
+    static bool apply(R &, const A1 &, size_t, size_t) { return false; }
+
+    template <class R, class A1, class A2>
+    static bool apply(R &, const A1 &, const A2 &, size_t, size_t) { return false; }
+
+    template <class R, class A1, class A2, class A3>
+    static bool apply(R &, const A1 &, const A2 &, const A3 &, size_t, size_t) { return false; }
+
+    template <class C>
+    static bool apply_void(C &, size_t, size_t) { return false; }
+
+    template <class C, class A1>
+    static bool apply_void(C &, const A1 &, size_t, size_t) { return false; }
+};
+
+//
+// The scalar type of the runs an element type is made of, void for
+// element types without kernels
+//
+template <class T> struct simd_scalar { typedef void type; };
+template <> struct simd_scalar<float> { typedef float type; };
+template <> struct simd_scalar<double> { typedef double type; };
+template <class T> struct simd_scalar<IMATH_NAMESPACE::Vec2<T> > : public simd_scalar<T> {};
+template <class T> struct simd_scalar<IMATH_NAMESPACE::Vec3<T> > : public simd_scalar<T> {};
+template <class T> struct simd_scalar<IMATH_NAMESPACE::Vec4<T> > : public simd_scalar<T> {};
+
+//
+// An argument of a vectorized operation seen as a run of scalars:
+// a contiguous array, or a scalar value broadcast over the run.
+//
+template <class S>
+struct SimdRun
+{
+    const S *ptr;
+    size_t   stride;
+    size_t   width;     // scalars per array element, 0 for a broadcast value
+
+    template <class E>
+    bool set(const FixedArray<E> &a, size_t start)
+    {
+        if (!boost::is_same<typename simd_scalar<E>::type, S>::value || a.stride() != 1)
+            return false;
+
+        ptr = reinterpret_cast<const S *>(&a.direct_index(start));
+        stride = 1;
+        width = sizeof(E) / sizeof(S);
+        return true;
+    }
+
+    bool set(const S &value, size_t)
+    {
+        ptr = &value;
+        stride = 0;
+        width = 0;
+        return true;
+    }
+
+    template <class E>
+    bool set(const E &, size_t) { return false; }
+
+    // arrays must have the element type of the result
+    bool matches(const SimdRun &result) const { return width == 0 || width == result.width; }
+};
+
+template <class Ret, SimdBinaryOp Kernel, bool Reversed = false,
+          class S = typename simd_scalar<Ret>::type>
+struct simd_binary_op : public simd_op<void>
+{
+    using simd_op<void>::apply;
+    using simd_op<void>::apply_void;
+
+    template <class A1, class A2>
+    static bool apply(FixedArray<Ret> &r, const A1 &a1, const A2 &a2, size_t start, size_t end)
+    {
+        SimdRun<S> rr, r1, r2;
+        if (!rr.set(r, start) || !r1.set(a1, start) || !r2.set(a2, start) ||
+            !r1.matches(rr) || !r2.matches(rr))
+            return false;
+
+        if (Reversed)
+            std::swap(r1, r2);
+
+        simdKernels<S>().binary[Kernel](r1.ptr, r1.stride, r2.ptr, r2.stride,
+                                        const_cast<S *>(rr.ptr), (end - start) * rr.width);
+        return true;
+    }
+
+    template <class A1>
+    static bool apply_void(FixedArray<Ret> &c, const A1 &a1, size_t start, size_t end)
+    {
+        return apply(c, c, a1, start, end);
+    }
+};
+
+template <class Ret, SimdBinaryOp Kernel, bool Reversed>
+struct simd_binary_op<Ret,Kernel,Reversed,void> : public simd_op<void> {};
+
+template <class Ret, SimdTernaryOp Kernel, class S = typename simd_scalar<Ret>::type>
+struct simd_ternary_op : public simd_op<void>
+{
+    using simd_op<void>::apply;
+
+    template <class A1, class A2, class A3>
+    static bool apply(FixedArray<Ret> &r, const A1 &a1, const A2 &a2, const A3 &a3, size_t start, size_t end)
+    {
+        SimdRun<S> rr, r1, r2, r3;
+        if (!rr.set(r, start) || !r1.set(a1, start) || !r2.set(a2, start) || !r3.set(a3, start) ||
+            !r1.matches(rr) || !r2.matches(rr) || !r3.matches(rr))
+            return false;
+
+        simdKernels<S>().ternary[Kernel](r1.ptr, r1.stride, r2.ptr, r2.stride, r3.ptr, r3.stride,
+                                         const_cast<S *>(rr.ptr), (end - start) * rr.width);
+        return true;
+    }
+};
+
+template <class Ret, SimdTernaryOp Kernel>
+struct simd_ternary_op<Ret,Kernel,void> : public simd_op<void> {};
+
+} // namespace PyImath
+
+#endif // _PyImathSimd_h_
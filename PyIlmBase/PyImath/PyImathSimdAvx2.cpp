@@ -0,0 +1,232 @@
+///////////////////////////////////////////////////////////////////////////
+//
+// Copyright (c) 2010-2011, Industrial Light & Magic, a division of Lucas
+// Digital Ltd. LLC
+//
+// All rights reserved.
+//
+// Redistribution and use in source and binary forms, with or without
+// modification, are permitted provided that the following conditions are
+// met:
+// *       Redistributions of source code must retain the above copyright
+// notice, this list of conditions and the following disclaimer.
+// *       Redistributions in binary form must reproduce the above
+// copyright notice, this list of conditions and the following disclaimer
+// in the documentation and/or other materials provided with the
+// distribution.
+// *       Neither the name of Industrial Light & Magic nor the names of
+// its contributors may be used to endorse or promote products derived
+// from this software without specific prior written permission.
+//
+// THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+// "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+// LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+// A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+// OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+// SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+// LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+// DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+// THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+// (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+// OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+//
+///////////////////////////////////////////////////////////////////////////
+
+//
+// The AVX2 kernels.  Only the functions of this file are compiled for
+// AVX2, they are called once PyImathSimd.cpp has checked the processor.
+//
+
+#include "PyIlmBaseConfigInternal.h"
+
+#include "PyImathSimd.h"
+
+#ifdef PYIMATH_HAVE_AVX2
+
+#include <immintrin.h>
+
+#if defined(__GNUC__) || defined(__clang__)
+    #define PYIMATH_SIMD_TARGET __attribute__((target("avx2")))
+    #define PYIMATH_F16C_TARGET __attribute__((target("avx,f16c")))
+#else
+    #define PYIMATH_F16C_TARGET
+#endif
+
+#include "PyImathSimdKernels.h"
+
+namespace PyImath {
+
+namespace {
+
+struct Avx2Float
+{
+    typedef float T;
+    typedef __m256 V;
+    typedef __m256 M;
+    enum { width = 8 };
+
+    PYIMATH_SIMD_TARGET static V load(const T *p) { return _mm256_loadu_ps(p); }
+    PYIMATH_SIMD_TARGET static void store(T *p, V v) { _mm256_storeu_ps(p, v); }
+    PYIMATH_SIMD_TARGET static V broadcast(T v) { return _mm256_set1_ps(v); }
+
+    PYIMATH_SIMD_TARGET static V add(V a, V b) { return _mm256_add_ps(a, b); }
+    PYIMATH_SIMD_TARGET static V sub(V a, V b) { return _mm256_sub_ps(a, b); }
+    PYIMATH_SIMD_TARGET static V mul(V a, V b) { return _mm256_mul_ps(a, b); }
+    PYIMATH_SIMD_TARGET static V div(V a, V b) { return _mm256_div_ps(a, b); }
+    PYIMATH_SIMD_TARGET static V sqrt(V a) { return _mm256_sqrt_ps(a); }
+
+    PYIMATH_SIMD_TARGET static M lt(V a, V b) { return _mm256_cmp_ps(a, b, _CMP_LT_OQ); }
+    PYIMATH_SIMD_TARGET static M gt(V a, V b) { return _mm256_cmp_ps(a, b, _CMP_GT_OQ); }
+    PYIMATH_SIMD_TARGET static M neq(V a, V b) { return _mm256_cmp_ps(a, b, _CMP_NEQ_UQ); }
+    PYIMATH_SIMD_TARGET static V select(M m, V a, V b) { return _mm256_blendv_ps(b, a, m); }
+    PYIMATH_SIMD_TARGET static bool any(M m) { return _mm256_movemask_ps(m) != 0; }
+
+    PYIMATH_SIMD_TARGET static V load(const T *lo, const T *hi)
+    {
+        return _mm256_insertf128_ps(_mm256_castps128_ps256(_mm_loadu_ps(lo)), _mm_loadu_ps(hi), 1);
+    }
+
+    PYIMATH_SIMD_TARGET static void store(T *lo, T *hi, V v)
+    {
+        _mm_storeu_ps(lo, _mm256_castps256_ps128(v));
+        _mm_storeu_ps(hi, _mm256_extractf128_ps(v, 1));
+    }
+
+    //
+    // The 128 bit lanes hold vectors 0..3 and 4..7, each deinterleaved
+    // as in Sse2Float::load3
+    //
+
+    PYIMATH_SIMD_TARGET static void load3(const T *p, V &x, V &y, V &z)
+    {
+        V m03 = load(p, p + 12);
+        V m14 = load(p + 4, p + 16);
+        V m25 = load(p + 8, p + 20);
+
+        V xy = _mm256_shuffle_ps(m14, m25, _MM_SHUFFLE(2,1,3,2));
+        V yz = _mm256_shuffle_ps(m03, m14, _MM_SHUFFLE(1,0,2,1));
+        x = _mm256_shuffle_ps(m03, xy, _MM_SHUFFLE(2,0,3,0));
+        y = _mm256_shuffle_ps(yz, xy, _MM_SHUFFLE(3,1,2,0));
+        z = _mm256_shuffle_ps(yz, m25, _MM_SHUFFLE(3,0,3,1));
+    }
+
+    PYIMATH_SIMD_TARGET static void store3(T *p, V x, V y, V z)
+    {
+        V xy = _mm256_shuffle_ps(x, y, _MM_SHUFFLE(2,0,2,0));
+        V yz = _mm256_shuffle_ps(y, z, _MM_SHUFFLE(3,1,3,1));
+        V zx = _mm256_shuffle_ps(z, x, _MM_SHUFFLE(3,1,2,0));
+
+        store(p, p + 12, _mm256_shuffle_ps(xy, zx, _MM_SHUFFLE(2,0,2,0)));
+        store(p + 4, p + 16, _mm256_shuffle_ps(yz, xy, _MM_SHUFFLE(3,1,2,0)));
+        store(p + 8, p + 20, _mm256_shuffle_ps(zx, yz, _MM_SHUFFLE(3,1,3,1)));
+    }
+
+    PYIMATH_SIMD_TARGET static void transpose(V &a, V &b, V &c, V &d)
+    {
+        V t0 = _mm256_unpacklo_ps(a, b);
+        V t1 = _mm256_unpacklo_ps(c, d);
+        V t2 = _mm256_unpackhi_ps(a, b);
+        V t3 = _mm256_unpackhi_ps(c, d);
+        a = _mm256_shuffle_ps(t0, t1, _MM_SHUFFLE(1,0,1,0));
+        b = _mm256_shuffle_ps(t0, t1, _MM_SHUFFLE(3,2,3,2));
+        c = _mm256_shuffle_ps(t2, t3, _MM_SHUFFLE(1,0,1,0));
+        d = _mm256_shuffle_ps(t2, t3, _MM_SHUFFLE(3,2,3,2));
+    }
+
+    PYIMATH_SIMD_TARGET static void load4(const T *p, V &x, V &y, V &z, V &w)
+    {
+        x = load(p, p + 16);
+        y = load(p + 4, p + 20);
+        z = load(p + 8, p + 24);
+        w = load(p + 12, p + 28);
+        transpose(x, y, z, w);
+    }
+
+    PYIMATH_SIMD_TARGET static void store4(T *p, V x, V y, V z, V w)
+    {
+        transpose(x, y, z, w);
+        store(p, p + 16, x);
+        store(p + 4, p + 20, y);
+        store(p + 8, p + 24, z);
+        store(p + 12, p + 28, w);
+    }
+};
+
+struct Avx2Double
+{
+    typedef double T;
+    typedef __m256d V;
+    typedef __m256d M;
+    enum { width = 4 };
+
+    PYIMATH_SIMD_TARGET static V load(const T *p) { return _mm256_loadu_pd(p); }
+    PYIMATH_SIMD_TARGET static void store(T *p, V v) { _mm256_storeu_pd(p, v); }
+    PYIMATH_SIMD_TARGET static V broadcast(T v) { return _mm256_set1_pd(v); }
+
+    PYIMATH_SIMD_TARGET static V add(V a, V b) { return _mm256_add_pd(a, b); }
+    PYIMATH_SIMD_TARGET static V sub(V a, V b) { return _mm256_sub_pd(a, b); }
+    PYIMATH_SIMD_TARGET static V mul(V a, V b) { return _mm256_mul_pd(a, b); }
+    PYIMATH_SIMD_TARGET static V div(V a, V b) { return _mm256_div_pd(a, b); }
+
+    PYIMATH_SIMD_TARGET static M lt(V a, V b) { return _mm256_cmp_pd(a, b, _CMP_LT_OQ); }
+    PYIMATH_SIMD_TARGET static M gt(V a, V b) { return _mm256_cmp_pd(a, b, _CMP_GT_OQ); }
+    PYIMATH_SIMD_TARGET static V select(M m, V a, V b) { return _mm256_blendv_pd(b, a, m); }
+};
+
+PYIMATH_F16C_TARGET void
+f16cToHalf(const float *a, unsigned short *r, size_t n)
+{
+    size_t i = 0;
+    for (; i + 8 <= n; i += 8)
+    {
+        __m128i h = _mm256_cvtps_ph(_mm256_loadu_ps(a + i), _MM_FROUND_TO_NEAREST_INT);
+        _mm_storeu_si128(reinterpret_cast<__m128i *>(r + i), h);
+    }
+    simdToHalf(a + i, r + i, n - i);
+}
+
+PYIMATH_F16C_TARGET void
+f16cToFloat(const unsigned short *a, float *r, size_t n)
+{
+    size_t i = 0;
+    for (; i + 8 <= n; i += 8)
+    {
+        __m128i h = _mm_loadu_si128(reinterpret_cast<const __m128i *>(a + i));
+        _mm256_storeu_ps(r + i, _mm256_cvtph_ps(h));
+    }
+    simdToFloat(a + i, r + i, n - i);
+}
+
+} // namespace
+
+const SimdKernels<float> &
+avx2FloatKernels()
+{
+    static const SimdKernels<float> kernels = simdKernelSet<Avx2Float>();
+    return kernels;
+}
+
+const SimdKernels<double> &
+avx2DoubleKernels()
+{
+    static const SimdKernels<double> kernels = simdKernelSet<Avx2Double>();
+    return kernels;
+}
+
+const SimdVecKernels &
+avx2VecKernels()
+{
+    static const SimdVecKernels kernels = simdVecKernelSet<Avx2Float>();
+    return kernels;
+}
+
+const SimdHalfKernels &
+f16cHalfKernels()
+{
+    static const SimdHalfKernels kernels = { f16cToHalf, f16cToFloat };
+    return kernels;
+}
+
+} // namespace PyImath
+
+#endif // PYIMATH_HAVE_AVX2
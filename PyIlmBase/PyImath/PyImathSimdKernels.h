@@ -0,0 +1,577 @@
+///////////////////////////////////////////////////////////////////////////
+//
+// Copyright (c) 2010-2011, Industrial Light & Magic, a division of Lucas
+// Digital Ltd. LLC
+//
+// All rights reserved.
+//
+// Redistribution and use in source and binary forms, with or without
+// modification, are permitted provided that the following conditions are
+// met:
+// *       Redistributions of source code must retain the above copyright
+// notice, this list of conditions and the following disclaimer.
+// *       Redistributions in binary form must reproduce the above
+// copyright notice, this list of conditions and the following disclaimer
+// in the documentation and/or other materials provided with the
+// distribution.
+// *       Neither the name of Industrial Light & Magic nor the names of
+// its contributors may be used to endorse or promote products derived
+// from this software without specific prior written permission.
+//
+// THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+// "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+// LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+// A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+// OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+// SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+// LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+// DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+// THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+// (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+// OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+//
+///////////////////////////////////////////////////////////////////////////
+
+#ifndef _PyImathSimdKernels_h_
+#define _PyImathSimdKernels_h_
+
+//
+// Private to the kernel implementations in PyImathSimd.cpp and
+// PyImathSimdAvx2.cpp.
+//
+// The kernels are written once against an instruction set traits
+// class I (see ScalarIsa for the interface) and instantiated for each
+// instruction set.  Everything lives in an anonymous namespace and is
+// tagged with PYIMATH_SIMD_TARGET, so that code compiled for AVX2 can't
+// leak into functions called before the processor has been checked.
+//
+// The kernels evaluate exactly the expressions of the corresponding
+// Imath functions, in the same order and without fused multiply-adds,
+// so their results are bit identical to the element loops.
+//
+
+#include "PyImathSimd.h"
+#include <cfloat>
+#include <cmath>
+
+#ifndef PYIMATH_SIMD_TARGET
+    #define PYIMATH_SIMD_TARGET
+#endif
+
+namespace PyImath {
+
+//
+// Element fallbacks for the vectors the kernels can't handle
+// (vectors whose length is below the sqrt of the smallest float are
+// measured by Vec3::lengthTiny()), defined in PyImathSimd.cpp.
+//
+float simdLength3(const float *v);
+float simdLength4(const float *v);
+void  simdNormalize3(const float *v, float *r, bool keepNull);
+void  simdNormalize4(const float *v, float *r, bool keepNull);
+
+// the half conversions through the tables of half
+void  simdToHalf(const float *a, unsigned short *r, size_t n);
+void  simdToFloat(const unsigned short *a, float *r, size_t n);
+
+// the AVX2 kernel sets, defined in PyImathSimdAvx2.cpp
+const SimdKernels<float> &avx2FloatKernels();
+const SimdKernels<double> &avx2DoubleKernels();
+const SimdVecKernels &avx2VecKernels();
+const SimdHalfKernels &f16cHalfKernels();
+
+namespace {
+
+template <class S>
+struct ScalarIsa
+{
+    typedef S T;
+    typedef S V;
+    typedef bool M;
+    enum { width = 1 };
+
+    PYIMATH_SIMD_TARGET static V load(const T *p) { return *p; }
+    PYIMATH_SIMD_TARGET static void store(T *p, V v) { *p = v; }
+    PYIMATH_SIMD_TARGET static V broadcast(T v) { return v; }
+
+    PYIMATH_SIMD_TARGET static V add(V a, V b) { return a + b; }
+    PYIMATH_SIMD_TARGET static V sub(V a, V b) { return a - b; }
+    PYIMATH_SIMD_TARGET static V mul(V a, V b) { return a * b; }
+    PYIMATH_SIMD_TARGET static V div(V a, V b) { return a / b; }
+
+    PYIMATH_SIMD_TARGET static V sqrt(V a) { return std::sqrt(a); }
+
+    PYIMATH_SIMD_TARGET static M lt(V a, V b) { return a < b; }
+    PYIMATH_SIMD_TARGET static M gt(V a, V b) { return a > b; }
+    PYIMATH_SIMD_TARGET static M neq(V a, V b) { return a != b; }
+    PYIMATH_SIMD_TARGET static V select(M m, V a, V b) { return m ? a : b; }
+    PYIMATH_SIMD_TARGET static bool any(M m) { return m; }
+
+    PYIMATH_SIMD_TARGET static void load3(const T *p, V &x, V &y, V &z)
+    {
+        x = p[0]; y = p[1]; z = p[2];
+    }
+
+    PYIMATH_SIMD_TARGET static void store3(T *p, V x, V y, V z)
+    {
+        p[0] = x; p[1] = y; p[2] = z;
+    }
+
+    PYIMATH_SIMD_TARGET static void load4(const T *p, V &x, V &y, V &z, V &w)
+    {
+        x = p[0]; y = p[1]; z = p[2]; w = p[3];
+    }
+
+    PYIMATH_SIMD_TARGET static void store4(T *p, V x, V y, V z, V w)
+    {
+        p[0] = x; p[1] = y; p[2] = z; p[3] = w;
+    }
+};
+
+//
+// The operations, in the form of the Imath functions
+//
+
+struct SimdAdd
+{
+    template <class I>
+    PYIMATH_SIMD_TARGET static typename I::V apply(typename I::V a, typename I::V b) { return I::add(a, b); }
+};
+
+struct SimdSub
+{
+    template <class I>
+    PYIMATH_SIMD_TARGET static typename I::V apply(typename I::V a, typename I::V b) { return I::sub(a, b); }
+};
+
+struct SimdMul
+{
+    template <class I>
+    PYIMATH_SIMD_TARGET static typename I::V apply(typename I::V a, typename I::V b) { return I::mul(a, b); }
+};
+
+struct SimdDiv
+{
+    template <class I>
+    PYIMATH_SIMD_TARGET static typename I::V apply(typename I::V a, typename I::V b) { return I::div(a, b); }
+};
+
+// Imath::lerp: a * (1 - t) + b * t
+struct SimdLerp
+{
+    template <class I>
+    PYIMATH_SIMD_TARGET static typename I::V apply(typename I::V a, typename I::V b, typename I::V t)
+    {
+        typename I::V one = I::broadcast(typename I::T(1));
+        return I::add(I::mul(a, I::sub(one, t)), I::mul(b, t));
+    }
+};
+
+// Imath::clamp: (a < l) ? l : ((a > h) ? h : a)
+struct SimdClamp
+{
+    template <class I>
+    PYIMATH_SIMD_TARGET static typename I::V apply(typename I::V a, typename I::V l, typename I::V h)
+    {
+        return I::select(I::lt(a, l), l, I::select(I::gt(a, h), h, a));
+    }
+};
+
+//
+// Binary and ternary kernels, instantiated for every combination of
+// runs (A, B, C true) and broadcast values
+//
+
+template <class I, class Op, bool A, bool B>
+PYIMATH_SIMD_TARGET void
+binaryRun(const typename I::T *a, const typename I::T *b, typename I::T *r, size_t n)
+{
+    typedef ScalarIsa<typename I::T> S;
+
+    const typename I::V av = I::broadcast(*a);
+    const typename I::V bv = I::broadcast(*b);
+
+    size_t i = 0;
+    for (; i + I::width <= n; i += I::width)
+        I::store(r + i, Op::template apply<I>(A ? I::load(a + i) : av,
+                                              B ? I::load(b + i) : bv));
+
+    for (; i < n; ++i)
+        r[i] = Op::template apply<S>(A ? a[i] : *a, B ? b[i] : *b);
+}
+
+template <class I, class Op>
+PYIMATH_SIMD_TARGET void
+binary(const typename I::T *a, size_t aStride,
+       const typename I::T *b, size_t bStride,
+       typename I::T *r, size_t n)
+{
+    if (n == 0)
+        return;
+
+    if (aStride)
+    {
+        if (bStride)
+            binaryRun<I,Op,true,true>(a, b, r, n);
+        else
+            binaryRun<I,Op,true,false>(a, b, r, n);
+    }
+    else
+    {
+        if (bStride)
+            binaryRun<I,Op,false,true>(a, b, r, n);
+        else
+            binaryRun<I,Op,false,false>(a, b, r, n);
+    }
+}
+
+template <class I, class Op, bool A, bool B, bool C>
+PYIMATH_SIMD_TARGET void
+ternaryRun(const typename I::T *a, const typename I::T *b, const typename I::T *c,
+           typename I::T *r, size_t n)
+{
+    typedef ScalarIsa<typename I::T> S;
+
+    const typename I::V av = I::broadcast(*a);
+    const typename I::V bv = I::broadcast(*b);
+    const typename I::V cv = I::broadcast(*c);
+
+    size_t i = 0;
+    for (; i + I::width <= n; i += I::width)
+        I::store(r + i, Op::template apply<I>(A ? I::load(a + i) : av,
+                                              B ? I::load(b + i) : bv,
+                                              C ? I::load(c + i) : cv));
+
+    for (; i < n; ++i)
+        r[i] = Op::template apply<S>(A ? a[i] : *a, B ? b[i] : *b, C ? c[i] : *c);
+}
+
+template <class I, class Op>
+PYIMATH_SIMD_TARGET void
+ternary(const typename I::T *a, size_t aStride,
+        const typename I::T *b, size_t bStride,
+        const typename I::T *c, size_t cStride,
+        typename I::T *r, size_t n)
+{
+    if (n == 0)
+        return;
+
+    switch ((aStride ? 4 : 0) | (bStride ? 2 : 0) | (cStride ? 1 : 0))
+    {
+      case 0: ternaryRun<I,Op,false,false,false>(a, b, c, r, n); break;
+      case 1: ternaryRun<I,Op,false,false,true>(a, b, c, r, n); break;
+      case 2: ternaryRun<I,Op,false,true,false>(a, b, c, r, n); break;
+      case 3: ternaryRun<I,Op,false,true,true>(a, b, c, r, n); break;
+      case 4: ternaryRun<I,Op,true,false,false>(a, b, c, r, n); break;
+      case 5: ternaryRun<I,Op,true,false,true>(a, b, c, r, n); break;
+      case 6: ternaryRun<I,Op,true,true,false>(a, b, c, r, n); break;
+      default: ternaryRun<I,Op,true,true,true>(a, b, c, r, n); break;
+    }
+}
+
+//
+// Vector kernels.  Their instruction set also provides load3/store3
+// and load4/store4, which convert between width V3f or V4f and one
+// register per component, and any(), which tells whether a mask is set
+// in any lane.
+//
+
+template <class I>
+PYIMATH_SIMD_TARGET typename I::V
+dot3(typename I::V ax, typename I::V ay, typename I::V az,
+     typename I::V bx, typename I::V by, typename I::V bz)
+{
+    return I::add(I::add(I::mul(ax, bx), I::mul(ay, by)), I::mul(az, bz));
+}
+
+template <class I>
+PYIMATH_SIMD_TARGET typename I::V
+dot4(typename I::V ax, typename I::V ay, typename I::V az, typename I::V aw,
+     typename I::V bx, typename I::V by, typename I::V bz, typename I::V bw)
+{
+    return I::add(I::add(I::add(I::mul(ax, bx), I::mul(ay, by)), I::mul(az, bz)), I::mul(aw, bw));
+}
+
+template <class I>
+PYIMATH_SIMD_TARGET void
+vecDot3(const float *a, const float *b, float *r, size_t n)
+{
+    size_t i = 0;
+    for (; i + I::width <= n; i += I::width)
+    {
+        typename I::V ax, ay, az, bx, by, bz;
+        I::load3(a + 3*i, ax, ay, az);
+        I::load3(b + 3*i, bx, by, bz);
+        I::store(r + i, dot3<I>(ax, ay, az, bx, by, bz));
+    }
+
+    for (; i < n; ++i)
+        r[i] = a[3*i] * b[3*i] + a[3*i+1] * b[3*i+1] + a[3*i+2] * b[3*i+2];
+}
+
+template <class I>
+PYIMATH_SIMD_TARGET void
+vecDot4(const float *a, const float *b, float *r, size_t n)
+{
+    size_t i = 0;
+    for (; i + I::width <= n; i += I::width)
+    {
+        typename I::V ax, ay, az, aw, bx, by, bz, bw;
+        I::load4(a + 4*i, ax, ay, az, aw);
+        I::load4(b + 4*i, bx, by, bz, bw);
+        I::store(r + i, dot4<I>(ax, ay, az, aw, bx, by, bz, bw));
+    }
+
+    for (; i < n; ++i)
+        r[i] = a[4*i] * b[4*i] + a[4*i+1] * b[4*i+1] + a[4*i+2] * b[4*i+2] + a[4*i+3] * b[4*i+3];
+}
+
+template <class I>
+PYIMATH_SIMD_TARGET void
+vecCross3(const float *a, const float *b, float *r, size_t n)
+{
+    size_t i = 0;
+    for (; i + I::width <= n; i += I::width)
+    {
+        typename I::V ax, ay, az, bx, by, bz;
+        I::load3(a + 3*i, ax, ay, az);
+        I::load3(b + 3*i, bx, by, bz);
+        I::store3(r + 3*i,
+                  I::sub(I::mul(ay, bz), I::mul(az, by)),
+                  I::sub(I::mul(az, bx), I::mul(ax, bz)),
+                  I::sub(I::mul(ax, by), I::mul(ay, bx)));
+    }
+
+    for (; i < n; ++i)
+    {
+        const float *u = a + 3*i;
+        const float *v = b + 3*i;
+        float x = u[1] * v[2] - u[2] * v[1];
+        float y = u[2] * v[0] - u[0] * v[2];
+        float z = u[0] * v[1] - u[1] * v[0];
+        r[3*i] = x;
+        r[3*i+1] = y;
+        r[3*i+2] = z;
+    }
+}
+
+//
+// v * m as in M44f::multVecMatrix(), or M44f::multDirMatrix() when
+// Point is false, m being the matrix elements broadcast
+//
+template <class I, bool Point>
+PYIMATH_SIMD_TARGET void
+multMatrix3(const typename I::V *m, typename I::V &x, typename I::V &y, typename I::V &z)
+{
+    typename I::V a = I::add(I::add(I::mul(x, m[0]), I::mul(y, m[4])), I::mul(z, m[8]));
+    typename I::V b = I::add(I::add(I::mul(x, m[1]), I::mul(y, m[5])), I::mul(z, m[9]));
+    typename I::V c = I::add(I::add(I::mul(x, m[2]), I::mul(y, m[6])), I::mul(z, m[10]));
+
+    if (Point)
+    {
+        typename I::V w = I::add(I::add(I::add(I::mul(x, m[3]), I::mul(y, m[7])), I::mul(z, m[11])), m[15]);
+        a = I::div(I::add(a, m[12]), w);
+        b = I::div(I::add(b, m[13]), w);
+        c = I::div(I::add(c, m[14]), w);
+    }
+
+    x = a;
+    y = b;
+    z = c;
+}
+
+template <class I, bool Point>
+PYIMATH_SIMD_TARGET void
+vecMultMatrix3(const float *m, const float *a, float *r, size_t n)
+{
+    typedef ScalarIsa<float> S;
+
+    typename I::V mv[16];
+    for (int k = 0; k < 16; ++k)
+        mv[k] = I::broadcast(m[k]);
+
+    size_t i = 0;
+    for (; i + I::width <= n; i += I::width)
+    {
+        typename I::V x, y, z;
+        I::load3(a + 3*i, x, y, z);
+        multMatrix3<I,Point>(mv, x, y, z);
+        I::store3(r + 3*i, x, y, z);
+    }
+
+    for (; i < n; ++i)
+    {
+        float x, y, z;
+        S::load3(a + 3*i, x, y, z);
+        multMatrix3<S,Point>(m, x, y, z);
+        S::store3(r + 3*i, x, y, z);
+    }
+}
+
+template <class I>
+PYIMATH_SIMD_TARGET void
+vecLength3(const float *a, float *r, size_t n)
+{
+    const typename I::V tiny = I::broadcast(2 * FLT_MIN);
+
+    size_t i = 0;
+    for (; i + I::width <= n; i += I::width)
+    {
+        typename I::V x, y, z;
+        I::load3(a + 3*i, x, y, z);
+        typename I::V length2 = dot3<I>(x, y, z, x, y, z);
+
+        if (I::any(I::lt(length2, tiny)))
+        {
+            for (size_t j = i; j < i + I::width; ++j)
+                r[j] = simdLength3(a + 3*j);
+        }
+        else
+        {
+            I::store(r + i, I::sqrt(length2));
+        }
+    }
+
+    for (; i < n; ++i)
+        r[i] = simdLength3(a + 3*i);
+}
+
+template <class I>
+PYIMATH_SIMD_TARGET void
+vecLength4(const float *a, float *r, size_t n)
+{
+    const typename I::V tiny = I::broadcast(2 * FLT_MIN);
+
+    size_t i = 0;
+    for (; i + I::width <= n; i += I::width)
+    {
+        typename I::V x, y, z, w;
+        I::load4(a + 4*i, x, y, z, w);
+        typename I::V length2 = dot4<I>(x, y, z, w, x, y, z, w);
+
+        if (I::any(I::lt(length2, tiny)))
+        {
+            for (size_t j = i; j < i + I::width; ++j)
+                r[j] = simdLength4(a + 4*j);
+        }
+        else
+        {
+            I::store(r + i, I::sqrt(length2));
+        }
+    }
+
+    for (; i < n; ++i)
+        r[i] = simdLength4(a + 4*i);
+}
+
+template <class I, bool KeepNull>
+PYIMATH_SIMD_TARGET void
+vecNormalize3(const float *a, float *r, size_t n)
+{
+    const typename I::V tiny = I::broadcast(2 * FLT_MIN);
+    const typename I::V zero = I::broadcast(0.0f);
+
+    size_t i = 0;
+    for (; i + I::width <= n; i += I::width)
+    {
+        typename I::V x, y, z;
+        I::load3(a + 3*i, x, y, z);
+        typename I::V length2 = dot3<I>(x, y, z, x, y, z);
+
+        if (I::any(I::lt(length2, tiny)))
+        {
+            for (size_t j = i; j < i + I::width; ++j)
+                simdNormalize3(a + 3*j, r + 3*j, KeepNull);
+        }
+        else
+        {
+            typename I::V l = I::sqrt(length2);
+            typename I::M nonNull = I::neq(l, zero);
+            I::store3(r + 3*i,
+                      I::select(nonNull, I::div(x, l), KeepNull ? x : zero),
+                      I::select(nonNull, I::div(y, l), KeepNull ? y : zero),
+                      I::select(nonNull, I::div(z, l), KeepNull ? z : zero));
+        }
+    }
+
+    for (; i < n; ++i)
+        simdNormalize3(a + 3*i, r + 3*i, KeepNull);
+}
+
+template <class I, bool KeepNull>
+PYIMATH_SIMD_TARGET void
+vecNormalize4(const float *a, float *r, size_t n)
+{
+    const typename I::V tiny = I::broadcast(2 * FLT_MIN);
+    const typename I::V zero = I::broadcast(0.0f);
+
+    size_t i = 0;
+    for (; i + I::width <= n; i += I::width)
+    {
+        typename I::V x, y, z, w;
+        I::load4(a + 4*i, x, y, z, w);
+        typename I::V length2 = dot4<I>(x, y, z, w, x, y, z, w);
+
+        if (I::any(I::lt(length2, tiny)))
+        {
+            for (size_t j = i; j < i + I::width; ++j)
+                simdNormalize4(a + 4*j, r + 4*j, KeepNull);
+        }
+        else
+        {
+            typename I::V l = I::sqrt(length2);
+            typename I::M nonNull = I::neq(l, zero);
+            I::store4(r + 4*i,
+                      I::select(nonNull, I::div(x, l), KeepNull ? x : zero),
+                      I::select(nonNull, I::div(y, l), KeepNull ? y : zero),
+                      I::select(nonNull, I::div(z, l), KeepNull ? z : zero),
+                      I::select(nonNull, I::div(w, l), KeepNull ? w : zero));
+        }
+    }
+
+    for (; i < n; ++i)
+        simdNormalize4(a + 4*i, r + 4*i, KeepNull);
+}
+
+//
+// Kernel sets
+//
+
+template <class I>
+SimdKernels<typename I::T>
+simdKernelSet()
+{
+    SimdKernels<typename I::T> k;
+    k.binary[SIMD_ADD] = &binary<I,SimdAdd>;
+    k.binary[SIMD_SUB] = &binary<I,SimdSub>;
+    k.binary[SIMD_MUL] = &binary<I,SimdMul>;
+    k.binary[SIMD_DIV] = &binary<I,SimdDiv>;
+    k.ternary[SIMD_LERP] = &ternary<I,SimdLerp>;
+    k.ternary[SIMD_CLAMP] = &ternary<I,SimdClamp>;
+    return k;
+}
+
+template <class I>
+SimdVecKernels
+simdVecKernelSet()
+{
+    SimdVecKernels k;
+    k.dot3 = &vecDot3<I>;
+    k.cross3 = &vecCross3<I>;
+    k.length3 = &vecLength3<I>;
+    k.normalize3 = &vecNormalize3<I,true>;
+    k.normalized3 = &vecNormalize3<I,false>;
+    k.multVecMatrix3 = &vecMultMatrix3<I,true>;
+    k.multDirMatrix3 = &vecMultMatrix3<I,false>;
+    k.dot4 = &vecDot4<I>;
+    k.length4 = &vecLength4<I>;
+    k.normalize4 = &vecNormalize4<I,true>;
+    k.normalized4 = &vecNormalize4<I,false>;
+    return k;
+}
+
+} // namespace
+
+} // namespace PyImath
+
+#endif // _PyImathSimdKernels_h_
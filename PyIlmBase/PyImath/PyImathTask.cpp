@@ -35,28 +35,189 @@
 #include "PyIlmBaseConfigInternal.h"
 
 #include "PyImathTask.h"
+#include <IlmThreadPool.h>
+#include <algorithm>
+#include <exception>
+#include <memory>
+#include <mutex>
 
 namespace PyImath {
 
-static WorkerPool *_currentPool = 0;
+namespace {
+
+//
+// Set while the current thread is executing a chunk of a dispatched
+// task, so that nested dispatches run serially instead of waiting on
+// the pool they are running in.
+//
+thread_local bool _inWorkerThread = false;
+
+//
+// Holds the first exception thrown by any chunk of a dispatch, so it
+// can be rethrown in the calling thread once all chunks are finished.
+//
+class DispatchError
+{
+  public:
+    void set(std::exception_ptr e)
+    {
+        std::lock_guard<std::mutex> lock(_mutex);
+        if (!_error)
+            _error = e;
+    }
+
+    void rethrow()
+    {
+        if (_error)
+            std::rethrow_exception(_error);
+    }
+
+  private:
+    std::mutex         _mutex;
+    std::exception_ptr _error;
+};
+
+void
+executeChunk(Task &task, size_t start, size_t end, int tid, DispatchError &error)
+{
+    bool saved = _inWorkerThread;
+    _inWorkerThread = true;
+
+    try
+    {
+        task.execute(start,end,tid);
+    }
+    catch (...)
+    {
+        error.set(std::current_exception());
+    }
+
+    _inWorkerThread = saved;
+}
+
+class ChunkTask : public ILMTHREAD_NAMESPACE::Task
+{
+  public:
+    ChunkTask(ILMTHREAD_NAMESPACE::TaskGroup *group, PyImath::Task &task,
+              size_t start, size_t end, int tid, DispatchError &error)
+        : ILMTHREAD_NAMESPACE::Task(group), _task(task), _start(start), _end(end),
+          _tid(tid), _error(error) {}
+
+    void execute()
+    {
+        executeChunk(_task,_start,_end,_tid,_error);
+    }
+
+  private:
+    PyImath::Task &_task;
+    size_t         _start;
+    size_t         _end;
+    int            _tid;
+    DispatchError &_error;
+};
+
+} // namespace
+
+struct IlmThreadWorkerPool::Data
+{
+    Data(size_t numWorkers)
+        : workers(std::max(numWorkers,size_t(1))),
+          pool(static_cast<unsigned>(workers - 1)) {}
+
+    size_t                workers;
+    ILMTHREAD_NAMESPACE::ThreadPool pool;
+};
+
+IlmThreadWorkerPool::IlmThreadWorkerPool(size_t numWorkers)
+    : _data(new Data(numWorkers))
+{
+}
+
+IlmThreadWorkerPool::~IlmThreadWorkerPool()
+{
+    delete _data;
+}
+
+size_t
+IlmThreadWorkerPool::workers() const
+{
+    return _data->workers;
+}
+
+void
+IlmThreadWorkerPool::dispatch(Task &task,size_t length)
+{
+    size_t chunks = std::min(_data->workers,length);
+    DispatchError error;
+
+    if (chunks <= 1)
+    {
+        executeChunk(task,0,length,0,error);
+    }
+    else
+    {
+        //
+        // The TaskGroup destructor waits for the chunks handed to the
+        // pool; the calling thread works on the first chunk meanwhile.
+        //
+        ILMTHREAD_NAMESPACE::TaskGroup group;
+        for (size_t i = 1; i < chunks; ++i)
+        {
+            _data->pool.addTask(new ChunkTask(&group,task,
+                                              i*length/chunks,
+                                              (i+1)*length/chunks,
+                                              int(i),error));
+        }
+        executeChunk(task,0,length/chunks,0,error);
+    }
+
+    error.rethrow();
+}
+
+bool
+IlmThreadWorkerPool::inWorkerThread() const
+{
+    return _inWorkerThread;
+}
+
+//
+// The current pool.  Dispatches hold a reference to it for their
+// whole duration, so that a pool replaced by setNumThreads in another
+// thread is only destroyed once the dispatches running on it are
+// done.  Pools installed by setCurrentPool are owned by the caller.
+//
+static std::shared_ptr<WorkerPool> _currentPool;
+
+static std::shared_ptr<WorkerPool>
+currentPoolRef()
+{
+    return std::atomic_load(&_currentPool);
+}
+
+static void
+noDelete(WorkerPool *)
+{
+}
 
 WorkerPool *
 WorkerPool::currentPool()
 {
-    return _currentPool;
+    return currentPoolRef().get();
 }
 
 void
 WorkerPool::setCurrentPool(WorkerPool *pool)
 {
-    _currentPool = pool;
+    std::atomic_store(&_currentPool, std::shared_ptr<WorkerPool>(pool,noDelete));
 }
 
 void
 dispatchTask(Task &task,size_t length)
 {
-    if (WorkerPool::currentPool() && !WorkerPool::currentPool()->inWorkerThread())
-        WorkerPool::currentPool()->dispatch(task,length);
+    std::shared_ptr<WorkerPool> pool = currentPoolRef();
+
+    if (pool && !pool->inWorkerThread())
+        pool->dispatch(task,length);
     else
         task.execute(0,length,0);
 }
@@ -65,8 +226,31 @@ dispatchTask(Task &task,size_t length)
 size_t
 workers()
 {
-    if (WorkerPool::currentPool() && !WorkerPool::currentPool()->inWorkerThread())
-        return WorkerPool::currentPool()->workers();
+    std::shared_ptr<WorkerPool> pool = currentPoolRef();
+
+    if (pool && !pool->inWorkerThread())
+        return pool->workers();
+    else
+        return 1;
+}
+
+void
+setNumThreads(size_t count)
+{
+    std::shared_ptr<WorkerPool> pool;
+    if (count > 1)
+        pool.reset(new IlmThreadWorkerPool(count));
+
+    std::atomic_store(&_currentPool, pool);
+}
+
+size_t
+numThreads()
+{
+    std::shared_ptr<WorkerPool> pool = currentPoolRef();
+
+    if (pool)
+        return pool->workers();
     else
         return 1;
 }
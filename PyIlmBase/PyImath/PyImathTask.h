@@ -57,13 +57,50 @@ struct WorkerPool
     PYIMATH_EXPORT virtual void dispatch(Task &task,size_t length) = 0;
     PYIMATH_EXPORT virtual bool inWorkerThread() const = 0;
 
+    // The pool given to setCurrentPool is not owned: it must outlive
+    // the dispatches running on it.
     PYIMATH_EXPORT static WorkerPool *currentPool();
     PYIMATH_EXPORT static void setCurrentPool(WorkerPool *pool);
 };
 
+//
+// WorkerPool backed by an IlmThread::ThreadPool.  dispatch() splits
+// [0,length) into one contiguous chunk per worker; the calling thread
+// executes the first chunk itself, so a pool with n workers owns n-1
+// threads.  Each chunk is passed its worker index as the tid, which is
+// always less than workers().
+//
+class IlmThreadWorkerPool : public WorkerPool
+{
+  public:
+    PYIMATH_EXPORT IlmThreadWorkerPool(size_t numWorkers);
+    PYIMATH_EXPORT virtual ~IlmThreadWorkerPool();
+
+    PYIMATH_EXPORT virtual size_t workers() const;
+    PYIMATH_EXPORT virtual void dispatch(Task &task,size_t length);
+    PYIMATH_EXPORT virtual bool inWorkerThread() const;
+
+    IlmThreadWorkerPool(const IlmThreadWorkerPool &) = delete;
+    IlmThreadWorkerPool &operator=(const IlmThreadWorkerPool &) = delete;
+
+  private:
+    struct Data;
+    Data *_data;
+};
+
 PYIMATH_EXPORT void dispatchTask(Task &task,size_t length);
 PYIMATH_EXPORT size_t workers();
 
+//
+// Install an IlmThreadWorkerPool with the given number of workers as
+// the current pool, replacing any current pool.  A pool installed by
+// setNumThreads is destroyed once it is replaced and the dispatches
+// running on it in other threads are done.  A count of 0 or 1 removes
+// the pool, so all tasks run serially in the calling thread.
+//
+PYIMATH_EXPORT void setNumThreads(size_t count);
+PYIMATH_EXPORT size_t numThreads();
+
 }
 
 #endif
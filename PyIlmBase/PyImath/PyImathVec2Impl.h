@@ -1103,53 +1103,6 @@ Vec2Array_get(FixedArray<IMATH_NAMESPACE::Vec2<T> > &va)
     return FixedArray<T>(&va[0][index],va.len(),2*va.stride());
 }
 
-template <class T>
-static IMATH_NAMESPACE::Vec2<T>
-Vec2Array_min(const FixedArray<IMATH_NAMESPACE::Vec2<T> > &a)
-{
-    Vec2<T> tmp(Vec2<T>(0));
-    size_t len = a.len();
-    if (len > 0)
-        tmp = a[0];
-    for (size_t i=1; i < len; ++i)
-    {
-        if (a[i].x < tmp.x)
-            tmp.x = a[i].x;
-        if (a[i].y < tmp.y)
-            tmp.y = a[i].y;
-    }
-    return tmp;
-}
-
-template <class T>
-static IMATH_NAMESPACE::Vec2<T>
-Vec2Array_max(const FixedArray<IMATH_NAMESPACE::Vec2<T> > &a)
-{
-    Vec2<T> tmp(Vec2<T>(0));
-    size_t len = a.len();
-    if (len > 0)
-        tmp = a[0];
-    for (size_t i=1; i < len; ++i)
-    {
-        if (a[i].x > tmp.x)
-            tmp.x = a[i].x;
-        if (a[i].y > tmp.y)
-            tmp.y = a[i].y;
-    }
-    return tmp;
-}
-
-template <class T>
-static IMATH_NAMESPACE::Box<IMATH_NAMESPACE::Vec2<T> >
-Vec2Array_bounds(const FixedArray<IMATH_NAMESPACE::Vec2<T> > &a)
-{
-    Box<Vec2<T> > tmp;
-    size_t len = a.len();
-    for (size_t i=0; i < len; ++i)
-        tmp.extendBy(a[i]);
-    return tmp;
-}
-
 template <class T>
 class_<FixedArray<IMATH_NAMESPACE::Vec2<T> > >
 register_Vec2Array()
@@ -1163,13 +1116,12 @@ register_Vec2Array()
         .add_property("y",&Vec2Array_get<T,1>)
         .def("__setitem__", &setItemTuple<T,tuple>)
         .def("__setitem__", &setItemTuple<T,list>)
-        .def("min", &Vec2Array_min<T>)
-        .def("max", &Vec2Array_max<T>)
-        .def("bounds", &Vec2Array_bounds<T>)
         ;
 
     add_arithmetic_math_functions(vec2Array_class);
     add_comparison_functions(vec2Array_class);
+    add_reduction_functions(vec2Array_class);
+    add_bounds_box_function(vec2Array_class);
 
     generate_member_bindings<op_vecLength<IMATH_NAMESPACE::Vec2<T> >     >(vec2Array_class,"length","");
     generate_member_bindings<op_vecLength2<IMATH_NAMESPACE::Vec2<T> >    >(vec2Array_class,"length2","");
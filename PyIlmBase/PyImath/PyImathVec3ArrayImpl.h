@@ -60,6 +60,23 @@ namespace PyImath {
 using namespace boost::python;
 using namespace IMATH_NAMESPACE;
 
+// contiguous V3f arrays are transformed by M44f with a kernel of PyImathSimd.h
+template <>
+struct simd_op<op_mul<IMATH_NAMESPACE::V3f,IMATH_NAMESPACE::M44f> > : public simd_op<void>
+{
+    using simd_op<void>::apply;
+
+    static bool apply(FixedArray<IMATH_NAMESPACE::V3f> &r, const FixedArray<IMATH_NAMESPACE::V3f> &a,
+                      const IMATH_NAMESPACE::M44f &m, size_t start, size_t end)
+    {
+        if (r.stride() != 1 || a.stride() != 1)
+            return false;
+        simdVecKernels().multVecMatrix3(m.getValue(), &a.direct_index(start).x,
+                                        &r.direct_index(start).x, end - start);
+        return true;
+    }
+};
+
 // XXX fixme - template this
 // really this should get generated automatically...
 
@@ -86,57 +103,6 @@ setItemTuple(FixedArray<IMATH_NAMESPACE::Vec3<T> > &va, Py_ssize_t index, const
         THROW(IEX_NAMESPACE::LogicExc, "tuple of length 3 expected");
 }
 
-template <class T>
-static IMATH_NAMESPACE::Vec3<T>
-Vec3Array_min(const FixedArray<IMATH_NAMESPACE::Vec3<T> > &a)
-{
-    Vec3<T> tmp(Vec3<T>(0));
-    size_t len = a.len();
-    if (len > 0)
-        tmp = a[0];
-    for (size_t i=1; i < len; ++i)
-    {
-        if (a[i].x < tmp.x)
-            tmp.x = a[i].x;
-        if (a[i].y < tmp.y)
-            tmp.y = a[i].y;
-        if (a[i].z < tmp.z)
-            tmp.z = a[i].z;
-    }
-    return tmp;
-}
-
-template <class T>
-static IMATH_NAMESPACE::Vec3<T>
-Vec3Array_max(const FixedArray<IMATH_NAMESPACE::Vec3<T> > &a)
-{
-    Vec3<T> tmp(Vec3<T>(0));
-    size_t len = a.len();
-    if (len > 0)
-        tmp = a[0];
-    for (size_t i=1; i < len; ++i)
-    {
-        if (a[i].x > tmp.x)
-            tmp.x = a[i].x;
-        if (a[i].y > tmp.y)
-            tmp.y = a[i].y;
-        if (a[i].z > tmp.z)
-            tmp.z = a[i].z;
-    }
-    return tmp;
-}
-
-template <class T>
-static IMATH_NAMESPACE::Box<IMATH_NAMESPACE::Vec3<T> >
-Vec3Array_bounds(const FixedArray<IMATH_NAMESPACE::Vec3<T> > &a)
-{
-    Box<Vec3<T> > tmp;
-    size_t len = a.len();
-    for (size_t i=0; i < len; ++i)
-        tmp.extendBy(a[i]);
-    return tmp;
-}
-
 template <class T>
 class_<FixedArray<IMATH_NAMESPACE::Vec3<T> > >
 register_Vec3Array()
@@ -150,13 +116,12 @@ register_Vec3Array()
         .add_property("y",&Vec3Array_get<T,1>)
         .add_property("z",&Vec3Array_get<T,2>)
         .def("__setitem__", &setItemTuple<T>)
-        .def("min", &Vec3Array_min<T>)
-        .def("max", &Vec3Array_max<T>)
-        .def("bounds", &Vec3Array_bounds<T>)
         ;
 
     add_arithmetic_math_functions(vec3Array_class);
     add_comparison_functions(vec3Array_class);
+    add_reduction_functions(vec3Array_class);
+    add_bounds_box_function(vec3Array_class);
 
     generate_member_bindings<op_vecLength<IMATH_NAMESPACE::Vec3<T> >     >(vec3Array_class,"length","");
     generate_member_bindings<op_vecLength2<IMATH_NAMESPACE::Vec3<T> >    >(vec3Array_class,"length2","");
@@ -167,8 +132,8 @@ register_Vec3Array()
     generate_member_bindings<op_vecDot<IMATH_NAMESPACE::Vec3<T> >,true_>(vec3Array_class,"dot","return the inner product of (self,x)",boost::python::args("x"));
 
     generate_member_bindings<op_mul<IMATH_NAMESPACE::Vec3<T>,T>,  true_>(vec3Array_class,"__mul__" ,"self*x", boost::python::args("x"));
-    generate_member_bindings<op_mul<IMATH_NAMESPACE::Vec3<T>,IMATH_NAMESPACE::M44f>,false_>(vec3Array_class,"__mul__" ,"self*x", boost::python::args("x"));
-    generate_member_bindings<op_mul<IMATH_NAMESPACE::Vec3<T>,IMATH_NAMESPACE::M44d>,false_>(vec3Array_class,"__mul__" ,"self*x", boost::python::args("x"));
+    generate_member_bindings<op_mul<IMATH_NAMESPACE::Vec3<T>,IMATH_NAMESPACE::M44f>,true_>(vec3Array_class,"__mul__" ,"self*x", boost::python::args("x"));
+    generate_member_bindings<op_mul<IMATH_NAMESPACE::Vec3<T>,IMATH_NAMESPACE::M44d>,true_>(vec3Array_class,"__mul__" ,"self*x", boost::python::args("x"));
 
     generate_member_bindings<op_mul<IMATH_NAMESPACE::Vec3<T>,T>,  true_>(vec3Array_class,"__rmul__","x*self", boost::python::args("x"));
     generate_member_bindings<op_imul<IMATH_NAMESPACE::Vec3<T>,T>, true_>(vec3Array_class,"__imul__","self*=x",boost::python::args("x"));
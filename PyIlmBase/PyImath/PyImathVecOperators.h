@@ -35,6 +35,9 @@
 #ifndef _PyImathVecOperators_h_
 #define _PyImathVecOperators_h_
 
+#include <ImathVec.h>
+#include "PyImathSimd.h"
+
 namespace PyImath {
 
 template <class T>
@@ -72,6 +75,124 @@ struct op_vec2Cross {
     static inline T apply(const IMATH_NAMESPACE::Vec2<T> &a, const IMATH_NAMESPACE::Vec2<T> &b) { return a.cross(b); }
 };
 
+//
+// Contiguous V3f and V4f arrays use the vector kernels of PyImathSimd.h
+//
+
+template <>
+struct simd_op<op_vecDot<IMATH_NAMESPACE::V3f> > : public simd_op<void>
+{
+    using simd_op<void>::apply;
+
+    static bool apply(FixedArray<float> &r, const FixedArray<IMATH_NAMESPACE::V3f> &a,
+                      const FixedArray<IMATH_NAMESPACE::V3f> &b, size_t start, size_t end)
+    {
+        if (r.stride() != 1 || a.stride() != 1 || b.stride() != 1)
+            return false;
+        simdVecKernels().dot3(&a.direct_index(start).x, &b.direct_index(start).x,
+                              &r.direct_index(start), end - start);
+        return true;
+    }
+};
+
+template <>
+struct simd_op<op_vecDot<IMATH_NAMESPACE::V4f> > : public simd_op<void>
+{
+    using simd_op<void>::apply;
+
+    static bool apply(FixedArray<float> &r, const FixedArray<IMATH_NAMESPACE::V4f> &a,
+                      const FixedArray<IMATH_NAMESPACE::V4f> &b, size_t start, size_t end)
+    {
+        if (r.stride() != 1 || a.stride() != 1 || b.stride() != 1)
+            return false;
+        simdVecKernels().dot4(&a.direct_index(start).x, &b.direct_index(start).x,
+                              &r.direct_index(start), end - start);
+        return true;
+    }
+};
+
+template <>
+struct simd_op<op_vec3Cross<float> > : public simd_op<void>
+{
+    using simd_op<void>::apply;
+
+    static bool apply(FixedArray<IMATH_NAMESPACE::V3f> &r, const FixedArray<IMATH_NAMESPACE::V3f> &a,
+                      const FixedArray<IMATH_NAMESPACE::V3f> &b, size_t start, size_t end)
+    {
+        if (r.stride() != 1 || a.stride() != 1 || b.stride() != 1)
+            return false;
+        simdVecKernels().cross3(&a.direct_index(start).x, &b.direct_index(start).x,
+                                &r.direct_index(start).x, end - start);
+        return true;
+    }
+};
+
+template <class V, SimdVecKernels::Unary SimdVecKernels::*Kernel>
+struct simd_vec_length_op : public simd_op<void>
+{
+    using simd_op<void>::apply;
+
+    static bool apply(FixedArray<float> &r, const FixedArray<V> &a, size_t start, size_t end)
+    {
+        if (r.stride() != 1 || a.stride() != 1)
+            return false;
+        (simdVecKernels().*Kernel)(&a.direct_index(start).x, &r.direct_index(start), end - start);
+        return true;
+    }
+};
+
+template <class V, SimdVecKernels::Unary SimdVecKernels::*Kernel>
+struct simd_vec_normalized_op : public simd_op<void>
+{
+    using simd_op<void>::apply;
+
+    static bool apply(FixedArray<V> &r, const FixedArray<V> &a, size_t start, size_t end)
+    {
+        if (r.stride() != 1 || a.stride() != 1)
+            return false;
+        (simdVecKernels().*Kernel)(&a.direct_index(start).x, &r.direct_index(start).x, end - start);
+        return true;
+    }
+};
+
+template <class V, SimdVecKernels::Unary SimdVecKernels::*Kernel>
+struct simd_vec_normalize_op : public simd_op<void>
+{
+    using simd_op<void>::apply_void;
+
+    static bool apply_void(FixedArray<V> &c, size_t start, size_t end)
+    {
+        if (c.stride() != 1)
+            return false;
+        (simdVecKernels().*Kernel)(&c.direct_index(start).x, &c.direct_index(start).x, end - start);
+        return true;
+    }
+};
+
+template <>
+struct simd_op<op_vecLength<IMATH_NAMESPACE::V3f> >
+    : public simd_vec_length_op<IMATH_NAMESPACE::V3f,&SimdVecKernels::length3> {};
+
+template <>
+struct simd_op<op_vecLength<IMATH_NAMESPACE::V4f> >
+    : public simd_vec_length_op<IMATH_NAMESPACE::V4f,&SimdVecKernels::length4> {};
+
+template <>
+struct simd_op<op_vecNormalized<IMATH_NAMESPACE::V3f> >
+    : public simd_vec_normalized_op<IMATH_NAMESPACE::V3f,&SimdVecKernels::normalized3> {};
+
+template <>
+struct simd_op<op_vecNormalized<IMATH_NAMESPACE::V4f> >
+    : public simd_vec_normalized_op<IMATH_NAMESPACE::V4f,&SimdVecKernels::normalized4> {};
+
+template <>
+struct simd_op<op_vecNormalize<IMATH_NAMESPACE::V3f> >
+    : public simd_vec_normalize_op<IMATH_NAMESPACE::V3f,&SimdVecKernels::normalize3> {};
+
+template <>
+struct simd_op<op_vecNormalize<IMATH_NAMESPACE::V4f> >
+    : public simd_vec_normalize_op<IMATH_NAMESPACE::V4f,&SimdVecKernels::normalize4> {};
+
 }  // namespace PyImath
 
 #endif // _PyImathVecOperators_h_
@@ -36,8 +36,13 @@
 #include <boost/python.hpp>
 #include <PyImath.h>
 #include <PyImathVec.h>
-#include <iostream>
-#include <boost/format.hpp>
+#include <PyImathColor.h>
+#include <PyImathMatrix.h>
+#include <PyImathQuat.h>
+#include <PyImathHalf.h>
+#include <PyImathBufferProtocol.h>
+#include <sstream>
+#include <vector>
 #define NPY_NO_DEPRECATED_API NPY_1_7_API_VERSION
 #include <numpy/arrayobject.h>
 
@@ -67,70 +72,281 @@ setBaseObject (PyObject* nparr, T& arr)
     PyArray_SetBaseObject ((PyArrayObject*) nparr, capsule);
 }
 
-static
-object 
-arrayToNumpy_float(FloatArray &fa)
+template <class T> struct NumpyType;
+
+#define IMATHNUMPY_TYPE(T,npy) \
+    template <> struct NumpyType<T> { enum { value = npy }; };
+
+IMATHNUMPY_TYPE(bool,           NPY_BOOL)
+IMATHNUMPY_TYPE(signed char,    NPY_BYTE)
+IMATHNUMPY_TYPE(unsigned char,  NPY_UBYTE)
+IMATHNUMPY_TYPE(short,          NPY_SHORT)
+IMATHNUMPY_TYPE(unsigned short, NPY_USHORT)
+IMATHNUMPY_TYPE(int,            NPY_INT)
+IMATHNUMPY_TYPE(unsigned int,   NPY_UINT)
+IMATHNUMPY_TYPE(half,           NPY_HALF)
+IMATHNUMPY_TYPE(float,          NPY_FLOAT)
+IMATHNUMPY_TYPE(double,         NPY_DOUBLE)
+
+#undef IMATHNUMPY_TYPE
+
+//
+// Masked reference arrays can't be described with strides, so they
+// are handed to numpy as a gathered copy of the referenced elements.
+//
+template <class Container>
+static Container
+gathered (const Container &a)
 {
-    if (fa.stride() != 1) {
-        throw IEX_NAMESPACE::LogicExc("Unable to make numpy wrapping of strided arrays");
+    return a;
+}
+
+template <class T>
+static FixedArray<T>
+gathered (const FixedArray<T> &a)
+{
+    FixedArray<T> result (a.len());
+    for (size_t i = 0; i < a.len(); ++i)
+        result[i] = a[i];
+    return result;
+}
+
+template <class Container>
+static object
+arrayToNumpy (Container &array)
+{
+    typedef BufferProtocol<Container>       Protocol;
+    typedef typename Protocol::Layout       Layout;
+    typedef typename Protocol::Scalar       Scalar;
+
+    Container a = Layout::exportable (array) ? array : gathered (array);
+
+    Py_ssize_t shape[BUFFER_MAX_NDIM];
+    Py_ssize_t strides[BUFFER_MAX_NDIM];
+    Protocol::describe (a, shape, strides);
+
+    npy_intp dims[BUFFER_MAX_NDIM];
+    npy_intp npyStrides[BUFFER_MAX_NDIM];
+    for (int i = 0; i < Protocol::ndim; ++i)
+    {
+        dims[i] = shape[i];
+        npyStrides[i] = strides[i];
     }
 
-    npy_intp length = fa.len();
-    float *data = &fa[0];
-    PyObject *a = PyArray_SimpleNewFromData(1,&length,NPY_FLOAT,data);
+    PyObject *result = PyArray_New (&PyArray_Type, Protocol::ndim, dims, NumpyType<Scalar>::value,
+                                    npyStrides, Layout::data (a), 0, NPY_ARRAY_WRITEABLE, NULL);
 
-    if (!a) {
+    if (!result) {
         throw_error_already_set();
     }
-    setBaseObject (a, fa);
+    setBaseObject (result, a);
 
-    object retval = object (handle<> (a));
+    object retval = object (handle<> (result));
     return retval;
 }
 
-static
-object 
-arrayToNumpy_V3f(V3fArray &va)
+//
+// The imath array types numpy arrays can be converted to
+//
+struct ArrayType
 {
-    if (va.stride() != 1) {
-        throw IEX_NAMESPACE::LogicExc("Unable to make numpy wrapping of strided arrays");
-    }
+    PyTypeObject *          type;
+    int                     typenum;
+    int                     ndim;       // dimensions of the container
+    std::vector<npy_intp>   extents;    // extents of an element
+    bool                    isDefault;  // used when no type is requested
+    object                  (*convert) (object, const ArrayType &);
+};
 
-    npy_intp length[2];
-    length[0] = va.len();
-    length[1] = 3;
-    float *data = &va[0].x;
-    PyObject *a = PyArray_SimpleNewFromData(2,length,NPY_FLOAT,data);
+static std::vector<ArrayType> &
+arrayTypes ()
+{
+    static std::vector<ArrayType> *types = new std::vector<ArrayType>;
+    return *types;
+}
 
+//
+// Return source as an aligned, writable numpy array of the requested
+// scalar type, sharing its memory where possible.  Arrays whose
+// elements are not contiguous, or whose strides can't be represented
+// by the imath array, are copied.
+//
+static object
+compatibleArray (object source, const ArrayType &info)
+{
+    PyObject *a = PyArray_FromAny (source.ptr(), PyArray_DescrFromType (info.typenum), 0, 0,
+                                   NPY_ARRAY_ALIGNED | NPY_ARRAY_NOTSWAPPED | NPY_ARRAY_WRITEABLE |
+                                   NPY_ARRAY_FORCECAST,
+                                   NULL);
     if (!a) {
         throw_error_already_set();
     }
-    setBaseObject (a, va);
+    object result = object (handle<> (a));
 
-    object retval = object(handle<>(a));
-    return retval;
+    PyArrayObject *arr = reinterpret_cast<PyArrayObject *> (a);
+    int ndim = PyArray_NDIM (arr);
+    const npy_intp *shape = PyArray_SHAPE (arr);
+    const npy_intp *strides = PyArray_STRIDES (arr);
+
+    bool viewable = true;
+    npy_intp stride = PyArray_ITEMSIZE (arr);
+    for (int i = ndim-1; i >= 0 && i >= info.ndim; --i)
+    {
+        viewable = viewable && strides[i] == stride;
+        stride *= shape[i];
+    }
+
+    for (int i = 0; i < info.ndim && i < ndim; ++i)
+        viewable = viewable && strides[i] > 0 && strides[i] % stride == 0;
+
+    if (info.ndim == 2 && ndim >= 2)
+        viewable = viewable && strides[0] % strides[1] == 0;
+
+    if (!viewable)
+    {
+        a = PyArray_FromAny (source.ptr(), PyArray_DescrFromType (info.typenum), 0, 0,
+                             NPY_ARRAY_CARRAY | NPY_ARRAY_ENSURECOPY | NPY_ARRAY_FORCECAST, NULL);
+        if (!a) {
+            throw_error_already_set();
+        }
+        result = object (handle<> (a));
+    }
+
+    return result;
+}
+
+template <class Container>
+static object
+numpyToFixedArray (object source, const ArrayType &info)
+{
+    return object (BufferImport<Container>::fromBuffer (compatibleArray (source, info)));
 }
 
-static
-object 
-arrayToNumpy_int(IntArray &va)
+template <class T>
+static object
+numpyToFixedMatrix (object source, const ArrayType &info)
 {
-    if (va.stride() != 1) {
-        throw IEX_NAMESPACE::LogicExc("Unable to make numpy wrapping of strided arrays");
+    object a = compatibleArray (source, info);
+    PyArrayObject *arr = reinterpret_cast<PyArrayObject *> (a.ptr());
+
+    if (PyArray_NDIM (arr) != 2)
+    {
+        std::stringstream err;
+        err << "Expected a 2 dimensional array for a " << info.type->tp_name
+            << ", got " << PyArray_NDIM (arr) << " dimensions";
+        throw IEX_NAMESPACE::ArgExc (err.str());
     }
 
-    npy_intp length = va.len();
-    int *data = &va[0];
-    PyObject *a = PyArray_SimpleNewFromData(1,&length,NPY_INT,data);
+    int rows = PyArray_DIM (arr, 0);
+    int cols = PyArray_DIM (arr, 1);
+    FixedMatrix<T> m (rows, cols);
+    for (int i = 0; i < rows; ++i)
+        for (int j = 0; j < cols; ++j)
+            m.element (i, j) = *static_cast<T *> (PyArray_GETPTR2 (arr, i, j));
 
+    return object (m);
+}
+
+static const ArrayType &
+findArrayType (object source, object type)
+{
+    const std::vector<ArrayType> &types = arrayTypes();
+
+    if (!type.is_none())
+    {
+        for (size_t i = 0; i < types.size(); ++i)
+        {
+            if (type.ptr() == reinterpret_cast<PyObject *> (types[i].type))
+                return types[i];
+        }
+
+        PyErr_SetString (PyExc_TypeError, "numpyToArray: unsupported imath array type");
+        throw_error_already_set();
+    }
+
+    PyObject *a = PyArray_FromAny (source.ptr(), NULL, 0, 0, 0, NULL);
     if (!a) {
         throw_error_already_set();
     }
-    setBaseObject (a, va);
+    handle<> holder (a);
 
-    object retval = object(handle<>(a));
-    return retval;
+    PyArrayObject *arr = reinterpret_cast<PyArrayObject *> (a);
+    int ndim = PyArray_NDIM (arr);
+    const npy_intp *shape = PyArray_SHAPE (arr);
+
+    for (size_t i = 0; i < types.size(); ++i)
+    {
+        const ArrayType &t = types[i];
+        if (!t.isDefault ||
+            !PyArray_EquivTypenums (t.typenum, PyArray_TYPE (arr)) ||
+            ndim != t.ndim + int(t.extents.size()))
+            continue;
+
+        bool match = true;
+        for (size_t j = 0; j < t.extents.size(); ++j)
+            match = match && shape[t.ndim + j] == t.extents[j];
+
+        if (match)
+            return t;
+    }
+
+    std::stringstream err;
+    err << "numpyToArray: no default imath array type for a numpy array of type "
+        << PyArray_DESCR (arr)->typeobj->tp_name << " and shape (";
+    for (int i = 0; i < ndim; ++i)
+        err << (i ? ", " : "") << shape[i];
+    err << "), the array type must be given explicitly";
+    throw IEX_NAMESPACE::ArgExc (err.str());
+}
+
+static object
+numpyToArray (object source, object type)
+{
+    const ArrayType &info = findArrayType (source, type);
+    return info.convert (source, info);
 }
+
+template <class Container>
+static void
+registerArrayType (bool isDefault, object (*convert) (object, const ArrayType &))
+{
+    typedef BufferProtocol<Container>       Protocol;
+    typedef typename Protocol::Layout       Layout;
+    typedef typename Protocol::Element      Element;
+    typedef typename Protocol::Scalar       Scalar;
+
+    ArrayType t;
+    t.type = converter::registered<Container>::converters.get_class_object();
+    t.typenum = NumpyType<Scalar>::value;
+    t.ndim = Layout::ndim;
+
+    Py_ssize_t extents[BUFFER_MAX_NDIM];
+    Element::extents (extents);
+    t.extents.assign (extents, extents + int(Element::ndim));
+
+    t.isDefault = isDefault;
+    t.convert = convert;
+    arrayTypes().push_back (t);
+
+    std::string doc = std::string ("arrayToNumpy(array) - wrap the given ") +
+                      t.type->tp_name + " as a numpy array";
+    def("arrayToNumpy", &arrayToNumpy<Container>, doc.c_str(), (arg("array")));
+}
+
+template <class Container>
+static void
+registerFixedArray (bool isDefault)
+{
+    registerArrayType<Container> (isDefault, &numpyToFixedArray<Container>);
+}
+
+template <class T>
+static void
+registerFixedMatrix ()
+{
+    registerArrayType<FixedMatrix<T> > (false, &numpyToFixedMatrix<T>);
+}
+
 #if PY_MAJOR_VERSION > 2
 static void *apply_import()
 {
@@ -158,13 +374,63 @@ BOOST_PYTHON_MODULE(imathnumpy)
 
     scope().attr("__doc__") = "Array wrapping module to overlay imath array data with numpy arrays";
 
-    def("arrayToNumpy",&arrayToNumpy_float,
-        "arrayToNumpy(array) - wrap the given FloatArray as a numpy array",
-        (arg("array")));
-    def("arrayToNumpy",&arrayToNumpy_V3f,
-        "arrayToNumpy(array) - wrap the given V3fArray as a numpy array",
-        (arg("array")));
-    def("arrayToNumpy",&arrayToNumpy_int,
-        "arrayToNumpy(array) - wrap the given IntArray as a numpy array",
-        (arg("array")));
+    //
+    // The first type registered for a numpy scalar type and element
+    // shape is the default numpyToArray result for it.
+    //
+    registerFixedArray<BoolArray> (true);
+    registerFixedArray<SignedCharArray> (true);
+    registerFixedArray<UnsignedCharArray> (true);
+    registerFixedArray<ShortArray> (true);
+    registerFixedArray<UnsignedShortArray> (true);
+    registerFixedArray<IntArray> (true);
+    registerFixedArray<UnsignedIntArray> (true);
+    registerFixedArray<FloatArray> (true);
+    registerFixedArray<DoubleArray> (true);
+    registerFixedArray<HalfArray> (true);
+
+    registerFixedArray<V2sArray> (true);
+    registerFixedArray<V2iArray> (true);
+    registerFixedArray<V2fArray> (true);
+    registerFixedArray<V2dArray> (true);
+    registerFixedArray<V3sArray> (true);
+    registerFixedArray<V3iArray> (true);
+    registerFixedArray<V3fArray> (true);
+    registerFixedArray<V3dArray> (true);
+    registerFixedArray<V3hArray> (true);
+    registerFixedArray<V4sArray> (true);
+    registerFixedArray<V4iArray> (true);
+    registerFixedArray<V4fArray> (true);
+    registerFixedArray<V4dArray> (true);
+
+    registerFixedArray<M22fArray> (true);
+    registerFixedArray<M22dArray> (true);
+    registerFixedArray<M33fArray> (true);
+    registerFixedArray<M33dArray> (true);
+    registerFixedArray<M44fArray> (true);
+    registerFixedArray<M44dArray> (true);
+
+    registerFixedArray<C3fArray> (false);
+    registerFixedArray<C4fArray> (false);
+    registerFixedArray<C4hArray> (false);
+    registerFixedArray<QuatfArray> (false);
+    registerFixedArray<QuatdArray> (false);
+
+    registerFixedArray<IntArray2D> (false);
+    registerFixedArray<FloatArray2D> (false);
+    registerFixedArray<DoubleArray2D> (false);
+    registerFixedArray<Color4fArray> (false);
+
+    registerFixedMatrix<int> ();
+    registerFixedMatrix<float> ();
+    registerFixedMatrix<double> ();
+
+    def("numpyToArray", &numpyToArray,
+        "numpyToArray(array, type=None) - return an imath array of the given type\n"
+        "holding the data of a numpy array.  The result shares the memory of the\n"
+        "numpy array when its dtype and strides allow it, and holds a copy\n"
+        "otherwise; matrices are always copied.  Without a type, a 1 dimensional\n"
+        "array of scalars, vectors or matrices matching the numpy array's dtype\n"
+        "and trailing dimensions is returned.",
+        (arg("array"), arg("type") = object()));
 }
@@ -1,8 +1,10 @@
 #!@PYTHON@
 
+import array
 import math
 import random
 import string
+import struct
 import sys
 import traceback
 from math import cos, pi, sin, sqrt
@@ -8913,6 +8915,990 @@ def testWstringArray():
 testList.append(("testWstringArray",testWstringArray))
 
 
+# -------------------------------------------------------------------------
+# Verify that array operations give the same results regardless of the
+# number of threads used to evaluate them.
+
+def testThreading():
+
+    def equalArrays(x, y):
+        return len(x) == len(y) and all(x[i] == y[i] for i in range(len(x)))
+
+    n = 10007
+    a = V3fArray(n)
+    b = FloatArray(n)
+    for i in range(n):
+        a[i] = V3f(i, -i, 0.5*i)
+        b[i] = i % 17
+
+    oldCount = numThreads()
+    assert oldCount >= 1
+
+    setNumThreads(1)
+    assert numThreads() == 1
+    serialSum = a + a*b
+    serialLen = a.length()
+    serialBox = Box3f()
+    serialBox.extendBy(a)
+
+    for count in (2, 3, 8):
+        setNumThreads(count)
+        assert numThreads() == count
+        assert equalArrays(a + a*b, serialSum)
+        assert equalArrays(a.length(), serialLen)
+        box = Box3f()
+        box.extendBy(a)
+        assert box == serialBox
+
+        # arrays shorter than the number of threads
+        c = FloatArray(1)
+        c[0] = 2
+        assert (c*c)[0] == 4
+
+    # replacing the pool while other threads dispatch on it, with
+    # the GIL released
+    import threading
+    big = FloatArray(200000)
+    big[:] = 1
+    errors = []
+    done = threading.Event()
+
+    def reduceLoop():
+        try:
+            while not done.is_set():
+                assert big.sum() == len(big) and big.max() == 1
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=reduceLoop) for i in range(3)]
+    for t in threads:
+        t.start()
+    for i in range(200):
+        setNumThreads((2, 1, 5, 3)[i % 4])
+    done.set()
+    for t in threads:
+        t.join()
+    assert not errors
+
+    setNumThreads(oldCount)
+    assert numThreads() == oldCount
+
+    print ("ok")
+
+testList.append (('testThreading',testThreading))
+
+
+def testThreadedMasking():
+
+    # large enough for the mask to be compacted in several blocks
+    n = 200003
+    a = IntArray(n)
+    mask = IntArray(n)
+    for i in range(n):
+        a[i] = i
+        mask[i] = (i % 7 == 3) or (i > 150000 and i % 2 == 0)
+
+    expected = [i for i in range(n) if mask[i]]
+
+    oldCount = numThreads()
+    for count in (1, 2, 5):
+        setNumThreads(count)
+
+        m = a[mask]
+        assert len(m) == len(expected)
+        assert all(m[i] == expected[i] for i in range(0, len(m), 97))
+        assert m[len(m)-1] == expected[-1]
+
+        s = a[n-1:0:-3]
+        assert len(s) == len(range(n-1, 0, -3))
+        assert s[0] == n-1 and s[1] == n-4 and s[len(s)-1] == range(n-1, 0, -3)[-1]
+
+        e = a.ifelse(mask, -1)
+        assert e[3] == 3 and e[4] == -1 and e[150002] == 150002
+
+        c = IntArray(n)
+        c[mask] = m
+        assert c[expected[-1]] == expected[-1] and c[4] == 0
+
+        c[:n-1:2] = a[1::2]
+        assert c[0] == 1 and c[n-3] == n-2
+
+    setNumThreads(oldCount)
+
+    print ("ok")
+
+testList.append (('testThreadedMasking',testThreadedMasking))
+
+
+def testArrayExpr():
+
+    def equalArrays(x, y):
+        return len(x) == len(y) and all(x[i] == y[i] for i in range(len(x)))
+
+    # longer than an evaluation block
+    n = 1000
+    a = V3fArray(n)
+    b = FloatArray(n)
+    c = V3fArray(n)
+    for i in range(n):
+        a[i] = V3f(i, 2*i, 3)
+        b[i] = 0.5*i
+        c[i] = V3f(1, i % 7, -1)
+
+    e = expr(a)*b + expr(c)*2 - a
+    assert isinstance(e, V3fArrayExpr)
+    assert len(e) == n
+    assert equalArrays(e.eval(), a*b + c*2 - a)
+
+    assert equalArrays((2*expr(a) - c).eval(), 2*a - c)
+    assert equalArrays((b*expr(a)/4.0).eval(), b*a/4.0)
+    assert equalArrays((-expr(b) + 1).eval(), -b + 1)
+    assert equalArrays((1 - expr(b)).eval(), 1 - b)
+    assert equalArrays(expr(a).dot(c).eval(), a.dot(c))
+    assert equalArrays(expr(a).cross(c).eval(), a.cross(c))
+    assert equalArrays(expr(c).length2().eval(), c.length2())
+
+    # strided and masked arrays
+    assert equalArrays((expr(a.y)*b).eval(), a.y*b)
+    mask = b > 100
+    assert equalArrays((expr(b[mask]) + 1).eval(), b[mask] + 1)
+
+    # evaluation into an existing array, which may be an operand
+    d = FloatArray(n)
+    (expr(b)*b + 1).evalInto(d)
+    assert equalArrays(d, b*b + 1)
+    (expr(d) - 1).evalInto(d)
+    assert equalArrays(d, b*b)
+
+    try:
+        (expr(b) + FloatArray(3)).eval()
+    except:
+        pass
+    else:
+        assert 0
+
+    print ("ok")
+
+testList.append (('testArrayExpr',testArrayExpr))
+
+
+# -------------------------------------------------------------------------
+# Verify that array data is exposed through the buffer protocol without
+# copying.
+
+def testBufferProtocol():
+
+    a = V3fArray(4)
+    for i in range(4):
+        a[i] = V3f(i, 2*i, 3*i)
+
+    m = memoryview(a)
+    assert m.format == 'f'
+    assert m.itemsize == 4
+    assert m.shape == (4, 3)
+    assert m.strides == (12, 4)
+    assert not m.readonly
+
+    # python 2 memoryviews can't index or list multi-dimensional views
+    if sys.version_info[0] > 2:
+        assert m.tolist()[3] == [3, 6, 9]
+
+        # writes through the view are seen by the array
+        m[1,2] = 42
+        assert a[1] == V3f(1, 2, 42)
+
+        # the view keeps the array data alive
+        del a
+        assert m[1,2] == 42
+        m.release()
+
+    assert memoryview(IntArray(5)).format == 'i'
+    assert memoryview(DoubleArray(5)).format == 'd'
+    assert memoryview(UnsignedCharArray(5)).format == 'B'
+    assert memoryview(V2dArray(5)).shape == (5, 2)
+    assert memoryview(V4iArray(5)).shape == (5, 4)
+    assert memoryview(C4fArray(5)).shape == (5, 4)
+    assert memoryview(QuatdArray(5)).shape == (5, 4)
+    assert memoryview(Box3fArray(5)).shape == (5, 2, 3)
+    assert memoryview(M33dArray(5)).shape == (5, 3, 3)
+    if sys.version_info[0] > 2:
+        assert memoryview(M44fArray(1)).tolist()[0] == [[1,0,0,0],[0,1,0,0],[0,0,1,0],[0,0,0,1]]
+
+    # 2D arrays and matrices are row major
+    c = Color4fArray2D(3, 2)
+    c[1,0] = Color4f(1, 2, 3, 4)
+    mc = memoryview(c)
+    assert mc.shape == (2, 3, 4)
+    assert mc.strides == (48, 16, 4)
+    if sys.version_info[0] > 2:
+        assert mc[0,1,3] == 4
+
+    fm = FloatMatrix(2, 3)
+    assert memoryview(fm).shape == (2, 3)
+
+    # strided arrays are exported with their strides
+    v = V3fArray(3)
+    for i in range(3):
+        v[i] = V3f(i, 10+i, 20+i)
+    y = memoryview(v.y)
+    assert y.strides == (12,)
+    if sys.version_info[0] > 2:
+        assert y.tolist() == [10, 11, 12]
+        assert struct.unpack('3f', bytes(v.y)) == (10, 11, 12)
+
+    # but not to consumers that ask for a contiguous buffer, as
+    # PyObject_GetBuffer(obj, &view, PyBUF_C_CONTIGUOUS) does
+    try:
+        import ctypes
+        getBuffer = ctypes.pythonapi.PyObject_GetBuffer
+        releaseBuffer = ctypes.pythonapi.PyBuffer_Release
+    except (ImportError, AttributeError):
+        getBuffer = None
+
+    if getBuffer:
+        class Py_buffer(ctypes.Structure):
+            _fields_ = [('buf', ctypes.c_void_p), ('obj', ctypes.c_void_p),
+                        ('len', ctypes.c_ssize_t), ('itemsize', ctypes.c_ssize_t),
+                        ('readonly', ctypes.c_int), ('ndim', ctypes.c_int),
+                        ('format', ctypes.c_char_p), ('shape', ctypes.c_void_p),
+                        ('strides', ctypes.c_void_p), ('suboffsets', ctypes.c_void_p),
+                        ('internal', ctypes.c_void_p)]
+
+        getBuffer.argtypes = [ctypes.py_object, ctypes.POINTER(Py_buffer), ctypes.c_int]
+        releaseBuffer.argtypes = [ctypes.POINTER(Py_buffer)]
+
+        PyBUF_STRIDES = 0x18
+        PyBUF_C_CONTIGUOUS = 0x20 | PyBUF_STRIDES
+        PyBUF_F_CONTIGUOUS = 0x40 | PyBUF_STRIDES
+        PyBUF_ANY_CONTIGUOUS = 0x80 | PyBUF_STRIDES
+
+        def exported(obj, flags):
+            view = Py_buffer()
+            try:
+                getBuffer(obj, ctypes.byref(view), flags)
+            except BufferError:
+                return False
+            releaseBuffer(ctypes.byref(view))
+            return True
+
+        f = FloatArray(6)
+        for flags in (PyBUF_STRIDES, PyBUF_C_CONTIGUOUS,
+                      PyBUF_F_CONTIGUOUS, PyBUF_ANY_CONTIGUOUS):
+            assert exported(f, flags)
+            assert exported(v.y, flags) == (flags == PyBUF_STRIDES)
+
+        # vector arrays are row major
+        assert exported(v, PyBUF_C_CONTIGUOUS)
+        assert exported(v, PyBUF_ANY_CONTIGUOUS)
+        assert not exported(v, PyBUF_F_CONTIGUOUS)
+
+    # masked arrays can't be exported without a copy
+    mask = IntArray(3)
+    mask[1] = 1
+    try:
+        memoryview(v[mask])
+    except BufferError:
+        pass
+    else:
+        assert 0
+
+    print ("ok")
+
+testList.append (('testBufferProtocol',testBufferProtocol))
+
+
+def testFromBuffer():
+
+    # arrays view the memory of the source object, here a 2D array
+    # of floats viewed as rows of vectors
+    b = FloatArray2D(3, 2)
+    for y in range(2):
+        for x in range(3):
+            b[x,y] = 3*y + x + 1
+    a = V3fArray.fromBuffer(b)
+    assert len(a) == 2
+    assert a[1] == V3f(4, 5, 6)
+    a[0] = V3f(7, 8, 9)
+    assert [b.item(x,0) for x in range(3)] == [7, 8, 9]
+
+    # and keep it alive
+    del b
+    assert a[0] == V3f(7, 8, 9)
+
+    # strided sources
+    v = V3fArray(4)
+    for i in range(4):
+        v[i] = V3f(i, 2*i, 3*i)
+    f = FloatArray.fromBuffer(v.y)
+    assert list(f) == [0, 2, 4, 6]
+    f[1] = 42
+    assert v[1] == V3f(1, 42, 3)
+
+    m = M44dArray.fromBuffer(M44dArray(3))
+    assert len(m) == 3 and m[2] == M44d()
+
+    c = Color4fArray2D(3, 2)
+    c[2,1] = Color4f(1, 2, 3, 4)
+    d = Color4fArray2D.fromBuffer(c)
+    assert d.size() == (3, 2)
+    assert d.item(2,1) == Color4f(1, 2, 3, 4)
+
+    # mismatched formats, shapes and read only buffers are rejected
+    sources = [(DoubleArray(1), FloatArray),
+               (FloatArray(3), V3fArray),
+               (b'abcd', FloatArray)]
+
+    # python 2 has no memoryview.cast, and its array.array doesn't
+    # export buffers
+    if sys.version_info[0] > 2:
+        b = bytearray(struct.pack('6f', 1, 2, 3, 4, 5, 6))
+        a = V3fArray.fromBuffer(memoryview(b).cast('f', (2, 3)))
+        a[0] = V3f(7, 8, 9)
+        assert struct.unpack('6f', b) == (7, 8, 9, 4, 5, 6)
+
+        f = FloatArray.fromBuffer(memoryview(array.array('f', range(8)))[::2])
+        assert list(f) == [0, 2, 4, 6]
+
+        sources += [(array.array('d', [1]), FloatArray),
+                    (memoryview(bytearray(9))[1:].cast('f'), FloatArray)]
+
+    for src, cls in sources:
+        try:
+            cls.fromBuffer(src)
+        except (iex.ArgExc, BufferError):
+            pass
+        else:
+            assert 0
+
+    print ("ok")
+
+testList.append (('testFromBuffer',testFromBuffer))
+
+
+# -------------------------------------------------------------------------
+# Verify that the SIMD kernels of every supported instruction set give the
+# same results as the element loops, which masked references always use.
+
+def testSimdKernels():
+
+    def equalArrays(x, y):
+        return len(x) == len(y) and all(x[i] == y[i] for i in range(len(x)))
+
+    # not a multiple of the vector widths, so the tails are covered
+    n = 1003
+    r = random.Random(7)
+
+    f = FloatArray(n)
+    g = FloatArray(n)
+    t = FloatArray(n)
+    d = DoubleArray(n)
+    e = DoubleArray(n)
+    a = V3fArray(n)
+    b = V3fArray(n)
+    p = V4fArray(n)
+    q = V4fArray(n)
+    for i in range(n):
+        f[i] = r.uniform(-10, 10)
+        g[i] = r.uniform(0.5, 10)
+        t[i] = r.uniform(0, 1)
+        d[i] = r.uniform(-10, 10)
+        e[i] = r.uniform(0.5, 10)
+        a[i] = V3f(r.uniform(-1, 1), r.uniform(-1, 1), r.uniform(-1, 1))
+        b[i] = V3f(r.uniform(-1, 1), r.uniform(-1, 1), r.uniform(-1, 1))
+        p[i] = V4f(r.uniform(-1, 1), r.uniform(-1, 1), r.uniform(-1, 1), r.uniform(-1, 1))
+        q[i] = V4f(r.uniform(-1, 1), r.uniform(-1, 1), r.uniform(-1, 1), r.uniform(-1, 1))
+
+    # null and tiny vectors go through V3f::lengthTiny()
+    a[5] = V3f(0, 0, 0)
+    a[17] = V3f(1e-30, -2e-30, 0)
+    a[1001] = V3f(0, 0, 0)
+    p[9] = V4f(0, 0, 0, 0)
+    p[10] = V4f(0, 3e-25, 0, 1e-25)
+
+    full = IntArray(n)
+    full[:] = 1
+
+    def check():
+        for x, y in ((f, g), (d, e)):
+            assert equalArrays(x + y, x[full] + y[full])
+            assert equalArrays(x - y, x[full] - y[full])
+            assert equalArrays(x * y, x[full] * y[full])
+            assert equalArrays(x / y, x[full] / y[full])
+            assert equalArrays(x + 3, x[full] + 3)
+            assert equalArrays(3 - x, 3 - x[full])
+            assert equalArrays(x / 3, x[full] / 3)
+
+        assert equalArrays(lerp(f, g, t), lerp(f[full], g[full], t[full]))
+        assert equalArrays(lerp(f, 2.0, t), lerp(f[full], 2.0, t[full]))
+        assert equalArrays(lerp(d, e, 0.25), lerp(d[full], e[full], 0.25))
+        assert equalArrays(clamp(f, -2.0, g), clamp(f[full], -2.0, g[full]))
+        assert equalArrays(clamp(d, -2.0, 2.0), clamp(d[full], -2.0, 2.0))
+
+        for x, y in ((a, b), (p, q)):
+            assert equalArrays(x + y, x[full] + y[full])
+            assert equalArrays(x - y, x[full] - y[full])
+            assert equalArrays(x * y, x[full] * y[full])
+            assert equalArrays(x * 2.5, x[full] * 2.5)
+            assert equalArrays(x / 3.0, x[full] / 3.0)
+            assert equalArrays(x.dot(y), x[full].dot(y[full]))
+            assert equalArrays(x.length(), x[full].length())
+            assert equalArrays(x.normalized(), x[full].normalized())
+
+        assert equalArrays(a.cross(b), a[full].cross(b[full]))
+
+        # in place operations, including normalize of null vectors
+        for x in (f, d, a, p):
+            y = x[:]
+            z = x[:]
+            y *= 1.5
+            z[full] *= 1.5
+            assert equalArrays(y, z)
+            y += x
+            z[full] += x
+            assert equalArrays(y, z)
+
+        for x in (a, p):
+            y = x[:]
+            z = x[:]
+            y.normalize()
+            z[full].normalize()
+            assert equalArrays(y, z)
+
+        # strided arrays fall back to the element loops
+        assert equalArrays(a.x + f, a.x[full] + f[full])
+        assert equalArrays(a.y * a.z, a[full].y * a[full].z)
+
+    level = simdLevel()
+    assert simdLevel() == maxSimdLevel()
+    try:
+        for l in (SIMD_NONE, SIMD_SSE2, SIMD_AVX2):
+            setSimdLevel(l)
+            assert simdLevel() == min(l, maxSimdLevel())
+            check()
+    finally:
+        setSimdLevel(level)
+
+    print ("ok")
+
+testList.append (('testSimdKernels',testSimdKernels))
+
+
+# -------------------------------------------------------------------------
+# Verify the batched transforms of vector arrays by one matrix, or by an
+# array of matrices.
+
+def testM44ArrayTransforms():
+
+    def equalArrays(x, y):
+        return len(x) == len(y) and all(x[i] == y[i] for i in range(len(x)))
+
+    n = 1003
+    r = random.Random(3)
+
+    for Vec, VecArray, Mat, MatArray in ((V3f, V3fArray, M44f, M44fArray),
+                                         (V3d, V3dArray, M44d, M44dArray)):
+        m = Mat().rotate(Vec(0.3, -0.2, 1.1)).scale(Vec(2, 3, 0.5)).translate(Vec(4, -5, 6))
+        m[0][3] = 0.01          # make the point transforms projective
+        a = VecArray(n)
+        ma = MatArray(n)
+        for i in range(n):
+            a[i] = Vec(r.uniform(-10, 10), r.uniform(-10, 10), r.uniform(-10, 10))
+            ma[i] = Mat().rotate(Vec(0, i * 0.01, 0)).translate(Vec(i, 0, -i))
+
+        for l in (SIMD_NONE, maxSimdLevel()):
+            setSimdLevel(l)
+
+            b = a * m
+            assert isinstance(b, VecArray)
+            assert equalArrays(b, [a[i] * m for i in range(n)])
+            assert equalArrays(m.multVecMatrix(a), [m.multVecMatrix(a[i]) for i in range(n)])
+            assert equalArrays(m.multDirMatrix(a), [m.multDirMatrix(a[i]) for i in range(n)])
+
+            # masked and strided sources
+            mask = IntArray(n)
+            mask[:] = 1
+            mask[::3] = 0
+            am = a[mask]
+            assert equalArrays(m.multVecMatrix(am), [m.multVecMatrix(am[i]) for i in range(len(am))])
+            assert equalArrays(am * m, [am[i] * m for i in range(len(am))])
+            s = a[::2]
+            assert equalArrays(m.multVecMatrix(s), [m.multVecMatrix(s[i]) for i in range(len(s))])
+
+        setSimdLevel(maxSimdLevel())
+
+        # one matrix per vector
+        assert equalArrays(a * ma, [a[i] * ma[i] for i in range(n)])
+        assert equalArrays(ma.multVecMatrix(a), [ma[i].multVecMatrix(a[i]) for i in range(n)])
+        assert equalArrays(ma.multDirMatrix(a), [ma[i].multDirMatrix(a[i]) for i in range(n)])
+
+        try:
+            ma.multVecMatrix(VecArray(3))
+        except:
+            pass
+        else:
+            assert 0
+
+    print ("ok")
+
+testList.append (('testM44ArrayTransforms',testM44ArrayTransforms))
+
+
+# -------------------------------------------------------------------------
+# Verify the parallel reductions of scalar and vector arrays against
+# sequential loops, over lengths spanning several blocks.
+
+def testReductions():
+
+    n = 16384 * 3 + 123
+    r = random.Random(9)
+
+    def argmin(x):
+        return min(range(len(x)), key=lambda i: (x[i], i))
+
+    def argmax(x):
+        return min(range(len(x)), key=lambda i: (-x[i], i))
+
+    def checkScalars(a):
+        x = [a[i] for i in range(len(a))]
+        assert a.min() == min(x) and a.max() == max(x)
+        assert a.argmin() == argmin(x) and a.argmax() == argmax(x)
+        assert a.bounds() == (min(x), max(x))
+        assert abs(a.sum() - sum(x)) <= 1e-9 * len(x) * max(abs(v) for v in x)
+        assert abs(a.mean() - sum(x) / len(x)) <= 1e-9 * max(abs(v) for v in x)
+
+    for Array, lo, hi in ((IntArray, -1000000, 1000000),
+                          (UnsignedCharArray, 0, 255),
+                          (ShortArray, -30000, 30000)):
+        a = Array(n)
+        for i in range(n):
+            a[i] = r.randint(lo, hi)
+        checkScalars(a)
+        assert a.sum() == sum(a[i] for i in range(n))
+
+    for Array in (FloatArray, DoubleArray):
+        a = Array(n)
+        for i in range(n):
+            a[i] = r.uniform(-100, 100)
+        checkScalars(a)
+
+        # repeated extrema report the first index
+        a[7] = 1000
+        a[n - 1] = 1000
+        a[n // 2] = -1000
+        a[n - 2] = -1000
+        assert a.argmax() == 7 and a.argmin() == n // 2
+
+        # masked references
+        mask = IntArray(n)
+        mask[:] = 1
+        mask[::5] = 0
+        checkScalars(a[mask])
+
+    for Vec, VecArray, Box in ((V2f, V2fArray, Box2f), (V3f, V3fArray, Box3f),
+                               (V3d, V3dArray, Box3d), (V3i, V3iArray, Box3i)):
+        a = VecArray(n)
+        k = len(Vec())
+        for i in range(n):
+            a[i] = Vec(*[r.randint(-1000, 1000) for c in range(k)])
+
+        x = [a[i] for i in range(n)]
+        lo = Vec(*[min(v[c] for v in x) for c in range(k)])
+        hi = Vec(*[max(v[c] for v in x) for c in range(k)])
+        assert a.min() == lo and a.max() == hi
+        assert a.bounds() == Box(lo, hi)
+        assert a.argmin() == tuple(argmin([v[c] for v in x]) for c in range(k))
+        assert a.argmax() == tuple(argmax([v[c] for v in x]) for c in range(k))
+        assert a.sum() == Vec(*[sum(v[c] for v in x) for c in range(k)])
+        m = a.mean()
+        assert m.equalWithAbsError(type(m)(*[sum(v[c] for v in x) / n for c in range(k)]), 1e-3)
+        if VecArray in (V3fArray, V3dArray):
+            assert computeBoundingBox(a) == Box(lo, hi)
+
+    a = V4fArray(n)
+    for i in range(n):
+        a[i] = V4f(i, -i, i % 7, 1)
+    assert a.bounds() == (V4f(0, 1 - n, 0, 1), V4f(n - 1, 0, 6, 1))
+    assert a.argmax() == (n - 1, 0, 6, 0)
+
+    # NaNs are skipped unless they come first, wherever the blocks
+    # the array is reduced in start
+    nan = float('nan')
+    for m in (10, 40000):
+        a = FloatArray(m)
+        a[:] = 5
+        i = 2 if m == 10 else 16384
+        a[i] = nan
+        a[i + 1] = 1
+        a[i + 2] = 9
+        assert a.min() == 1 and a.argmin() == i + 1
+        assert a.max() == 9 and a.argmax() == i + 2
+
+        a[0] = nan
+        assert math.isnan(a.min()) and a.argmin() == 0
+        assert math.isnan(a.max()) and a.argmax() == 0
+
+    a = V3fArray(40000)
+    a[:] = V3f(5, 5, 5)
+    a[16384] = V3f(nan, 3, nan)
+    a[16385] = V3f(1, 4, 2)
+    assert a.min() == V3f(1, 3, 2) and a.argmin() == (16385, 16384, 16385)
+    a[0] = V3f(5, nan, 5)
+    m = a.min()
+    assert m[0] == 1 and math.isnan(m[1]) and m[2] == 2
+    assert a.argmin() == (16385, 0, 16385)
+
+    # empty arrays
+    assert FloatArray(0).sum() == 0 and FloatArray(0).min() == 0
+    assert V3fArray(0).bounds().isEmpty()
+    for f in (lambda: FloatArray(0).mean(), lambda: IntArray(0).argmin(),
+              lambda: V3fArray(0).argmax()):
+        try:
+            f()
+        except:
+            pass
+        else:
+            assert 0
+
+    print ("ok")
+
+testList.append (('testReductions',testReductions))
+
+
+# -------------------------------------------------------------------------
+# Verify the element-wise quaternion and euler array operations against
+# the single value ones.
+
+def testQuatEulerArrayOps():
+
+    n = 257
+    r = random.Random(5)
+
+    def equalArrays(x, y):
+        return len(x) == len(y) and all(x[i] == y[i] for i in range(len(x)))
+
+    for Quat, QuatArray, Euler, EulerArray, Vec, VecArray, Array in \
+            ((Quatf, QuatfArray, Eulerf, EulerfArray, V3f, V3fArray, FloatArray),
+             (Quatd, QuatdArray, Eulerd, EulerdArray, V3d, V3dArray, DoubleArray)):
+
+        e = EulerArray(n)
+        q = QuatArray(n)
+        p = QuatArray(n)
+        v = VecArray(n)
+        t = Array(n)
+        for i in range(n):
+            e[i] = Euler(Vec(r.uniform(-3, 3), r.uniform(-3, 3), r.uniform(-3, 3)))
+            q[i] = e[i].toQuat()
+            p[i] = Quat().setAxisAngle(Vec(1, 2, 3).normalized(), r.uniform(-3, 3))
+            v[i] = Vec(r.uniform(-10, 10), r.uniform(-10, 10), r.uniform(-10, 10))
+            t[i] = r.uniform(0, 1)
+
+        assert equalArrays(e.toQuat(), q)
+        assert equalArrays(e.toMatrix33(), [e[i].toMatrix33() for i in range(n)])
+        assert equalArrays(e.toMatrix44(), [e[i].toMatrix44() for i in range(n)])
+
+        assert equalArrays(q.slerp(p, t), [q[i].slerp(p[i], t[i]) for i in range(n)])
+        assert equalArrays(q.slerp(p[3], 0.25), [q[i].slerp(p[3], 0.25) for i in range(n)])
+        assert equalArrays(q.slerp(p, 0.75), [q[i].slerp(p[i], 0.75) for i in range(n)])
+        assert equalArrays(q.inverse(), [q[i].inverse() for i in range(n)])
+        assert equalArrays(q.normalized(), [q[i].normalized() for i in range(n)])
+        assert equalArrays(q.toMatrix33(), [q[i].toMatrix33() for i in range(n)])
+        assert equalArrays(q.toMatrix44(), [q[i].toMatrix44() for i in range(n)])
+        assert equalArrays(q.rotateVector(v), [q[i].rotateVector(v[i]) for i in range(n)])
+        assert equalArrays(q.rotateVector(v[0]), [q[i].rotateVector(v[0]) for i in range(n)])
+
+        # in place operations on a masked reference
+        s = q[:]
+        mask = IntArray(n)
+        mask[:] = 0
+        mask[::4] = 1
+        s[mask].invert()
+        assert equalArrays(s, [q[i].inverse() if i % 4 == 0 else q[i] for i in range(n)])
+        s = q[:]
+        s *= QuatArray(Quat(2, 0, 0, 0), n)
+        s.normalize()
+        assert equalArrays(s, [(q[i] * Quat(2, 0, 0, 0)).normalized() for i in range(n)])
+
+        try:
+            q.slerp(QuatArray(3), t)
+        except:
+            pass
+        else:
+            assert 0
+
+    print ("ok")
+
+testList.append (('testQuatEulerArrayOps',testQuatEulerArrayOps))
+
+
+# -------------------------------------------------------------------------
+# Verify the bulk random array generators: reproducible from the seed,
+# independent of the number of threads, and with the distributions of
+# the single value generators.
+
+def testRandomArrays():
+
+    n = 100003
+
+    def equalArrays(x, y):
+        return len(x) == len(y) and all(x[i] == y[i] for i in range(len(x)))
+
+    oldCount = numThreads()
+
+    for Rand, Array in ((Rand32, FloatArray), (Rand48, DoubleArray)):
+        results = []
+        for count in (1, 4):
+            setNumThreads(count)
+            r = Rand(17)
+            results.append((r.nextfArray(n), r.nextfArray(n, -2, 3), r.nextiArray(n),
+                            r.nextbArray(n), r.nextGaussArray(n),
+                            r.nextSolidSphereArray(n, V3f()),
+                            r.nextHollowSphereArray(n, V2d()),
+                            r.nextGaussSphereArray(n, V3d())))
+        setNumThreads(oldCount)
+
+        for a, b in zip(results[0], results[1]):
+            assert equalArrays(a, b)
+
+        f, g, i, b, gauss, solid, hollow, gsphere = results[0]
+        assert isinstance(f, Array) and isinstance(g, Array)
+        assert f.min() >= 0 and f.max() < 1 and abs(f.mean() - 0.5) < 0.01
+        assert g.min() >= -2 and g.max() <= 3 and abs(g.mean() - 0.5) < 0.05
+        assert isinstance(gauss, FloatArray)
+        assert abs(gauss.mean()) < 0.02 and abs((gauss * gauss).mean() - 1) < 0.02
+        assert 0.49 < sum(1 for k in range(n) if b[k]) / float(n) < 0.51
+        assert solid.length().max() <= 1 and abs(solid.mean().length()) < 0.02
+        assert isinstance(hollow, V2dArray)
+        assert all(abs(hollow[k].length() - 1) < 1e-9 for k in range(0, n, 97))
+        assert isinstance(gsphere, V3dArray)
+
+        # successive arrays differ, the seed reproduces them
+        r = Rand(17)
+        assert equalArrays(r.nextfArray(n), f)
+        assert not equalArrays(r.nextfArray(n), f)
+
+        assert len(Rand(1).nextfArray(0)) == 0
+        try:
+            Rand(1).nextfArray(-1)
+        except:
+            pass
+        else:
+            assert 0
+
+    print ("ok")
+
+testList.append (('testRandomArrays',testRandomArrays))
+
+
+# -------------------------------------------------------------------------
+# Verify the half arrays and their conversions to and from the float
+# arrays, which round to nearest like half(float) with either kernel set.
+
+def testHalfArrays():
+
+    # round to the nearest half, ties to even, without struct's 'e'
+    # format, which python 2 lacks
+    def toHalf(x):
+        if x != x or x == 0:
+            return x
+        if abs(x) >= 65520:
+            return math.copysign(float('inf'), x)
+        e = math.frexp(abs(x))[1]
+        q = 2.0 ** (max(e, -13) - 11)
+        t = abs(x) / q
+        n = math.floor(t)
+        if t - n > 0.5 or (t - n == 0.5 and n % 2 == 1):
+            n += 1
+        return math.copysign(n * q, x)
+
+    def equalArrays(x, y):
+        return len(x) == len(y) and all(x[i] == y[i] for i in range(len(x)))
+
+    n = 1003
+    r = random.Random(5)
+
+    f = FloatArray(n)
+    for i in range(n):
+        f[i] = r.uniform(-70000, 70000) * r.choice((1, 1e-3, 1e-6))
+    f[0] = 0.1
+    f[1] = 65504.0
+    f[2] = 65520.0          # rounds to infinity
+    f[3] = 2.0**-24         # smallest subnormal
+    f[4] = -0.0
+    expected = [toHalf(f[i]) for i in range(n)]
+
+    v = V3fArray(n)
+    c = C4fArray(n)
+    for i in range(n):
+        v[i] = V3f(f[i], -f[i] * 0.5, 1.0 / (i + 1))
+        c[i] = Color4f(f[i], 0.25, i * 0.001, 1)
+
+    level = simdLevel()
+    results = []
+    try:
+        for l in (SIMD_NONE, SIMD_SSE2, SIMD_AVX2):
+            setSimdLevel(l)
+
+            h = f.toHalf()
+            assert isinstance(h, HalfArray) and len(h) == n
+            assert equalArrays(h, expected)
+            assert isinstance(h.toFloat(), FloatArray)
+            assert equalArrays(h.toFloat(), expected)
+            assert equalArrays(h.toFloat().toHalf(), h)
+
+            vh = v.toHalf()
+            assert isinstance(vh, V3hArray)
+            assert all(vh[i] == V3f(toHalf(v[i].x), toHalf(v[i].y), toHalf(v[i].z))
+                       for i in range(5, n))
+            assert equalArrays(vh.toFloat().toHalf(), vh)
+
+            ch = c.toHalf()
+            assert isinstance(ch, C4hArray)
+            assert equalArrays(ch.r, h)
+            assert equalArrays(ch.toFloat().toHalf(), ch)
+
+            # masked and strided sources
+            mask = IntArray(n)
+            mask[:] = 1
+            mask[::3] = 0
+            assert equalArrays(f[mask].toHalf(), [expected[i] for i in range(n) if i % 3])
+            assert equalArrays(v.y.toHalf(), [toHalf(v[i].y) for i in range(n)])
+            assert equalArrays(h[mask].toFloat(), [expected[i] for i in range(n) if i % 3])
+
+            results.append((h, vh, ch))
+    finally:
+        setSimdLevel(level)
+
+    for a, b in zip(results[0], results[-1]):
+        assert equalArrays(a, b)
+
+    # elements and arithmetic
+    h = HalfArray(4)
+    assert equalArrays(h, [0, 0, 0, 0])
+    h[:] = 1.5
+    h[2] = 0.1
+    assert h[2] == toHalf(0.1) and h[-1] == 1.5
+    assert equalArrays(h + h, [3, 3, 2 * toHalf(0.1), 3])
+    assert equalArrays(h * 2.0, h + h)
+    assert h.max() == 1.5 and h.argmin() == 2
+    assert equalArrays(h > 1, [1, 1, 0, 1])
+
+    vh = V3hArray(V3f(1, 2, 3), 3)
+    vh.x[:] = vh.y + vh.z
+    assert vh[1] == V3f(5, 2, 3)
+    vh[2] = V3f(0.5, 0.5, 0.5)
+    assert vh.sum() == V3f(10.5, 4.5, 6.5)
+
+    ch = C4hArray(2)
+    ch[0] = Color4f(1, 0.5, 0.25, 1)
+    assert ch[0] == Color4f(1, 0.5, 0.25, 1) and ch[1].a == 0
+    assert ch.a[0] == 1
+
+    print ("ok")
+
+testList.append (('testHalfArrays',testHalfArrays))
+
+
+# -------------------------------------------------------------------------
+# Tests for the variable arrays, whose items hold varying numbers of
+# elements
+
+def testVArrays():
+
+    def equalArrays(x, y):
+        return len(x) == len(y) and all(x[i] == y[i] for i in range(len(x)))
+
+    lengths = IntArray(5)
+    for i in range(5):
+        lengths[i] = (3, 0, 1, 4, 2)[i]
+
+    v = VFloatArray(0.5, lengths)
+    assert len(v) == 5
+    assert equalArrays(v.offsets(), [0, 3, 3, 4, 8, 10])
+    assert len(v.elements()) == 10
+    assert equalArrays([len(v[i]) for i in range(5)], lengths)
+
+    # items and the elements reference the pool of the array
+
+    item = v[3]
+    assert isinstance(item, FloatArray) and len(item) == 4
+    for i in range(4):
+        item[i] = i + 1
+    assert equalArrays(v[-2], [1, 2, 3, 4])
+    assert equalArrays(v.elements()[4:8], [1, 2, 3, 4])
+
+    e = v.elements()
+    e[0] = 7
+    assert v[0][0] == 7
+
+    if sys.version_info[0] > 2:
+        m = memoryview(e)
+        assert m.format == 'f' and m.shape == (10,)
+        m[1] = 8
+        assert v[0][1] == 8
+
+    # slices are copies, masks are references
+
+    s = v[1:4]
+    assert isinstance(s, VFloatArray) and len(s) == 3
+    assert equalArrays(s.offsets(), [0, 0, 1, 5])
+    s[2][0] = 9
+    assert v[3][0] == 1
+
+    mask = IntArray(5)
+    mask[3] = 1
+    mv = v[mask]
+    assert len(mv) == 1 and equalArrays(mv[0], [1, 2, 3, 4])
+    mv[0][1] = 6
+    assert v[3][1] == 6
+
+    try:
+        mv.elements()
+    except:
+        pass
+    else:
+        assert False
+
+    # items are assigned element by element, and keep their lengths
+
+    w = VFloatArray(-1.0, lengths)
+    w[0:2] = v[0:2]
+    assert equalArrays(w[0], [7, 8, 0.5]) and len(w[1]) == 0
+    w[mask] = v[mask]
+    assert equalArrays(w[3], [1, 6, 3, 4])
+
+    try:
+        w[1:3] = v[0:2]
+    except:
+        pass
+    else:
+        assert False
+    assert len(w[1]) == 0 and w[2][0] == -1
+
+    choice = IntArray(5)
+    choice[0] = 1
+    choice[4] = 1
+    x = v.ifelse(choice, VFloatArray(2.0, 5))
+    assert equalArrays(x.offsets(), [0, 3, 4, 5, 6, 8])
+    assert equalArrays(x[0], v[0]) and x[1][0] == 2 and x[3][0] == 2
+
+    # the other element types
+
+    vi = VIntArray(3, 4)
+    assert equalArrays(vi.offsets(), [0, 1, 2, 3, 4])
+    assert isinstance(vi[0], IntArray) and vi[2][0] == 3
+    assert len(VIntArray(6)[5]) == 0
+
+    vh = VHalfArray(0.1, lengths)
+    assert isinstance(vh[0], HalfArray)
+    assert vh[4][1] == 0.0999755859375     # the half nearest 0.1, 0x2e66
+    vh[3][0] = 1.5
+    assert vh.elements()[4] == 1.5
+
+    print ("ok")
+
+testList.append (('testVArrays',testVArrays))
+
+
 # -------------------------------------------------------------------------
 # Main loop
 
@@ -0,0 +1,101 @@
+//
+// SPDX-License-Identifier: BSD-3-Clause
+// Copyright Contributors to the OpenEXR Project.
+//
+
+#ifndef _PyImf_h_
+#define _PyImf_h_
+
+#include <Python.h>
+#include <boost/python.hpp>
+#include <boost/shared_ptr.hpp>
+#include <ImfFrameBuffer.h>
+#include <ImfChannelList.h>
+#include <ImfHeader.h>
+#include <ImathBox.h>
+#include <PyImathBufferProtocol.h>
+#include <string>
+#include <vector>
+
+namespace PyImf {
+
+//
+// A frame buffer whose slices view the memory of python objects
+// exporting the buffer protocol: the imath arrays, numpy arrays, ...
+//
+// The pixels of the window are laid out in the buffer either as a
+// (height, width) block or as width*height consecutive elements, row
+// by row.  A buffer holding one channel has no other dimension, a
+// buffer holding n channels has a trailing dimension of n, the
+// channels interleaved in the order they were named.  The scalar type
+// of the buffer, 'e' (half), 'f' (float) or 'I' (unsigned int),
+// selects the pixel type of the slices.
+//
+// The buffers are held until the frame buffer goes away, so the
+// slices stay valid while the python lock is released.
+//
+class PyFrameBuffer
+{
+  public:
+
+    PyFrameBuffer (const IMATH_NAMESPACE::Box2i &window);
+
+    //
+    // Add slices for the channels viewing buffer.  channels is the name
+    // of one channel or a sequence of names.
+    //
+    void insert (boost::python::object channels,
+                 boost::python::object buffer,
+                 bool writable);
+
+    //
+    // Add slices for a mapping of channels, as above, to buffers
+    //
+    void insert (boost::python::dict buffers, bool writable);
+
+    //
+    // Add a slice over memory owned by the caller
+    //
+    void insert (const std::string &name, const OPENEXR_IMF_NAMESPACE::Slice &slice);
+
+    const IMATH_NAMESPACE::Box2i &             window () const      { return _window; }
+    const OPENEXR_IMF_NAMESPACE::FrameBuffer & frameBuffer () const { return _frameBuffer; }
+
+  private:
+
+    IMATH_NAMESPACE::Box2i                                  _window;
+    OPENEXR_IMF_NAMESPACE::FrameBuffer                      _frameBuffer;
+    std::vector<boost::shared_ptr<PyImath::BufferHandle> >  _buffers;
+};
+
+//
+// The channel names of the channels argument of the read and write
+// functions: one name or a sequence of names
+//
+std::vector<std::string> channelNames (boost::python::object channels);
+
+//
+// Channel names, with the names of layers standing for all their
+// channels, and None standing for all the channels of the list
+//
+std::vector<std::string> channelsAndLayers (const OPENEXR_IMF_NAMESPACE::ChannelList &channelList,
+                                            boost::python::object channels);
+
+//
+// Add a slice of a pixel type over a new array holding the window of
+// the frame buffer, and return the array
+//
+boost::python::object allocateChannel (PyFrameBuffer &frameBuffer,
+                                       const std::string &name,
+                                       OPENEXR_IMF_NAMESPACE::PixelType type);
+
+void register_InputFile ();
+void register_OutputFile ();
+void register_FramePrefetcher ();
+void register_Envmap ();
+void register_DeepInputFile ();
+void register_DeepOutputFile ();
+
+} // namespace PyImf
+
+#endif // _PyImf_h_
@@ -0,0 +1,403 @@
+//
+// SPDX-License-Identifier: BSD-3-Clause
+// Copyright Contributors to the OpenEXR Project.
+//
+
+#include "PyImf.h"
+#include <ImfMultiPartInputFile.h>
+#include <ImfDeepScanLineInputPart.h>
+#include <ImfDeepTiledInputPart.h>
+#include <ImfDeepFrameBuffer.h>
+#include <ImfPartType.h>
+#include <ImfChannelList.h>
+#include <ImfThreading.h>
+#include <IlmThreadMutex.h>
+#include <IexBaseExc.h>
+#include <PyImath.h>
+#include <PyImathHalf.h>
+#include <PyImathUtil.h>
+#include <boost/shared_array.hpp>
+#include <algorithm>
+
+namespace PyImf {
+
+using namespace boost::python;
+using namespace OPENEXR_IMF_NAMESPACE;
+using IMATH_NAMESPACE::Box2i;
+using IMATH_NAMESPACE::V2i;
+using PyImath::FixedArray;
+using PyImath::FixedVArray;
+
+namespace {
+
+bool
+contains (const Box2i &outer, const Box2i &inner)
+{
+    return outer.intersects (inner.min) && outer.intersects (inner.max);
+}
+
+size_t
+numPixels (const Box2i &box)
+{
+    return size_t (box.max.x - box.min.x + 1) * size_t (box.max.y - box.min.y + 1);
+}
+
+//
+// The samples of a channel in a window: one pool holding the samples
+// of all the pixels, pixel after pixel, row by row
+//
+struct SamplePool
+{
+    SamplePool (const std::string &n, PixelType t) : name (n), type (t) {}
+
+    std::string                 name;
+    PixelType                   type;
+    boost::shared_array<char>   data;
+};
+
+size_t
+sampleSize (PixelType type)
+{
+    return type == HALF ? 2 : 4;
+}
+
+//
+// A variable array of the samples of the pixels of a pool, the
+// offsets table giving where the samples of each pixel start
+//
+template <class T>
+object
+samplesArray (const SamplePool &pool,
+              const boost::shared_array<size_t> &offsets,
+              size_t pixels)
+{
+    return object (FixedVArray<T> (reinterpret_cast<T *> (pool.data.get()),
+                                   offsets, pixels, 1, boost::any (pool.data)));
+}
+
+object
+samplesArray (const SamplePool &pool,
+              const boost::shared_array<size_t> &offsets,
+              size_t pixels)
+{
+    switch (pool.type)
+    {
+      case HALF:
+        return samplesArray<half> (pool, offsets, pixels);
+      case FLOAT:
+        return samplesArray<float> (pool, offsets, pixels);
+      default:
+        return samplesArray<int> (pool, offsets, pixels);
+    }
+}
+
+} // namespace
+
+
+//
+// One part of a deep EXR file, read into variable arrays: a VHalfArray,
+// VFloatArray or VIntArray for each channel, each item of which holds
+// the samples of a pixel.  The samples of a channel are held in one
+// pool, and the arrays of the channels read together share their
+// offsets table.
+//
+// As for InputFile, the samples are decoded with the python lock
+// released, by the threads of the global thread pool, and reads may
+// be limited to a window: the scan lines or the tiles it overlaps are
+// decoded, and only the samples of its pixels are kept.
+//
+class PyDeepInputFile
+{
+  public:
+
+    PyDeepInputFile (const std::string &fileName, int part = 0)
+        : _file (new MultiPartInputFile (fileName.c_str(), globalThreadCount())),
+          _partNumber (part)
+    {
+        if (part < 0 || part >= _file->parts())
+            throw IEX_NAMESPACE::ArgExc ("Part number out of range");
+
+        const Header &header = _file->header (part);
+        if (!header.hasType() || !isDeepData (header.type()))
+            throw IEX_NAMESPACE::ArgExc ("The part does not hold deep data");
+
+        if (header.type() == DEEPTILE)
+            _tiledPart.reset (new DeepTiledInputPart (*_file, part));
+        else
+            _part.reset (new DeepScanLineInputPart (*_file, part));
+    }
+
+    int parts () const                      { return _file->parts(); }
+    int part () const                       { return _partNumber; }
+    const Header &header () const           { return _file->header (_partNumber); }
+    Box2i dataWindow () const               { return header().dataWindow(); }
+    Box2i displayWindow () const            { return header().displayWindow(); }
+    Compression compression () const        { return header().compression(); }
+    bool isTiled () const                   { return bool (_tiledPart); }
+
+    bool
+    isComplete () const
+    {
+        return _tiledPart ? _tiledPart->isComplete() : _part->isComplete();
+    }
+
+    std::string
+    name () const
+    {
+        return header().hasName() ? header().name() : std::string();
+    }
+
+    list
+    channels () const
+    {
+        list names;
+        const ChannelList &channels = header().channels();
+        for (ChannelList::ConstIterator i = channels.begin(); i != channels.end(); ++i)
+            names.append (i.name());
+        return names;
+    }
+
+    PixelType
+    channelType (const std::string &name) const
+    {
+        const Channel *channel = header().channels().findChannel (name);
+        if (!channel)
+            throw IEX_NAMESPACE::ArgExc ("No channel named '" + name + "' in the file");
+        return channel->type;
+    }
+
+    FixedArray<int>
+    readSampleCounts (object window)
+    {
+        Box2i box = readWindow (window);
+        std::vector<SamplePool> pools;
+        boost::shared_array<size_t> offsets = read (box, pools);
+
+        size_t pixels = numPixels (box);
+        FixedArray<int> counts (pixels);
+        for (size_t i = 0; i < pixels; ++i)
+            counts[i] = int (offsets[i + 1] - offsets[i]);
+
+        return counts;
+    }
+
+    object
+    readChannel (const std::string &name, object window)
+    {
+        Box2i box = readWindow (window);
+        std::vector<SamplePool> pools (1, SamplePool (name, channelType (name)));
+        boost::shared_array<size_t> offsets = read (box, pools);
+
+        return samplesArray (pools[0], offsets, numPixels (box));
+    }
+
+    dict
+    readChannels (object channels, object window)
+    {
+        Box2i box = readWindow (window);
+        std::vector<std::string> names = channelsAndLayers (header().channels(), channels);
+
+        std::vector<SamplePool> pools;
+        for (size_t i = 0; i < names.size(); ++i)
+            pools.push_back (SamplePool (names[i], channelType (names[i])));
+
+        boost::shared_array<size_t> offsets = read (box, pools);
+
+        dict result;
+        for (size_t i = 0; i < pools.size(); ++i)
+            result[pools[i].name] = samplesArray (pools[i], offsets, numPixels (box));
+
+        return result;
+    }
+
+  private:
+
+    //
+    // The window of a read, the data window when none is given
+    //
+    Box2i
+    readWindow (object window) const
+    {
+        Box2i dw = dataWindow();
+        if (window.is_none())
+            return dw;
+
+        Box2i box = extract<Box2i> (window);
+        if (box.isEmpty() || !contains (dw, box))
+            throw IEX_NAMESPACE::ArgExc ("The window to read is not inside the data window");
+        return box;
+    }
+
+    //
+    // The pixels the decoder writes when reading a window: full scan
+    // lines, or the tiles of the full resolution level it overlaps
+    //
+    Box2i
+    band (const Box2i &window, V2i &tiles0, V2i &tiles1) const
+    {
+        Box2i dw = dataWindow();
+
+        if (!_tiledPart)
+        {
+            return Box2i (V2i (dw.min.x, window.min.y), V2i (dw.max.x, window.max.y));
+        }
+
+        const TileDescription &tiles = header().tileDescription();
+        int xSize = int (tiles.xSize);
+        int ySize = int (tiles.ySize);
+
+        tiles0 = V2i ((window.min.x - dw.min.x) / xSize, (window.min.y - dw.min.y) / ySize);
+        tiles1 = V2i ((window.max.x - dw.min.x) / xSize, (window.max.y - dw.min.y) / ySize);
+
+        return Box2i (V2i (dw.min.x + tiles0.x * xSize, dw.min.y + tiles0.y * ySize),
+                      V2i (std::min (dw.max.x, dw.min.x + (tiles1.x + 1) * xSize - 1),
+                           std::min (dw.max.y, dw.min.y + (tiles1.y + 1) * ySize - 1)));
+    }
+
+    //
+    // Read the sample counts of a window, and the samples of the
+    // channels of the pools.  Return the offsets table: the samples
+    // of the i-th pixel of the window, row by row, are offsets[i] up
+    // to offsets[i+1] in the pools.  The pixels of the band outside
+    // the window have no sample pointers, so their samples are skipped.
+    //
+    // The frame buffer is set before the sample counts are read, and
+    // the sample pointers are filled in once the pools are allocated.
+    //
+    boost::shared_array<size_t>
+    read (const Box2i &window, std::vector<SamplePool> &pools)
+    {
+        PyImath::PyReleaseLock pyunlock;
+        ILMTHREAD_NAMESPACE::Lock lock (_mutex);
+
+        V2i tiles0, tiles1;
+        Box2i b = band (window, tiles0, tiles1);
+        ptrdiff_t bandWidth = b.max.x - b.min.x + 1;
+        ptrdiff_t bandOrigin = ptrdiff_t (b.min.y) * bandWidth + b.min.x;
+
+        std::vector<unsigned int> counts (numPixels (b));
+        std::vector<std::vector<char *> > pointers (pools.size());
+
+        DeepFrameBuffer frameBuffer;
+        frameBuffer.insertSampleCountSlice (Slice::Make (UINT, &counts[0], b));
+
+        for (size_t c = 0; c < pools.size(); ++c)
+        {
+            pointers[c].resize (counts.size(), 0);
+
+            frameBuffer.insert (pools[c].name,
+                                DeepSlice (pools[c].type,
+                                           (char *) (&pointers[c][0] - bandOrigin),
+                                           sizeof (char *),
+                                           sizeof (char *) * bandWidth,
+                                           sampleSize (pools[c].type)));
+        }
+
+        if (_tiledPart)
+        {
+            _tiledPart->setFrameBuffer (frameBuffer);
+            _tiledPart->readPixelSampleCounts (tiles0.x, tiles1.x, tiles0.y, tiles1.y, 0, 0);
+        }
+        else
+        {
+            _part->setFrameBuffer (frameBuffer);
+            _part->readPixelSampleCounts (window.min.y, window.max.y);
+        }
+
+        size_t pixels = numPixels (window);
+        boost::shared_array<size_t> offsets (new size_t[pixels + 1]);
+        offsets[0] = 0;
+
+        for (int y = window.min.y, i = 0; y <= window.max.y; ++y)
+        {
+            for (int x = window.min.x; x <= window.max.x; ++x, ++i)
+                offsets[i + 1] = offsets[i] + counts[ptrdiff_t (y) * bandWidth + x - bandOrigin];
+        }
+
+        if (pools.empty())
+            return offsets;
+
+        for (size_t c = 0; c < pools.size(); ++c)
+        {
+            SamplePool &pool = pools[c];
+            size_t size = sampleSize (pool.type);
+
+            pool.data.reset (new char[std::max<size_t> (offsets[pixels], 1) * size]);
+
+            for (int y = window.min.y, i = 0; y <= window.max.y; ++y)
+            {
+                for (int x = window.min.x; x <= window.max.x; ++x, ++i)
+                {
+                    pointers[c][ptrdiff_t (y) * bandWidth + x - bandOrigin] =
+                        pool.data.get() + offsets[i] * size;
+                }
+            }
+        }
+
+        if (_tiledPart)
+            _tiledPart->readTiles (tiles0.x, tiles1.x, tiles0.y, tiles1.y, 0, 0);
+        else
+            _part->readPixels (window.min.y, window.max.y);
+
+        return offsets;
+    }
+
+    boost::shared_ptr<MultiPartInputFile>       _file;
+    boost::shared_ptr<DeepScanLineInputPart>    _part;
+    boost::shared_ptr<DeepTiledInputPart>       _tiledPart;
+    int                                         _partNumber;
+    ILMTHREAD_NAMESPACE::Mutex                  _mutex;
+};
+
+
+void
+register_DeepInputFile ()
+{
+    class_<PyDeepInputFile, boost::noncopyable> (
+        "DeepInputFile",
+        "DeepInputFile(fileName, part=0) -- opens a deep part of an EXR file for\n"
+        "reading its samples into variable arrays, each item of which holds the\n"
+        "samples of a pixel.",
+        init<std::string, optional<int> > ((arg ("fileName"), arg ("part") = 0)))
+        .def ("parts", &PyDeepInputFile::parts,
+              "parts() -- returns the number of parts in the file")
+        .def ("part", &PyDeepInputFile::part,
+              "part() -- returns the number of the part being read")
+        .def ("name", &PyDeepInputFile::name,
+              "name() -- returns the name of the part, empty when it has none")
+        .def ("dataWindow", &PyDeepInputFile::dataWindow,
+              "dataWindow() -- returns the data window of the part as a Box2i")
+        .def ("displayWindow", &PyDeepInputFile::displayWindow,
+              "displayWindow() -- returns the display window of the part as a Box2i")
+        .def ("compression", &PyDeepInputFile::compression,
+              "compression() -- returns the compression method of the part")
+        .def ("isTiled", &PyDeepInputFile::isTiled,
+              "isTiled() -- returns whether the part is stored in tiles")
+        .def ("isComplete", &PyDeepInputFile::isComplete,
+              "isComplete() -- returns whether all the pixels of the part are present")
+        .def ("channels", &PyDeepInputFile::channels,
+              "channels() -- returns the names of the channels of the part")
+        .def ("channelType", &PyDeepInputFile::channelType, (arg ("name")),
+              "channelType(name) -- returns the pixel type of a channel")
+        .def ("readSampleCounts", &PyDeepInputFile::readSampleCounts,
+              (arg ("window") = object()),
+              "readSampleCounts(window=None) -- returns the numbers of samples of the\n"
+              "pixels of a Box2i window as an IntArray, row by row.  The window must be\n"
+              "inside the data window, which is read when it is None.")
+        .def ("readChannel", &PyDeepInputFile::readChannel,
+              (arg ("name"), arg ("window") = object()),
+              "readChannel(name, window=None) -- returns the samples of the pixels of a\n"
+              "channel in a window, row by row, as a VHalfArray, VFloatArray or, for\n"
+              "unsigned int channels, a VIntArray of the same bits.  elements() views\n"
+              "the samples of all the pixels without copying, and offsets() where the\n"
+              "samples of each pixel start.")
+        .def ("readChannels", &PyDeepInputFile::readChannels,
+              (arg ("channels") = object(), arg ("window") = object()),
+              "readChannels(channels=None, window=None) -- returns a dict of the\n"
+              "samples of channels in a window, read as by readChannel in a single\n"
+              "pass over the file.  The names of layers stand for all their\n"
+              "channels, and None for all the channels of the part.")
+        ;
+}
+
+} // namespace PyImf
@@ -0,0 +1,252 @@
+//
+// SPDX-License-Identifier: BSD-3-Clause
+// Copyright Contributors to the OpenEXR Project.
+//
+
+#include "PyImf.h"
+#include <ImfDeepScanLineOutputFile.h>
+#include <ImfDeepTiledOutputFile.h>
+#include <ImfDeepFrameBuffer.h>
+#include <ImfPartType.h>
+#include <ImfChannelList.h>
+#include <ImfThreading.h>
+#include <IexBaseExc.h>
+#include <PyImath.h>
+#include <PyImathHalf.h>
+#include <PyImathUtil.h>
+
+namespace PyImf {
+
+using namespace boost::python;
+using namespace OPENEXR_IMF_NAMESPACE;
+using IMATH_NAMESPACE::Box2i;
+using IMATH_NAMESPACE::V2f;
+using IMATH_NAMESPACE::V2i;
+using PyImath::FixedVArray;
+
+namespace {
+
+//
+// The samples of a channel to write, from a variable array: pointers
+// to the samples of each pixel of the data window, row by row, and
+// their numbers
+//
+struct SampleTable
+{
+    std::string                 name;
+    PixelType                   type;
+    size_t                      sampleSize;
+    std::vector<char *>         pointers;
+    std::vector<unsigned int>   counts;
+};
+
+template <class T>
+bool
+extractSamples (object samples, PixelType type, SampleTable &table)
+{
+    extract<FixedVArray<T> &> e (samples);
+    if (!e.check())
+        return false;
+
+    FixedVArray<T> &a = e();
+    size_t n = a.len();
+
+    table.type = type;
+    table.sampleSize = sizeof (T);
+    table.pointers.resize (n);
+    table.counts.resize (n);
+
+    for (size_t i = 0; i < n; ++i)
+    {
+        table.pointers[i] = reinterpret_cast<char *> (a[i]);
+        table.counts[i] = (unsigned int) a.size (i);
+    }
+
+    return true;
+}
+
+} // namespace
+
+
+//
+// A deep scan line or single level deep tiled EXR file written from
+// variable arrays in one pass.  The samples are compressed with the
+// python lock released, by the threads of the global thread pool.
+//
+class PyDeepOutputFile
+{
+  public:
+
+    PyDeepOutputFile (const std::string &fileName,
+                      const Box2i &dataWindow,
+                      dict channels,
+                      Compression compression = ZIPS_COMPRESSION,
+                      object tileSize = object())
+    {
+        Header header (dataWindow, dataWindow, 1, V2f (0, 0), 1, INCREASING_Y, compression);
+
+        list items = channels.items();
+        size_t n = len (items);
+        for (size_t i = 0; i < n; ++i)
+        {
+            std::string name = extract<std::string> (items[i][0]);
+            PixelType type = extract<PixelType> (items[i][1]);
+            header.channels().insert (name, Channel (type));
+        }
+
+        if (tileSize.is_none())
+        {
+            header.setType (DEEPSCANLINE);
+            _file.reset (new DeepScanLineOutputFile (fileName.c_str(), header, globalThreadCount()));
+        }
+        else
+        {
+            V2i size = extract<V2i> (tileSize);
+            if (size.x <= 0 || size.y <= 0)
+                throw IEX_NAMESPACE::ArgExc ("Tile sizes must be positive");
+
+            header.setType (DEEPTILE);
+            header.setTileDescription (TileDescription (size.x, size.y, ONE_LEVEL));
+            _tiledFile.reset (new DeepTiledOutputFile (fileName.c_str(), header, globalThreadCount()));
+        }
+
+        _dataWindow = dataWindow;
+        _channels = header.channels();
+    }
+
+    Box2i
+    dataWindow () const
+    {
+        return _dataWindow;
+    }
+
+    bool
+    isTiled () const
+    {
+        return bool (_tiledFile);
+    }
+
+    void
+    writePixels (dict samples)
+    {
+        if (!_file && !_tiledFile)
+            throw IEX_NAMESPACE::LogicExc ("The file has been closed");
+
+        size_t pixels = size_t (_dataWindow.max.x - _dataWindow.min.x + 1) *
+                        size_t (_dataWindow.max.y - _dataWindow.min.y + 1);
+
+        list items = samples.items();
+        std::vector<SampleTable> tables (len (items));
+
+        if (tables.empty())
+            throw IEX_NAMESPACE::ArgExc ("No samples to write");
+
+        for (size_t i = 0; i < tables.size(); ++i)
+        {
+            SampleTable &table = tables[i];
+            table.name = extract<std::string> (items[i][0]);
+
+            const Channel *channel = _channels.findChannel (table.name);
+            if (!channel)
+                throw IEX_NAMESPACE::ArgExc ("No channel named '" + table.name + "' in the file");
+
+            object array = items[i][1];
+            if (!extractSamples<half> (array, HALF, table) &&
+                !extractSamples<float> (array, FLOAT, table) &&
+                !extractSamples<int> (array, UINT, table))
+            {
+                throw IEX_NAMESPACE::ArgExc ("The samples of channel '" + table.name +
+                                             "' are not a VHalfArray, VFloatArray or VIntArray");
+            }
+
+            if (table.type != channel->type)
+                throw IEX_NAMESPACE::ArgExc ("The samples of channel '" + table.name +
+                                             "' do not match its pixel type");
+
+            if (table.pointers.size() != pixels)
+                throw IEX_NAMESPACE::ArgExc ("The samples of channel '" + table.name +
+                                             "' do not match the data window");
+
+            if (table.counts != tables[0].counts)
+                throw IEX_NAMESPACE::ArgExc ("The channels do not have the same numbers "
+                                             "of samples in each pixel");
+        }
+
+        PyImath::PyReleaseLock pyunlock;
+
+        ptrdiff_t width = _dataWindow.max.x - _dataWindow.min.x + 1;
+        ptrdiff_t origin = ptrdiff_t (_dataWindow.min.y) * width + _dataWindow.min.x;
+
+        DeepFrameBuffer frameBuffer;
+        frameBuffer.insertSampleCountSlice (Slice::Make (UINT, &tables[0].counts[0], _dataWindow));
+
+        for (size_t i = 0; i < tables.size(); ++i)
+        {
+            frameBuffer.insert (tables[i].name,
+                                DeepSlice (tables[i].type,
+                                           (char *) (&tables[i].pointers[0] - origin),
+                                           sizeof (char *),
+                                           sizeof (char *) * width,
+                                           tables[i].sampleSize));
+        }
+
+        if (_tiledFile)
+        {
+            _tiledFile->setFrameBuffer (frameBuffer);
+            _tiledFile->writeTiles (0, _tiledFile->numXTiles() - 1,
+                                    0, _tiledFile->numYTiles() - 1);
+        }
+        else
+        {
+            _file->setFrameBuffer (frameBuffer);
+            _file->writePixels (_dataWindow.max.y - _dataWindow.min.y + 1);
+        }
+    }
+
+    void
+    close ()
+    {
+        PyImath::PyReleaseLock pyunlock;
+        _file.reset();
+        _tiledFile.reset();
+    }
+
+  private:
+
+    boost::shared_ptr<DeepScanLineOutputFile>   _file;
+    boost::shared_ptr<DeepTiledOutputFile>      _tiledFile;
+    Box2i                                       _dataWindow;
+    ChannelList                                 _channels;
+};
+
+
+void
+register_DeepOutputFile ()
+{
+    class_<PyDeepOutputFile, boost::noncopyable> (
+        "DeepOutputFile",
+        "DeepOutputFile(fileName, dataWindow, channels, compression=ZIPS_COMPRESSION,\n"
+        "tileSize=None) -- creates a deep EXR file with a Box2i data window and a\n"
+        "mapping of channel names to pixel types, made of scan lines, or of tiles\n"
+        "of a V2i size.  The file is complete once all its pixels are written and\n"
+        "it is closed, or goes away.",
+        init<std::string, Box2i, dict, optional<Compression, object> > (
+            (arg ("fileName"), arg ("dataWindow"), arg ("channels"),
+             arg ("compression") = ZIPS_COMPRESSION, arg ("tileSize") = object())))
+        .def ("dataWindow", &PyDeepOutputFile::dataWindow,
+              "dataWindow() -- returns the data window of the file as a Box2i")
+        .def ("isTiled", &PyDeepOutputFile::isTiled,
+              "isTiled() -- returns whether the file is made of tiles")
+        .def ("writePixels", &PyDeepOutputFile::writePixels, (arg ("samples")),
+              "writePixels(samples) -- writes a mapping of channels to the variable\n"
+              "arrays of their samples, laid out as DeepInputFile.readChannel returns\n"
+              "them: a VHalfArray, VFloatArray or VIntArray (for unsigned int channels)\n"
+              "with an item for each pixel of the data window, row by row.  All the\n"
+              "channels must have the same number of samples in each pixel; channels\n"
+              "that are not given are written as zero.")
+        .def ("close", &PyDeepOutputFile::close,
+              "close() -- completes and closes the file")
+        ;
+}
+
+} // namespace PyImf
@@ -0,0 +1,134 @@
+//
+// SPDX-License-Identifier: BSD-3-Clause
+// Copyright Contributors to the OpenEXR Project.
+//
+
+#include "PyImf.h"
+#include <ImfEnvmap.h>
+#include <ImfEnvmapFilter.h>
+#include <IexBaseExc.h>
+#include <PyImathFixedArray2D.h>
+#include <PyImathUtil.h>
+#include <ImathColor.h>
+
+namespace PyImf {
+
+using namespace boost::python;
+using namespace OPENEXR_IMF_NAMESPACE;
+using IMATH_NAMESPACE::Box2i;
+using IMATH_NAMESPACE::V2i;
+using IMATH_NAMESPACE::Color4f;
+using PyImath::FixedArray2D;
+
+namespace {
+
+//
+// The data window of an array of pixels
+//
+Box2i
+windowOf (const FixedArray2D<Color4f> &pixels)
+{
+    if (pixels.len().x == 0 || pixels.len().y == 0)
+        throw IEX_NAMESPACE::ArgExc ("The environment map has no pixels");
+
+    return Box2i (V2i (0, 0), V2i (int (pixels.len().x) - 1,
+                                   int (pixels.len().y) - 1));
+}
+
+//
+// The pixels of an array, row by row without gaps, as the envmap
+// filters want them; slices of arrays are copied
+//
+std::vector<Color4f>
+contiguousPixels (const FixedArray2D<Color4f> &pixels)
+{
+    std::vector<Color4f> result;
+    result.reserve (pixels.len().x * pixels.len().y);
+
+    for (size_t y = 0; y < pixels.len().y; ++y)
+        for (size_t x = 0; x < pixels.len().x; ++x)
+            result.push_back (pixels (x, y));
+
+    return result;
+}
+
+//
+// The data window of an output map width pixels wide: 6*width
+// pixels high for a cube-face map, width/2 for a latitude-longitude map
+//
+Box2i
+outputWindow (Envmap type, int width)
+{
+    int height = type == ENVMAP_CUBE ? 6 * width : width / 2;
+    if (width < 1 || height < 1)
+        throw IEX_NAMESPACE::ArgExc ("The environment map to make is too small");
+
+    return Box2i (V2i (0, 0), V2i (width - 1, height - 1));
+}
+
+FixedArray2D<Color4f>
+resample (const FixedArray2D<Color4f> &pixels,
+          Envmap type,
+          Envmap outType,
+          int width,
+          float filterRadius,
+          int numSamples)
+{
+    Box2i dw1 = windowOf (pixels);
+    Box2i dw2 = outputWindow (outType, width);
+    std::vector<Color4f> pixels1 = contiguousPixels (pixels);
+
+    FixedArray2D<Color4f> result (dw2.max.x + 1, dw2.max.y + 1);
+    {
+        PyImath::PyReleaseLock pyunlock;
+        resampleEnvmap (type, dw1, &pixels1[0],
+                        outType, dw2, &result (0, 0),
+                        filterRadius, numSamples);
+    }
+    return result;
+}
+
+FixedArray2D<Color4f>
+blur (const FixedArray2D<Color4f> &pixels, Envmap type, int width, bool approximate)
+{
+    Box2i dw1 = windowOf (pixels);
+    Box2i dw2 = outputWindow (ENVMAP_CUBE, width);
+    std::vector<Color4f> pixels1 = contiguousPixels (pixels);
+
+    FixedArray2D<Color4f> result (dw2.max.x + 1, dw2.max.y + 1);
+    {
+        PyImath::PyReleaseLock pyunlock;
+        blurEnvmap (type, dw1, &pixels1[0], dw2, &result (0, 0), approximate);
+    }
+    return result;
+}
+
+} // namespace
+
+void
+register_Envmap ()
+{
+    enum_<Envmap>("Envmap")
+        .value("ENVMAP_LATLONG", ENVMAP_LATLONG)
+        .value("ENVMAP_CUBE",    ENVMAP_CUBE)
+        .export_values()
+        ;
+
+    def ("resampleEnvmap", &resample,
+         (arg ("pixels"), arg ("type"), arg ("outType"), arg ("width"),
+          arg ("filterRadius") = 1.0f, arg ("numSamples") = 5),
+         "resampleEnvmap(pixels, type, outType, width, filterRadius=1, numSamples=5) --\n"
+         "converts the Color4fArray2D of an environment map of the given type into a new\n"
+         "map of outType, width pixels wide and 6*width (cube-face) or width/2\n"
+         "(latitude-longitude) pixels high.  Each pixel is numSamples by numSamples\n"
+         "filtered samples; a larger filterRadius blurs more.");
+
+    def ("blurEnvmap", &blur,
+         (arg ("pixels"), arg ("type"), arg ("width") = 100, arg ("approximate") = false),
+         "blurEnvmap(pixels, type, width=100, approximate=False) -- applies a 180-degree-wide\n"
+         "diffuse filter to the Color4fArray2D of an environment map of the given type, and\n"
+         "returns a cube-face map width pixels wide.  approximate replaces the filter with a\n"
+         "polynomial, much faster but less accurate behind small, bright lights.");
+}
+
+} // namespace PyImf
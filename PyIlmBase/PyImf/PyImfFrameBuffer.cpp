@@ -0,0 +1,243 @@
+//
+// SPDX-License-Identifier: BSD-3-Clause
+// Copyright Contributors to the OpenEXR Project.
+//
+
+#include "PyImf.h"
+#include <IexBaseExc.h>
+#include <PyImath.h>
+#include <PyImathHalf.h>
+#include <sstream>
+
+namespace PyImf {
+
+using namespace boost::python;
+using namespace OPENEXR_IMF_NAMESPACE;
+using IMATH_NAMESPACE::Box2i;
+using PyImath::BufferHandle;
+using PyImath::FixedArray;
+using PyImath::bufferFormatMatches;
+
+namespace {
+
+PixelType
+bufferPixelType (const Py_buffer &view)
+{
+    if (view.itemsize == 2 && bufferFormatMatches (view.format, "e"))
+        return HALF;
+    if (view.itemsize == 4 && bufferFormatMatches (view.format, "f"))
+        return FLOAT;
+    if (view.itemsize == 4 && bufferFormatMatches (view.format, "I"))
+        return UINT;
+
+    std::stringstream err;
+    err << "Buffer format '" << (view.format ? view.format : "B")
+        << "' with item size " << view.itemsize
+        << " is not a pixel type, expected half ('e'), float ('f') or unsigned int ('I')";
+    throw IEX_NAMESPACE::ArgExc (err.str());
+}
+
+//
+// Check that the dimensions of the buffer after the pixel dimensions
+// hold the channels: none for one channel, one of the channel count
+// otherwise
+//
+bool
+channelsMatch (const Py_buffer &view, int pixelDims, size_t channels, Py_ssize_t &cStride)
+{
+    if (view.ndim == pixelDims)
+    {
+        cStride = 0;
+        return channels == 1;
+    }
+
+    if (view.ndim == pixelDims + 1 && size_t (view.shape[pixelDims]) == channels)
+    {
+        cStride = view.strides[pixelDims];
+        return true;
+    }
+
+    return false;
+}
+
+bool
+bufferLayout (const Py_buffer &view,
+              Py_ssize_t width,
+              Py_ssize_t height,
+              size_t channels,
+              Py_ssize_t &xStride,
+              Py_ssize_t &yStride,
+              Py_ssize_t &cStride)
+{
+    if (view.ndim >= 2 && view.shape[0] == height && view.shape[1] == width &&
+        channelsMatch (view, 2, channels, cStride))
+    {
+        yStride = view.strides[0];
+        xStride = view.strides[1];
+        return true;
+    }
+
+    if (view.ndim >= 1 && view.shape[0] == width * height &&
+        channelsMatch (view, 1, channels, cStride))
+    {
+        xStride = view.strides[0];
+        yStride = xStride * width;
+        return true;
+    }
+
+    return false;
+}
+
+template <class T>
+object
+allocateChannel (PyFrameBuffer &frameBuffer, const std::string &name, PixelType type)
+{
+    const Box2i &window = frameBuffer.window();
+    size_t width = size_t (window.max.x - window.min.x) + 1;
+    size_t height = size_t (window.max.y - window.min.y) + 1;
+    FixedArray<T> pixels (width * height, PyImath::UNINITIALIZED);
+
+    frameBuffer.insert (name, Slice::Make (type, &pixels.direct_index (0), window));
+    return object (pixels);
+}
+
+} // namespace
+
+
+std::vector<std::string>
+channelNames (object channels)
+{
+    std::vector<std::string> names;
+
+    extract<std::string> name (channels);
+    if (name.check())
+    {
+        names.push_back (name());
+    }
+    else
+    {
+        size_t n = len (channels);
+        for (size_t i = 0; i < n; ++i)
+            names.push_back (extract<std::string> (channels[i]));
+    }
+
+    if (names.empty())
+        throw IEX_NAMESPACE::ArgExc ("No channels named");
+
+    return names;
+}
+
+
+std::vector<std::string>
+channelsAndLayers (const ChannelList &channelList, object channels)
+{
+    std::vector<std::string> names;
+
+    if (channels.is_none())
+    {
+        for (ChannelList::ConstIterator i = channelList.begin(); i != channelList.end(); ++i)
+            names.push_back (i.name());
+        return names;
+    }
+
+    std::vector<std::string> requested = channelNames (channels);
+    for (size_t n = 0; n < requested.size(); ++n)
+    {
+        if (channelList.findChannel (requested[n]))
+        {
+            names.push_back (requested[n]);
+            continue;
+        }
+
+        ChannelList::ConstIterator first, last;
+        channelList.channelsInLayer (requested[n], first, last);
+        if (first == last)
+            throw IEX_NAMESPACE::ArgExc ("No channel or layer named '" + requested[n] + "' in the file");
+
+        for (ChannelList::ConstIterator i = first; i != last; ++i)
+            names.push_back (i.name());
+    }
+
+    return names;
+}
+
+
+object
+allocateChannel (PyFrameBuffer &frameBuffer, const std::string &name, PixelType type)
+{
+    switch (type)
+    {
+      case HALF:
+        return allocateChannel<half> (frameBuffer, name, HALF);
+      case FLOAT:
+        return allocateChannel<float> (frameBuffer, name, FLOAT);
+      default:
+        return allocateChannel<unsigned int> (frameBuffer, name, UINT);
+    }
+}
+
+
+PyFrameBuffer::PyFrameBuffer (const Box2i &window)
+    : _window (window)
+{
+}
+
+
+void
+PyFrameBuffer::insert (object channels, object buffer, bool writable)
+{
+    std::vector<std::string> names = channelNames (channels);
+
+    boost::shared_ptr<BufferHandle> handle (
+        new BufferHandle (buffer.ptr(), writable ? PyBUF_RECORDS : PyBUF_RECORDS_RO));
+    const Py_buffer &view = handle->view();
+
+    PixelType type = bufferPixelType (view);
+
+    Py_ssize_t width = Py_ssize_t (_window.max.x) - _window.min.x + 1;
+    Py_ssize_t height = Py_ssize_t (_window.max.y) - _window.min.y + 1;
+    Py_ssize_t xStride, yStride, cStride;
+
+    if (!bufferLayout (view, width, height, names.size(), xStride, yStride, cStride))
+    {
+        std::stringstream err;
+        err << "Buffer shape (";
+        for (int i = 0; i < view.ndim; ++i)
+            err << (i ? ", " : "") << view.shape[i];
+        err << ") does not hold " << names.size() << " channel(s) of "
+            << width << " by " << height << " pixels";
+        throw IEX_NAMESPACE::ArgExc (err.str());
+    }
+
+    if (xStride < 0 || yStride < 0 || cStride < 0)
+        throw IEX_NAMESPACE::ArgExc ("Buffers with negative strides are not supported");
+
+    char *base = static_cast<char *> (view.buf);
+    for (size_t i = 0; i < names.size(); ++i)
+    {
+        _frameBuffer.insert (names[i],
+                             Slice::Make (type, base + i * cStride, _window,
+                                          xStride, yStride));
+    }
+
+    _buffers.push_back (handle);
+}
+
+
+void
+PyFrameBuffer::insert (dict buffers, bool writable)
+{
+    list items = buffers.items();
+    size_t n = len (items);
+    for (size_t i = 0; i < n; ++i)
+        insert (object (items[i][0]), object (items[i][1]), writable);
+}
+
+
+void
+PyFrameBuffer::insert (const std::string &name, const Slice &slice)
+{
+    _frameBuffer.insert (name, slice);
+}
+
+} // namespace PyImf
@@ -0,0 +1,206 @@
+//
+// SPDX-License-Identifier: BSD-3-Clause
+// Copyright Contributors to the OpenEXR Project.
+//
+
+#include "PyImf.h"
+#include <ImfFramePrefetcher.h>
+#include <ImfInputFile.h>
+#include <ImfChannelList.h>
+#include <IexBaseExc.h>
+#include <PyImathUtil.h>
+#include <deque>
+
+namespace PyImf {
+
+using namespace boost::python;
+using namespace OPENEXR_IMF_NAMESPACE;
+using IMATH_NAMESPACE::Box2i;
+
+//
+// Iterates over the frames of a sequence of files, read ahead by a
+// FramePrefetcher.  The channels to read, their pixel types and the
+// data window come from the first file.  Each frame is read into
+// new arrays, so the frames handed out stay valid.
+//
+class PyFramePrefetcher
+{
+  public:
+
+    PyFramePrefetcher (object fileNames,
+                       object channels = object(),
+                       int framesInFlight = 2)
+        : _requested (0)
+    {
+        size_t n = len (fileNames);
+        for (size_t i = 0; i < n; ++i)
+            _fileNames.push_back (extract<std::string> (fileNames[i]));
+
+        if (_fileNames.empty())
+            throw IEX_NAMESPACE::ArgExc ("No files to read");
+
+        Header header;
+        {
+            PyImath::PyReleaseLock pyunlock;
+            header = InputFile (_fileNames[0].c_str()).header();
+        }
+
+        _dataWindow = header.dataWindow();
+        _channels = channelsAndLayers (header.channels(), channels);
+        for (size_t i = 0; i < _channels.size(); ++i)
+            _types.push_back (header.channels()[_channels[i]].type);
+
+        _prefetcher.reset (new FramePrefetcher (framesInFlight));
+    }
+
+    ~PyFramePrefetcher ()
+    {
+        //
+        // Wait for the frames in flight before their arrays go away
+        //
+
+        PyImath::PyReleaseLock pyunlock;
+        _prefetcher.reset();
+    }
+
+    int
+    frames () const
+    {
+        return int (_fileNames.size());
+    }
+
+    int
+    framesInFlight () const
+    {
+        return _prefetcher->framesInFlight();
+    }
+
+    Box2i
+    dataWindow () const
+    {
+        return _dataWindow;
+    }
+
+    list
+    channels () const
+    {
+        list result;
+        for (size_t i = 0; i < _channels.size(); ++i)
+            result.append (_channels[i]);
+        return result;
+    }
+
+    //
+    // The next frame, as a mapping of channel names to arrays.  The
+    // frames that follow are requested before returning it, so they
+    // are read while the caller uses it.
+    //
+    dict
+    next ()
+    {
+        request();
+
+        if (_frames.empty())
+        {
+            PyErr_SetString (PyExc_StopIteration, "No more frames");
+            throw_error_already_set();
+        }
+
+        dict frame = _frames.front();
+        _frames.pop_front();
+
+        try
+        {
+            PyImath::PyReleaseLock pyunlock;
+            _prefetcher->nextFrame();
+        }
+        catch (...)
+        {
+            request();
+            throw;
+        }
+
+        request();
+        return frame;
+    }
+
+  private:
+
+    void
+    request ()
+    {
+        while (_requested < _fileNames.size() &&
+               _prefetcher->framesInFlight() < _prefetcher->maxFramesInFlight())
+        {
+            PyFrameBuffer frameBuffer (_dataWindow);
+            dict frame;
+            for (size_t i = 0; i < _channels.size(); ++i)
+                frame[_channels[i]] = allocateChannel (frameBuffer, _channels[i], _types[i]);
+
+            _prefetcher->prefetch (_fileNames[_requested].c_str(),
+                                   frameBuffer.frameBuffer(),
+                                   _dataWindow,
+                                   int (_requested));
+
+            _frames.push_back (frame);
+            ++_requested;
+        }
+    }
+
+    std::vector<std::string>                 _fileNames;
+    std::vector<std::string>                 _channels;
+    std::vector<PixelType>                   _types;
+    Box2i                                    _dataWindow;
+    size_t                                   _requested;
+
+    //
+    // The arrays of the frames in flight, declared before the
+    // prefetcher so they outlive it
+    //
+    std::deque<dict>                         _frames;
+    boost::shared_ptr<FramePrefetcher>       _prefetcher;
+};
+
+
+namespace {
+
+object
+identity (object self)
+{
+    return self;
+}
+
+} // namespace
+
+
+void
+register_FramePrefetcher ()
+{
+    class_<PyFramePrefetcher, boost::noncopyable> (
+        "FramePrefetcher",
+        "FramePrefetcher(fileNames, channels=None, framesInFlight=2) -- iterates over\n"
+        "the frames of a sequence of EXR files, reading up to framesInFlight frames\n"
+        "ahead on background threads while the previous frames are used.  Each frame\n"
+        "is a dict mapping the channel names to new arrays of their pixels, as\n"
+        "InputFile.readChannels returns.  channels names channels or layers, all the\n"
+        "channels when None; the channels, their pixel types and the data window of\n"
+        "all the frames are those of the first file.  A frame that cannot be read\n"
+        "raises an exception when its turn comes, and the iteration can go on.",
+        init<object, optional<object, int> > (
+            (arg ("fileNames"), arg ("channels") = object(), arg ("framesInFlight") = 2)))
+        .def ("__iter__", &identity)
+        .def ("__next__", &PyFramePrefetcher::next)
+        .def ("next", &PyFramePrefetcher::next,
+              "next() -- returns the next frame")
+        .def ("frames", &PyFramePrefetcher::frames,
+              "frames() -- returns the number of frames of the sequence")
+        .def ("framesInFlight", &PyFramePrefetcher::framesInFlight,
+              "framesInFlight() -- returns the number of frames being read")
+        .def ("dataWindow", &PyFramePrefetcher::dataWindow,
+              "dataWindow() -- returns the data window of the frames as a Box2i")
+        .def ("channels", &PyFramePrefetcher::channels,
+              "channels() -- returns the names of the channels read")
+        ;
+}
+
+} // namespace PyImf
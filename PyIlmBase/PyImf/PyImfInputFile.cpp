@@ -0,0 +1,484 @@
+//
+// SPDX-License-Identifier: BSD-3-Clause
+// Copyright Contributors to the OpenEXR Project.
+//
+
+#include "PyImf.h"
+#include <ImfMultiPartInputFile.h>
+#include <ImfInputPart.h>
+#include <ImfTiledInputPart.h>
+#include <ImfChannelList.h>
+#include <ImfThreading.h>
+#include <IlmThreadMutex.h>
+#include <IexBaseExc.h>
+#include <PyImathFixedArray2D.h>
+#include <PyImathUtil.h>
+#include <algorithm>
+#include <cstring>
+#include <set>
+
+namespace PyImf {
+
+using namespace boost::python;
+using namespace OPENEXR_IMF_NAMESPACE;
+using IMATH_NAMESPACE::Box2i;
+using IMATH_NAMESPACE::Color4f;
+using PyImath::FixedArray2D;
+
+namespace {
+
+//
+// The number of scan lines in the chunks of a compression method
+//
+int
+linesPerChunk (Compression compression)
+{
+    switch (compression)
+    {
+      case ZIP_COMPRESSION:
+      case PXR24_COMPRESSION:
+        return 16;
+      case PIZ_COMPRESSION:
+      case B44_COMPRESSION:
+      case B44A_COMPRESSION:
+      case DWAA_COMPRESSION:
+        return 32;
+      case DWAB_COMPRESSION:
+        return 256;
+      default:
+        return 1;
+    }
+}
+
+bool
+contains (const Box2i &outer, const Box2i &inner)
+{
+    return outer.intersects (inner.min) && outer.intersects (inner.max);
+}
+
+//
+// The decoders produce whole bands of pixels, full scan lines or whole
+// tiles, which may stick out of the window being read.  A BandBuffer
+// holds a band of each slice of the frame buffer of the window, to be
+// decoded into and then copied to the frame buffer.
+//
+class BandBuffer
+{
+  public:
+
+    BandBuffer (const FrameBuffer &target, const Box2i &maxBand)
+        : _target (target)
+    {
+        size_t pixels = size_t (maxBand.max.x - maxBand.min.x + 1) *
+                        size_t (maxBand.max.y - maxBand.min.y + 1);
+
+        for (FrameBuffer::ConstIterator i = target.begin(); i != target.end(); ++i)
+            _storage.push_back (std::vector<char> (pixels * pixelSize (i.slice().type)));
+    }
+
+    //
+    // The frame buffer to decode a band into
+    //
+    const FrameBuffer &
+    frameBuffer (const Box2i &band)
+    {
+        _band = band;
+        _frameBuffer = FrameBuffer();
+
+        size_t n = 0;
+        for (FrameBuffer::ConstIterator i = _target.begin(); i != _target.end(); ++i, ++n)
+        {
+            const Slice &slice = i.slice();
+            _frameBuffer.insert (i.name(),
+                                 Slice::Make (slice.type, &_storage[n][0], band, 0, 0,
+                                              1, 1, slice.fillValue));
+        }
+
+        return _frameBuffer;
+    }
+
+    //
+    // Copy the pixels of the band inside the window to the target
+    //
+    void
+    copy (const Box2i &window)
+    {
+        int x0 = std::max (window.min.x, _band.min.x);
+        int x1 = std::min (window.max.x, _band.max.x);
+        int y0 = std::max (window.min.y, _band.min.y);
+        int y1 = std::min (window.max.y, _band.max.y);
+        size_t bandWidth = _band.max.x - _band.min.x + 1;
+
+        size_t n = 0;
+        for (FrameBuffer::ConstIterator i = _target.begin(); i != _target.end(); ++i, ++n)
+        {
+            const Slice &slice = i.slice();
+            size_t size = pixelSize (slice.type);
+
+            for (int y = y0; y <= y1; ++y)
+            {
+                const char *from = &_storage[n][0] +
+                    ((y - _band.min.y) * bandWidth + (x0 - _band.min.x)) * size;
+                char *to = slice.base + ptrdiff_t (y) * ptrdiff_t (slice.yStride) +
+                                        ptrdiff_t (x0) * ptrdiff_t (slice.xStride);
+
+                if (slice.xStride == size)
+                {
+                    memcpy (to, from, (x1 - x0 + 1) * size);
+                }
+                else
+                {
+                    for (int x = x0; x <= x1; ++x, from += size, to += slice.xStride)
+                        memcpy (to, from, size);
+                }
+            }
+        }
+    }
+
+  private:
+
+    static size_t pixelSize (PixelType type) { return type == HALF ? 2 : 4; }
+
+    const FrameBuffer &             _target;
+    FrameBuffer                     _frameBuffer;
+    Box2i                           _band;
+    std::vector<std::vector<char> > _storage;
+};
+
+} // namespace
+
+
+//
+// One part of an EXR file, read into python buffers.  The pixels are
+// decoded with the python lock released, by the threads of the global
+// thread pool.
+//
+// Reads may be limited to a window inside the data window, and only
+// the chunks overlapping the window are decoded: the scan line blocks
+// it spans, or its tiles for tiled parts.
+//
+class PyInputFile
+{
+  public:
+
+    PyInputFile (const std::string &fileName, int part = 0)
+        : _file (new MultiPartInputFile (fileName.c_str(), globalThreadCount())),
+          _partNumber (part)
+    {
+        if (part < 0 || part >= _file->parts())
+            throw IEX_NAMESPACE::ArgExc ("Part number out of range");
+
+        //
+        // A part is only ever opened as one kind of file: tiled parts
+        // are read through TiledInputPart, which decodes just the tiles
+        // a window overlaps, the other ones through InputPart
+        //
+        if (_file->header (part).hasTileDescription())
+            _tiledPart.reset (new TiledInputPart (*_file, part));
+        else
+            _part.reset (new InputPart (*_file, part));
+    }
+
+    int parts () const                      { return _file->parts(); }
+    int part () const                       { return _partNumber; }
+    const Header &header () const           { return _file->header (_partNumber); }
+    Box2i dataWindow () const               { return header().dataWindow(); }
+    Box2i displayWindow () const            { return header().displayWindow(); }
+    Compression compression () const        { return header().compression(); }
+    bool isTiled () const                   { return bool (_tiledPart); }
+
+    bool
+    isComplete () const
+    {
+        return _tiledPart ? _tiledPart->isComplete() : _part->isComplete();
+    }
+
+    std::string
+    name () const
+    {
+        return header().hasName() ? header().name() : std::string();
+    }
+
+    list
+    channels () const
+    {
+        list names;
+        const ChannelList &channels = header().channels();
+        for (ChannelList::ConstIterator i = channels.begin(); i != channels.end(); ++i)
+            names.append (i.name());
+        return names;
+    }
+
+    list
+    layers () const
+    {
+        std::set<std::string> layerNames;
+        header().channels().layers (layerNames);
+
+        list names;
+        for (std::set<std::string>::const_iterator i = layerNames.begin(); i != layerNames.end(); ++i)
+            names.append (*i);
+        return names;
+    }
+
+    PixelType
+    channelType (const std::string &name) const
+    {
+        const Channel *channel = header().channels().findChannel (name);
+        if (!channel)
+            throw IEX_NAMESPACE::ArgExc ("No channel named '" + name + "' in the file");
+        return channel->type;
+    }
+
+    void
+    readPixels (object channels, object buffer, object window)
+    {
+        PyFrameBuffer frameBuffer (readWindow (window));
+        frameBuffer.insert (channels, buffer, true);
+        read (frameBuffer);
+    }
+
+    void
+    readPixelsDict (dict buffers, object window)
+    {
+        PyFrameBuffer frameBuffer (readWindow (window));
+        frameBuffer.insert (buffers, true);
+        read (frameBuffer);
+    }
+
+    object
+    readChannel (const std::string &name, object window)
+    {
+        PyFrameBuffer frameBuffer (readWindow (window));
+        object pixels = allocateChannel (frameBuffer, name, channelType (name));
+        read (frameBuffer);
+        return pixels;
+    }
+
+    dict
+    readChannels (object channels, object window)
+    {
+        PyFrameBuffer frameBuffer (readWindow (window));
+        std::vector<std::string> names = channelsAndLayers (header().channels(), channels);
+
+        dict result;
+        for (size_t i = 0; i < names.size(); ++i)
+            result[names[i]] = allocateChannel (frameBuffer, names[i], channelType (names[i]));
+
+        read (frameBuffer);
+        return result;
+    }
+
+    FixedArray2D<Color4f>
+    readRGBA (object window)
+    {
+        Box2i box = readWindow (window);
+        FixedArray2D<Color4f> pixels (box.max.x - box.min.x + 1,
+                                      box.max.y - box.min.y + 1);
+
+        static const char *names[] = {"R", "G", "B", "A"};
+        size_t xStride = sizeof (Color4f);
+        size_t yStride = xStride * pixels.len().x;
+
+        PyFrameBuffer frameBuffer (box);
+        for (int i = 0; i < 4; ++i)
+        {
+            frameBuffer.insert (names[i],
+                                Slice::Make (FLOAT, &pixels (0, 0)[i], box,
+                                             xStride, yStride, 1, 1, i == 3 ? 1.0 : 0.0));
+        }
+
+        read (frameBuffer);
+        return pixels;
+    }
+
+  private:
+
+    //
+    // The window of a read, the data window when none is given
+    //
+    Box2i
+    readWindow (object window) const
+    {
+        Box2i dw = dataWindow();
+        if (window.is_none())
+            return dw;
+
+        Box2i box = extract<Box2i> (window);
+        if (box.isEmpty() || !contains (dw, box))
+            throw IEX_NAMESPACE::ArgExc ("The window to read is not inside the data window");
+        return box;
+    }
+
+    void
+    read (const PyFrameBuffer &frameBuffer)
+    {
+        PyImath::PyReleaseLock pyunlock;
+        ILMTHREAD_NAMESPACE::Lock lock (_mutex);
+
+        if (_tiledPart)
+            readTiles (frameBuffer);
+        else
+            readScanLines (frameBuffer);
+    }
+
+    //
+    // Scan line parts decode whole lines; a window narrower than the
+    // data window is read through a band buffer, a few chunks high so
+    // the threads have chunks to decode in parallel
+    //
+    void
+    readScanLines (const PyFrameBuffer &frameBuffer)
+    {
+        const Box2i &window = frameBuffer.window();
+        Box2i dw = dataWindow();
+
+        if (window.min.x == dw.min.x && window.max.x == dw.max.x)
+        {
+            _part->setFrameBuffer (frameBuffer.frameBuffer());
+            _part->readPixels (window.min.y, window.max.y);
+            return;
+        }
+
+        int lines = linesPerChunk (compression());
+        int bandLines = std::max (64, lines * std::max (1, globalThreadCount()));
+        bandLines = (bandLines + lines - 1) / lines * lines;
+
+        Box2i maxBand (dw.min, IMATH_NAMESPACE::V2i (dw.max.x, dw.min.y + bandLines - 1));
+        BandBuffer buffer (frameBuffer.frameBuffer(), maxBand);
+
+        for (int y = window.min.y; y <= window.max.y; )
+        {
+            //
+            // bands start at chunk boundaries past the first one, so
+            // no chunk is decoded twice
+            //
+            int start = dw.min.y + (y - dw.min.y) / lines * lines;
+            int end = std::min (window.max.y, start + bandLines - 1);
+            Box2i band (IMATH_NAMESPACE::V2i (dw.min.x, y), IMATH_NAMESPACE::V2i (dw.max.x, end));
+
+            _part->setFrameBuffer (buffer.frameBuffer (band));
+            _part->readPixels (y, end);
+            buffer.copy (window);
+
+            y = end + 1;
+        }
+    }
+
+    //
+    // Tiled parts decode the tiles of the full resolution level the
+    // window overlaps, a row of tiles at a time.  Rows inside the
+    // window are decoded straight into the frame buffer.
+    //
+    void
+    readTiles (const PyFrameBuffer &frameBuffer)
+    {
+        const Box2i &window = frameBuffer.window();
+        Box2i dw = dataWindow();
+        const TileDescription &tiles = header().tileDescription();
+
+        int tx0 = (window.min.x - dw.min.x) / int (tiles.xSize);
+        int tx1 = (window.max.x - dw.min.x) / int (tiles.xSize);
+        int ty0 = (window.min.y - dw.min.y) / int (tiles.ySize);
+        int ty1 = (window.max.y - dw.min.y) / int (tiles.ySize);
+
+        Box2i maxBand (IMATH_NAMESPACE::V2i (dw.min.x + tx0 * int (tiles.xSize), 0),
+                       IMATH_NAMESPACE::V2i (std::min (dw.max.x, dw.min.x + (tx1 + 1) * int (tiles.xSize) - 1),
+                                             int (tiles.ySize) - 1));
+        boost::shared_ptr<BandBuffer> buffer;
+
+        for (int ty = ty0; ty <= ty1; ++ty)
+        {
+            int y0 = dw.min.y + ty * int (tiles.ySize);
+            Box2i band (IMATH_NAMESPACE::V2i (maxBand.min.x, y0),
+                        IMATH_NAMESPACE::V2i (maxBand.max.x,
+                                              std::min (dw.max.y, y0 + int (tiles.ySize) - 1)));
+
+            if (contains (window, band))
+            {
+                _tiledPart->setFrameBuffer (frameBuffer.frameBuffer());
+                _tiledPart->readTiles (tx0, tx1, ty, ty, 0, 0);
+            }
+            else
+            {
+                if (!buffer)
+                    buffer.reset (new BandBuffer (frameBuffer.frameBuffer(), maxBand));
+
+                _tiledPart->setFrameBuffer (buffer->frameBuffer (band));
+                _tiledPart->readTiles (tx0, tx1, ty, ty, 0, 0);
+                buffer->copy (window);
+            }
+        }
+    }
+
+    boost::shared_ptr<MultiPartInputFile>   _file;
+    boost::shared_ptr<InputPart>            _part;
+    boost::shared_ptr<TiledInputPart>       _tiledPart;
+    int                                     _partNumber;
+    ILMTHREAD_NAMESPACE::Mutex              _mutex;
+};
+
+
+void
+register_InputFile ()
+{
+    class_<PyInputFile, boost::noncopyable> (
+        "InputFile",
+        "InputFile(fileName, part=0) -- opens a part of an EXR file for reading\n"
+        "into imath arrays, numpy arrays or any object exporting a writable\n"
+        "buffer of half, float or unsigned int pixels.",
+        init<std::string, optional<int> > ((arg ("fileName"), arg ("part") = 0)))
+        .def ("parts", &PyInputFile::parts,
+              "parts() -- returns the number of parts in the file")
+        .def ("part", &PyInputFile::part,
+              "part() -- returns the number of the part being read")
+        .def ("name", &PyInputFile::name,
+              "name() -- returns the name of the part, empty when it has none")
+        .def ("dataWindow", &PyInputFile::dataWindow,
+              "dataWindow() -- returns the data window of the part as a Box2i")
+        .def ("displayWindow", &PyInputFile::displayWindow,
+              "displayWindow() -- returns the display window of the part as a Box2i")
+        .def ("compression", &PyInputFile::compression,
+              "compression() -- returns the compression method of the part")
+        .def ("isTiled", &PyInputFile::isTiled,
+              "isTiled() -- returns whether the part is stored in tiles")
+        .def ("isComplete", &PyInputFile::isComplete,
+              "isComplete() -- returns whether all the pixels of the part are present")
+        .def ("channels", &PyInputFile::channels,
+              "channels() -- returns the names of the channels of the part")
+        .def ("layers", &PyInputFile::layers,
+              "layers() -- returns the names of the layers of the part, the\n"
+              "channel name prefixes up to their last '.'")
+        .def ("channelType", &PyInputFile::channelType, (arg ("name")),
+              "channelType(name) -- returns the pixel type of a channel")
+        .def ("readPixels", &PyInputFile::readPixels,
+              (arg ("channels"), arg ("buffer"), arg ("window") = object()),
+              "readPixels(channels, buffer, window=None) -- reads a Box2i window of\n"
+              "one channel, or a sequence of channels, into a buffer holding\n"
+              "(height, width) or width*height pixels, with a trailing dimension\n"
+              "interleaving the channels when there are several.  The window must\n"
+              "be inside the data window, which is read when it is None; only\n"
+              "the chunks it overlaps are decoded.  The pixels are converted to\n"
+              "the scalar type of the buffer; channels missing from the file are\n"
+              "filled with zero.")
+        .def ("readPixels", &PyInputFile::readPixelsDict,
+              (arg ("buffers"), arg ("window") = object()),
+              "readPixels(buffers, window=None) -- reads a mapping of channels to\n"
+              "buffers, as above, in a single pass over the file")
+        .def ("readChannel", &PyInputFile::readChannel,
+              (arg ("name"), arg ("window") = object()),
+              "readChannel(name, window=None) -- returns the pixels of a channel in\n"
+              "a window as a HalfArray, FloatArray or UnsignedIntArray, row by row")
+        .def ("readChannels", &PyInputFile::readChannels,
+              (arg ("channels") = object(), arg ("window") = object()),
+              "readChannels(channels=None, window=None) -- returns a dict of the\n"
+              "pixels of channels in a window, read as by readChannel in a single\n"
+              "pass over the file.  The names of layers stand for all their\n"
+              "channels, and None for all the channels of the part.")
+        .def ("readRGBA", &PyInputFile::readRGBA, (arg ("window") = object()),
+              "readRGBA(window=None) -- returns the R, G, B and A channels in a window\n"
+              "as a Color4fArray2D, missing channels being zero and a missing alpha one")
+        ;
+}
+
+} // namespace PyImf
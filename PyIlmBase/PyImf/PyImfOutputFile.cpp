@@ -0,0 +1,159 @@
+//
+// SPDX-License-Identifier: BSD-3-Clause
+// Copyright Contributors to the OpenEXR Project.
+//
+
+#include "PyImf.h"
+#include <ImfOutputFile.h>
+#include <ImfTiledOutputFile.h>
+#include <ImfChannelList.h>
+#include <ImfThreading.h>
+#include <IexBaseExc.h>
+#include <PyImathUtil.h>
+
+namespace PyImf {
+
+using namespace boost::python;
+using namespace OPENEXR_IMF_NAMESPACE;
+using IMATH_NAMESPACE::Box2i;
+using IMATH_NAMESPACE::V2f;
+using IMATH_NAMESPACE::V2i;
+
+//
+// A scan line or single level tiled EXR file written from python
+// buffers in one pass.  The pixels are compressed with the python lock
+// released, by the threads of the global thread pool.
+//
+class PyOutputFile
+{
+  public:
+
+    PyOutputFile (const std::string &fileName,
+                  const Box2i &dataWindow,
+                  dict channels,
+                  Compression compression = ZIP_COMPRESSION,
+                  object tileSize = object())
+    {
+        Header header (dataWindow, dataWindow, 1, V2f (0, 0), 1, INCREASING_Y, compression);
+
+        list items = channels.items();
+        size_t n = len (items);
+        for (size_t i = 0; i < n; ++i)
+        {
+            std::string name = extract<std::string> (items[i][0]);
+            PixelType type = extract<PixelType> (items[i][1]);
+            header.channels().insert (name, Channel (type));
+        }
+
+        if (tileSize.is_none())
+        {
+            _file.reset (new OutputFile (fileName.c_str(), header, globalThreadCount()));
+        }
+        else
+        {
+            V2i size = extract<V2i> (tileSize);
+            if (size.x <= 0 || size.y <= 0)
+                throw IEX_NAMESPACE::ArgExc ("Tile sizes must be positive");
+
+            header.setTileDescription (TileDescription (size.x, size.y, ONE_LEVEL));
+            _tiledFile.reset (new TiledOutputFile (fileName.c_str(), header, globalThreadCount()));
+        }
+
+        _dataWindow = dataWindow;
+    }
+
+    Box2i
+    dataWindow () const
+    {
+        return _dataWindow;
+    }
+
+    bool
+    isTiled () const
+    {
+        return bool (_tiledFile);
+    }
+
+    void
+    writePixels (object channels, object buffer)
+    {
+        PyFrameBuffer frameBuffer (dataWindow());
+        frameBuffer.insert (channels, buffer, false);
+        write (frameBuffer);
+    }
+
+    void
+    writePixelsDict (dict buffers)
+    {
+        PyFrameBuffer frameBuffer (dataWindow());
+        frameBuffer.insert (buffers, false);
+        write (frameBuffer);
+    }
+
+    void
+    close ()
+    {
+        PyImath::PyReleaseLock pyunlock;
+        _file.reset();
+        _tiledFile.reset();
+    }
+
+  private:
+
+    void
+    write (const PyFrameBuffer &frameBuffer)
+    {
+        if (!_file && !_tiledFile)
+            throw IEX_NAMESPACE::LogicExc ("The file has been closed");
+
+        PyImath::PyReleaseLock pyunlock;
+
+        if (_tiledFile)
+        {
+            _tiledFile->setFrameBuffer (frameBuffer.frameBuffer());
+            _tiledFile->writeTiles (0, _tiledFile->numXTiles() - 1,
+                                    0, _tiledFile->numYTiles() - 1);
+        }
+        else
+        {
+            _file->setFrameBuffer (frameBuffer.frameBuffer());
+            _file->writePixels (_dataWindow.max.y - _dataWindow.min.y + 1);
+        }
+    }
+
+    boost::shared_ptr<OutputFile>       _file;
+    boost::shared_ptr<TiledOutputFile>  _tiledFile;
+    Box2i                               _dataWindow;
+};
+
+
+void
+register_OutputFile ()
+{
+    class_<PyOutputFile, boost::noncopyable> (
+        "OutputFile",
+        "OutputFile(fileName, dataWindow, channels, compression=ZIP_COMPRESSION,\n"
+        "tileSize=None) -- creates an EXR file with a Box2i data window and a\n"
+        "mapping of channel names to pixel types, made of scan lines, or of\n"
+        "tiles of a V2i size.  The file is complete once all its pixels are\n"
+        "written and it is closed, or goes away.",
+        init<std::string, Box2i, dict, optional<Compression, object> > (
+            (arg ("fileName"), arg ("dataWindow"), arg ("channels"),
+             arg ("compression") = ZIP_COMPRESSION, arg ("tileSize") = object())))
+        .def ("dataWindow", &PyOutputFile::dataWindow,
+              "dataWindow() -- returns the data window of the file as a Box2i")
+        .def ("isTiled", &PyOutputFile::isTiled,
+              "isTiled() -- returns whether the file is made of tiles")
+        .def ("writePixels", &PyOutputFile::writePixels, (arg ("channels"), arg ("buffer")),
+              "writePixels(channels, buffer) -- writes the pixels of one channel, or a\n"
+              "sequence of channels, from a buffer laid out as for InputFile.readPixels\n"
+              "and holding the pixel type of the channels.  All the pixels are written\n"
+              "at once; channels that are not given are written as zero.")
+        .def ("writePixels", &PyOutputFile::writePixelsDict, (arg ("buffers")),
+              "writePixels(buffers) -- writes a mapping of channels to buffers, as above")
+        .def ("close", &PyOutputFile::close,
+              "close() -- completes and closes the file")
+        ;
+}
+
+} // namespace PyImf
@@ -0,0 +1,107 @@
+//
+// SPDX-License-Identifier: BSD-3-Clause
+// Copyright Contributors to the OpenEXR Project.
+//
+
+#include <Python.h>
+#include <boost/python.hpp>
+#include <ImfPixelType.h>
+#include <ImfCompression.h>
+#include <ImfThreading.h>
+#include <ImfMMapIO.h>
+#include <ImfTileCache.h>
+#include "PyImf.h"
+
+using namespace boost::python;
+using namespace OPENEXR_IMF_NAMESPACE;
+
+namespace {
+
+void
+clearTileCacheOf (object fileName)
+{
+    if (fileName.is_none())
+        clearTileCache();
+    else
+        clearTileCache (extract<std::string> (fileName)().c_str());
+}
+
+
+dict
+tileCacheStatsDict ()
+{
+    TileCacheStats stats = tileCacheStats();
+
+    dict d;
+    d["hits"] = stats.hits;
+    d["misses"] = stats.misses;
+    d["numTiles"] = stats.numTiles;
+    d["bytes"] = stats.bytes;
+    return d;
+}
+
+} // namespace
+
+BOOST_PYTHON_MODULE(imf)
+{
+    handle<> imath(PyImport_ImportModule("imath"));
+    if (PyErr_Occurred()) throw_error_already_set();
+    scope().attr("imath") = imath;
+
+    scope().attr("__doc__") = "Reading and writing EXR files into imath and numpy arrays";
+
+    enum_<PixelType>("PixelType")
+        .value("UINT",  UINT)
+        .value("HALF",  HALF)
+        .value("FLOAT", FLOAT)
+        .export_values()
+        ;
+
+    enum_<Compression>("Compression")
+        .value("NO_COMPRESSION",    NO_COMPRESSION)
+        .value("RLE_COMPRESSION",   RLE_COMPRESSION)
+        .value("ZIPS_COMPRESSION",  ZIPS_COMPRESSION)
+        .value("ZIP_COMPRESSION",   ZIP_COMPRESSION)
+        .value("PIZ_COMPRESSION",   PIZ_COMPRESSION)
+        .value("PXR24_COMPRESSION", PXR24_COMPRESSION)
+        .value("B44_COMPRESSION",   B44_COMPRESSION)
+        .value("B44A_COMPRESSION",  B44A_COMPRESSION)
+        .value("DWAA_COMPRESSION",  DWAA_COMPRESSION)
+        .value("DWAB_COMPRESSION",  DWAB_COMPRESSION)
+        .export_values()
+        ;
+
+    def("setGlobalThreadCount", &setGlobalThreadCount, (arg("count")),
+        "setGlobalThreadCount(count) -- sets the number of threads compressing and\n"
+        "decompressing pixels, zero doing it in the calling thread");
+    def("globalThreadCount", &globalThreadCount,
+        "globalThreadCount() -- returns the number of threads compressing and\n"
+        "decompressing pixels");
+    def("setMemoryMappedInput", &setMemoryMappedInput, (arg("enabled")),
+        "setMemoryMappedInput(enabled) -- sets whether the files opened for reading are\n"
+        "memory mapped, sharing their pages with the other processes reading them");
+    def("memoryMappedInput", &memoryMappedInput,
+        "memoryMappedInput() -- returns whether the files opened for reading are\n"
+        "memory mapped");
+    def("setTileCacheSize", &setTileCacheSize, (arg("maxBytes")),
+        "setTileCacheSize(maxBytes) -- sets the number of bytes of decompressed tiles\n"
+        "kept in memory for the tiled files read again, zero disabling the cache");
+    def("tileCacheSize", &tileCacheSize,
+        "tileCacheSize() -- returns the number of bytes of decompressed tiles kept\n"
+        "in memory");
+    def("clearTileCache", &clearTileCacheOf, (arg("fileName")=object()),
+        "clearTileCache(fileName=None) -- discards the cached tiles of the given file,\n"
+        "or of all files; a file rewritten while its tiles are cached must be cleared");
+    def("tileCacheStats", &tileCacheStatsDict,
+        "tileCacheStats() -- returns a dict of the hits and misses of the tile cache\n"
+        "since resetTileCacheStats(), and the numTiles and bytes it holds");
+    def("resetTileCacheStats", &resetTileCacheStats,
+        "resetTileCacheStats() -- resets the hit and miss counts of the tile cache");
+
+    PyImf::register_InputFile();
+    PyImf::register_OutputFile();
+    PyImf::register_FramePrefetcher();
+    PyImf::register_Envmap();
+    PyImf::register_DeepInputFile();
+    PyImf::register_DeepOutputFile();
+}